@@ -9,7 +9,10 @@ import logging
 import tempfile
 import json
 import uuid
+import socket
+from datetime import datetime
 from flask import Flask, request, jsonify, send_file
+from werkzeug.utils import secure_filename
 from flask_cors import CORS
 from dotenv import load_dotenv
 import threading
@@ -69,11 +72,27 @@ except Exception as e:
 from iflow_generator_api import generate_iflow_from_markdown, IFlowGeneratorAPI
 
 # Import the SAP BTP integration module
-from sap_btp_integration import SapBtpIntegration
+from sap_btp_integration import get_sap_btp_client
 
 # Import the direct iFlow deployment module
 from direct_iflow_deployment import DirectIflowDeployment, deploy_iflow
 
+# Import signed job callbacks to the Main API
+from job_callbacks import send_job_event, callbacks_enabled
+from retention import RetentionEngine, RetentionPolicy, remove_path
+from job_store import SharedJobStore, open_job_store
+from llm_clients import reset_clients, warm_clients
+from sap_token_cache import reset_sessions
+
+# Name this service reports itself as in job callbacks
+CALLBACK_SOURCE = 'boomi'
+
+# Import bulk deployment engine
+from bulk_deployment import BulkDeploymentEngine, bulk_item_id
+
+# Import runtime deployment status tracker
+from deployment_status_tracker import get_deployment_tracker
+
 # SAP BTP Integration configuration
 SAP_BTP_TENANT_URL = os.getenv('SAP_BTP_TENANT_URL')
 SAP_BTP_CLIENT_ID = os.getenv('SAP_BTP_CLIENT_ID')
@@ -145,14 +164,63 @@ def load_jobs():
 
 # Function to save jobs to JSON file
 def save_jobs(jobs_dict):
+    if isinstance(jobs_dict, SharedJobStore):
+        return  # Every change is already stored
     try:
         with open(app.config['JOBS_FILE'], 'w') as f:
             json.dump(jobs_dict, f, indent=2)
     except Exception as e:
         logging.error(f"Error saving jobs file: {str(e)}")
 
-# In-memory job storage (initialized from file and periodically saved to file)
-jobs = load_jobs()
+# In-memory job storage (initialized from file and periodically saved to file),
+# or the shared job store when running several worker processes (JOB_STORE=sqlite)
+jobs = open_job_store(app.config['JOBS_FILE'], load_jobs)
+
+def after_fork():
+    """Give a freshly forked worker its own connections and LLM clients (called from gunicorn.conf.py)"""
+    reset_clients()
+    reset_sessions()
+    start_retention()
+    warm_clients()
+
+def is_job_active(job_id):
+    """Jobs still generating or deploying are never cleaned up"""
+    job = jobs.get(job_id)
+    if not job:
+        return False
+    return job.get('status') not in ('completed', 'failed') or job.get('deployment_status') == 'deploying'
+
+def remove_job_data(job_id):
+    """Delete a job's results and uploads and forget the job; returns bytes freed"""
+    freed_bytes = remove_path(os.path.join(app.config['RESULTS_FOLDER'], job_id))
+    freed_bytes += remove_path(os.path.join(app.config['UPLOAD_FOLDER'], job_id))
+    if jobs.pop(job_id, None) is not None:
+        save_jobs(jobs)
+    return freed_bytes
+
+def retention_days(name, default):
+    return float(os.getenv(name, default))
+
+# Old job folders and GenAI debug dumps are removed on a schedule
+retention_engine = RetentionEngine([
+    RetentionPolicy('jobs', root=app.config['RESULTS_FOLDER'], remove=remove_job_data,
+                    is_protected=lambda name: name == 'bulk_deployments' or is_job_active(name),
+                    max_age_days=retention_days('JOB_RETENTION_DAYS', 30)),
+    RetentionPolicy('bulk_deployments', root=os.path.join(app.config['RESULTS_FOLDER'], 'bulk_deployments'),
+                    is_protected=lambda bulk_id: bulk_run_status(bulk_deployments.get(bulk_id, {})) == 'running',
+                    max_age_days=retention_days('JOB_RETENTION_DAYS', 30)),
+    RetentionPolicy('uploads', root=app.config['UPLOAD_FOLDER'], is_protected=is_job_active,
+                    max_age_days=retention_days('UPLOAD_RETENTION_DAYS', 7)),
+    RetentionPolicy('genai_debug', root=os.path.abspath('genai_debug'),
+                    max_age_days=retention_days('DEBUG_RETENTION_DAYS', 7))
+], interval_seconds=retention_days('RETENTION_INTERVAL_SECONDS', 3600))
+
+# Started per worker in after_fork (or before app.run), never at import: a
+# preloading gunicorn master would otherwise sweep with a stale copy of the jobs
+def start_retention():
+    """Start the retention sweeper; of several workers only the holder of the retention lock sweeps"""
+    if os.getenv('RETENTION_ENABLED', 'true').lower() == 'true':
+        retention_engine.start(lock_path=f"{app.config['JOBS_FILE']}.retention.lock")
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -321,6 +389,7 @@ def process_iflow_generation(job_id, markdown_content, iflow_name=None):
             'message': 'Initializing iFlow generator...'
         })
         save_jobs(jobs)  # Save job data to file
+        send_job_event(jobs[job_id], 'status', CALLBACK_SOURCE)
 
         # Update job status
         jobs[job_id].update({
@@ -328,6 +397,7 @@ def process_iflow_generation(job_id, markdown_content, iflow_name=None):
             'message': 'Analyzing markdown and generating iFlow...'
         })
         save_jobs(jobs)  # Save job data to file
+        send_job_event(jobs[job_id], 'status', CALLBACK_SOURCE)
 
         # Generate the iFlow
         if iflow_name is None:
@@ -362,12 +432,14 @@ def process_iflow_generation(job_id, markdown_content, iflow_name=None):
                 'iflow_name': iflow_name
             })
             save_jobs(jobs)  # Save job data to file
+            send_job_event(jobs[job_id], 'status', CALLBACK_SOURCE)
         else:
             jobs[job_id].update({
                 'status': 'failed',
                 'message': result["message"]
             })
             save_jobs(jobs)  # Save job data to file
+            send_job_event(jobs[job_id], 'status', CALLBACK_SOURCE)
 
     except Exception as e:
         logger.error(f"Error generating iFlow: {str(e)}")
@@ -376,6 +448,7 @@ def process_iflow_generation(job_id, markdown_content, iflow_name=None):
             'message': f'Error generating iFlow: {str(e)}'
         })
         save_jobs(jobs)  # Save job data to file
+        send_job_event(jobs[job_id], 'status', CALLBACK_SOURCE)
 
 @app.route('/api/jobs/<job_id>', methods=['GET', 'OPTIONS'])
 @app.route('/api/iflow-generation/<job_id>', methods=['GET', 'OPTIONS'])
@@ -530,6 +603,73 @@ def download_debug_file(job_id, file_name):
         mimetype='text/plain'
     )
 
+def notify_main_api_deployment_status(job_id):
+    """Push the deployment state of a job to the Main API job it was generated for"""
+    job = jobs.get(job_id, {})
+    main_job_id = job.get('original_job_id')
+    if not main_job_id:
+        return
+
+    # Prefer the signed callback channel when it is configured
+    if callbacks_enabled():
+        send_job_event(job, 'deployment', CALLBACK_SOURCE)
+        return
+
+    try:
+        import requests
+        main_api_url = os.getenv('MAIN_API_URL', 'http://localhost:5000')
+        details = dict(job.get('deployment_details') or {})
+        details.setdefault('iflow_name', job.get('iflow_name'))
+        details['runtime_status'] = job.get('runtime_status')
+
+        requests.post(
+            f"{main_api_url}/api/jobs/{main_job_id}/update-deployment-status",
+            json={
+                'deployment_status': job.get('deployment_status'),
+                'deployment_message': job.get('deployment_message', ''),
+                'deployment_details': details
+            },
+            timeout=10
+        )
+    except Exception as e:
+        logger.warning(f"Could not push deployment status of job {job_id} to Main API: {str(e)}")
+
+def track_runtime_status(job_id, sap_client, iflow_id, previous_deployment=None, expected_version=None):
+    """
+    Track the runtime status of a deployed iFlow and record it in the job
+
+    Call this after the job's deployment state is saved, so a fast final status
+    is not overwritten by it.
+
+    Args:
+        job_id (str): Job that deployed the iFlow
+        sap_client (SapBtpIntegration): Client of the target tenant
+        iflow_id (str): ID of the deployed iFlow
+        previous_deployment (dict, optional): Runtime artifact before the deploy
+        expected_version (str, optional): Design time version that was deployed
+    """
+    def on_status(update):
+        if job_id not in jobs:
+            return
+
+        changes = {'runtime_status': update['status']}
+        if update['final']:
+            if update['status'] == 'STARTED':
+                changes['deployment_message'] = 'iFlow deployed and started on the tenant'
+            else:
+                changes['deployment_status'] = 'failed'
+                changes['deployment_message'] = f"iFlow runtime status {update['status']}"
+                if update.get('error'):
+                    changes['runtime_error'] = update['error']
+
+        jobs[job_id].update(changes)
+        save_jobs(jobs)
+
+        if update['final']:
+            notify_main_api_deployment_status(job_id)
+
+    get_deployment_tracker().track(sap_client, iflow_id, on_status, previous_deployment, expected_version)
+
 @app.route('/api/jobs/<job_id>/deploy', methods=['POST', 'OPTIONS'])
 @app.route('/api/iflow-generation/<job_id>/deploy', methods=['POST', 'OPTIONS'])
 def deploy_to_sap(job_id):
@@ -539,7 +679,8 @@ def deploy_to_sap(job_id):
     Request body:
     {
         "package_id": "MyPackage", // Optional, will use default if not provided
-        "description": "My iFlow description" // Optional
+        "description": "My iFlow description", // Optional
+        "force": false // Optional, deploy even if the same content is already deployed
     }
     """
     # Handle OPTIONS request for CORS preflight
@@ -618,31 +759,42 @@ def deploy_to_sap(job_id):
             'deployment_message': 'Deploying to SAP Integration Suite...'
         })
         save_jobs(jobs)  # Save job data to file
+        send_job_event(jobs[job_id], 'deployment', CALLBACK_SOURCE)
 
-        # Initialize SAP BTP integration client
-        sap_client = SapBtpIntegration(
+        # Get the shared SAP BTP integration client (reuses its OAuth token and connections)
+        sap_client = get_sap_btp_client(
             tenant_url=SAP_BTP_TENANT_URL,
             client_id=SAP_BTP_CLIENT_ID,
             client_secret=SAP_BTP_CLIENT_SECRET,
             oauth_url=SAP_BTP_OAUTH_URL
         )
 
-        # Deploy the iFlow
+        # Deploy the iFlow (skipped when the same content is already deployed, unless forced)
         result = sap_client.deploy_integration_flow(
             package_id=package_id,
             iflow_name=iflow_name,
             iflow_zip_path=zip_path,
-            description=description
+            description=description,
+            force=bool(data.get('force', False))
         )
 
         # Update job status
-        jobs[job_id].update({
+        changes = {
             'deployment_status': 'completed',
             'deployment_message': 'Deployment completed successfully',
             'deployment_details': result,
             'iflow_name': iflow_name  # Preserve the iflow_name after deployment
-        })
+        }
+        if not result.get('skipped'):
+            changes['runtime_status'] = 'STARTING'
+        jobs[job_id].update(changes)
         save_jobs(jobs)  # Save job data to file
+        send_job_event(jobs[job_id], 'deployment', CALLBACK_SOURCE)
+
+        # Follow the asynchronous start of the iFlow on the tenant
+        if not result.get('skipped'):
+            track_runtime_status(job_id, sap_client, result['iflow_id'],
+                                 result.get('previous_deployment'), result.get('version'))
 
         return jsonify({
             'status': 'success',
@@ -661,6 +813,7 @@ def deploy_to_sap(job_id):
                 'iflow_name': iflow_name  # Preserve the iflow_name even on failure
             })
             save_jobs(jobs)  # Save job data to file
+            send_job_event(jobs[job_id], 'deployment', CALLBACK_SOURCE)
 
         return jsonify({
             'status': 'error',
@@ -735,7 +888,8 @@ def direct_deploy_to_sap(job_id):
     {
         "package_id": "MyPackage", // Optional, will use default if not provided
         "iflow_id": "MyIFlowId",   // Optional, will use filename without extension if not provided
-        "iflow_name": "My iFlow"   // Optional, will use filename without extension if not provided
+        "iflow_name": "My iFlow",  // Optional, will use filename without extension if not provided
+        "force": false             // Optional, deploy even if the same content is already deployed
     }
 
     Returns:
@@ -874,6 +1028,7 @@ def direct_deploy_to_sap(job_id):
             'deployment_message': 'Deploying to SAP Integration Suite using direct deployment...'
         })
         save_jobs(jobs)  # Save job data to file
+        send_job_event(jobs[job_id], 'deployment', CALLBACK_SOURCE)
 
         # Deploy the iFlow using direct deployment
         logger.info(f"Deploying iFlow using direct deployment: {zip_path}")
@@ -881,7 +1036,8 @@ def direct_deploy_to_sap(job_id):
             iflow_path=zip_path,
             iflow_id=iflow_id,
             iflow_name=iflow_name,
-            package_id=package_id
+            package_id=package_id,
+            force=bool(data.get('force', False))
         )
 
         # Update job status based on deployment result
@@ -893,6 +1049,7 @@ def direct_deploy_to_sap(job_id):
                 'iflow_name': iflow_name  # Preserve the iflow_name after successful deployment
             })
             save_jobs(jobs)  # Save job data to file
+            send_job_event(jobs[job_id], 'deployment', CALLBACK_SOURCE)
         else:
             jobs[job_id].update({
                 'deployment_status': 'failed',
@@ -901,6 +1058,7 @@ def direct_deploy_to_sap(job_id):
                 'iflow_name': iflow_name  # Preserve the iflow_name even on failure
             })
             save_jobs(jobs)  # Save job data to file
+            send_job_event(jobs[job_id], 'deployment', CALLBACK_SOURCE)
 
         # Return the deployment result
         return jsonify(deployment_result), 200 if deployment_result['status'] == 'success' else 500
@@ -916,15 +1074,346 @@ def direct_deploy_to_sap(job_id):
                 'iflow_name': iflow_name  # Preserve the iflow_name even on exception
             })
             save_jobs(jobs)  # Save job data to file
+            send_job_event(jobs[job_id], 'deployment', CALLBACK_SOURCE)
 
         return jsonify({
             'status': 'error',
             'message': f'Error deploying iFlow: {str(e)}'
         }), 500
 
+# Bulk deployment runs in this process, keyed by bulk ID
+# Run status per bulk deployment, shared between workers like the jobs
+bulk_deployments = open_job_store(os.path.join(os.path.dirname(app.config['JOBS_FILE']), 'bulk_deployments.json'), dict)
+bulk_deployments_lock = threading.Lock()
+
+# A running bulk deployment refreshes its heartbeat; once its owner stops doing so it is interrupted
+BULK_HEARTBEAT_SECONDS = float(os.getenv('BULK_HEARTBEAT_SECONDS', '30'))
+BULK_STALE_SECONDS = float(os.getenv('BULK_STALE_SECONDS', str(BULK_HEARTBEAT_SECONDS * 4)))
+
+def bulk_owner():
+    """Identity of the process running a bulk deployment"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def bulk_owner_alive(owner):
+    """False if the owner ran on this host and its process is gone; other hosts are judged by the heartbeat"""
+    host, _, pid = (owner or '').rpartition(':')
+    if host != socket.gethostname() or not pid.isdigit() or os.name == 'nt':
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass  # The process exists but belongs to another user
+    return True
+
+def bulk_run_status(run):
+    """
+    Status of a bulk deployment run
+
+    A run recorded as 'running' whose owner process died or whose heartbeat is
+    older than BULK_STALE_SECONDS is reported as 'interrupted', so it can be
+    resumed and its manifest can be cleaned up.
+    """
+    status = run.get('status')
+    if status != 'running':
+        return status
+    heartbeat = run.get('heartbeat_at') or run.get('started_at')
+    try:
+        stale = (datetime.now() - datetime.fromisoformat(heartbeat)).total_seconds() > BULK_STALE_SECONDS
+    except (TypeError, ValueError):
+        stale = True
+    if stale or not bulk_owner_alive(run.get('owner')):
+        return 'interrupted'
+    return status
+
+def get_bulk_manifest_path(bulk_id):
+    """Get the manifest path of a bulk deployment run"""
+    return os.path.join(app.config['RESULTS_FOLDER'], 'bulk_deployments', bulk_id, 'manifest.json')
+
+def run_bulk_deployment(bulk_id, items=None, upload_workers=4, deploy_workers=2, force=False):
+    """
+    Run a bulk deployment in the background and mirror item results into the jobs
+
+    Args:
+        bulk_id (str): ID of the bulk deployment run
+        items (list, optional): Items to add to the manifest before running
+        upload_workers (int): Number of concurrent uploads
+        deploy_workers (int): Number of concurrent deploy requests
+        force (bool): Deploy items even if their content is unchanged
+    """
+    def on_item_update(item):
+        job_id = item.get('job_id')
+        if not job_id or job_id not in jobs:
+            return
+        if item['status'] == 'deployed':
+            changes = {
+                'deployment_status': 'completed',
+                'deployment_message': 'iFlow unchanged, deployment skipped' if item.get('skipped') else 'Deployment completed successfully',
+                'deployment_details': {
+                    'status': 'success',
+                    'iflow_id': item['iflow_id'],
+                    'package_id': item['package_id'],
+                    'bulk_id': bulk_id,
+                    'skipped': bool(item.get('skipped'))
+                }
+            }
+            if not item.get('skipped'):
+                changes['runtime_status'] = 'STARTING'
+            jobs[job_id].update(changes)
+            save_jobs(jobs)
+
+            # Start tracking only after the job state is saved
+            if not item.get('skipped'):
+                track_runtime_status(job_id, sap_client, item['iflow_id'],
+                                     item.get('previous_deployment'), item.get('version'))
+            return
+        elif item['status'] == 'failed':
+            jobs[job_id].update({
+                'deployment_status': 'failed',
+                'deployment_message': f"Error deploying iFlow: {item.get('error')}"
+            })
+        else:
+            jobs[job_id].update({
+                'deployment_status': 'deploying',
+                'deployment_message': f"Bulk deployment {bulk_id}: {item['status']}"
+            })
+        save_jobs(jobs)
+
+    stop_heartbeat = threading.Event()
+
+    def heartbeat():
+        while not stop_heartbeat.wait(BULK_HEARTBEAT_SECONDS):
+            bulk_deployments[bulk_id]['heartbeat_at'] = datetime.now().isoformat()
+
+    threading.Thread(target=heartbeat, name=f"bulk-heartbeat-{bulk_id[:8]}", daemon=True).start()
+
+    try:
+        sap_client = get_sap_btp_client(
+            tenant_url=SAP_BTP_TENANT_URL,
+            client_id=SAP_BTP_CLIENT_ID,
+            client_secret=SAP_BTP_CLIENT_SECRET,
+            oauth_url=SAP_BTP_OAUTH_URL
+        )
+        engine = BulkDeploymentEngine(
+            sap_client,
+            get_bulk_manifest_path(bulk_id),
+            upload_workers=upload_workers,
+            deploy_workers=deploy_workers,
+            on_item_update=on_item_update,
+            force=force
+        )
+        if items:
+            duplicates = engine.add_items(items)
+            if duplicates:
+                bulk_deployments[bulk_id]['skipped'] = [
+                    {'job_id': spec.get('job_id'), 'reason': f"Duplicate iFlow ID {bulk_item_id(spec)}"}
+                    for spec in duplicates
+                ]
+
+        summary = engine.run()
+        bulk_deployments[bulk_id]['status'] = 'completed' if not summary.get('failed') else 'completed_with_errors'
+        logger.info(f"Bulk deployment {bulk_id} finished: {summary}")
+
+    except Exception as e:
+        logger.error(f"Bulk deployment {bulk_id} failed: {str(e)}")
+        bulk_deployments[bulk_id].update({
+            'status': 'failed',
+            'error': str(e)
+        })
+    finally:
+        stop_heartbeat.set()
+
+def start_bulk_deployment(bulk_id, items=None, upload_workers=4, deploy_workers=2, force=False):
+    """
+    Start a bulk deployment thread unless one is already running for this ID
+
+    Returns:
+        bool: True if a new run was started
+    """
+    with bulk_deployments_lock:
+        current = bulk_deployments.get(bulk_id)
+        if current and bulk_run_status(current) == 'running':
+            return False
+        now = datetime.now().isoformat()
+        bulk_deployments[bulk_id] = {'status': 'running', 'started_at': now, 'heartbeat_at': now, 'owner': bulk_owner()}
+
+    thread = threading.Thread(
+        target=run_bulk_deployment,
+        args=(bulk_id, items, upload_workers, deploy_workers, force)
+    )
+    thread.daemon = True
+    thread.start()
+    return True
+
+@app.route('/api/bulk-deploy', methods=['POST', 'OPTIONS'])
+def bulk_deploy_to_sap():
+    """
+    Deploy the iFlows of many completed jobs to SAP Integration Suite in the background
+
+    Request body:
+    {
+        "job_ids": ["job-1", "job-2"],  // Jobs whose generated iFlows should be deployed
+        "package_id": "MyPackage",      // Optional, will use default if not provided
+        "upload_workers": 4,            // Optional, concurrent uploads
+        "deploy_workers": 2,            // Optional, concurrent deploy requests
+        "force": false                  // Optional, redeploy iFlows whose content is unchanged
+    }
+
+    Returns:
+    {
+        "status": "queued",
+        "bulk_id": "...",
+        "status_url": "/api/bulk-deploy/<bulk_id>",
+        "skipped": [{"job_id": "...", "reason": "..."}]
+    }
+    """
+    # Handle OPTIONS request for CORS preflight
+    if request.method == 'OPTIONS':
+        response = jsonify({'status': 'ok'})
+        response.headers.set('Access-Control-Allow-Origin', cors_origin)
+        response.headers.set('Access-Control-Allow-Headers', 'Content-Type,Authorization')
+        response.headers.set('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
+        response.headers.set('Access-Control-Allow-Credentials', 'true')
+        return response, 200
+
+    if not all([SAP_BTP_TENANT_URL, SAP_BTP_CLIENT_ID, SAP_BTP_CLIENT_SECRET]):
+        return jsonify({
+            'status': 'error',
+            'message': 'SAP BTP credentials not configured'
+        }), 500
+
+    data = request.json or {}
+    job_ids = data.get('job_ids') or []
+    if not job_ids:
+        return jsonify({
+            'status': 'error',
+            'message': 'Missing required parameter: job_ids'
+        }), 400
+
+    package_id = data.get('package_id') or SAP_BTP_DEFAULT_PACKAGE
+    if not package_id:
+        return jsonify({
+            'status': 'error',
+            'message': 'No package ID provided and no default package configured'
+        }), 400
+
+    items = []
+    skipped = []
+    item_jobs = {}  # iFlow ID -> job ID
+    for job_id in job_ids:
+        job = jobs.get(job_id)
+        if not job or job.get('status') != 'completed':
+            skipped.append({'job_id': job_id, 'reason': 'Job not found or not completed'})
+            continue
+        if 'files' not in job or 'zip' not in job['files']:
+            skipped.append({'job_id': job_id, 'reason': 'iFlow ZIP file not available'})
+            continue
+
+        zip_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), job['files']['zip'])
+        if not os.path.exists(zip_path):
+            skipped.append({'job_id': job_id, 'reason': 'iFlow ZIP file not found on server'})
+            continue
+
+        item = {
+            'job_id': job_id,
+            'zip_path': zip_path,
+            'iflow_name': job.get('iflow_name', f"GeneratedIFlow_{job_id[:8]}"),
+            'package_id': package_id,
+            'description': data.get('description')
+        }
+        # One manifest entry per iFlow ID; a second job for the same iFlow would be dropped silently
+        iflow_id = bulk_item_id(item)
+        if iflow_id in item_jobs:
+            skipped.append({'job_id': job_id, 'reason': f"Duplicate iFlow ID {iflow_id} (also generated by job {item_jobs[iflow_id]})"})
+            continue
+        item_jobs[iflow_id] = job_id
+        items.append(item)
+
+    if not items:
+        return jsonify({
+            'status': 'error',
+            'message': 'None of the requested jobs has a deployable iFlow',
+            'skipped': skipped
+        }), 400
+
+    bulk_id = str(uuid.uuid4())
+    start_bulk_deployment(
+        bulk_id,
+        items,
+        upload_workers=int(data.get('upload_workers', 4)),
+        deploy_workers=int(data.get('deploy_workers', 2)),
+        force=bool(data.get('force', False))
+    )
+
+    return jsonify({
+        'status': 'queued',
+        'bulk_id': bulk_id,
+        'items': len(items),
+        'skipped': skipped,
+        'status_url': f'/api/bulk-deploy/{bulk_id}'
+    }), 202
+
+@app.route('/api/bulk-deploy/<bulk_id>', methods=['GET'])
+def get_bulk_deployment(bulk_id):
+    """Get the per-item result manifest of a bulk deployment"""
+    manifest_path = get_bulk_manifest_path(secure_filename(bulk_id))
+    if not os.path.exists(manifest_path):
+        return jsonify({'error': 'Bulk deployment not found'}), 404
+
+    with open(manifest_path, 'r') as f:
+        manifest = json.load(f)
+
+    # Runs that are not tracked (or whose owner stopped) were interrupted unless every item finished
+    summary = manifest.get('summary', {})
+    unfinished = summary.get('pending', 0) + summary.get('uploaded', 0)
+    run = bulk_deployments.get(bulk_id, {})
+
+    return jsonify({
+        'bulk_id': bulk_id,
+        'status': bulk_run_status(run) or ('interrupted' if unfinished else 'completed'),
+        'error': run.get('error'),
+        'skipped': run.get('skipped', []),
+        'summary': summary,
+        'items': list(manifest.get('items', {}).values()),
+        'updated_at': manifest.get('updated_at')
+    })
+
+@app.route('/api/bulk-deploy/<bulk_id>/resume', methods=['POST', 'OPTIONS'])
+def resume_bulk_deployment(bulk_id):
+    """Resume an interrupted bulk deployment, retrying failed and unfinished items"""
+    # Handle OPTIONS request for CORS preflight
+    if request.method == 'OPTIONS':
+        response = jsonify({'status': 'ok'})
+        response.headers.set('Access-Control-Allow-Origin', cors_origin)
+        response.headers.set('Access-Control-Allow-Headers', 'Content-Type,Authorization')
+        response.headers.set('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
+        response.headers.set('Access-Control-Allow-Credentials', 'true')
+        return response, 200
+
+    bulk_id = secure_filename(bulk_id)
+    if not os.path.exists(get_bulk_manifest_path(bulk_id)):
+        return jsonify({'error': 'Bulk deployment not found'}), 404
+
+    data = request.json or {}
+    if not start_bulk_deployment(
+        bulk_id,
+        upload_workers=int(data.get('upload_workers', 4)),
+        deploy_workers=int(data.get('deploy_workers', 2)),
+        force=bool(data.get('force', False))
+    ):
+        return jsonify({'status': 'running', 'bulk_id': bulk_id}), 409
+
+    return jsonify({
+        'status': 'queued',
+        'bulk_id': bulk_id,
+        'status_url': f'/api/bulk-deploy/{bulk_id}'
+    }), 202
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5003))
 
     # Disable auto-reload to prevent interruptions during long-running AI analysis
     # The debug mode was causing restarts every time a ZIP file was generated
+    start_retention()
     app.run(host='0.0.0.0', port=port, debug=False, use_reloader=False)
@@ -0,0 +1,395 @@
+"""
+Bulk deployment engine for pushing many iFlows to one SAP Integration Suite tenant.
+
+Uploads and deploys run as two pipelined worker pools: an iFlow is handed to the
+deploy pool as soon as its upload finishes. All requests to a tenant share one
+adaptive concurrency limiter that backs off when the tenant answers 429/503.
+Per-item progress is written to a JSON manifest, so an interrupted run can be
+resumed without repeating the work that already finished. iFlows whose content
+hash matches the deployment ledger are skipped without contacting the tenant.
+"""
+
+import os
+import json
+import time
+import queue
+import logging
+import threading
+from datetime import datetime
+
+from sap_btp_integration import SapThrottledError
+from deployment_ledger import compute_iflow_hash, get_deployment_ledger, current_version
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Item states recorded in the manifest
+ITEM_PENDING = 'pending'
+ITEM_UPLOADED = 'uploaded'
+ITEM_DEPLOYED = 'deployed'
+ITEM_FAILED = 'failed'
+
+# Seconds to pause a tenant after a throttled request without Retry-After
+DEFAULT_THROTTLE_BACKOFF = 5
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Bounds the requests in flight to one tenant and adapts the bound to throttling
+
+    The limit is halved (down to 1) and the tenant is paused whenever a request is
+    throttled, and grows back by one after a full window of successful requests.
+    """
+
+    def __init__(self, max_limit):
+        """
+        Initialize the limiter
+
+        Args:
+            max_limit (int): Maximum number of requests in flight
+        """
+        self.max_limit = max(1, max_limit)
+        self.limit = self.max_limit
+        self.in_flight = 0
+        self.resume_at = 0
+        self.successes = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """Wait for a free slot and for any throttling pause to end"""
+        with self._condition:
+            while True:
+                pause = self.resume_at - time.time()
+                if pause > 0:
+                    self._condition.wait(pause)
+                elif self.in_flight < self.limit:
+                    self.in_flight += 1
+                    return
+                else:
+                    self._condition.wait()
+
+    def release(self, throttled=False, retry_after=None):
+        """
+        Return a slot and adapt the limit
+
+        Args:
+            throttled (bool): Whether the request was throttled by the tenant
+            retry_after (float, optional): Pause requested by the tenant in seconds
+        """
+        with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(1, self.limit // 2)
+                self.successes = 0
+                self.resume_at = max(self.resume_at, time.time() + (retry_after or DEFAULT_THROTTLE_BACKOFF))
+                logger.warning(f"Tenant throttled, concurrency limit lowered to {self.limit}")
+            else:
+                self.successes += 1
+                if self.limit < self.max_limit and self.successes >= self.limit:
+                    self.limit += 1
+                    self.successes = 0
+            self._condition.notify_all()
+
+def bulk_item_id(spec):
+    """iFlow ID of a bulk item: its iflow_id, or the iFlow name with spaces replaced"""
+    return spec.get('iflow_id') or spec['iflow_name'].replace(' ', '_')
+
+# One limiter per tenant, shared by every bulk run against it in this worker process
+# (with WEB_CONCURRENCY>1 each worker adapts its own limit)
+_tenant_limiters = {}
+_tenant_limiters_lock = threading.Lock()
+
+def get_tenant_limiter(tenant_url, max_limit):
+    """
+    Get the shared concurrency limiter for a tenant
+
+    Args:
+        tenant_url (str): Tenant URL
+        max_limit (int): Maximum number of requests in flight, used when the limiter is created
+
+    Returns:
+        AdaptiveConcurrencyLimiter: Limiter for the tenant
+    """
+    with _tenant_limiters_lock:
+        limiter = _tenant_limiters.get(tenant_url)
+        if limiter is None:
+            limiter = AdaptiveConcurrencyLimiter(max_limit)
+            _tenant_limiters[tenant_url] = limiter
+        return limiter
+
+class BulkDeploymentEngine:
+    """
+    Deploys a list of iFlow ZIPs with pipelined upload and deploy phases
+    """
+
+    def __init__(self, sap_client, manifest_path, upload_workers=4, deploy_workers=2,
+                 max_attempts=5, on_item_update=None, force=False):
+        """
+        Initialize the bulk deployment engine
+
+        Args:
+            sap_client (SapBtpIntegration): Client for the target tenant
+            manifest_path (str): Path of the JSON manifest recording per-item progress
+            upload_workers (int): Number of concurrent uploads
+            deploy_workers (int): Number of concurrent deploy requests
+            max_attempts (int): Attempts per phase before a throttled item is marked failed
+            on_item_update (callable, optional): Called with each item dict after it changes state
+            force (bool): Deploy items even if the ledger shows their content unchanged
+        """
+        self.sap_client = sap_client
+        self.manifest_path = manifest_path
+        self.upload_workers = max(1, upload_workers)
+        self.deploy_workers = max(1, deploy_workers)
+        self.max_attempts = max_attempts
+        self.on_item_update = on_item_update
+        self.force = force
+        self.ledger = get_deployment_ledger()
+
+        self.limiter = get_tenant_limiter(sap_client.tenant_url, self.upload_workers + self.deploy_workers)
+        self.manifest = self.load_manifest()
+
+        self._lock = threading.Lock()
+        self._upload_queue = queue.Queue()
+        self._deploy_queue = queue.Queue()
+        self._remaining = 0
+        self._done = threading.Event()
+
+    def load_manifest(self):
+        """
+        Load the manifest of a previous run, or start a new one
+
+        Returns:
+            dict: Manifest with an 'items' dict keyed by iFlow ID
+        """
+        if os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path, 'r') as f:
+                    return json.load(f)
+            except json.JSONDecodeError:
+                logger.error(f"Error loading manifest {self.manifest_path}. Starting a new one.")
+
+        return {
+            'tenant_url': self.sap_client.tenant_url,
+            'created_at': datetime.now().isoformat(),
+            'items': {}
+        }
+
+    def save_manifest(self):
+        """Write the manifest atomically"""
+        with self._lock:
+            self.manifest['updated_at'] = datetime.now().isoformat()
+            self.manifest['summary'] = self._summary()
+            os.makedirs(os.path.dirname(os.path.abspath(self.manifest_path)), exist_ok=True)
+            tmp_path = f"{self.manifest_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.manifest, f, indent=2)
+            os.replace(tmp_path, self.manifest_path)
+
+    def _summary(self):
+        """Count items per state"""
+        summary = {ITEM_PENDING: 0, ITEM_UPLOADED: 0, ITEM_DEPLOYED: 0, ITEM_FAILED: 0, 'unchanged': 0}
+        for item in self.manifest['items'].values():
+            summary[item['status']] = summary.get(item['status'], 0) + 1
+            if item.get('skipped'):
+                summary['unchanged'] += 1
+        summary['total'] = len(self.manifest['items'])
+        return summary
+
+    def add_items(self, items):
+        """
+        Add iFlows to the manifest
+
+        Items already in the manifest keep their recorded progress.
+
+        Args:
+            items (list): Dicts with zip_path, iflow_name, package_id and optionally
+                iflow_id, description and job_id
+
+        Returns:
+            list: Specs that were not added because their iFlow ID is already in the manifest
+        """
+        duplicates = []
+        with self._lock:
+            for spec in items:
+                iflow_id = bulk_item_id(spec)
+                if iflow_id in self.manifest['items']:
+                    duplicates.append(spec)
+                    continue
+                self.manifest['items'][iflow_id] = {
+                    'iflow_id': iflow_id,
+                    'iflow_name': spec['iflow_name'],
+                    'zip_path': spec['zip_path'],
+                    'package_id': spec['package_id'],
+                    'description': spec.get('description'),
+                    'job_id': spec.get('job_id'),
+                    'status': ITEM_PENDING,
+                    'attempts': 0,
+                    'error': None
+                }
+        self.save_manifest()
+        if duplicates:
+            logger.warning(f"Bulk deployment: {len(duplicates)} item(s) not added, their iFlow ID is already in the manifest")
+        return duplicates
+
+    def run(self):
+        """
+        Deploy every item that has not been deployed yet and wait for completion
+
+        Failed items from a previous run are retried.
+
+        Returns:
+            dict: Summary counts per state
+        """
+        with self._lock:
+            for item in self.manifest['items'].values():
+                if item['status'] == ITEM_DEPLOYED:
+                    continue
+                if item['status'] == ITEM_FAILED:
+                    item['status'] = ITEM_UPLOADED if item.get('uploaded_at') else ITEM_PENDING
+                    item['error'] = None
+                item['attempts'] = 0
+                self._remaining += 1
+                if item['status'] == ITEM_UPLOADED:
+                    self._deploy_queue.put(item)
+                else:
+                    self._upload_queue.put(item)
+
+        if not self._remaining:
+            logger.info("Bulk deployment: nothing left to deploy")
+            return self._summary()
+
+        logger.info(f"Bulk deployment of {self._remaining} iFlows to {self.sap_client.tenant_url}")
+
+        workers = []
+        for _ in range(self.upload_workers):
+            workers.append(threading.Thread(target=self._worker, args=(self._upload_queue, self._upload), daemon=True))
+        for _ in range(self.deploy_workers):
+            workers.append(threading.Thread(target=self._worker, args=(self._deploy_queue, self._deploy), daemon=True))
+        for worker in workers:
+            worker.start()
+
+        self._done.wait()
+
+        # Release the idle workers
+        for _ in range(self.upload_workers):
+            self._upload_queue.put(None)
+        for _ in range(self.deploy_workers):
+            self._deploy_queue.put(None)
+        for worker in workers:
+            worker.join()
+
+        self.save_manifest()
+        return self._summary()
+
+    def _worker(self, work_queue, handler):
+        """Process items from one phase queue until a stop sentinel arrives"""
+        while True:
+            item = work_queue.get()
+            if item is None:
+                return
+            try:
+                handler(item)
+            except Exception as e:
+                # An unexpected error (e.g. a tenant call outside _call) must still finish the item
+                logger.error(f"Bulk deployment of {item['iflow_id']} failed: {str(e)}")
+                try:
+                    self._update(item, status=ITEM_FAILED, error=str(e))
+                finally:
+                    self._finish_item()
+
+    def _upload(self, item):
+        """Upload one iFlow, then hand it to the deploy phase"""
+        try:
+            content_hash = compute_iflow_hash(item['zip_path'])
+        except Exception as e:
+            self._update(item, status=ITEM_FAILED, error=f"Cannot read iFlow ZIP: {str(e)}")
+            self._finish_item()
+            return
+
+        if not self.force and self.ledger.is_unchanged(self.sap_client.tenant_url, item['iflow_id'], content_hash,
+                                                       lambda: self.sap_client.get_artifact_state(item['iflow_id'])):
+            self._update(item, status=ITEM_DEPLOYED, skipped=True, content_hash=content_hash,
+                         deployed_at=datetime.now().isoformat())
+            self._finish_item()
+            return
+
+        with self._lock:
+            item['content_hash'] = content_hash
+            item['skipped'] = False
+
+        if self._call(item, self.sap_client.upload_integration_flow,
+                      item['package_id'], item['iflow_name'], item['zip_path'],
+                      item['iflow_id'], item.get('description')):
+            self._update(item, status=ITEM_UPLOADED, attempts=0, uploaded_at=datetime.now().isoformat())
+            self._deploy_queue.put(item)
+
+    def _deploy(self, item):
+        """Deploy one uploaded iFlow"""
+        deployment = {}
+
+        def deploy():
+            deployment['previous'] = self.sap_client.deploy_uploaded_flow(item['iflow_id'])
+
+        if self._call(item, deploy):
+            version = current_version(self.sap_client._request, self.sap_client.api_base, item['iflow_id'])
+            if item.get('content_hash'):
+                self.ledger.record(self.sap_client.tenant_url, item['iflow_id'], item['content_hash'],
+                                   version=version, package_id=item['package_id'])
+            # The previous runtime deployment and the new version let the runtime
+            # status tracker ignore a status left over from before this deploy
+            self._update(item, status=ITEM_DEPLOYED, deployed_at=datetime.now().isoformat(),
+                         version=version, previous_deployment=deployment.get('previous'))
+            self._finish_item()
+
+    def _call(self, item, func, *args):
+        """
+        Run one phase of an item under the tenant limiter
+
+        Throttled calls are requeued until max_attempts is reached; other errors
+        fail the item.
+
+        Returns:
+            bool: True if the call succeeded
+        """
+        self.limiter.acquire()
+        try:
+            func(*args)
+        except SapThrottledError as e:
+            self.limiter.release(throttled=True, retry_after=e.retry_after)
+            attempts = item['attempts'] + 1
+            if attempts < self.max_attempts:
+                self._update(item, attempts=attempts)
+                queue_for_phase = self._deploy_queue if item['status'] == ITEM_UPLOADED else self._upload_queue
+                queue_for_phase.put(item)
+            else:
+                self._update(item, status=ITEM_FAILED, attempts=attempts, error=str(e))
+                self._finish_item()
+            return False
+        except Exception as e:
+            self.limiter.release()
+            logger.error(f"Bulk deployment of {item['iflow_id']} failed: {str(e)}")
+            self._update(item, status=ITEM_FAILED, error=str(e))
+            self._finish_item()
+            return False
+
+        self.limiter.release()
+        return True
+
+    def _update(self, item, **changes):
+        """Apply changes to an item, persist the manifest and notify the listener"""
+        with self._lock:
+            item.update(changes)
+        self.save_manifest()
+
+        if self.on_item_update:
+            try:
+                self.on_item_update(dict(item))
+            except Exception as e:
+                logger.error(f"Error in bulk deployment progress callback: {str(e)}")
+
+    def _finish_item(self):
+        """Mark one item as terminal and signal completion after the last one"""
+        with self._lock:
+            self._remaining -= 1
+            if self._remaining <= 0:
+                self._done.set()
@@ -0,0 +1,314 @@
+"""
+Deployment ledger recording what content was last deployed to each tenant.
+
+Entries are keyed by (tenant, iFlow ID) and hold a normalized content hash of the
+iFlow ZIP. The hash ignores ZIP entry timestamps and the build timestamps written
+into MANIFEST.MF and .prop files, so regenerating an unchanged iFlow produces the
+same hash and its upload and deploy can be skipped.
+
+A matching hash alone is not trusted: before a deployment is skipped the
+tenant's design time and runtime artifacts are read (fetch_artifact_state), and
+the entry is forgotten if the iFlow was deleted, undeployed, edited or
+redeployed on the tenant since it was recorded.
+"""
+
+import os
+import json
+import sqlite3
+import hashlib
+import logging
+import threading
+import zipfile
+from datetime import datetime
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# MANIFEST.MF headers that change on every build without changing the iFlow
+VOLATILE_MANIFEST_HEADERS = ('Bnd-LastModified', 'Created-By', 'Build-Jdk', 'Built-By', 'Build-Date')
+
+DEFAULT_LEDGER_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'deployment_ledger.sqlite3')
+
+# Runtime states in which a recorded deployment still counts as deployed
+RUNNING_STATUSES = ('STARTED', 'STARTING')
+
+def _normalize_manifest(content):
+    """Drop volatile headers (and their continuation lines) from a MANIFEST.MF"""
+    lines = []
+    skipping = False
+    for line in content.decode('utf-8', 'ignore').splitlines():
+        if line.startswith(' ') and skipping:
+            continue
+        skipping = line.split(':', 1)[0] in VOLATILE_MANIFEST_HEADERS
+        if not skipping:
+            lines.append(line.rstrip())
+    return '\n'.join(lines).encode('utf-8')
+
+def _normalize_properties(content):
+    """Drop comment lines, which hold the timestamp java.util.Properties writes"""
+    lines = [
+        line.rstrip() for line in content.decode('utf-8', 'ignore').splitlines()
+        if not line.lstrip().startswith(('#', '!'))
+    ]
+    return '\n'.join(lines).encode('utf-8')
+
+def compute_iflow_hash(zip_path):
+    """
+    Compute a normalized content hash of an iFlow ZIP
+
+    Entries are hashed in name order by name and content only, so ZIP entry
+    timestamps and ordering do not affect the result.
+
+    Args:
+        zip_path (str): Path to the iFlow ZIP file
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    digest = hashlib.sha256()
+
+    with zipfile.ZipFile(zip_path, 'r') as zf:
+        for name in sorted(info.filename for info in zf.infolist() if not info.is_dir()):
+            content = zf.read(name)
+            if name.endswith('MANIFEST.MF'):
+                content = _normalize_manifest(content)
+            elif name.endswith(('.prop', '.properties')):
+                content = _normalize_properties(content)
+
+            digest.update(name.encode('utf-8'))
+            digest.update(b'\0')
+            digest.update(hashlib.sha256(content).digest())
+
+    return digest.hexdigest()
+
+def fetch_artifact_state(request, api_base, iflow_id, runtime=True):
+    """
+    Read the tenant's current design time and (optionally) runtime artifact of an iFlow
+
+    Args:
+        request (callable): Authenticated request function, request(method, url, **kwargs) -> Response
+        api_base (str): Tenant API base URL ending in /api/v1
+        iflow_id (str): iFlow ID
+        runtime (bool): Also read the runtime artifact
+
+    Returns:
+        dict: designtime_version and, with runtime, runtime_version, runtime_status
+            and deployed_on; None where the tenant has no such artifact
+
+    Raises:
+        Exception: If the tenant answers with anything but 200 or 404
+    """
+    def read_entity(url):
+        response = request('GET', url, params={'$format': 'json'}, timeout=30)
+        if response.status_code == 404:
+            return None
+        if response.status_code != 200:
+            raise Exception(f"Failed to read {url}: {response.status_code}")
+        return response.json().get('d', {})
+
+    designtime = read_entity(f"{api_base}/IntegrationDesigntimeArtifacts(Id='{iflow_id}',Version='active')")
+    state = {'designtime_version': designtime.get('Version') if designtime else None}
+
+    if runtime:
+        artifact = read_entity(f"{api_base}/IntegrationRuntimeArtifacts('{iflow_id}')") or {}
+        state.update({
+            'runtime_version': artifact.get('Version'),
+            'runtime_status': artifact.get('Status'),
+            'deployed_on': artifact.get('DeployedOn')
+        })
+
+    return state
+
+def current_version(request, api_base, iflow_id):
+    """
+    Design time version of an iFlow on the tenant, recorded with a deployment
+
+    Returns:
+        str: Version, or None if it could not be read
+    """
+    try:
+        return fetch_artifact_state(request, api_base, iflow_id, runtime=False)['designtime_version']
+    except Exception as e:
+        logger.warning(f"Could not read the version of {iflow_id}: {str(e)}")
+        return None
+
+class DeploymentLedger:
+    """
+    Map of (tenant, iFlow ID) to the last deployed content hash
+
+    Entries are kept in a SQLite file shared by the worker processes of the
+    service. Every change is a single statement or a short write transaction,
+    so workers never overwrite each other's entries.
+    """
+
+    def __init__(self, ledger_file=DEFAULT_LEDGER_FILE, timeout=30):
+        """
+        Initialize the ledger
+
+        Args:
+            ledger_file (str): Path of the SQLite file backing the ledger
+            timeout (float): Seconds to wait for a lock held by another process
+        """
+        self.ledger_file = ledger_file
+        self.timeout = timeout
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(os.path.abspath(ledger_file)), exist_ok=True)
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS deployments (key TEXT PRIMARY KEY, entry TEXT NOT NULL)"
+        )
+
+    @staticmethod
+    def _key(tenant, iflow_id):
+        return f"{tenant.rstrip('/')}|{iflow_id}"
+
+    def _connection(self):
+        """One connection per thread and process; connections are never inherited across fork"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.ledger_file, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, tenant, iflow_id):
+        """
+        Get the ledger entry of an iFlow on a tenant
+
+        Returns:
+            dict: Entry with content_hash and deployed_at, or None
+        """
+        row = self._connection().execute(
+            "SELECT entry FROM deployments WHERE key = ?", (self._key(tenant, iflow_id),)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def is_unchanged(self, tenant, iflow_id, content_hash, artifact_state=None):
+        """
+        Check whether this exact content is already deployed
+
+        Args:
+            tenant (str): Tenant URL
+            iflow_id (str): iFlow ID
+            content_hash (str): Normalized content hash of the ZIP to deploy
+            artifact_state (callable, optional): Returns the tenant's current artifact
+                state (see fetch_artifact_state). Called only when the hashes match;
+                if the tenant no longer has what was recorded, the entry is forgotten.
+
+        Returns:
+            bool: True if the deployment can be skipped
+        """
+        entry = self.get(tenant, iflow_id)
+        if not entry or entry.get('content_hash') != content_hash:
+            return False
+        if artifact_state is None:
+            return True
+
+        try:
+            state = artifact_state()
+        except Exception as e:
+            logger.warning(f"Could not check {iflow_id} on {tenant}, deploying it again: {str(e)}")
+            return False
+
+        reason = self._mismatch(entry, state)
+        if reason:
+            logger.info(f"iFlow {iflow_id} {reason} on {tenant}; forgetting its ledger entry")
+            self.forget(tenant, iflow_id)
+            return False
+
+        self._pin(tenant, iflow_id, content_hash, state)
+        return True
+
+    @staticmethod
+    def _mismatch(entry, state):
+        """Why the tenant no longer has the recorded deployment, or None if it still does"""
+        version = state.get('designtime_version')
+        if version is None:
+            return "no longer exists in the design time workspace"
+        if entry.get('version') and entry['version'] != version:
+            return f"was changed (version {entry['version']} -> {version})"
+
+        if not entry.get('runtime', True):
+            return None
+
+        status = state.get('runtime_status')
+        if status is None:
+            return "is not deployed"
+        if status not in RUNNING_STATUSES:
+            return f"has runtime status {status}"
+        if state.get('runtime_version') and state['runtime_version'] != version:
+            return f"runs version {state['runtime_version']} instead of {version}"
+        if entry.get('deployed_on') and state.get('deployed_on') and entry['deployed_on'] != state['deployed_on']:
+            return "was redeployed"
+        return None
+
+    def _pin(self, tenant, iflow_id, content_hash, state):
+        """Remember the version and runtime deployment first seen for an entry, to detect later changes"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT entry FROM deployments WHERE key = ?", (self._key(tenant, iflow_id),)).fetchone()
+            entry = json.loads(row[0]) if row else None
+            if entry and entry.get('content_hash') == content_hash:
+                pinned = dict(entry)
+                pinned.setdefault('version', state.get('designtime_version'))
+                if pinned.get('runtime', True) and state.get('runtime_status') == 'STARTED':
+                    pinned.setdefault('deployed_on', state.get('deployed_on'))
+                if pinned != entry:
+                    conn.execute(
+                        "UPDATE deployments SET entry = ? WHERE key = ?",
+                        (json.dumps(pinned), self._key(tenant, iflow_id))
+                    )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def record(self, tenant, iflow_id, content_hash, version=None, runtime=True, **details):
+        """
+        Record a successful deployment
+
+        Args:
+            tenant (str): Tenant URL
+            iflow_id (str): iFlow ID
+            content_hash (str): Normalized content hash of the deployed ZIP
+            version (str, optional): Design time version on the tenant after the upload
+            runtime (bool): The iFlow was deployed to the runtime, not only uploaded
+            **details: Extra fields stored with the entry, e.g. package_id
+        """
+        entry = {
+            'content_hash': content_hash,
+            'deployed_at': datetime.now().isoformat(),
+            'runtime': runtime,
+            **details
+        }
+        if version:
+            entry['version'] = version
+        self._connection().execute(
+            "INSERT OR REPLACE INTO deployments (key, entry) VALUES (?, ?)",
+            (self._key(tenant, iflow_id), json.dumps(entry))
+        )
+
+    def forget(self, tenant, iflow_id):
+        """Drop the entry of an iFlow, forcing its next deployment"""
+        self._connection().execute("DELETE FROM deployments WHERE key = ?", (self._key(tenant, iflow_id),))
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+def get_deployment_ledger():
+    """
+    Get the process-wide deployment ledger
+
+    The file location can be overridden with DEPLOYMENT_LEDGER_FILE.
+
+    Returns:
+        DeploymentLedger: Ledger instance
+    """
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = DeploymentLedger(os.getenv('DEPLOYMENT_LEDGER_FILE', DEFAULT_LEDGER_FILE))
+        return _ledger
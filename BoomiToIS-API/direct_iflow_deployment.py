@@ -4,7 +4,6 @@ This module uses a direct API approach to deploy iFlows to SAP Integration Suite
 """
 
 import os
-import requests
 import base64
 import json
 import time
@@ -13,6 +12,9 @@ import logging
 from datetime import datetime
 from dotenv import load_dotenv
 
+from sap_token_cache import token_cache, authorized_request
+from deployment_ledger import compute_iflow_hash, get_deployment_ledger, fetch_artifact_state, current_version
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -60,7 +62,31 @@ class DirectIflowDeployment:
         # Force output to be displayed immediately
         sys.stdout.flush()
 
-    def deploy_iflow(self, iflow_path, iflow_id=None, iflow_name=None, package_id="ConversionPackages"):
+    def _request(self, method, url, headers=None, **kwargs):
+        """
+        Send a request with the cached OAuth token over the pooled session
+        
+        Args:
+            method (str): HTTP method
+            url (str): Request URL
+            headers (dict, optional): Extra request headers
+            **kwargs: Passed to requests
+            
+        Returns:
+            requests.Response: The response
+        """
+        return authorized_request(
+            method,
+            url,
+            self.token_url,
+            self.client_id,
+            self.client_secret,
+            credentials_in_body=True,
+            headers=headers,
+            **kwargs
+        )
+
+    def deploy_iflow(self, iflow_path, iflow_id=None, iflow_name=None, package_id="ConversionPackages", force=False):
         """
         Deploy an iFlow to SAP Integration Suite
         
@@ -69,6 +95,7 @@ class DirectIflowDeployment:
             iflow_id (str, optional): Technical ID for the iFlow. If None, derived from filename
             iflow_name (str, optional): Display name for the iFlow. If None, derived from filename
             package_id (str, optional): ID of the package where the iFlow will be deployed
+            force (bool, optional): Deploy even if the same content is already deployed
             
         Returns:
             dict: Deployment result with status and message
@@ -93,25 +120,34 @@ class DirectIflowDeployment:
         self.log(f"Found iFlow file: {iflow_path} ({file_size} bytes)")
         
         try:
-            # Step 1: Get OAuth token using WORKING method
+            # Skip the upload when this exact content is already deployed to the tenant
+            ledger = get_deployment_ledger()
+            content_hash = compute_iflow_hash(iflow_path)
+            # This client only uploads the design time artifact, so only that is checked
+            api_base = f"{self.base_url}/api/v1"
+            if not force and ledger.is_unchanged(
+                self.base_url, iflow_id, content_hash,
+                lambda: fetch_artifact_state(self._request, api_base, iflow_id, runtime=False)
+            ):
+                self.log(f"iFlow {iflow_id} is unchanged, skipping deployment")
+                return {
+                    "status": "success",
+                    "message": "iFlow unchanged, deployment skipped",
+                    "iflow_id": iflow_id,
+                    "package_id": package_id,
+                    "iflow_name": iflow_name,
+                    "skipped": True
+                }
+
+            # Step 1: Get OAuth token (reused from the process-wide cache when still valid)
             self.log("Getting OAuth token...")
-            response = requests.post(
-                self.token_url,
-                data={
-                    "grant_type": "client_credentials",
-                    "client_id": self.client_id,
-                    "client_secret": self.client_secret
-                },
-                headers={"Content-Type": "application/x-www-form-urlencoded"},
-                timeout=30
-            )
-
-            if response.status_code != 200:
-                error_msg = f"OAuth failed: {response.status_code} - {response.text}"
+            try:
+                token_cache.get_token(self.token_url, self.client_id, self.client_secret, credentials_in_body=True)
+            except Exception as e:
+                error_msg = f"OAuth failed: {str(e)}"
                 self.log(error_msg)
                 return {"status": "error", "message": error_msg}
 
-            oauth_token = response.json()["access_token"]
             self.log("✅ OAuth token obtained")
 
             # Step 2: Read and encode iFlow file using WORKING method
@@ -133,19 +169,20 @@ class DirectIflowDeployment:
             # Step 4: Deploy with WORKING headers (Bearer + Minimal)
             self.log("Deploying with working headers...")
             headers = {
-                "Authorization": f"Bearer {oauth_token}",
                 "Content-Type": "application/json"
             }
 
             url = f"{self.base_url}/api/v1/IntegrationDesigntimeArtifacts"
             self.log(f"POST to: {url}")
 
-            response = requests.post(url, headers=headers, json=payload, timeout=120)
+            response = self._request("POST", url, headers=headers, json=payload, timeout=120)
 
             self.log(f"Response status: {response.status_code}")
 
             if response.status_code in [200, 201, 202]:
                 self.log("✅ Deployment successful!")
+                ledger.record(self.base_url, iflow_id, content_hash, runtime=False,
+                              version=current_version(self._request, api_base, iflow_id), package_id=package_id)
 
                 return {
                     "status": "success",
@@ -171,7 +208,7 @@ class DirectIflowDeployment:
             return {"status": "error", "message": error_msg}
 
 # Function to deploy an iFlow directly
-def deploy_iflow(iflow_path, iflow_id=None, iflow_name=None, package_id="ConversionPackages"):
+def deploy_iflow(iflow_path, iflow_id=None, iflow_name=None, package_id="ConversionPackages", force=False):
     """
     Deploy an iFlow to SAP Integration Suite
     
@@ -180,12 +217,13 @@ def deploy_iflow(iflow_path, iflow_id=None, iflow_name=None, package_id="Convers
         iflow_id (str, optional): Technical ID for the iFlow. If None, derived from filename
         iflow_name (str, optional): Display name for the iFlow. If None, derived from filename
         package_id (str, optional): ID of the package where the iFlow will be deployed
+        force (bool, optional): Deploy even if the same content is already deployed
         
     Returns:
         dict: Deployment result with status and message
     """
     deployment = DirectIflowDeployment()
-    return deployment.deploy_iflow(iflow_path, iflow_id, iflow_name, package_id)
+    return deployment.deploy_iflow(iflow_path, iflow_id, iflow_name, package_id, force)
 
 # Test function
 def test_deploy_iflow():
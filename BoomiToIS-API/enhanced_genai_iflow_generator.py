@@ -55,8 +55,8 @@ class EnhancedGenAIIFlowGenerator:
         # Initialize Anthropic if needed
         elif provider == "claude" and api_key:
             try:
-                import anthropic
-                self.anthropic_client = anthropic.Anthropic(api_key=api_key)
+                from llm_clients import get_anthropic_client
+                self.anthropic_client = get_anthropic_client(api_key)
             except ImportError:
                 print("Anthropic package not found. Please install it with 'pip install anthropic'")
                 self.provider = "local"
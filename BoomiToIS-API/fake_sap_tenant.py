@@ -0,0 +1,315 @@
+"""
+Local fake SAP Integration Suite tenant for exercising the deployment clients offline.
+
+Implements the OAuth client-credentials token endpoint and the subset of the
+Integration Content API used by SapBtpIntegration, DirectIflowDeployment and the
+CI/CD scripts. Tokens expire after --token-ttl seconds and requests can be
+throttled with 429 responses, so token reuse, refresh and retry paths can be
+observed through the /_fake/stats endpoint.
+
+Usage:
+    python fake_sap_tenant.py --port 8089 --token-ttl 120
+
+    SAP_BTP_TENANT_URL=http://localhost:8089
+    SAP_BTP_OAUTH_URL=http://localhost:8089/oauth/token
+"""
+
+import argparse
+import base64
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, unquote
+
+ARTIFACT_KEY_PATTERN = re.compile(r"IntegrationDesigntimeArtifacts\(Id='([^']+)',Version='([^']+)'\)(/.*)?$")
+RUNTIME_KEY_PATTERN = re.compile(r"IntegrationRuntimeArtifacts\('([^']+)'\)$")
+
+class FakeSapTenant:
+    """
+    In-memory SAP Integration Suite tenant served over HTTP
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, token_ttl=3600, throttle_rate=0.0, deploy_delay=1.0):
+        """
+        Initialize the fake tenant
+
+        Args:
+            host (str): Interface to bind
+            port (int): Port to bind, 0 picks a free port
+            token_ttl (int): Lifetime of issued access tokens in seconds
+            throttle_rate (float): Fraction of API requests answered with 429
+            deploy_delay (float): Seconds a deployed artifact stays in STARTING
+        """
+        self.token_ttl = token_ttl
+        self.throttle_rate = throttle_rate
+        self.deploy_delay = deploy_delay
+
+        self.lock = threading.Lock()
+        self.tokens = {}  # access_token -> expires_at
+        self.packages = {'ConversionPackages': {'Id': 'ConversionPackages', 'Name': 'ConversionPackages'}}
+        self.artifacts = {}  # iflow_id -> metadata dict with 'content' bytes
+        self.runtime = {}  # iflow_id -> {'Status': ..., 'ready_at': ...}
+        self.stats = {'token_requests': 0, 'api_requests': 0, 'unauthorized': 0, 'throttled': 0, 'connections': 0}
+
+        self.server = ThreadingHTTPServer((host, port), self._make_handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        """Base URL of the running tenant"""
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def token_url(self):
+        """OAuth token URL of the running tenant"""
+        return f"{self.base_url}/oauth/token"
+
+    def start(self):
+        """Serve in a background thread and return the base URL"""
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        """Stop serving"""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def issue_token(self):
+        """Create a new access token"""
+        access_token = uuid.uuid4().hex
+        with self.lock:
+            self.stats['token_requests'] += 1
+            self.tokens[access_token] = time.time() + self.token_ttl
+        return access_token
+
+    def is_valid_token(self, authorization):
+        """Check a Bearer authorization header"""
+        if not authorization or not authorization.startswith('Bearer '):
+            return False
+        with self.lock:
+            expires_at = self.tokens.get(authorization[len('Bearer '):])
+        return bool(expires_at and expires_at > time.time())
+
+    def runtime_status(self, iflow_id):
+        """Get the runtime entry of an artifact, advancing STARTING to STARTED"""
+        with self.lock:
+            entry = self.runtime.get(iflow_id)
+            if entry and entry['Status'] == 'STARTING' and entry['ready_at'] <= time.time():
+                entry['Status'] = 'STARTED'
+            return dict(entry) if entry else None
+
+    def deploy(self, iflow_id):
+        """Start the runtime deployment of an artifact"""
+        with self.lock:
+            if iflow_id not in self.artifacts:
+                return False
+            self.runtime[iflow_id] = {
+                'Id': iflow_id,
+                'Version': self.artifacts[iflow_id].get('Version', 'active'),
+                'Name': self.artifacts[iflow_id].get('Name', iflow_id),
+                'Type': 'INTEGRATION_FLOW',
+                'Status': 'STARTING',
+                'ready_at': time.time() + self.deploy_delay
+            }
+            return True
+
+    def _make_handler(self):
+        tenant = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                with tenant.lock:
+                    tenant.stats['connections'] += 1
+
+            def log_message(self, format, *args):
+                pass
+
+            def _read_body(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                return self.rfile.read(length) if length else b''
+
+            def _send(self, status, body=None, headers=None):
+                payload = b''
+                if body is not None:
+                    payload = body if isinstance(body, bytes) else json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _authorize(self):
+                with tenant.lock:
+                    tenant.stats['api_requests'] += 1
+                if not tenant.is_valid_token(self.headers.get('Authorization')):
+                    with tenant.lock:
+                        tenant.stats['unauthorized'] += 1
+                    self._send(401, {'error': 'invalid_token'})
+                    return False
+                if tenant.throttle_rate and random.random() < tenant.throttle_rate:
+                    with tenant.lock:
+                        tenant.stats['throttled'] += 1
+                    self._send(429, {'error': 'Too Many Requests'}, {'Retry-After': '1'})
+                    return False
+                return True
+
+            def _path(self):
+                parsed = urlparse(self.path)
+                return unquote(parsed.path), parse_qs(parsed.query)
+
+            def do_GET(self):
+                path, query = self._path()
+
+                if path == '/_fake/stats':
+                    with tenant.lock:
+                        return self._send(200, dict(tenant.stats))
+
+                self._read_body()
+                if not self._authorize():
+                    return
+
+                csrf_headers = {'X-CSRF-Token': 'fake-csrf-token'} if self.headers.get('X-CSRF-Token') == 'Fetch' else None
+
+                if path == '/api/v1/IntegrationPackages':
+                    with tenant.lock:
+                        results = list(tenant.packages.values())
+                    return self._send(200, {'d': {'results': results}}, csrf_headers)
+
+                if path == '/api/v1/IntegrationDesigntimeArtifacts':
+                    with tenant.lock:
+                        results = [{k: v for k, v in a.items() if k != 'content'} for a in tenant.artifacts.values()]
+                    return self._send(200, {'d': {'results': results}}, csrf_headers)
+
+                match = ARTIFACT_KEY_PATTERN.search(path)
+                if match:
+                    iflow_id, _, suffix = match.groups()
+                    with tenant.lock:
+                        artifact = tenant.artifacts.get(iflow_id)
+                    if not artifact:
+                        return self._send(404, {'error': {'message': f"Artifact '{iflow_id}' not found"}})
+                    if suffix == '/$value':
+                        return self._send(200, artifact.get('content', b''))
+                    return self._send(200, {'d': {k: v for k, v in artifact.items() if k != 'content'}})
+
+                if path == '/api/v1/IntegrationRuntimeArtifacts':
+                    with tenant.lock:
+                        ids = list(tenant.runtime)
+                    results = [tenant.runtime_status(i) for i in ids]
+                    for entry in results:
+                        entry.pop('ready_at', None)
+                    return self._send(200, {'d': {'results': results}})
+
+                match = RUNTIME_KEY_PATTERN.search(path)
+                if match:
+                    entry = tenant.runtime_status(match.group(1))
+                    if not entry:
+                        return self._send(404, {'error': {'message': 'Runtime artifact not found'}})
+                    entry.pop('ready_at', None)
+                    return self._send(200, {'d': entry})
+
+                self._send(404, {'error': {'message': f'Unknown path {path}'}})
+
+            def do_POST(self):
+                path, query = self._path()
+                body = self._read_body()
+
+                if path == '/oauth/token':
+                    form = parse_qs(body.decode('utf-8'))
+                    authorization = self.headers.get('Authorization', '')
+                    has_basic = authorization.startswith('Basic ') and ':' in base64.b64decode(authorization[6:]).decode('utf-8', 'ignore')
+                    if form.get('grant_type') != ['client_credentials'] or not (has_basic or form.get('client_id')):
+                        return self._send(401, {'error': 'invalid_client'})
+                    return self._send(200, {
+                        'access_token': tenant.issue_token(),
+                        'token_type': 'bearer',
+                        'expires_in': tenant.token_ttl
+                    })
+
+                if not self._authorize():
+                    return
+
+                if path == '/api/v1/IntegrationDesigntimeArtifacts':
+                    try:
+                        metadata = json.loads(body or b'{}')
+                    except ValueError:
+                        return self._send(400, {'error': {'message': 'Invalid JSON'}})
+                    iflow_id = metadata.get('Id')
+                    if not iflow_id:
+                        return self._send(400, {'error': {'message': 'Id is required'}})
+                    with tenant.lock:
+                        if iflow_id in tenant.artifacts:
+                            return self._send(500, {'error': {'message': f"Integration flow with ID '{iflow_id}' already exists"}})
+                        content = metadata.pop('ArtifactContent', None)
+                        metadata['Version'] = metadata.get('Version', 'active')
+                        metadata['content'] = base64.b64decode(content) if content else b''
+                        tenant.artifacts[iflow_id] = metadata
+                    return self._send(201, {'d': {k: v for k, v in metadata.items() if k != 'content'}})
+
+                if path == '/api/v1/DeployIntegrationDesigntimeArtifact':
+                    iflow_id = (query.get('Id') or [''])[0].strip("'")
+                    if tenant.deploy(iflow_id):
+                        return self._send(202, {'d': {'TaskId': uuid.uuid4().hex}})
+                    return self._send(404, {'error': {'message': f"Artifact '{iflow_id}' not found"}})
+
+                match = ARTIFACT_KEY_PATTERN.search(path)
+                if match and match.group(3) == '/Configurations/Deploy':
+                    if tenant.deploy(match.group(1)):
+                        return self._send(202, {'d': {'TaskId': uuid.uuid4().hex}})
+                    return self._send(404, {'error': {'message': f"Artifact '{match.group(1)}' not found"}})
+
+                self._send(404, {'error': {'message': f'Unknown path {path}'}})
+
+            def do_PUT(self):
+                path, _ = self._path()
+                body = self._read_body()
+                if not self._authorize():
+                    return
+
+                match = ARTIFACT_KEY_PATTERN.search(path)
+                if match and match.group(3) in ('/Content', '/$value'):
+                    with tenant.lock:
+                        artifact = tenant.artifacts.get(match.group(1))
+                        if not artifact:
+                            return self._send(404, {'error': {'message': f"Artifact '{match.group(1)}' not found"}})
+                        artifact['content'] = body
+                    return self._send(202)
+
+                self._send(404, {'error': {'message': f'Unknown path {path}'}})
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local fake SAP Integration Suite tenant')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind')
+    parser.add_argument('--port', type=int, default=8089, help='Port to bind')
+    parser.add_argument('--token-ttl', type=int, default=3600, help='Access token lifetime in seconds')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Fraction of API requests answered with 429')
+    parser.add_argument('--deploy-delay', type=float, default=1.0, help='Seconds before a deployed artifact is STARTED')
+    args = parser.parse_args()
+
+    tenant = FakeSapTenant(args.host, args.port, args.token_ttl, args.throttle_rate, args.deploy_delay)
+    print(f"Fake SAP tenant listening on {tenant.base_url}")
+    print(f"  SAP_BTP_TENANT_URL={tenant.base_url}")
+    print(f"  SAP_BTP_OAUTH_URL={tenant.token_url}")
+    print(f"  Stats: {tenant.base_url}/_fake/stats")
+    try:
+        tenant.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        tenant.server.server_close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+# retention.py - Scheduled cleanup of job artifacts, debug output and temp files
+
+import fnmatch
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, the single development server sweeps
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Directory entries inspected before the scanner yields to other threads
+SCAN_BATCH_SIZE = 200
+SCAN_PAUSE_SECONDS = 0.05
+
+class RetentionPolicy:
+    """
+    Retention rules for one class of artifacts
+
+    Entries older than max_age_days are removed first. Of the rest, the newest
+    max_count entries and the newest max_bytes are kept; older ones are removed.
+    """
+
+    def __init__(self, name, root=None, pattern='*', max_age_days=None, max_count=None,
+                 max_bytes=None, list_entries=None, remove=None, is_protected=None, run=None):
+        """
+        Args:
+            name (str): Policy name used in reports
+            root (str): Directory whose direct children are the managed entries
+            pattern (str): fnmatch pattern for entry names under root
+            max_age_days (float): Remove entries last modified longer ago than this
+            max_count (int): Keep at most this many entries
+            max_bytes (int): Keep at most this many bytes
+            list_entries (callable): Yields (name, mtime, size) instead of scanning root
+            remove (callable): Called with an entry name to delete it, returns bytes freed
+            is_protected (callable): Returns True for entries that must be kept (e.g. running jobs)
+            run (callable): Applies the policy itself (e.g. a bulk database cleanup) and returns its report
+        """
+        self.name = name
+        self.root = root
+        self.pattern = pattern
+        self.max_age_days = max_age_days
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.list_entries = list_entries
+        self.remove = remove
+        self.is_protected = is_protected
+        self.run = run
+
+class RetentionEngine:
+    """Applies retention policies on a schedule from a background thread"""
+
+    def __init__(self, policies, interval_seconds=3600):
+        self.policies = list(policies)
+        self.interval_seconds = interval_seconds
+        self.last_report = None
+        self._run_lock = threading.Lock()
+        self._thread = None
+        self.lock_path = None
+        self._lock_file = None
+
+    def start(self, lock_path=None):
+        """
+        Start the scheduler thread once
+
+        Args:
+            lock_path (str): File locked by the one process that sweeps. Other
+                processes started with the same file stay idle and take over
+                when the holder exits.
+        """
+        self.lock_path = lock_path
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run_forever, name='retention', daemon=True)
+            self._thread.start()
+
+    def _holds_lock(self):
+        """Take the sweeper lock if it is free; True if this process holds it"""
+        if not self.lock_path or fcntl is None:
+            return True
+        if self._lock_file is None:
+            lock_file = open(self.lock_path, 'a')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+            self._lock_file = lock_file
+            logger.info(f"Process {os.getpid()} runs the scheduled retention sweeps")
+        return True
+
+    def _run_forever(self):
+        while True:
+            time.sleep(self.interval_seconds)
+            if not self._holds_lock():
+                continue
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Retention run failed: {str(e)}")
+
+    def run_once(self):
+        """
+        Apply every policy once
+
+        Returns:
+            dict: Report with scanned/removed counts and bytes freed per policy,
+                  or the previous report if a run is already in progress
+        """
+        if not self._run_lock.acquire(blocking=False):
+            return self.last_report
+
+        try:
+            started = time.time()
+            report = {'started_at': datetime.now().isoformat(), 'policies': {}, 'freed_bytes': 0}
+            for policy in self.policies:
+                try:
+                    result = self._apply(policy)
+                except Exception as e:
+                    logger.error(f"Retention policy {policy.name} failed: {str(e)}")
+                    result = {'error': str(e)}
+                report['policies'][policy.name] = result
+                report['freed_bytes'] += result.get('freed_bytes', 0)
+
+            report['duration_seconds'] = round(time.time() - started, 2)
+            self.last_report = report
+            logger.info(f"Retention run freed {report['freed_bytes']} bytes in {report['duration_seconds']}s")
+            return report
+        finally:
+            self._run_lock.release()
+
+    def _apply(self, policy):
+        if policy.run:
+            return policy.run()
+
+        entries = list(policy.list_entries() if policy.list_entries else self._scan(policy))
+        now = time.time()
+        doomed = []
+        kept = []
+
+        for name, mtime, size in entries:
+            if policy.is_protected and policy.is_protected(name):
+                continue
+            if policy.max_age_days is not None and now - mtime > policy.max_age_days * 86400:
+                doomed.append((name, size))
+            else:
+                kept.append((name, mtime, size))
+
+        # Count and size quotas keep the newest entries
+        kept.sort(key=lambda entry: entry[1], reverse=True)
+        kept_bytes = 0
+        for index, (name, mtime, size) in enumerate(kept):
+            kept_bytes += size
+            over_count = policy.max_count is not None and index >= policy.max_count
+            over_bytes = policy.max_bytes is not None and kept_bytes > policy.max_bytes
+            if over_count or over_bytes:
+                doomed.append((name, size))
+
+        freed = 0
+        removed = 0
+        for name, size in doomed:
+            try:
+                if policy.remove:
+                    result = policy.remove(name)
+                    freed += size if result is None else result
+                else:
+                    freed += remove_path(os.path.join(policy.root, name))
+                removed += 1
+            except Exception as e:
+                logger.warning(f"Retention policy {policy.name} could not remove {name}: {str(e)}")
+
+        if removed:
+            logger.info(f"Retention policy {policy.name}: removed {removed} of {len(entries)} entries, freed {freed} bytes")
+        return {'scanned': len(entries), 'removed': removed, 'freed_bytes': freed}
+
+    def _scan(self, policy):
+        """Yield (name, mtime, size) for entries under the policy root, pausing between batches"""
+        if not policy.root or not os.path.isdir(policy.root):
+            return
+
+        seen = 0
+        with os.scandir(policy.root) as it:
+            for entry in it:
+                if not fnmatch.fnmatch(entry.name, policy.pattern):
+                    continue
+                try:
+                    mtime, size = path_usage(entry.path)
+                except OSError:
+                    continue
+                yield entry.name, mtime, size
+
+                seen += 1
+                if seen % SCAN_BATCH_SIZE == 0:
+                    time.sleep(SCAN_PAUSE_SECONDS)
+
+def path_usage(path):
+    """
+    Get the newest modification time and total size of a file or directory tree
+
+    Returns:
+        tuple: (mtime, size in bytes)
+    """
+    stat = os.stat(path)
+    if not os.path.isdir(path):
+        return stat.st_mtime, stat.st_size
+
+    mtime = stat.st_mtime
+    size = 0
+    for root, dirs, files in os.walk(path):
+        for filename in files:
+            try:
+                file_stat = os.stat(os.path.join(root, filename))
+            except OSError:
+                continue
+            size += file_stat.st_size
+            mtime = max(mtime, file_stat.st_mtime)
+    return mtime, size
+
+def remove_path(path):
+    """
+    Delete a file or directory tree
+
+    Returns:
+        int: Bytes freed
+    """
+    if not os.path.exists(path):
+        return 0
+    _, size = path_usage(path)
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        os.remove(path)
+    return size
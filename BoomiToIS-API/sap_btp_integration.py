@@ -3,16 +3,30 @@ SAP BTP Integration module for deploying integration flows to SAP Integration Su
 """
 
 import os
-import requests
 import json
 import logging
-import base64
+import threading
 from urllib.parse import urljoin
 
+from sap_token_cache import token_cache, authorized_request
+from deployment_ledger import compute_iflow_hash, get_deployment_ledger, fetch_artifact_state, current_version
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Status codes the tenant uses to ask clients to slow down
+THROTTLE_STATUS_CODES = (429, 503)
+
+class SapThrottledError(Exception):
+    """
+    Raised when the tenant throttles a request with 429 or 503
+    """
+    
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
 class SapBtpIntegration:
     """
     Class for interacting with SAP BTP Integration Suite APIs
@@ -43,8 +57,9 @@ class SapBtpIntegration:
         self.api_base = f"{self.tenant_url}/api/v1"
         self.integration_packages_api = f"{self.api_base}/IntegrationPackages"
         self.integration_designs_api = f"{self.api_base}/IntegrationDesigntimeArtifacts"
+        self.integration_runtime_api = f"{self.api_base}/IntegrationRuntimeArtifacts"
         
-        # Token cache
+        # Last token handed out by the process-wide token cache
         self.access_token = None
         self.token_expiry = 0
     
@@ -52,36 +67,16 @@ class SapBtpIntegration:
         """
         Get OAuth token for API authentication
         
+        The token is shared with every other client using the same credentials
+        and is only requested again shortly before it expires.
+        
         Returns:
             str: Access token
         """
         try:
-            # Basic auth for token request
-            auth_string = f"{self.client_id}:{self.client_secret}"
-            auth_header = base64.b64encode(auth_string.encode()).decode()
-            
-            headers = {
-                'Authorization': f'Basic {auth_header}',
-                'Content-Type': 'application/x-www-form-urlencoded'
-            }
-            
-            data = {
-                'grant_type': 'client_credentials'
-            }
-            
-            response = requests.post(
-                self.oauth_url,
-                headers=headers,
-                data=data
-            )
-            
-            if response.status_code == 200:
-                token_data = response.json()
-                self.access_token = token_data.get('access_token')
-                return self.access_token
-            else:
-                logger.error(f"Failed to get auth token: {response.status_code} - {response.text}")
-                raise Exception(f"Failed to get auth token: {response.status_code}")
+            self.access_token = token_cache.get_token(self.oauth_url, self.client_id, self.client_secret)
+            self.token_expiry = token_cache.get_expiry(self.oauth_url, self.client_id)
+            return self.access_token
                 
         except Exception as e:
             logger.error(f"Error getting auth token: {str(e)}")
@@ -94,14 +89,49 @@ class SapBtpIntegration:
         Returns:
             dict: Headers with auth token
         """
-        if not self.access_token:
-            self.get_auth_token()
+        self.get_auth_token()
             
         return {
             'Authorization': f'Bearer {self.access_token}',
             'Content-Type': 'application/json'
         }
     
+    def _request(self, method, url, content_type='application/json', **kwargs):
+        """
+        Send an authenticated request over the pooled session, refreshing the token once on 401
+        
+        Args:
+            method (str): HTTP method
+            url (str): Request URL
+            content_type (str): Content-Type header
+            **kwargs: Passed to requests
+            
+        Returns:
+            requests.Response: The response
+            
+        Raises:
+            SapThrottledError: If the tenant answers 429 or 503
+        """
+        response = authorized_request(
+            method,
+            url,
+            self.oauth_url,
+            self.client_id,
+            self.client_secret,
+            headers={'Content-Type': content_type},
+            **kwargs
+        )
+        
+        if response.status_code in THROTTLE_STATUS_CODES:
+            retry_after = response.headers.get('Retry-After')
+            try:
+                retry_after = float(retry_after) if retry_after else None
+            except ValueError:
+                retry_after = None
+            raise SapThrottledError(f"Tenant throttled {method} request: {response.status_code}", retry_after)
+        
+        return response
+    
     def list_integration_packages(self):
         """
         List all integration packages
@@ -110,11 +140,7 @@ class SapBtpIntegration:
             list: List of integration packages
         """
         try:
-            headers = self.get_headers()
-            response = requests.get(
-                self.integration_packages_api,
-                headers=headers
-            )
+            response = self._request('GET', self.integration_packages_api)
             
             if response.status_code == 200:
                 return response.json()
@@ -126,99 +152,251 @@ class SapBtpIntegration:
             logger.error(f"Error listing integration packages: {str(e)}")
             raise
     
-    def deploy_integration_flow(self, package_id, iflow_name, iflow_zip_path, iflow_id=None, description=None):
+    def upload_integration_flow(self, package_id, iflow_name, iflow_zip_path, iflow_id=None, description=None):
+        """
+        Create or update the design time artifact of an integration flow without deploying it
+        
+        Args:
+            package_id (str): ID of the integration package
+            iflow_name (str): Name of the integration flow
+            iflow_zip_path (str): Path to the integration flow ZIP file
+            iflow_id (str, optional): ID for the integration flow. If not provided, will use iflow_name
+            description (str, optional): Description for the integration flow
+            
+        Returns:
+            str: ID of the uploaded integration flow
+        """
+        # If no iflow_id provided, use the iflow_name (with spaces replaced by underscores)
+        if not iflow_id:
+            iflow_id = iflow_name.replace(' ', '_')
+        
+        # Read the ZIP file
+        with open(iflow_zip_path, 'rb') as zip_file:
+            zip_content = zip_file.read()
+        
+        # Create/update the integration flow
+        design_api_url = f"{self.integration_designs_api}(Id='{iflow_id}',Version='active')/Content"
+        
+        # Check if the integration flow already exists
+        check_url = f"{self.integration_designs_api}(Id='{iflow_id}',Version='active')"
+        check_response = self._request('GET', check_url)
+        
+        if check_response.status_code == 200:
+            # Update existing integration flow
+            response = self._request('PUT', design_api_url, content_type='application/zip', data=zip_content)
+        else:
+            # Create new integration flow metadata first
+            create_metadata_url = f"{self.integration_designs_api}"
+            
+            metadata = {
+                "Name": iflow_name,
+                "Id": iflow_id,
+                "PackageId": package_id,
+                "Description": description or f"Integration flow generated for {iflow_name}"
+            }
+            
+            metadata_response = self._request('POST', create_metadata_url, json=metadata)
+            
+            if metadata_response.status_code not in [201, 200]:
+                logger.error(f"Failed to create integration flow metadata: {metadata_response.status_code} - {metadata_response.text}")
+                raise Exception(f"Failed to create integration flow metadata: {metadata_response.status_code}")
+            
+            # Now upload the content
+            response = self._request('PUT', design_api_url, content_type='application/zip', data=zip_content)
+        
+        if response.status_code not in [200, 201, 202]:
+            logger.error(f"Failed to upload integration flow: {response.status_code} - {response.text}")
+            raise Exception(f"Failed to upload integration flow: {response.status_code}")
+        
+        return iflow_id
+    
+    def deploy_uploaded_flow(self, iflow_id):
+        """
+        Deploy an integration flow whose design time artifact is already on the tenant
+        
+        The runtime artifact the tenant had before the deploy is read first, so a
+        status tracker can tell that stale status from the one of this deployment.
+        
+        Args:
+            iflow_id (str): ID of the integration flow
+            
+        Returns:
+            dict: Previous runtime artifact (see get_runtime_artifact), or None
+        """
+        try:
+            previous = self.get_runtime_artifact(iflow_id)
+        except Exception as e:
+            logger.warning(f"Could not read the current runtime artifact of {iflow_id}: {str(e)}")
+            previous = None
+        
+        deploy_url = f"{self.integration_designs_api}(Id='{iflow_id}',Version='active')/Configurations/Deploy"
+        deploy_response = self._request('POST', deploy_url)
+        
+        if deploy_response.status_code not in [200, 201, 202]:
+            logger.error(f"Failed to deploy integration flow: {deploy_response.status_code} - {deploy_response.text}")
+            raise Exception(f"Failed to deploy integration flow: {deploy_response.status_code}")
+        
+        return previous
+    
+    @staticmethod
+    def _runtime_artifact(artifact):
+        return {
+            'status': artifact.get('Status'),
+            'version': artifact.get('Version'),
+            'deployed_on': artifact.get('DeployedOn')
+        }
+    
+    def get_runtime_artifact(self, iflow_id):
+        """
+        Get the runtime artifact of an integration flow
+        
+        Args:
+            iflow_id (str): ID of the integration flow
+            
+        Returns:
+            dict: status, version and deployed_on, or None if the iFlow is not deployed
+        """
+        response = self._request('GET', f"{self.integration_runtime_api}('{iflow_id}')", params={'$format': 'json'})
+        
+        if response.status_code == 404:
+            return None
+        if response.status_code != 200:
+            raise Exception(f"Failed to read runtime artifact {iflow_id}: {response.status_code}")
+        
+        return self._runtime_artifact(response.json().get('d', {}))
+    
+    def get_runtime_artifacts(self):
+        """
+        Get the runtime artifact of every deployed integration flow in one request
+        
+        Returns:
+            dict: status (e.g. STARTING, STARTED, ERROR), version and deployed_on keyed by iFlow ID
+        """
+        response = self._request('GET', self.integration_runtime_api, params={'$format': 'json'})
+        
+        if response.status_code != 200:
+            logger.error(f"Failed to list runtime artifacts: {response.status_code} - {response.text}")
+            raise Exception(f"Failed to list runtime artifacts: {response.status_code}")
+        
+        results = response.json().get('d', {}).get('results', [])
+        return {artifact.get('Id'): self._runtime_artifact(artifact) for artifact in results}
+    
+    def get_runtime_artifact_statuses(self):
+        """
+        Get the runtime status of every deployed integration flow in one request
+        
+        Returns:
+            dict: Runtime status (e.g. STARTING, STARTED, ERROR) keyed by iFlow ID
+        """
+        return {iflow_id: artifact['status'] for iflow_id, artifact in self.get_runtime_artifacts().items()}
+    
+    def get_artifact_state(self, iflow_id):
+        """
+        Get the design time version and runtime state of an integration flow
+        
+        Args:
+            iflow_id (str): ID of the integration flow
+            
+        Returns:
+            dict: See deployment_ledger.fetch_artifact_state
+        """
+        return fetch_artifact_state(self._request, self.api_base, iflow_id)
+    
+    def get_runtime_error(self, iflow_id):
+        """
+        Get the error information of an integration flow that failed to start
+        
+        Args:
+            iflow_id (str): ID of the integration flow
+            
+        Returns:
+            str: Error information, or None if not available
+        """
+        try:
+            response = self._request('GET', f"{self.integration_runtime_api}('{iflow_id}')/ErrorInformation/$value")
+            if response.status_code == 200:
+                return response.text[:2000]
+        except Exception as e:
+            logger.warning(f"Could not get runtime error for {iflow_id}: {str(e)}")
+        return None
+    
+    def deploy_integration_flow(self, package_id, iflow_name, iflow_zip_path, iflow_id=None, description=None, force=False):
         """
         Deploy an integration flow to SAP Integration Suite
         
+        The upload and deploy are skipped when the deployment ledger shows that the
+        same content is already deployed to this tenant and the tenant still runs it.
+        
         Args:
             package_id (str): ID of the integration package
             iflow_name (str): Name of the integration flow
             iflow_zip_path (str): Path to the integration flow ZIP file
             iflow_id (str, optional): ID for the integration flow. If not provided, will use iflow_name
             description (str, optional): Description for the integration flow
+            force (bool): Deploy even if the content is unchanged
             
         Returns:
             dict: Deployment result
         """
         try:
-            # If no iflow_id provided, use the iflow_name (with spaces replaced by underscores)
             if not iflow_id:
                 iflow_id = iflow_name.replace(' ', '_')
             
-            # Step 1: Create or update the integration flow design time artifact
-            headers = self.get_headers()
-            headers['Content-Type'] = 'application/zip'
-            
-            # Read the ZIP file
-            with open(iflow_zip_path, 'rb') as zip_file:
-                zip_content = zip_file.read()
-            
-            # Create/update the integration flow
-            design_api_url = f"{self.integration_designs_api}(Id='{iflow_id}',Version='active')/Content"
-            
-            # Check if the integration flow already exists
-            check_url = f"{self.integration_designs_api}(Id='{iflow_id}',Version='active')"
-            check_response = requests.get(check_url, headers=self.get_headers())
-            
-            if check_response.status_code == 200:
-                # Update existing integration flow
-                response = requests.put(
-                    design_api_url,
-                    headers=headers,
-                    data=zip_content
-                )
-            else:
-                # Create new integration flow metadata first
-                create_metadata_url = f"{self.integration_designs_api}"
-                metadata_headers = self.get_headers()
-                metadata_headers['Content-Type'] = 'application/json'
-                
-                metadata = {
-                    "Name": iflow_name,
-                    "Id": iflow_id,
-                    "PackageId": package_id,
-                    "Description": description or f"Integration flow generated for {iflow_name}"
+            ledger = get_deployment_ledger()
+            content_hash = compute_iflow_hash(iflow_zip_path)
+            if not force and ledger.is_unchanged(self.tenant_url, iflow_id, content_hash,
+                                                 lambda: self.get_artifact_state(iflow_id)):
+                logger.info(f"Integration flow {iflow_id} is unchanged on {self.tenant_url}, skipping deployment")
+                return {
+                    "status": "success",
+                    "message": "Integration flow unchanged, deployment skipped",
+                    "iflow_id": iflow_id,
+                    "package_id": package_id,
+                    "skipped": True
                 }
-                
-                metadata_response = requests.post(
-                    create_metadata_url,
-                    headers=metadata_headers,
-                    json=metadata
-                )
-                
-                if metadata_response.status_code not in [201, 200]:
-                    logger.error(f"Failed to create integration flow metadata: {metadata_response.status_code} - {metadata_response.text}")
-                    raise Exception(f"Failed to create integration flow metadata: {metadata_response.status_code}")
-                
-                # Now upload the content
-                response = requests.put(
-                    design_api_url,
-                    headers=headers,
-                    data=zip_content
-                )
             
-            if response.status_code not in [200, 201, 202]:
-                logger.error(f"Failed to upload integration flow: {response.status_code} - {response.text}")
-                raise Exception(f"Failed to upload integration flow: {response.status_code}")
+            # Step 1: Create or update the integration flow design time artifact
+            iflow_id = self.upload_integration_flow(package_id, iflow_name, iflow_zip_path, iflow_id, description)
             
             # Step 2: Deploy the integration flow
-            deploy_url = f"{self.integration_designs_api}(Id='{iflow_id}',Version='active')/Configurations/Deploy"
-            deploy_response = requests.post(
-                deploy_url,
-                headers=self.get_headers()
-            )
-            
-            if deploy_response.status_code not in [200, 201, 202]:
-                logger.error(f"Failed to deploy integration flow: {deploy_response.status_code} - {deploy_response.text}")
-                raise Exception(f"Failed to deploy integration flow: {deploy_response.status_code}")
+            previous_deployment = self.deploy_uploaded_flow(iflow_id)
+            version = current_version(self._request, self.api_base, iflow_id)
+            ledger.record(self.tenant_url, iflow_id, content_hash, version=version, package_id=package_id)
             
             return {
                 "status": "success",
                 "message": "Integration flow deployed successfully",
                 "iflow_id": iflow_id,
-                "package_id": package_id
+                "package_id": package_id,
+                "version": version,
+                "previous_deployment": previous_deployment
             }
                 
         except Exception as e:
             logger.error(f"Error deploying integration flow: {str(e)}")
             raise
+
+# Clients reused across requests, keyed by tenant and credentials
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_sap_btp_client(tenant_url, client_id, client_secret, oauth_url=None):
+    """
+    Get a shared SapBtpIntegration client for a tenant
+    
+    Args:
+        tenant_url (str): The URL of the SAP Integration Suite tenant
+        client_id (str): OAuth client ID
+        client_secret (str): OAuth client secret
+        oauth_url (str, optional): OAuth token URL
+        
+    Returns:
+        SapBtpIntegration: Client instance
+    """
+    key = (tenant_url.rstrip('/'), client_id, client_secret, oauth_url)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = SapBtpIntegration(tenant_url, client_id, client_secret, oauth_url)
+            _clients[key] = client
+        return client
@@ -12,6 +12,11 @@ import uuid
 import logging
 import threading
 import zipfile
+import re
+import json
+import hashlib
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from flask import Flask, request, jsonify, send_file
 from flask_cors import CORS
@@ -49,6 +54,8 @@ CHUNK_OVERLAP = int(os.getenv('GEMMA3_CHUNK_OVERLAP', '500'))  # Larger overlap
 MAX_WAIT_TIME = int(os.getenv('GEMMA3_MAX_WAIT_TIME', '1200'))  # 20 minutes for cold starts
 TEMPERATURE = float(os.getenv('GEMMA3_TEMPERATURE', '0.3'))  # Lower for more deterministic output
 TOP_P = float(os.getenv('GEMMA3_TOP_P', '0.9'))  # Nucleus sampling
+CHUNK_CONCURRENCY = int(os.getenv('GEMMA3_CHUNK_CONCURRENCY', '3'))  # Parts sent to RunPod at once
+CHECKPOINT_DIR = os.getenv('GEMMA3_CHECKPOINT_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'checkpoints'))
 
 # In-memory storage for jobs (in production, use Redis or database)
 jobs = {}
@@ -91,39 +98,212 @@ class GemmaJobManager:
 
 job_manager = GemmaJobManager()
 
+# Tokenizer used for chunk sizing: a local Gemma tokenizer if available, else tiktoken
+GEMMA3_TOKENIZER = os.getenv('GEMMA3_TOKENIZER', 'google/gemma-3-4b-it')
+_tokenizer = None
+_tokenizer_loaded = False
+_tokenizer_lock = threading.Lock()
+
+def get_tokenizer():
+    """
+    Load a tokenizer once
+
+    The Gemma tokenizer is used when transformers is installed and the tokenizer
+    files are available locally (GEMMA3_TOKENIZER may also be a directory).
+    Otherwise tiktoken's cl100k_base is used as a close approximation. Without
+    either, counts are estimated and chunk sizes are only approximate.
+
+    Returns:
+        callable: encode(text) -> token list, or None if no tokenizer is available
+    """
+    global _tokenizer, _tokenizer_loaded
+    if _tokenizer_loaded:
+        return _tokenizer
+
+    with _tokenizer_lock:
+        if _tokenizer_loaded:
+            return _tokenizer
+        try:
+            from transformers import AutoTokenizer
+            tokenizer = AutoTokenizer.from_pretrained(GEMMA3_TOKENIZER, local_files_only=True)
+            _tokenizer = lambda text: tokenizer.encode(text, add_special_tokens=False)
+            logger.info(f"Using tokenizer {GEMMA3_TOKENIZER} for token counts")
+        except Exception:
+            try:
+                import tiktoken
+                encoding = tiktoken.get_encoding('cl100k_base')
+                _tokenizer = lambda text: encoding.encode(text, disallowed_special=())
+                logger.info("Using tiktoken cl100k_base for token counts")
+            except Exception:
+                logger.info("No tokenizer available, estimating token counts")
+        _tokenizer_loaded = True
+        return _tokenizer
+
 def estimate_tokens(text):
-    """Rough estimation of tokens (1 token ≈ 4 characters for English)"""
-    return len(text) // 4
+    """Count tokens with the tokenizer, or estimate them from characters and words"""
+    if not text:
+        return 0
+    tokenizer = get_tokenizer()
+    if tokenizer:
+        return len(tokenizer(text))
+    # Markup and code tokenize denser than prose: take the larger of both estimates
+    return max(len(text) // 4, len(re.findall(r'\w+|[^\w\s]', text)))
+
+# Markdown structure used to pick chunk boundaries
+HEADING_PATTERN = re.compile(r'^(#{1,6})\s+(.*\S)')
+TABLE_LINE_PATTERN = re.compile(r'^\s*\|')
+
+def split_markdown_blocks(text):
+    """
+    Split markdown into blocks at blank lines and headings
+
+    Code fences and tables are kept whole.
+
+    Returns:
+        list: (block text, heading level or 0, heading title or None)
+    """
+    blocks = []
+    current = []
+    in_fence = False
+
+    def close():
+        if current:
+            heading = HEADING_PATTERN.match(current[0])
+            if heading:
+                blocks.append(('\n'.join(current), len(heading.group(1)), heading.group(2)))
+            else:
+                blocks.append(('\n'.join(current), 0, None))
+            current.clear()
+
+    for line in text.split('\n'):
+        if line.strip().startswith('```'):
+            if not in_fence:
+                close()
+            current.append(line)
+            in_fence = not in_fence
+            if not in_fence:
+                close()
+            continue
+        if in_fence:
+            current.append(line)
+            continue
+        if not line.strip():
+            if not (current and TABLE_LINE_PATTERN.match(current[-1])):
+                close()
+            continue
+        if HEADING_PATTERN.match(line):
+            close()
+        current.append(line)
+
+    close()
+    return blocks
+
+def split_long_line(line, max_tokens):
+    """
+    Cut a line into pieces of at most max_tokens, at word boundaries where possible
+
+    Pieces are sized from the line's average characters per token and shrunk
+    until their own count fits, so the whole line is only counted once.
+    """
+    if estimate_tokens(line) <= max_tokens:
+        return [line]
+
+    chars_per_token = len(line) / max(estimate_tokens(line), 1)
+    pieces = []
+    while line:
+        cut = max(1, min(len(line), int(max_tokens * chars_per_token * 0.9)))
+        while cut > 1 and estimate_tokens(line[:cut]) > max_tokens:
+            cut = max(1, int(cut * 0.8))
+        space = line.rfind(' ', cut // 2, cut)
+        if cut < len(line) and space > 0:
+            cut = space + 1
+        pieces.append(line[:cut])
+        line = line[cut:]
+    return pieces
 
 def chunk_text(text, max_tokens, overlap=200):
-    """Split text into chunks that fit within token limits"""
-    max_chars = max_tokens * 4  # Rough conversion
-    overlap_chars = overlap * 4
-    
+    """
+    Split markdown into chunks that fit within a token limit, at section boundaries
+
+    A chunk ends before a heading once it is half full, so sections stay together
+    where they fit. When a chunk ends inside a section, the next chunk starts with
+    the heading trail of that section plus up to `overlap` tokens of the last
+    blocks, so every chunk can be read on its own. Blocks larger than the limit
+    are cut at line boundaries, and lines larger than half the limit at word
+    boundaries, so they fit next to the carried context.
+
+    Args:
+        text (str): Markdown document
+        max_tokens (int): Maximum tokens per chunk
+        overlap (int): Tokens of trailing context repeated when a section is split
+
+    Returns:
+        list: Chunk texts in document order
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+
     chunks = []
-    start = 0
-    
-    while start < len(text):
-        end = start + max_chars
-        
-        if end >= len(text):
-            # Last chunk
-            chunks.append(text[start:])
-            break
-        
-        # Try to find a good breaking point (sentence or paragraph)
-        break_point = end
-        for i in range(end - 100, end):
-            if i < len(text) and text[i] in '.!?\n':
-                break_point = i + 1
-                break
-        
-        chunks.append(text[start:break_point])
-        start = break_point - overlap_chars
-        
-        if start < 0:
-            start = 0
-    
+    current = []        # (block text, tokens)
+    current_tokens = 0
+    trail = []          # Headings enclosing the current position: (level, block text)
+
+    def flush(next_is_heading):
+        nonlocal current, current_tokens
+        if not current:
+            return
+        chunks.append('\n\n'.join(block for block, _ in current))
+
+        # Carry context into the next chunk when a section continues across the boundary
+        carried = []
+        if not next_is_heading:
+            carried_tokens = 0
+            for block, tokens in reversed(current):
+                if carried_tokens + tokens > overlap or any(block == heading for _, heading in trail):
+                    break
+                carried.insert(0, (block, tokens))
+                carried_tokens += tokens
+            carried = [(heading, estimate_tokens(heading)) for _, heading in trail] + carried
+            if sum(tokens for _, tokens in carried) > max_tokens // 2:
+                carried = []
+        current = carried
+        current_tokens = sum(tokens for _, tokens in carried)
+
+    for block, level, _ in split_markdown_blocks(text):
+        tokens = estimate_tokens(block) + 1
+        if level:
+            trail = [(lvl, heading) for lvl, heading in trail if lvl < level] + [(level, block)]
+            if current_tokens >= max_tokens // 2:
+                flush(True)
+        if current_tokens + tokens > max_tokens:
+            flush(bool(level))
+            if current_tokens + tokens > max_tokens and tokens <= max_tokens:
+                # No room for carried context next to this block
+                current, current_tokens = [], 0
+
+        if tokens > max_tokens:
+            # Oversized block: cut at line boundaries
+            piece = []
+            piece_tokens = current_tokens
+            # Long lines are cut to half the limit, so a piece fits next to carried context
+            line_limit = max(1, max_tokens // 2 - 1)
+            lines = (part for line in block.split('\n') for part in split_long_line(line, line_limit))
+            for line in lines:
+                line_tokens = estimate_tokens(line) + 1
+                if piece and piece_tokens + line_tokens > max_tokens:
+                    current.append(('\n'.join(piece), piece_tokens - current_tokens))
+                    flush(False)
+                    piece, piece_tokens = [], current_tokens
+                piece.append(line)
+                piece_tokens += line_tokens
+            current.append(('\n'.join(piece), piece_tokens - current_tokens))
+            current_tokens = piece_tokens
+            continue
+
+        current.append((block, tokens))
+        current_tokens += tokens
+
+    flush(True)
     return chunks
 
 def call_runpod_api(prompt, max_wait_time=1200):
@@ -464,6 +644,125 @@ def generate_iflow(job_id=None):
         logger.error(f"Error in generate_iflow: {e}")
         return jsonify({'error': str(e)}), 500
 
+def checkpoint_path(job):
+    """Checkpoint file of a job, keyed by its input so a resubmitted job finds it too"""
+    key = hashlib.sha256('\0'.join([
+        job['markdown_content'], job['iflow_name'], job.get('platform', 'mulesoft'),
+        str(MAX_INPUT_TOKENS), str(CHUNK_OVERLAP)
+    ]).encode('utf-8')).hexdigest()
+    return os.path.join(CHECKPOINT_DIR, f"{key}.json")
+
+def chunk_hash(chunk):
+    return hashlib.sha256(chunk.encode('utf-8')).hexdigest()
+
+def load_checkpoint(path, chunks):
+    """
+    Load completed part responses from a checkpoint
+
+    Returns:
+        dict: {part index: response} for parts whose text is unchanged
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable checkpoint {path}: {e}")
+        return {}
+
+    hashes = checkpoint.get('chunks', [])
+    responses = {}
+    for index, response in checkpoint.get('responses', {}).items():
+        index = int(index)
+        if response and index < len(chunks) and index < len(hashes) and hashes[index] == chunk_hash(chunks[index]):
+            responses[index] = response
+    return responses
+
+def save_checkpoint(path, chunks, responses):
+    """Write completed part responses atomically"""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'chunks': [chunk_hash(chunk) for chunk in chunks],
+                'responses': {str(i): response for i, response in enumerate(responses) if response}
+            }, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not write checkpoint {path}: {e}")
+
+def process_chunks(job_id, chunks, iflow_name, platform):
+    """
+    Generate a response for every part, CHUNK_CONCURRENCY parts at a time
+
+    Parts completed by an earlier run (kept in the job's partial_responses, or in
+    the checkpoint file for a resubmitted job) are not sent again. Each completed
+    part is checkpointed immediately, so a failed job resumes where it stopped.
+
+    Returns:
+        list: Response per part, in part order
+    """
+    job = job_manager.get_job(job_id)
+    path = checkpoint_path(job)
+
+    responses = [None] * len(chunks)
+    previous = job.get('partial_responses') or []
+    if job.get('chunks') == chunks and len(previous) == len(chunks):
+        responses = list(previous)
+    for index, response in load_checkpoint(path, chunks).items():
+        responses[index] = responses[index] or response
+
+    pending = [i for i, response in enumerate(responses) if not response]
+    if len(pending) < len(chunks):
+        logger.info(f"Resuming job {job_id}: {len(chunks) - len(pending)}/{len(chunks)} parts already completed")
+    job_manager.update_job_status(
+        job_id, 'processing',
+        chunks=chunks,
+        current_chunk=len(chunks) - len(pending),
+        partial_responses=list(responses)
+    )
+
+    def generate(index):
+        logger.info(f"Processing part {index + 1}/{len(chunks)} for job {job_id}")
+        prompt = create_chunked_prompt(chunks[index], index, len(chunks), iflow_name, platform)
+        return extract_output(call_runpod_api(prompt, MAX_WAIT_TIME))
+
+    failures = []
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, min(CHUNK_CONCURRENCY, len(pending)))) as executor:
+            futures = {executor.submit(generate, index): index for index in pending}
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    output = future.result()
+                except Exception as e:
+                    logger.error(f"Part {index + 1}/{len(chunks)} of job {job_id} failed: {e}")
+                    failures.append(f"part {index + 1}: {e}")
+                    continue
+                if not output:
+                    failures.append(f"part {index + 1}: empty response")
+                    continue
+
+                responses[index] = output
+                save_checkpoint(path, chunks, responses)
+                job_manager.update_job_status(
+                    job_id, 'processing',
+                    current_chunk=sum(1 for response in responses if response),
+                    partial_responses=list(responses)
+                )
+
+    if failures:
+        raise Exception(
+            f"{len(failures)} of {len(chunks)} parts failed ({'; '.join(failures)}). "
+            f"Completed parts are checkpointed; resume the job to retry the rest."
+        )
+
+    if os.path.exists(path):
+        os.remove(path)
+    return responses
+
 def process_iflow_generation(job_id):
     """Process iFlow generation with chunking and resumption"""
     job = job_manager.get_job(job_id)
@@ -476,6 +775,7 @@ def process_iflow_generation(job_id):
         markdown_content = job['markdown_content']
         iflow_name = job['iflow_name']
         platform = job.get('platform', 'mulesoft')
+        chunks = None
 
         # Estimate tokens and determine if chunking is needed
         estimated_tokens = estimate_tokens(markdown_content)
@@ -485,24 +785,8 @@ def process_iflow_generation(job_id):
             # Need to chunk the input
             logger.info(f"Input too large, chunking into smaller pieces...")
             chunks = chunk_text(markdown_content, MAX_INPUT_TOKENS - 1000, CHUNK_OVERLAP)
-            job_manager.update_job_status(job_id, 'processing', chunks=chunks)
-
-            # Process each chunk
-            partial_responses = []
-            for i, chunk in enumerate(chunks):
-                logger.info(f"Processing chunk {i+1}/{len(chunks)} for job {job_id}")
-
-                prompt = create_chunked_prompt(chunk, i, len(chunks), iflow_name, platform)
-                response = call_runpod_api(prompt, MAX_WAIT_TIME)
-                output = extract_output(response)
-
-                if output:
-                    partial_responses.append(output)
-                    job_manager.update_job_status(
-                        job_id, 'processing',
-                        current_chunk=i+1,
-                        partial_responses=partial_responses
-                    )
+            logger.info(f"Split job {job_id} into {len(chunks)} parts")
+            partial_responses = process_chunks(job_id, chunks, iflow_name, platform)
 
             # Combine responses
             final_response = combine_chunked_responses(partial_responses, iflow_name)
@@ -553,7 +837,10 @@ def process_iflow_generation(job_id):
             logger.info(f"Job {job_id} completed successfully with response length: {len(final_response)}")
         else:
             logger.error(f"No response generated for job {job_id}")
-            logger.error(f"RunPod response was: {response}")
+            if chunks:
+                logger.error(f"None of the {len(chunks)} parts of job {job_id} returned a usable response")
+            else:
+                logger.error(f"RunPod response was: {response}")
             raise Exception("No response generated from RunPod")
 
     except Exception as e:
@@ -628,72 +915,65 @@ Requirements for other files:
 Generate the complete structured response with all files:"""
 
 def create_chunked_prompt(chunk, chunk_index, total_chunks, iflow_name, platform='mulesoft'):
-    """Create prompt for chunked processing with structured output optimized for Gemma 3n"""
+    """
+    Create the prompt for one part of a split document
+
+    Parts are generated concurrently, so each prompt asks for a self-contained
+    fragment: a complete BPMN2 document for the components of this part, with ids
+    prefixed by the part number so combine_chunked_responses can merge fragments
+    without collisions. Project files are requested from the first part only.
+    """
     platform_text = "MuleSoft" if platform == 'mulesoft' else "Boomi"
-    if chunk_index == 0:
-        return f"""<start_of_turn>user
-You are an expert SAP Integration Suite developer. I will provide you with {platform_text} documentation in {total_chunks} parts. This is part {chunk_index + 1}/{total_chunks}.
-
-For this first part, start generating the SAP Integration Suite iFlow project structure. Focus on the main flow structure and initial components.
-
-IMPORTANT: Structure your response EXACTLY as shown below with clear file separators:
-
-=== FILE: src/main/resources/scenarioflows/integrationflow/{iflow_name}.iflw ===
-[Start generating the main iFlow XML content here - begin with XML declaration and root elements]
+    part = chunk_index + 1
+    iflow_path = f"src/main/resources/scenarioflows/integrationflow/{iflow_name}.iflw"
 
+    if chunk_index == 0:
+        project_files = """
 === FILE: META-INF/MANIFEST.MF ===
 [Generate the manifest file content here]
 
-=== PARTIAL RESPONSE ===
-[This is part {chunk_index + 1} of {total_chunks}]
-
-iFlow name: {iflow_name}
-
-Part {chunk_index + 1}/{total_chunks} of MuleSoft Documentation:
-{chunk}
-
-Generate the beginning of the structured iFlow project:"""
-
-    elif chunk_index == total_chunks - 1:
-        return f"""This is the final part {chunk_index + 1}/{total_chunks} of the MuleSoft documentation. Complete the SAP Integration Suite iFlow project definition.
-
-IMPORTANT: Complete all remaining files with proper structure:
-
-=== CONTINUE FILE: src/main/resources/scenarioflows/integrationflow/{iflow_name}.iflw ===
-[Complete the main iFlow XML content here]
-
 === FILE: .project ===
 [Generate the Eclipse project file content here]
 
 === FILE: metainfo.prop ===
 [Generate the metadata properties file content here]
+"""
+    else:
+        project_files = ""
 
-=== FILE: src/main/resources/parameters.prop ===
-[Generate the parameters properties file content here]
+    return f"""<start_of_turn>user
+You are an expert SAP Integration Suite developer with deep knowledge of BPMN2 XML structure and SAP Cloud Integration patterns.
 
-=== FILE: src/main/resources/parameters.propdef ===
-[Generate the parameter definitions file content here]
+The {platform_text} documentation for the iFlow "{iflow_name}" is too large for one request and was split into {total_chunks} parts at section boundaries. This is part {part}/{total_chunks}. The other parts are processed separately and the results are merged afterwards.
 
-=== END FILES ===
+Task: Generate the SAP Integration Suite iFlow content for the flows and components described in THIS part only.
 
-Final part of MuleSoft Documentation:
-{chunk}
+Rules for merging:
+1. The .iflw file must be a complete, well-formed BPMN2 XML document (XML declaration, bpmn2:definitions with all namespaces, collaboration and process) containing only the components of this part
+2. Prefix every id you create with "Part{part}_" (for example Part{part}_StartEvent_1) so ids are unique across parts
+3. Use the same participant and process ids for the main integration process in every part: Participant_Process_1 and Process_1
+4. Model this part in Process_1 as one path from a single start event to its end event; the parts are joined in order by connecting each part's end to the next part's first step
+5. Only add parameters.prop and parameters.propdef entries for parameters used by this part
 
-Complete the iFlow project with all remaining files:"""
+{platform_text} Documentation (part {part}/{total_chunks}):
+{chunk}
+<end_of_turn>
+<start_of_turn>model
 
-    else:
-        return f"""This is part {chunk_index + 1}/{total_chunks} of the MuleSoft documentation. Continue building the SAP Integration Suite iFlow project based on this content.
+IMPORTANT: Structure your response EXACTLY as shown below with clear file separators:
 
-=== CONTINUE FILE: src/main/resources/scenarioflows/integrationflow/{iflow_name}.iflw ===
-[Continue the main iFlow XML content here]
+=== FILE: {iflow_path} ===
+[Generate the BPMN2 XML for the components of this part here]
+{project_files}
+=== FILE: src/main/resources/parameters.prop ===
+[Generate the parameters used by this part here]
 
-=== PARTIAL RESPONSE ===
-[This is part {chunk_index + 1} of {total_chunks}]
+=== FILE: src/main/resources/parameters.propdef ===
+[Generate the parameter definitions used by this part here]
 
-Part {chunk_index + 1}/{total_chunks} of MuleSoft Documentation:
-{chunk}
+=== END FILES ===
 
-Continue the iFlow project definition:"""
+Generate the structured response for part {part}/{total_chunks}:"""
 
 def parse_structured_response(response_text):
     """Parse structured response into multiple files"""
@@ -734,25 +1014,234 @@ def parse_structured_response(response_text):
 
     return files
 
+def strip_code_fence(content):
+    """Remove a markdown code fence wrapped around a file's content"""
+    match = re.match(r'^```[\w.-]*\s*\n(.*?)\n?```\s*$', content.strip(), re.DOTALL)
+    return match.group(1).strip() if match else content.strip()
+
+def _element_key(element):
+    """Identity of an XML element for merging: its id, or its name/key for parameters and properties"""
+    if element.get('id'):
+        return ('id', element.get('id'))
+    for child_tag in ('name', 'key'):
+        child = element.find(child_tag)
+        if child is not None and child.text and child.text.strip():
+            return (element.tag, child_tag, child.text.strip())
+    if element.get('name'):
+        return (element.tag, 'name', element.get('name'))
+    return None
+
+def _merge_element(base, other):
+    """Add the children of other to base; children with the same identity are merged recursively"""
+    keyed = {}
+    by_tag = {}
+    for child in base:
+        key = _element_key(child)
+        if key:
+            keyed[key] = child
+        else:
+            by_tag.setdefault(child.tag, child)
+
+    for child in list(other):
+        key = _element_key(child)
+        if key is None:
+            if child.tag in by_tag:
+                _merge_element(by_tag[child.tag], child)
+            else:
+                base.append(child)
+                by_tag[child.tag] = child
+        elif key in keyed:
+            _merge_element(keyed[key], child)
+        else:
+            base.append(child)
+            keyed[key] = child
+
+def merge_xml_documents(documents):
+    """
+    Merge XML fragments into one document
+
+    The first well-formed fragment is the base; elements of later fragments are
+    added where their identity is new (first definition wins) and merged into the
+    matching element otherwise. Namespace prefixes of the fragments are kept.
+    Fragments that are not well-formed (e.g. truncated output) are skipped.
+    """
+    base = None
+    for index, document in enumerate(documents):
+        document = document[document.find('<'):] if '<' in document else document
+        try:
+            namespace_parser = ET.XMLPullParser(events=('start-ns',))
+            namespace_parser.feed(document)
+            for _, (prefix, uri) in namespace_parser.read_events():
+                try:
+                    ET.register_namespace(prefix, uri)
+                except ValueError:
+                    pass
+            root = ET.fromstring(document)
+        except ET.ParseError as e:
+            logger.warning(f"Skipping malformed XML fragment {index + 1}/{len(documents)}: {e}")
+            continue
+
+        if base is None:
+            base = root
+        elif root.tag == base.tag:
+            _merge_element(base, root)
+        else:
+            logger.warning(f"Skipping XML fragment {index + 1} with root {root.tag}, expected {base.tag}")
+
+    if base is None:
+        return documents[0]
+    return '<?xml version="1.0" encoding="UTF-8"?>\n' + ET.tostring(base, encoding='unicode')
+
+def merge_properties(contents):
+    """Merge key=value files: the first value of each key wins, repeated comments are dropped"""
+    lines = []
+    seen = set()
+    for content in contents:
+        for line in content.split('\n'):
+            stripped = line.strip()
+            if not stripped:
+                continue
+            key = stripped if stripped.startswith(('#', '!')) else re.split(r'\s*[=:]\s*', stripped, 1)[0]
+            if key not in seen:
+                seen.add(key)
+                lines.append(line)
+    return '\n'.join(lines)
+
+BPMN2_NS = 'http://www.omg.org/spec/BPMN/20100524/MODEL'
+BPMNDI_NS = 'http://www.omg.org/spec/BPMN/20100524/DI'
+DC_NS = 'http://www.omg.org/spec/DD/20100524/DC'
+DI_NS = 'http://www.omg.org/spec/DD/20100524/DI'
+PART_ID_PATTERN = re.compile(r'^Part(\d+)_')
+
+def chain_part_processes(document):
+    """
+    Join the per-part paths of a merged .iflw into one sequence
+
+    Every part brings its own start and end event into Process_1, which leaves
+    unconnected PartN_Start -> PartN_End chains. For each pair of consecutive
+    parts, the end events of the first and the start event of the second are
+    removed, and the flows that led into the end events continue to the step the
+    start event led to. Pairs that cannot be joined unambiguously (several start
+    events or start flows) are left as they are.
+    """
+    try:
+        root = ET.fromstring(document)
+    except ET.ParseError:
+        return document
+
+    bpmn = f'{{{BPMN2_NS}}}'
+    removed = set()
+    rerouted = {}  # flow id -> new target id
+    for process in root.iter(f'{bpmn}process'):
+        starts, ends = {}, {}
+        for element in process:
+            match = PART_ID_PATTERN.match(element.get('id', ''))
+            if not match:
+                continue
+            if element.tag == f'{bpmn}startEvent':
+                starts.setdefault(int(match.group(1)), []).append(element)
+            elif element.tag == f'{bpmn}endEvent':
+                ends.setdefault(int(match.group(1)), []).append(element)
+
+        by_id = {element.get('id'): element for element in process}
+        flows = process.findall(f'{bpmn}sequenceFlow')
+        parts = sorted(part for part in starts if part in ends)
+        for part, next_part in zip(parts, parts[1:]):
+            start_flows = [flow for flow in flows if flow.get('sourceRef') == starts[next_part][0].get('id')]
+            if len(starts[next_part]) != 1 or len(start_flows) != 1 or start_flows[0].get('targetRef') not in by_id:
+                logger.warning(f"Could not join part {part} to part {next_part}, leaving them unconnected")
+                continue
+
+            start, start_flow = starts[next_part][0], start_flows[0]
+            next_step = by_id[start_flow.get('targetRef')]
+            for incoming in next_step.findall(f'{bpmn}incoming'):
+                if (incoming.text or '').strip() == start_flow.get('id'):
+                    next_step.remove(incoming)
+            for element in (start, start_flow):
+                process.remove(element)
+                removed.add(element.get('id'))
+
+            end_ids = {end.get('id') for end in ends[part]}
+            for flow in flows:
+                if flow.get('targetRef') in end_ids:
+                    flow.set('targetRef', next_step.get('id'))
+                    rerouted[flow.get('id')] = next_step.get('id')
+                    ET.SubElement(next_step, f'{bpmn}incoming').text = flow.get('id')
+            for end in ends[part]:
+                process.remove(end)
+                removed.add(end.get('id'))
+
+    if not removed:
+        return document
+
+    # Drop the diagram shapes of removed elements and point rerouted edges at their new target
+    shapes = {}
+    for plane in root.iter(f'{{{BPMNDI_NS}}}BPMNPlane'):
+        for shape in plane.findall(f'{{{BPMNDI_NS}}}BPMNShape'):
+            shapes[shape.get('bpmnElement')] = shape
+        for item in list(plane):
+            if item.get('bpmnElement') in removed:
+                plane.remove(item)
+    for plane in root.iter(f'{{{BPMNDI_NS}}}BPMNPlane'):
+        for edge in plane.findall(f'{{{BPMNDI_NS}}}BPMNEdge'):
+            target = shapes.get(rerouted.get(edge.get('bpmnElement')))
+            bounds = target.find(f'{{{DC_NS}}}Bounds') if target is not None else None
+            waypoints = edge.findall(f'{{{DI_NS}}}waypoint')
+            if bounds is not None and waypoints:
+                waypoints[-1].set('x', bounds.get('x', '0'))
+                waypoints[-1].set('y', f"{float(bounds.get('y', '0')) + float(bounds.get('height', '0')) / 2:g}")
+
+    logger.info(f"Joined the parts of the merged iFlow, removing {len(removed)} inner events and flows")
+    return '<?xml version="1.0" encoding="UTF-8"?>\n' + ET.tostring(root, encoding='unicode')
+
+def merge_file_fragments(file_path, contents):
+    """Merge the contents generated for one file by several parts"""
+    if len(contents) == 1:
+        return contents[0]
+    if file_path.endswith('.iflw'):
+        return chain_part_processes(merge_xml_documents(contents))
+    if file_path.endswith('.propdef'):
+        return merge_xml_documents(contents)
+    if file_path.endswith('.prop'):
+        return merge_properties(contents)
+    # MANIFEST.MF, .project, scripts and mappings: the first version wins
+    return contents[0]
+
 def combine_chunked_responses(partial_responses, iflow_name):
-    """Combine multiple partial responses into a complete iFlow"""
-    if not partial_responses:
+    """
+    Merge the structured responses of all parts into one structured response
+
+    Each response is parsed into its files. Files produced by several parts are
+    merged per type (BPMN2 elements by id, parameters by name, properties by key),
+    and the result is emitted in the same "=== FILE: ===" format as a single
+    request, so download_iflow packages it the same way.
+    """
+    responses = [response for response in partial_responses if response]
+    if not responses:
         return None
 
-    if len(partial_responses) == 1:
-        return partial_responses[0]
+    if len(responses) == 1:
+        return responses[0]
 
-    # For chunked responses, combine them and then parse
-    combined = f"""# Generated iFlow Project: {iflow_name}
-# Combined from {len(partial_responses)} parts
+    iflow_path = f"src/main/resources/scenarioflows/integrationflow/{iflow_name}.iflw"
+    fragments = {}
+    for response in responses:
+        for file_path, content in parse_structured_response(response).items():
+            if file_path.endswith('.iflw'):
+                file_path = iflow_path
+            fragments.setdefault(file_path, []).append(strip_code_fence(content))
 
-"""
+    if not fragments:
+        logger.warning(f"No structured files in {len(responses)} part responses, concatenating them")
+        return '\n\n'.join(responses)
 
-    for i, response in enumerate(partial_responses):
-        combined += f"\n## Part {i+1}\n"
-        combined += response + "\n"
+    combined = []
+    for file_path, contents in fragments.items():
+        combined.append(f"=== FILE: {file_path} ===\n{merge_file_fragments(file_path, contents)}\n")
+    combined.append("=== END FILES ===")
 
-    return combined
+    logger.info(f"Merged {len(responses)} part responses into {len(fragments)} files")
+    return '\n'.join(combined)
 
 @app.route('/api/jobs/<job_id>', methods=['GET', 'OPTIONS'])
 def get_job_status(job_id):
@@ -796,6 +1285,30 @@ def get_job_status(job_id):
     response.headers.set('Access-Control-Allow-Origin', '*')
     return response
 
+@app.route('/api/jobs/<job_id>/resume', methods=['POST'])
+def resume_job(job_id):
+    """Restart a failed job; parts completed before the failure are not generated again"""
+    job = job_manager.get_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+
+    if job['status'] != 'failed':
+        return jsonify({'error': f"Only failed jobs can be resumed (job is {job['status']})"}), 400
+
+    job_manager.update_job_status(job_id, 'queued', error=None)
+    thread = threading.Thread(target=process_iflow_generation, args=(job_id,))
+    thread.daemon = True
+    thread.start()
+    logger.info(f"Resumed job {job_id} with {job.get('current_chunk', 0)}/{len(job.get('chunks') or [])} parts completed")
+
+    response = jsonify({
+        'job_id': job_id,
+        'status': 'queued',
+        'message': 'iFlow generation resumed'
+    })
+    response.headers.set('Access-Control-Allow-Origin', '*')
+    return response, 202
+
 @app.route('/api/jobs/<job_id>/download', methods=['GET'])
 def download_iflow(job_id):
     """Download generated iFlow"""
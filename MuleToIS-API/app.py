@@ -69,11 +69,24 @@ except Exception as e:
 from iflow_generator_api import generate_iflow_from_markdown, IFlowGeneratorAPI
 
 # Import the SAP BTP integration module
-from sap_btp_integration import SapBtpIntegration
+from sap_btp_integration import get_sap_btp_client
 
 # Import the direct iFlow deployment module
 from direct_iflow_deployment import DirectIflowDeployment, deploy_iflow
 
+# Import signed job callbacks to the Main API
+from job_callbacks import send_job_event, callbacks_enabled
+from retention import RetentionEngine, RetentionPolicy, remove_path
+from job_store import SharedJobStore, open_job_store
+from llm_clients import reset_clients, warm_clients
+from sap_token_cache import reset_sessions
+
+# Import runtime deployment status tracker
+from deployment_status_tracker import get_deployment_tracker
+
+# Name this service reports itself as in job callbacks
+CALLBACK_SOURCE = 'mule'
+
 # SAP BTP Integration configuration
 SAP_BTP_TENANT_URL = os.getenv('SAP_BTP_TENANT_URL')
 SAP_BTP_CLIENT_ID = os.getenv('SAP_BTP_CLIENT_ID')
@@ -145,14 +158,59 @@ def load_jobs():
 
 # Function to save jobs to JSON file
 def save_jobs(jobs_dict):
+    if isinstance(jobs_dict, SharedJobStore):
+        return  # Every change is already stored
     try:
         with open(app.config['JOBS_FILE'], 'w') as f:
             json.dump(jobs_dict, f, indent=2)
     except Exception as e:
         logging.error(f"Error saving jobs file: {str(e)}")
 
-# In-memory job storage (initialized from file and periodically saved to file)
-jobs = load_jobs()
+# In-memory job storage (initialized from file and periodically saved to file),
+# or the shared job store when running several worker processes (JOB_STORE=sqlite)
+jobs = open_job_store(app.config['JOBS_FILE'], load_jobs)
+
+def after_fork():
+    """Give a freshly forked worker its own connections and LLM clients (called from gunicorn.conf.py)"""
+    reset_clients()
+    reset_sessions()
+    start_retention()
+    warm_clients()
+
+def is_job_active(job_id):
+    """Jobs still generating or deploying are never cleaned up"""
+    job = jobs.get(job_id)
+    if not job:
+        return False
+    return job.get('status') not in ('completed', 'failed') or job.get('deployment_status') == 'deploying'
+
+def remove_job_data(job_id):
+    """Delete a job's results and uploads and forget the job; returns bytes freed"""
+    freed_bytes = remove_path(os.path.join(app.config['RESULTS_FOLDER'], job_id))
+    freed_bytes += remove_path(os.path.join(app.config['UPLOAD_FOLDER'], job_id))
+    if jobs.pop(job_id, None) is not None:
+        save_jobs(jobs)
+    return freed_bytes
+
+def retention_days(name, default):
+    return float(os.getenv(name, default))
+
+# Old job folders and GenAI debug dumps are removed on a schedule
+retention_engine = RetentionEngine([
+    RetentionPolicy('jobs', root=app.config['RESULTS_FOLDER'], remove=remove_job_data, is_protected=is_job_active,
+                    max_age_days=retention_days('JOB_RETENTION_DAYS', 30)),
+    RetentionPolicy('uploads', root=app.config['UPLOAD_FOLDER'], is_protected=is_job_active,
+                    max_age_days=retention_days('UPLOAD_RETENTION_DAYS', 7)),
+    RetentionPolicy('genai_debug', root=os.path.abspath('genai_debug'),
+                    max_age_days=retention_days('DEBUG_RETENTION_DAYS', 7))
+], interval_seconds=retention_days('RETENTION_INTERVAL_SECONDS', 3600))
+
+# Started per worker in after_fork (or before app.run), never at import: a
+# preloading gunicorn master would otherwise sweep with a stale copy of the jobs
+def start_retention():
+    """Start the retention sweeper; of several workers only the holder of the retention lock sweeps"""
+    if os.getenv('RETENTION_ENABLED', 'true').lower() == 'true':
+        retention_engine.start(lock_path=f"{app.config['JOBS_FILE']}.retention.lock")
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -340,6 +398,7 @@ def process_iflow_generation(job_id, markdown_content, iflow_name=None):
             'message': 'Initializing iFlow generator...'
         })
         save_jobs(jobs)  # Save job data to file
+        send_job_event(jobs[job_id], 'status', CALLBACK_SOURCE)
 
         # Update job status
         jobs[job_id].update({
@@ -347,6 +406,7 @@ def process_iflow_generation(job_id, markdown_content, iflow_name=None):
             'message': 'Analyzing markdown and generating iFlow...'
         })
         save_jobs(jobs)  # Save job data to file
+        send_job_event(jobs[job_id], 'status', CALLBACK_SOURCE)
 
         # Generate the iFlow
         if iflow_name is None:
@@ -381,12 +441,14 @@ def process_iflow_generation(job_id, markdown_content, iflow_name=None):
                 'iflow_name': iflow_name
             })
             save_jobs(jobs)  # Save job data to file
+            send_job_event(jobs[job_id], 'status', CALLBACK_SOURCE)
         else:
             jobs[job_id].update({
                 'status': 'failed',
                 'message': result["message"]
             })
             save_jobs(jobs)  # Save job data to file
+            send_job_event(jobs[job_id], 'status', CALLBACK_SOURCE)
 
     except Exception as e:
         logger.error(f"Error generating iFlow: {str(e)}")
@@ -395,6 +457,7 @@ def process_iflow_generation(job_id, markdown_content, iflow_name=None):
             'message': f'Error generating iFlow: {str(e)}'
         })
         save_jobs(jobs)  # Save job data to file
+        send_job_event(jobs[job_id], 'status', CALLBACK_SOURCE)
 
 @app.route('/api/jobs/<job_id>', methods=['GET', 'OPTIONS'])
 @app.route('/api/iflow-generation/<job_id>', methods=['GET', 'OPTIONS'])
@@ -549,6 +612,73 @@ def download_debug_file(job_id, file_name):
         mimetype='text/plain'
     )
 
+def notify_main_api_deployment_status(job_id):
+    """Push the deployment state of a job to the Main API job it was generated for"""
+    job = jobs.get(job_id, {})
+    main_job_id = job.get('original_job_id')
+    if not main_job_id:
+        return
+
+    # Prefer the signed callback channel when it is configured
+    if callbacks_enabled():
+        send_job_event(job, 'deployment', CALLBACK_SOURCE)
+        return
+
+    try:
+        import requests
+        main_api_url = os.getenv('MAIN_API_URL', 'http://localhost:5000')
+        details = dict(job.get('deployment_details') or {})
+        details.setdefault('iflow_name', job.get('iflow_name'))
+        details['runtime_status'] = job.get('runtime_status')
+
+        requests.post(
+            f"{main_api_url}/api/jobs/{main_job_id}/update-deployment-status",
+            json={
+                'deployment_status': job.get('deployment_status'),
+                'deployment_message': job.get('deployment_message', ''),
+                'deployment_details': details
+            },
+            timeout=10
+        )
+    except Exception as e:
+        logger.warning(f"Could not push deployment status of job {job_id} to Main API: {str(e)}")
+
+def track_runtime_status(job_id, sap_client, iflow_id, previous_deployment=None, expected_version=None):
+    """
+    Track the runtime status of a deployed iFlow and record it in the job
+
+    Call this after the job's deployment state is saved, so a fast final status
+    is not overwritten by it.
+
+    Args:
+        job_id (str): Job that deployed the iFlow
+        sap_client (SapBtpIntegration): Client of the target tenant
+        iflow_id (str): ID of the deployed iFlow
+        previous_deployment (dict, optional): Runtime artifact before the deploy
+        expected_version (str, optional): Design time version that was deployed
+    """
+    def on_status(update):
+        if job_id not in jobs:
+            return
+
+        changes = {'runtime_status': update['status']}
+        if update['final']:
+            if update['status'] == 'STARTED':
+                changes['deployment_message'] = 'iFlow deployed and started on the tenant'
+            else:
+                changes['deployment_status'] = 'failed'
+                changes['deployment_message'] = f"iFlow runtime status {update['status']}"
+                if update.get('error'):
+                    changes['runtime_error'] = update['error']
+
+        jobs[job_id].update(changes)
+        save_jobs(jobs)
+
+        if update['final']:
+            notify_main_api_deployment_status(job_id)
+
+    get_deployment_tracker().track(sap_client, iflow_id, on_status, previous_deployment, expected_version)
+
 @app.route('/api/jobs/<job_id>/deploy', methods=['POST', 'OPTIONS'])
 @app.route('/api/iflow-generation/<job_id>/deploy', methods=['POST', 'OPTIONS'])
 def deploy_to_sap(job_id):
@@ -558,7 +688,8 @@ def deploy_to_sap(job_id):
     Request body:
     {
         "package_id": "MyPackage", // Optional, will use default if not provided
-        "description": "My iFlow description" // Optional
+        "description": "My iFlow description", // Optional
+        "force": false // Optional, deploy even if the same content is already deployed
     }
     """
     # Handle OPTIONS request for CORS preflight
@@ -637,31 +768,42 @@ def deploy_to_sap(job_id):
             'deployment_message': 'Deploying to SAP Integration Suite...'
         })
         save_jobs(jobs)  # Save job data to file
+        send_job_event(jobs[job_id], 'deployment', CALLBACK_SOURCE)
 
-        # Initialize SAP BTP integration client
-        sap_client = SapBtpIntegration(
+        # Get the shared SAP BTP integration client (reuses its OAuth token and connections)
+        sap_client = get_sap_btp_client(
             tenant_url=SAP_BTP_TENANT_URL,
             client_id=SAP_BTP_CLIENT_ID,
             client_secret=SAP_BTP_CLIENT_SECRET,
             oauth_url=SAP_BTP_OAUTH_URL
         )
 
-        # Deploy the iFlow
+        # Deploy the iFlow (skipped when the same content is already deployed, unless forced)
         result = sap_client.deploy_integration_flow(
             package_id=package_id,
             iflow_name=iflow_name,
             iflow_zip_path=zip_path,
-            description=description
+            description=description,
+            force=bool(data.get('force', False))
         )
 
         # Update job status
-        jobs[job_id].update({
+        changes = {
             'deployment_status': 'completed',
             'deployment_message': 'Deployment completed successfully',
             'deployment_details': result,
             'iflow_name': iflow_name  # Preserve the iflow_name after deployment
-        })
+        }
+        if not result.get('skipped'):
+            changes['runtime_status'] = 'STARTING'
+        jobs[job_id].update(changes)
         save_jobs(jobs)  # Save job data to file
+        send_job_event(jobs[job_id], 'deployment', CALLBACK_SOURCE)
+
+        # Follow the asynchronous start of the iFlow on the tenant
+        if not result.get('skipped'):
+            track_runtime_status(job_id, sap_client, result['iflow_id'],
+                                 result.get('previous_deployment'), result.get('version'))
 
         return jsonify({
             'status': 'success',
@@ -680,6 +822,7 @@ def deploy_to_sap(job_id):
                 'iflow_name': iflow_name  # Preserve the iflow_name even on failure
             })
             save_jobs(jobs)  # Save job data to file
+            send_job_event(jobs[job_id], 'deployment', CALLBACK_SOURCE)
 
         return jsonify({
             'status': 'error',
@@ -754,7 +897,8 @@ def direct_deploy_to_sap(job_id):
     {
         "package_id": "MyPackage", // Optional, will use default if not provided
         "iflow_id": "MyIFlowId",   // Optional, will use filename without extension if not provided
-        "iflow_name": "My iFlow"   // Optional, will use filename without extension if not provided
+        "iflow_name": "My iFlow",  // Optional, will use filename without extension if not provided
+        "force": false             // Optional, deploy even if the same content is already deployed
     }
 
     Returns:
@@ -893,6 +1037,7 @@ def direct_deploy_to_sap(job_id):
             'deployment_message': 'Deploying to SAP Integration Suite using direct deployment...'
         })
         save_jobs(jobs)  # Save job data to file
+        send_job_event(jobs[job_id], 'deployment', CALLBACK_SOURCE)
 
         # Deploy the iFlow using direct deployment
         logger.info(f"Deploying iFlow using direct deployment: {zip_path}")
@@ -900,7 +1045,8 @@ def direct_deploy_to_sap(job_id):
             iflow_path=zip_path,
             iflow_id=iflow_id,
             iflow_name=iflow_name,
-            package_id=package_id
+            package_id=package_id,
+            force=bool(data.get('force', False))
         )
 
         # Update job status based on deployment result
@@ -912,6 +1058,7 @@ def direct_deploy_to_sap(job_id):
                 'iflow_name': iflow_name  # Preserve the iflow_name after successful deployment
             })
             save_jobs(jobs)  # Save job data to file
+            send_job_event(jobs[job_id], 'deployment', CALLBACK_SOURCE)
         else:
             jobs[job_id].update({
                 'deployment_status': 'failed',
@@ -920,6 +1067,7 @@ def direct_deploy_to_sap(job_id):
                 'iflow_name': iflow_name  # Preserve the iflow_name even on failure
             })
             save_jobs(jobs)  # Save job data to file
+            send_job_event(jobs[job_id], 'deployment', CALLBACK_SOURCE)
 
         # Return the deployment result
         return jsonify(deployment_result), 200 if deployment_result['status'] == 'success' else 500
@@ -935,6 +1083,7 @@ def direct_deploy_to_sap(job_id):
                 'iflow_name': iflow_name  # Preserve the iflow_name even on exception
             })
             save_jobs(jobs)  # Save job data to file
+            send_job_event(jobs[job_id], 'deployment', CALLBACK_SOURCE)
 
         return jsonify({
             'status': 'error',
@@ -943,4 +1092,6 @@ def direct_deploy_to_sap(job_id):
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5002))  # Changed from 5001 to 5002 to match startup script
-    app.run(host='0.0.0.0', port=port, debug=True)
+    # Development server; production runs gunicorn with gunicorn.conf.py (see Procfile)
+    start_retention()
+    app.run(host='0.0.0.0', port=port, debug=os.getenv('FLASK_DEBUG', 'false').lower() == 'true', use_reloader=False)
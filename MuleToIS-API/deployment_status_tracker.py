@@ -0,0 +1,234 @@
+"""
+Background tracker for the runtime status of deployed integration flows.
+
+After a deploy request is accepted the tenant starts the iFlow asynchronously.
+The tracker polls the tenant's runtime artifacts until each tracked iFlow reaches
+STARTED or ERROR and reports the result through a callback. One poller runs per
+tenant and fetches the status of all tracked iFlows in a single request, so many
+concurrent deployments to the same tenant cost one poll per interval. The
+interval starts short and doubles while nothing changes.
+
+A redeployed iFlow keeps its old runtime artifact until the tenant replaces it,
+so a STARTED or ERROR status is only taken as final once the artifact's
+DeployedOn differs from the one seen before the deploy and its version is the
+one just deployed; until then the iFlow is reported as PENDING.
+"""
+
+import time
+import logging
+import threading
+
+from sap_btp_integration import SapThrottledError
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Runtime states after which an iFlow is no longer tracked
+FINAL_RUNTIME_STATUSES = ('STARTED', 'ERROR')
+
+# Status reported before the iFlow shows up in the runtime artifact list
+PENDING_RUNTIME_STATUS = 'PENDING'
+
+# Status reported when an iFlow did not reach a final state in time
+TIMEOUT_RUNTIME_STATUS = 'TIMEOUT'
+
+class DeploymentStatusTracker:
+    """
+    Polls runtime artifact status per tenant with exponential backoff
+    """
+
+    def __init__(self, min_interval=2, max_interval=60, timeout=900):
+        """
+        Initialize the tracker
+
+        Args:
+            min_interval (float): Seconds between polls right after a change
+            max_interval (float): Upper bound of the poll interval
+            timeout (float): Seconds after which an iFlow that never reached a final state is reported as TIMEOUT
+        """
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._tenants = {}  # tenant_url -> {'client', 'watches', 'wake'}
+
+    def track(self, sap_client, iflow_id, callback, previous_deployment=None, expected_version=None):
+        """
+        Start tracking the runtime status of a deployed iFlow
+
+        The callback receives a dict with iflow_id, status, final and error. It is
+        called whenever the status changes and once more with final=True.
+
+        Args:
+            sap_client (SapBtpIntegration): Client of the tenant the iFlow was deployed to
+            iflow_id (str): ID of the deployed iFlow
+            callback (callable): Called with status updates
+            previous_deployment (dict, optional): Runtime artifact before the deploy
+                (see SapBtpIntegration.deploy_uploaded_flow)
+            expected_version (str, optional): Design time version that was deployed
+        """
+        watch = {
+            'callback': callback,
+            'started_at': time.time(),
+            'last_status': None,
+            'previous_deployed_on': (previous_deployment or {}).get('deployed_on'),
+            'expected_version': expected_version
+        }
+
+        with self._lock:
+            tenant = self._tenants.get(sap_client.tenant_url)
+            if tenant is None:
+                tenant = {'client': sap_client, 'watches': {}, 'wake': threading.Event()}
+                self._tenants[sap_client.tenant_url] = tenant
+                thread = threading.Thread(target=self._poll_tenant, args=(sap_client.tenant_url,))
+                thread.daemon = True
+                thread.start()
+            tenant['watches'].setdefault(iflow_id, []).append(watch)
+
+        # Poll soon for the new iFlow instead of waiting out a long backoff
+        tenant['wake'].set()
+
+    def tracked(self):
+        """
+        Get the iFlows currently being tracked
+
+        Returns:
+            dict: Lists of iFlow IDs keyed by tenant URL
+        """
+        with self._lock:
+            return {url: list(tenant['watches']) for url, tenant in self._tenants.items()}
+
+    def _poll_tenant(self, tenant_url):
+        """Poll one tenant until no iFlow on it is tracked any more"""
+        interval = self.min_interval
+
+        while True:
+            with self._lock:
+                tenant = self._tenants[tenant_url]
+                if not tenant['watches']:
+                    del self._tenants[tenant_url]
+                    return
+                tenant['wake'].clear()
+                iflow_ids = list(tenant['watches'])
+                sap_client = tenant['client']
+
+            changed = False
+            try:
+                artifacts = sap_client.get_runtime_artifacts()
+                for iflow_id in iflow_ids:
+                    if self._update(tenant, iflow_id, artifacts.get(iflow_id)):
+                        changed = True
+            except SapThrottledError as e:
+                interval = max(interval, e.retry_after or 0)
+                logger.warning(f"Runtime status polling throttled by {tenant_url}")
+                self._expire(tenant, "Runtime status polling throttled by the tenant")
+            except Exception as e:
+                logger.error(f"Error polling runtime status on {tenant_url}: {str(e)}")
+                self._expire(tenant, f"Error polling runtime status: {str(e)}")
+
+            interval = self.min_interval if changed else min(interval * 2, self.max_interval)
+            tenant['wake'].wait(interval)
+            if tenant['wake'].is_set():
+                interval = self.min_interval
+
+    def _expire(self, tenant, error):
+        """Report watches past the timeout as TIMEOUT when the tenant cannot be polled"""
+        now = time.time()
+        expired = []
+        with self._lock:
+            for iflow_id, watches in list(tenant['watches'].items()):
+                remaining = [watch for watch in watches if now - watch['started_at'] <= self.timeout]
+                expired.extend((iflow_id, watch) for watch in watches if now - watch['started_at'] > self.timeout)
+                if remaining:
+                    tenant['watches'][iflow_id] = remaining
+                else:
+                    tenant['watches'].pop(iflow_id, None)
+
+        for iflow_id, watch in expired:
+            try:
+                watch['callback']({
+                    'iflow_id': iflow_id,
+                    'status': TIMEOUT_RUNTIME_STATUS,
+                    'final': True,
+                    'error': error
+                })
+            except Exception as e:
+                logger.error(f"Error in deployment status callback for {iflow_id}: {str(e)}")
+
+    @staticmethod
+    def _watch_status(watch, artifact):
+        """Runtime status of the deployment a watch waits for; PENDING while the tenant still shows an older one"""
+        if not artifact:
+            return PENDING_RUNTIME_STATUS
+        if watch['previous_deployed_on'] and artifact.get('deployed_on') == watch['previous_deployed_on']:
+            return PENDING_RUNTIME_STATUS
+        if watch['expected_version'] and artifact.get('version') and artifact['version'] != watch['expected_version']:
+            return PENDING_RUNTIME_STATUS
+        return artifact.get('status') or PENDING_RUNTIME_STATUS
+
+    def _update(self, tenant, iflow_id, artifact):
+        """
+        Apply a polled runtime artifact to the watches of one iFlow
+
+        Returns:
+            bool: True if the status changed for any watch
+        """
+        with self._lock:
+            statuses = [self._watch_status(watch, artifact) for watch in tenant['watches'].get(iflow_id, [])]
+        error = tenant['client'].get_runtime_error(iflow_id) if 'ERROR' in statuses else None
+        now = time.time()
+        changed = False
+
+        with self._lock:
+            watches = tenant['watches'].get(iflow_id, [])
+            notify = []
+            remaining = []
+            for watch in watches:
+                status = self._watch_status(watch, artifact)
+                final = status in FINAL_RUNTIME_STATUSES
+                if final:
+                    notify.append((watch, status, True))
+                elif now - watch['started_at'] > self.timeout:
+                    notify.append((watch, TIMEOUT_RUNTIME_STATUS, True))
+                else:
+                    if watch['last_status'] != status:
+                        notify.append((watch, status, False))
+                    remaining.append(watch)
+                if watch['last_status'] != status:
+                    changed = True
+                watch['last_status'] = status
+
+            if remaining:
+                tenant['watches'][iflow_id] = remaining
+            else:
+                tenant['watches'].pop(iflow_id, None)
+
+        for watch, reported_status, is_final in notify:
+            try:
+                watch['callback']({
+                    'iflow_id': iflow_id,
+                    'status': reported_status,
+                    'final': is_final,
+                    'error': error
+                })
+            except Exception as e:
+                logger.error(f"Error in deployment status callback for {iflow_id}: {str(e)}")
+
+        return changed
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+def get_deployment_tracker():
+    """
+    Get the process-wide deployment status tracker
+
+    Returns:
+        DeploymentStatusTracker: Tracker instance
+    """
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = DeploymentStatusTracker()
+        return _tracker
@@ -6,12 +6,14 @@ This module uses a direct API approach to deploy iFlows to SAP Integration Suite
 import os
 import requests
 import base64
-import json
 import time
 import sys
 import logging
 from dotenv import load_dotenv
 
+from sap_token_cache import token_cache, authorized_request
+from deployment_ledger import compute_iflow_hash, get_deployment_ledger, fetch_artifact_state, current_version
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -59,7 +61,31 @@ class DirectIflowDeployment:
         # Force output to be displayed immediately
         sys.stdout.flush()
 
-    def deploy_iflow(self, iflow_path, iflow_id=None, iflow_name=None, package_id="WithRequestReply"):
+    def _request(self, method, url, headers=None, **kwargs):
+        """
+        Send a request with the cached OAuth token over the pooled session
+        
+        Args:
+            method (str): HTTP method
+            url (str): Request URL
+            headers (dict, optional): Extra request headers
+            **kwargs: Passed to requests
+            
+        Returns:
+            requests.Response: The response
+        """
+        return authorized_request(
+            method,
+            url,
+            self.token_url,
+            self.client_id,
+            self.client_secret,
+            credentials_in_body=True,
+            headers=headers,
+            **kwargs
+        )
+
+    def deploy_iflow(self, iflow_path, iflow_id=None, iflow_name=None, package_id="WithRequestReply", force=False):
         """
         Deploy an iFlow to SAP Integration Suite
         
@@ -68,6 +94,7 @@ class DirectIflowDeployment:
             iflow_id (str, optional): Technical ID for the iFlow. If None, derived from filename
             iflow_name (str, optional): Display name for the iFlow. If None, derived from filename
             package_id (str, optional): ID of the package where the iFlow will be deployed
+            force (bool, optional): Deploy even if the same content is already deployed
             
         Returns:
             dict: Deployment result with status and message
@@ -99,41 +126,38 @@ class DirectIflowDeployment:
             self.log(f"Found iFlow file: {iflow_path} ({file_size} bytes)")
         
         try:
-            # Step 1: Get OAuth token
+            # Skip the upload when this exact content is already deployed to the tenant
+            ledger = get_deployment_ledger()
+            content_hash = compute_iflow_hash(iflow_path)
+            # This client only uploads the design time artifact, so only that is checked
+            api_base = f"{self.base_url}/api/v1"
+            if not force and ledger.is_unchanged(
+                self.base_url, iflow_id, content_hash,
+                lambda: fetch_artifact_state(self._request, api_base, iflow_id, runtime=False)
+            ):
+                self.log(f"iFlow {iflow_id} is unchanged, skipping deployment")
+                return {
+                    "status": "success",
+                    "message": "iFlow unchanged, deployment skipped",
+                    "iflow_id": iflow_id,
+                    "package_id": package_id,
+                    "iflow_name": iflow_name,
+                    "skipped": True
+                }
+            
+            # Step 1: Get OAuth token (reused from the process-wide cache when still valid)
             self.log("Getting OAuth token...")
             try:
-                response = requests.post(
-                    self.token_url,
-                    data={
-                        "grant_type": "client_credentials",
-                        "client_id": self.client_id,
-                        "client_secret": self.client_secret
-                    },
-                    headers={
-                        "Content-Type": "application/x-www-form-urlencoded"
-                    },
-                    timeout=30
-                )
-                
-                self.log(f"OAuth response status: {response.status_code}")
-                
-                if response.status_code != 200:
-                    error_msg = f"Failed to get OAuth token: {response.text}"
-                    self.log(error_msg)
-                    return {"status": "error", "message": error_msg}
-                
-                try:
-                    oauth_token = response.json()["access_token"]
-                    self.log("OAuth token obtained successfully")
-                except (json.JSONDecodeError, KeyError) as e:
-                    error_msg = f"Error parsing OAuth response: {e}"
-                    self.log(error_msg)
-                    self.log(f"Response content: {response.text}")
-                    return {"status": "error", "message": error_msg}
+                token_cache.get_token(self.token_url, self.client_id, self.client_secret, credentials_in_body=True)
+                self.log("OAuth token obtained successfully")
             except requests.exceptions.RequestException as e:
                 error_msg = f"Network error during OAuth request: {e}"
                 self.log(error_msg)
                 return {"status": "error", "message": error_msg}
+            except Exception as e:
+                error_msg = f"Failed to get OAuth token: {e}"
+                self.log(error_msg)
+                return {"status": "error", "message": error_msg}
             
             # Step 2: Try to get CSRF token
             self.log("Getting CSRF token...")
@@ -142,10 +166,10 @@ class DirectIflowDeployment:
             for endpoint in ["/api/v1/IntegrationDesigntimeArtifacts", "/itspaces/api/1.0/workspace"]:
                 self.log(f"Trying CSRF endpoint: {self.base_url}{endpoint}")
                 try:
-                    response = requests.get(
+                    response = self._request(
+                        "GET",
                         f"{self.base_url}{endpoint}",
                         headers={
-                            "Authorization": f"Bearer {oauth_token}",
                             "X-CSRF-Token": "Fetch"
                         },
                         timeout=30
@@ -191,7 +215,6 @@ class DirectIflowDeployment:
             self.log("Uploading iFlow...")
             
             headers = {
-                "Authorization": f"Bearer {oauth_token}",
                 "Accept": "application/json",
                 "Content-Type": "application/json",
                 "DataServiceVersion": "2.0"
@@ -214,7 +237,8 @@ class DirectIflowDeployment:
                     self.log("Sending upload request...")
                     
                     # Make the request with a longer timeout
-                    response = requests.post(
+                    response = self._request(
+                        "POST",
                         f"{self.base_url}{endpoint}",
                         headers=headers,
                         json=payload,
@@ -233,6 +257,8 @@ class DirectIflowDeployment:
                     self.log(f"Network error during upload to {endpoint}: {e}")
             
             if success:
+                ledger.record(self.base_url, iflow_id, content_hash, runtime=False,
+                              version=current_version(self._request, api_base, iflow_id), package_id=package_id)
                 return {
                     "status": "success",
                     "message": "iFlow deployed successfully",
@@ -252,7 +278,7 @@ class DirectIflowDeployment:
             return {"status": "error", "message": error_msg}
 
 # Function to deploy an iFlow directly
-def deploy_iflow(iflow_path, iflow_id=None, iflow_name=None, package_id="WithRequestReply"):
+def deploy_iflow(iflow_path, iflow_id=None, iflow_name=None, package_id="WithRequestReply", force=False):
     """
     Deploy an iFlow to SAP Integration Suite
     
@@ -261,12 +287,13 @@ def deploy_iflow(iflow_path, iflow_id=None, iflow_name=None, package_id="WithReq
         iflow_id (str, optional): Technical ID for the iFlow. If None, derived from filename
         iflow_name (str, optional): Display name for the iFlow. If None, derived from filename
         package_id (str, optional): ID of the package where the iFlow will be deployed
+        force (bool, optional): Deploy even if the same content is already deployed
         
     Returns:
         dict: Deployment result with status and message
     """
     deployment = DirectIflowDeployment()
-    return deployment.deploy_iflow(iflow_path, iflow_id, iflow_name, package_id)
+    return deployment.deploy_iflow(iflow_path, iflow_id, iflow_name, package_id, force)
 
 # Test function
 def test_deploy_iflow():
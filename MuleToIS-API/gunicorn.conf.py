@@ -0,0 +1,38 @@
+# gunicorn.conf.py - Pre-fork production server settings (used by the Procfile)
+#
+# The app is imported once in the master (preload_app), including its warm-up
+# work (templates, NLTK data, documentation modules in the Main API), so every
+# worker starts warm and shares those pages. Preloading does no network work;
+# each worker opens its own database connections and LLM clients (and, in the
+# Main API, loads the recipe catalog) once it has loaded the app. With more
+# than one worker, job state lives in the shared SQLite job store
+# (JOB_STORE=sqlite) so status requests can be served by any worker, and the
+# retention sweeper started in every worker only runs in the one holding its
+# lock file.
+
+import os
+import sys
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '600'))
+graceful_timeout = 30
+keepalive = 5
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+accesslog = '-' if os.getenv('GUNICORN_ACCESS_LOG', 'false').lower() == 'true' else None
+
+# Settings the app reads at import time, so they must be set before it is preloaded
+if workers > 1:
+    os.environ.setdefault('JOB_STORE', 'sqlite')
+if preload_app:
+    os.environ.setdefault('STARTUP_WARMUP', 'preload')
+
+def post_worker_init(worker):
+    """Give the new worker its own connections, LLM clients and background threads"""
+    app_module = sys.modules.get('app')
+    after_fork = getattr(app_module, 'after_fork', None)
+    if after_fork:
+        after_fork()
+        worker.log.info(f"Worker {worker.pid} ready")
@@ -0,0 +1,117 @@
+"""
+Signed job event callbacks from this generator service to the Main API.
+
+Progress, completion and deployment events are POSTed to the Main API's
+/api/callbacks/job-events endpoint. Each request carries an HMAC-SHA256 signature
+over "<timestamp>.<body>" made with JOB_CALLBACK_SECRET, which the Main API
+shares. Events are delivered in order by one background sender with retries;
+callbacks are disabled when no secret is configured.
+"""
+
+import os
+import hmac
+import json
+import time
+import queue
+import hashlib
+import logging
+import threading
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Job fields forwarded to the Main API
+CALLBACK_JOB_FIELDS = (
+    'status', 'message', 'iflow_name', 'deployment_status', 'deployment_message',
+    'deployment_details', 'runtime_status', 'runtime_error'
+)
+
+CALLBACK_MAX_ATTEMPTS = 3
+
+def sign_payload(secret, timestamp, body):
+    """
+    Sign a callback body
+
+    Args:
+        secret (str): Shared callback secret
+        timestamp (str): UNIX timestamp sent in X-Callback-Timestamp
+        body (bytes): Raw request body
+
+    Returns:
+        str: Signature for the X-Callback-Signature header
+    """
+    digest = hmac.new(secret.encode('utf-8'), f"{timestamp}.".encode('utf-8') + body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+def callbacks_enabled():
+    """Check whether a callback secret is configured"""
+    return bool(os.getenv('JOB_CALLBACK_SECRET'))
+
+_event_queue = queue.Queue()
+_sender = None
+_sender_lock = threading.Lock()
+
+def send_job_event(job, event, source):
+    """
+    Queue a signed callback for a job that was started by the Main API
+
+    Args:
+        job (dict): Local job record; jobs without original_job_id are ignored
+        event (str): 'status' or 'deployment'
+        source (str): Name of this service, e.g. 'boomi' or 'mule'
+    """
+    if not callbacks_enabled() or not job or not job.get('original_job_id'):
+        return
+
+    payload = {
+        'event': event,
+        'source': source,
+        'job_id': job.get('id'),
+        'main_job_id': job['original_job_id'],
+        'sent_at': time.time(),
+        'job': {field: job[field] for field in CALLBACK_JOB_FIELDS if field in job}
+    }
+
+    _ensure_sender()
+    _event_queue.put(payload)
+
+def _ensure_sender():
+    """Start the background sender thread once"""
+    global _sender
+    with _sender_lock:
+        if _sender is None or not _sender.is_alive():
+            _sender = threading.Thread(target=_sender_loop, daemon=True)
+            _sender.start()
+
+def _sender_loop():
+    """Deliver queued events in order"""
+    import requests
+
+    while True:
+        payload = _event_queue.get()
+        main_api_url = os.getenv('MAIN_API_URL', 'http://localhost:5000').rstrip('/')
+        body = json.dumps(payload).encode('utf-8')
+
+        for attempt in range(1, CALLBACK_MAX_ATTEMPTS + 1):
+            timestamp = str(int(time.time()))
+            try:
+                response = requests.post(
+                    f"{main_api_url}/api/callbacks/job-events",
+                    data=body,
+                    headers={
+                        'Content-Type': 'application/json',
+                        'X-Callback-Timestamp': timestamp,
+                        'X-Callback-Signature': sign_payload(os.getenv('JOB_CALLBACK_SECRET', ''), timestamp, body)
+                    },
+                    timeout=10
+                )
+                if response.status_code < 500:
+                    if response.status_code >= 400:
+                        logger.warning(f"Main API rejected {payload['event']} callback for job {payload['job_id']}: {response.status_code}")
+                    break
+            except Exception as e:
+                logger.warning(f"Callback for job {payload['job_id']} failed (attempt {attempt}): {str(e)}")
+
+            if attempt < CALLBACK_MAX_ATTEMPTS:
+                time.sleep(2 ** attempt)
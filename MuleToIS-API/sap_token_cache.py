@@ -0,0 +1,232 @@
+"""
+Process-wide OAuth token cache and pooled HTTP sessions for SAP Integration Suite clients.
+
+SapBtpIntegration, DirectIflowDeployment and the CI/CD scripts share one token per
+(token URL, client ID) and one keep-alive session per host, so repeated deployments
+reuse both the client-credentials token and the TLS connection.
+"""
+
+import base64
+import logging
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Refresh tokens this many seconds before they expire
+TOKEN_EXPIRY_MARGIN = 60
+
+# Token lifetime assumed when the token response has no expires_in
+DEFAULT_TOKEN_LIFETIME = 3600
+
+# Connections kept open per host
+SESSION_POOL_SIZE = 20
+
+class TokenCache:
+    """
+    Thread-safe, expiry-aware cache of client-credentials access tokens
+    """
+
+    def __init__(self, expiry_margin=TOKEN_EXPIRY_MARGIN):
+        """
+        Initialize the token cache
+
+        Args:
+            expiry_margin (int): Seconds before expiry at which a token is refreshed
+        """
+        self.expiry_margin = expiry_margin
+        self._tokens = {}  # (token_url, client_id) -> (access_token, expires_at, refresh_at)
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _lock_for(self, key):
+        """Get the lock that serializes token requests for one client"""
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _cached(self, key):
+        """Return the cached (token, expires_at, refresh_at) if it is still valid"""
+        cached = self._tokens.get(key)
+        if cached and cached[2] > time.time():
+            return cached
+        return None
+
+    def get_token(self, token_url, client_id, client_secret, credentials_in_body=False):
+        """
+        Get a valid access token, requesting a new one only when needed
+
+        Concurrent callers for the same client wait for a single token request.
+
+        Args:
+            token_url (str): OAuth token URL
+            client_id (str): OAuth client ID
+            client_secret (str): OAuth client secret
+            credentials_in_body (bool): Send the credentials as form fields instead of Basic auth
+
+        Returns:
+            str: Access token
+        """
+        key = (token_url, client_id)
+
+        cached = self._cached(key)
+        if cached:
+            return cached[0]
+
+        with self._lock_for(key):
+            # Another thread may have fetched the token while we waited
+            cached = self._cached(key)
+            if cached:
+                return cached[0]
+
+            access_token, expires_in = self._request_token(token_url, client_id, client_secret, credentials_in_body)
+            # Short-lived tokens are refreshed halfway through their lifetime instead
+            # of on every call
+            margin = min(self.expiry_margin, expires_in // 2)
+            now = time.time()
+            self._tokens[key] = (access_token, now + expires_in, now + expires_in - margin)
+            logger.info(f"Obtained OAuth token for {client_id[:12]}... (expires in {expires_in}s)")
+            return access_token
+
+    def get_expiry(self, token_url, client_id):
+        """
+        Get the expiry time of the cached token
+
+        Returns:
+            float: Expiry as a UNIX timestamp, or 0 if no token is cached
+        """
+        cached = self._tokens.get((token_url, client_id))
+        return cached[1] if cached else 0
+
+    def invalidate(self, token_url, client_id, access_token=None):
+        """
+        Drop a cached token, e.g. after the tenant rejected it with 401
+
+        Args:
+            token_url (str): OAuth token URL
+            client_id (str): OAuth client ID
+            access_token (str, optional): Only drop the cached token if it is this one,
+                so a token refreshed by another thread is kept
+        """
+        key = (token_url, client_id)
+        with self._lock_for(key):
+            cached = self._tokens.get(key)
+            if cached and (access_token is None or cached[0] == access_token):
+                del self._tokens[key]
+
+    def clear(self):
+        """Drop all cached tokens"""
+        with self._guard:
+            self._tokens.clear()
+
+    def _request_token(self, token_url, client_id, client_secret, credentials_in_body):
+        """Request a new token with the client-credentials grant"""
+        headers = {
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'Accept': 'application/json'
+        }
+        data = {
+            'grant_type': 'client_credentials'
+        }
+
+        if credentials_in_body:
+            data['client_id'] = client_id
+            data['client_secret'] = client_secret
+        else:
+            auth_string = f"{client_id}:{client_secret}"
+            headers['Authorization'] = f"Basic {base64.b64encode(auth_string.encode()).decode()}"
+
+        response = get_session(token_url).post(token_url, headers=headers, data=data, timeout=30)
+
+        if response.status_code != 200:
+            logger.error(f"Failed to get auth token: {response.status_code} - {response.text}")
+            raise Exception(f"Failed to get auth token: {response.status_code}")
+
+        token_data = response.json()
+        access_token = token_data.get('access_token')
+        if not access_token:
+            raise Exception("Failed to get auth token: no access_token in response")
+
+        try:
+            expires_in = int(token_data.get('expires_in', DEFAULT_TOKEN_LIFETIME))
+        except (TypeError, ValueError):
+            expires_in = DEFAULT_TOKEN_LIFETIME
+
+        return access_token, expires_in
+
+# Process-wide token cache
+token_cache = TokenCache()
+
+# Keep-alive sessions keyed by scheme and host
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+def get_session(url):
+    """
+    Get the pooled keep-alive session for the host of a URL
+
+    Args:
+        url (str): Any URL on the host
+
+    Returns:
+        requests.Session: Shared session for that host
+    """
+    parsed = urlparse(url)
+    key = f"{parsed.scheme}://{parsed.netloc}"
+
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=SESSION_POOL_SIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _sessions[key] = session
+        return session
+
+def reset_sessions():
+    """Drop pooled sessions, e.g. in a freshly forked worker whose sockets belong to the parent"""
+    with _sessions_lock:
+        _sessions.clear()
+
+def authorized_request(method, url, token_url, client_id, client_secret, credentials_in_body=False,
+                       headers=None, **kwargs):
+    """
+    Send a request with a cached bearer token over the pooled session
+
+    If the tenant answers 401 the cached token is dropped and the request is
+    retried once with a fresh token.
+
+    Args:
+        method (str): HTTP method
+        url (str): Request URL
+        token_url (str): OAuth token URL
+        client_id (str): OAuth client ID
+        client_secret (str): OAuth client secret
+        credentials_in_body (bool): Send the credentials as form fields instead of Basic auth
+        headers (dict, optional): Extra request headers
+        **kwargs: Passed to requests.Session.request
+
+    Returns:
+        requests.Response: The response
+    """
+    session = get_session(url)
+    request_headers = dict(headers or {})
+
+    access_token = token_cache.get_token(token_url, client_id, client_secret, credentials_in_body)
+    request_headers['Authorization'] = f'Bearer {access_token}'
+    response = session.request(method, url, headers=request_headers, **kwargs)
+
+    if response.status_code == 401:
+        logger.info("Access token rejected, refreshing and retrying once")
+        token_cache.invalidate(token_url, client_id, access_token)
+        access_token = token_cache.get_token(token_url, client_id, client_secret, credentials_in_body)
+        request_headers['Authorization'] = f'Bearer {access_token}'
+        response = session.request(method, url, headers=request_headers, **kwargs)
+
+    return response
@@ -1,3 +1,6 @@
+import time
+STARTUP_STARTED = time.perf_counter()
+
 import os
 import sys
 import uuid
@@ -9,26 +12,43 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
-from flask import Flask, request, jsonify, send_file, render_template
+from flask import Flask, request, jsonify, send_file, render_template, Response, stream_with_context
 from utils.cors_helper import enable_cors
+from utils.upload_stream import save_upload_stream
+from utils.retention import RetentionEngine, RetentionPolicy, path_usage, remove_path
+from utils.lazy_import import LazyAttribute, timed_import, get_import_timings, warm_up
+from utils.job_store import SharedJobStore, open_job_store, job_store_path, shared_store_enabled
+from utils.llm_clients import reset_clients, warm_clients
+from database_integration.write_buffer import WriteBehindBuffer
 from werkzeug.utils import secure_filename
 import threading
-import time
+import queue
+import hashlib
+import hmac
+import socket
+import importlib.util
 from datetime import datetime
 import logging
 
-# Import document processor for direct documentation upload
-try:
-    from document_processor import DocumentProcessor
-    document_processor = DocumentProcessor()
-    print("Document processor initialized successfully")
-except Exception as e:
-    print(f"Warning: Document processor initialization failed: {str(e)}")
-    document_processor = None
+# Document processor for direct documentation upload, created on first use
+document_processor = None
+document_processor_lock = threading.Lock()
+
+def get_document_processor():
+    """Create the document processor once; returns None if it cannot be initialized"""
+    global document_processor
+    if document_processor is None:
+        with document_processor_lock:
+            if document_processor is None:
+                try:
+                    document_processor = timed_import('document_processor').DocumentProcessor()
+                    print("Document processor initialized successfully")
+                except Exception as e:
+                    print(f"Warning: Document processor initialization failed: {str(e)}")
+    return document_processor
 
 # Import database integration
 try:
-    import io
     # Try local import first (for Cloud Foundry deployment)
     try:
         from database_integration.integrated_manager import integrated_manager
@@ -44,13 +64,6 @@ except ImportError as e:
     print(f"⚠️ Database integration not available: {e}")
     DATABASE_ENABLED = False
 
-# Set up NLTK data
-try:
-    import nltk_setup
-    print("NLTK setup completed")
-except Exception as e:
-    print(f"Warning: NLTK setup failed: {str(e)}")
-
 # Run startup checks
 try:
     import cf_startup_check
@@ -135,15 +148,20 @@ except ImportError:
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "final"))
 
-# Import the enhanced documentation generator
-try:
-    from enhanced_doc_generator import generate_enhanced_documentation
-except ImportError:
-    print("Enhanced documentation generator not found. Using standard generator.")
-    use_enhanced_generator = False
-else:
-    use_enhanced_generator = True
+def module_available(module_name):
+    """Check that a module can be found, without importing it"""
+    try:
+        return importlib.util.find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        return False
+
+# The enhanced documentation generator is imported on first use
+use_enhanced_generator = module_available('enhanced_doc_generator')
+if use_enhanced_generator:
+    generate_enhanced_documentation = LazyAttribute('enhanced_doc_generator', 'generate_enhanced_documentation')
     print("Using enhanced documentation generator with support for additional file types.")
+else:
+    print("Enhanced documentation generator not found. Using standard generator.")
 
 # Custom patch for LLMDocumentationEnhancer to use Anthropic
 class CustomLLMDocumentationEnhancer:
@@ -240,22 +258,24 @@ class CustomLLMDocumentationEnhancer:
             logging.error(f"Error type: {type(e).__name__}")
             return base_documentation
 
-# Import the documentation generators
-try:
-    from mule_flow_documentation import MuleFlowParser, HTMLGenerator, FlowDocumentationGenerator
-    from md_to_html_with_mermaid import convert_markdown_to_html
-    # Use our custom enhancer instead of the original
-    LLMDocumentationEnhancer = CustomLLMDocumentationEnhancer
-
-    # Import Boomi documentation generator
-    from boomi_flow_documentation import BoomiFlowDocumentationGenerator
-    boomi_generator_available = True
-    print("Boomi documentation generator loaded successfully")
-except ImportError as e:
-    print(f"Error importing documentation modules: {e}")
-    boomi_generator_available = False
+# The documentation generators (markdown, LLM clients, parsers) are imported on first use
+DOCUMENTATION_MODULES = ['mule_flow_documentation', 'md_to_html_with_mermaid', 'boomi_flow_documentation']
+missing_modules = [name for name in DOCUMENTATION_MODULES if not module_available(name)]
+if missing_modules:
+    print(f"Error importing documentation modules: {', '.join(missing_modules)} not found")
     sys.exit(1)
 
+MuleFlowParser = LazyAttribute('mule_flow_documentation', 'MuleFlowParser')
+HTMLGenerator = LazyAttribute('mule_flow_documentation', 'HTMLGenerator')
+FlowDocumentationGenerator = LazyAttribute('mule_flow_documentation', 'FlowDocumentationGenerator')
+convert_markdown_to_html = LazyAttribute('md_to_html_with_mermaid', 'convert_markdown_to_html')
+# Use our custom enhancer instead of the original
+LLMDocumentationEnhancer = CustomLLMDocumentationEnhancer
+
+BoomiFlowDocumentationGenerator = LazyAttribute('boomi_flow_documentation', 'BoomiFlowDocumentationGenerator')
+process_graphs_for_llm = LazyAttribute('boomi_process_graph', 'process_graphs_for_llm')
+boomi_generator_available = True
+
 # Configure Flask app
 app.config['UPLOAD_FOLDER'] = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
 app.config['RESULTS_FOLDER'] = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
@@ -281,6 +301,8 @@ def load_jobs():
 
 # Function to save jobs to JSON file (fallback)
 def save_jobs(jobs_dict):
+    if isinstance(jobs_dict, SharedJobStore):
+        return  # Every change is already stored
     try:
         with open(app.config['JOBS_FILE'], 'w') as f:
             json.dump(jobs_dict, f, indent=2)
@@ -300,17 +322,44 @@ if use_database and DATABASE_ENABLED:
     jobs = {}  # Keep empty dict for compatibility
     logging.info("Using database for job storage")
 else:
-    # Fall back to file-based storage
-    jobs = load_jobs()
+    # Fall back to file-based storage (or the shared job store when running several workers)
+    jobs = open_job_store(app.config['JOBS_FILE'], load_jobs)
     use_database = False  # Force file-based storage
     logging.info(f"Using file-based storage, loaded {len(jobs)} jobs from jobs.json")
 
+if isinstance(jobs, SharedJobStore):
+    job_store = jobs
+elif shared_store_enabled():
+    # Jobs live in the database; the shared store only carries change versions between workers
+    job_store = SharedJobStore(job_store_path(app.config['JOBS_FILE']))
+else:
+    job_store = None
+
+def write_job_updates(updates_by_job):
+    """Apply buffered job updates to the database in one transaction"""
+    with app.app_context():
+        db_manager.update_jobs(updates_by_job)
+
+def save_dropped_job_update(kind, job_id, updates):
+    """Keep a job update the database kept rejecting in the jobs file instead of losing it"""
+    jobs.setdefault(job_id, {'id': job_id}).update(updates)
+    jobs[job_id]['last_updated'] = datetime.now().isoformat()
+    save_jobs(jobs)
+
+# Progress updates are merged per job and written behind, so processing never waits on the database
+job_db_writes = WriteBehindBuffer(
+    write_job_updates,
+    flush_interval=float(os.getenv('DB_FLUSH_INTERVAL_SECONDS', '1.0')),
+    name='jobs-db',
+    on_drop=save_dropped_job_update
+)
+
 # Save the job state
 def update_job(job_id, updates):
     """Update a job's data and save to persistent storage"""
     if use_database:
         try:
-            db_manager.update_job(job_id, **updates)
+            job_db_writes.update(job_id, updates)
         except Exception as e:
             logging.error(f"Failed to update job {job_id} in database: {str(e)}")
             # Fall back to file storage
@@ -324,12 +373,58 @@ def update_job(job_id, updates):
             jobs[job_id]['last_updated'] = datetime.now().isoformat()
             save_jobs(jobs)
 
+    notify_job_changed(job_id)
+
+# Wakes long-poll and event-stream readers when a job changes
+job_change_condition = threading.Condition()
+job_versions = {}
+
+# Other workers cannot wake this process, so waiters re-check the shared version this often
+JOB_WAIT_POLL_SECONDS = float(os.getenv('JOB_WAIT_POLL_SECONDS', '0.5'))
+
+def notify_job_changed(job_id):
+    """Bump the version of a job and wake its waiting readers"""
+    # Store I/O happens outside the condition, so it never holds up waiters or other notifiers
+    version = job_store.bump_version(job_id) if job_store is not None else None
+    with job_change_condition:
+        if version is None:
+            version = job_versions.get(job_id, 0) + 1
+        job_versions[job_id] = max(version, job_versions.get(job_id, 0))
+        job_change_condition.notify_all()
+
+def get_job_version(job_id):
+    """Current version of a job, as seen by all workers"""
+    if job_store is not None:
+        return job_store.version(job_id)
+    return job_versions.get(job_id, 0)
+
+def wait_for_job_change(job_id, since_version, timeout):
+    """
+    Wait until a job's version is newer than since_version
+
+    Returns:
+        int: The current version of the job
+    """
+    deadline = time.time() + timeout
+    while True:
+        version = get_job_version(job_id)
+        remaining = deadline - time.time()
+        if version > since_version or remaining <= 0:
+            return version
+        with job_change_condition:
+            # A change notified by this worker since the read is seen here without store I/O
+            if job_versions.get(job_id, 0) <= since_version:
+                job_change_condition.wait(min(remaining, JOB_WAIT_POLL_SECONDS) if job_store is not None else remaining)
+
 def get_job(job_id):
     """Get a job from storage"""
     if use_database:
         try:
             job = db_manager.get_job(job_id)
-            return job.to_dict() if job else None
+            if not job:
+                return None
+            # Include updates that are queued but not written yet
+            return {**job.to_dict(), **job_db_writes.pending_updates(job_id)}
         except Exception as e:
             logging.error(f"Failed to get job {job_id} from database: {str(e)}")
             # Fall back to file storage
@@ -374,9 +469,12 @@ def allowed_file(filename):
     """Check if the file has an allowed extension"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def upload_file_to_s3_and_db(file, job_id, filename, platform='mulesoft', user_id=None):
+def upload_file_to_s3_and_db(file_path, job_id, filename, platform='mulesoft', user_id=None,
+                             content_type='application/octet-stream', file_size=None, file_hash=None):
     """
-    Upload file to S3 and create database records
+    Upload a file already saved on disk to S3 and create database records
+
+    The file is streamed from disk, so it is never held in memory as a whole.
     Returns: (job_record, file_url, success)
     """
     if not DATABASE_ENABLED:
@@ -384,10 +482,6 @@ def upload_file_to_s3_and_db(file, job_id, filename, platform='mulesoft', user_i
         return None, None, False
 
     try:
-        # Read file content
-        file_content = file.read()
-        file.seek(0)  # Reset for potential reuse
-
         # Create job record in database
         job_data = {
             'id': job_id,
@@ -398,19 +492,17 @@ def upload_file_to_s3_and_db(file, job_id, filename, platform='mulesoft', user_i
             'enhance_with_llm': True,
             'file_info': {
                 'original_filename': filename,
-                'file_size': len(file_content),
-                'content_type': getattr(file, 'content_type', 'application/octet-stream')
+                'file_size': file_size if file_size is not None else os.path.getsize(file_path),
+                'content_type': content_type or 'application/octet-stream',
+                'sha256': file_hash
             }
         }
 
-        # Create file object for upload
-        file_obj = io.BytesIO(file_content)
-
         # Create job with file upload
         job_record = integrated_manager.create_job_with_file(
             job_data=job_data,
-            file_obj=file_obj,
-            filename=filename
+            filename=filename,
+            file_path=file_path
         )
 
         if job_record:
@@ -655,9 +747,20 @@ def generate_boomi_iflow_metadata(job_id, documentation, processing_results):
         if boomi_api_url.endswith('/api'):
             boomi_api_url = boomi_api_url[:-4]
 
+        # Give the iFlow generator the pre-computed process structure along with the documentation
+        markdown = documentation
+        process_graphs = process_graphs_for_llm(processing_results)
+        if process_graphs:
+            markdown += (
+                "\n\n## Boomi Process Graph (JSON)\n\n"
+                "Shapes in topological order with their connections, branches, joins, loops and "
+                "shapes unreachable from the start shape.\n\n"
+                f"```json\n{process_graphs}\n```\n"
+            )
+
         # Prepare the request data
         request_data = {
-            "markdown": documentation,
+            "markdown": markdown,
             "iflow_name": f"BoomiFlow_{job_id[:8]}",
             "job_id": job_id
         }
@@ -788,9 +891,9 @@ def process_boomi_documentation(job_id, input_dir, enhance=False):
         with open(doc_file, 'w', encoding='utf-8') as f:
             f.write(documentation)
 
-        # Convert to HTML (pass file path, not content)
+        # Convert to HTML (the content is passed along so the file is not read back)
         html_file = os.path.join(job_result_dir, 'boomi_documentation.html')
-        convert_markdown_to_html(doc_file, html_file)
+        convert_markdown_to_html(doc_file, html_file, markdown_content=documentation)
 
         # Generate iFlow intermediate JSON files if enhancement was used
         if enhance:
@@ -1033,7 +1136,7 @@ def process_mulesoft_documentation(job_id, input_dir, enhance=False):
 
             # Convert markdown to HTML with Mermaid diagrams
             html_output = os.path.join(job_result_dir, "flow_documentation_with_mermaid.html")
-            convert_markdown_to_html(md_file, html_output)
+            convert_markdown_to_html(md_file, html_output, markdown_content=doc_content)
 
             # Update job with file paths
             update_job(job_id, {
@@ -1069,6 +1172,7 @@ def process_mulesoft_documentation(job_id, input_dir, enhance=False):
 def upload_documentation():
     """Handle direct documentation upload for iFlow generation"""
     try:
+        document_processor = get_document_processor()
         if not document_processor:
             return jsonify({'error': 'Document processor not available'}), 500
 
@@ -1103,13 +1207,12 @@ def upload_documentation():
         # Save uploaded file
         filename = secure_filename(file.filename)
         file_path = os.path.join(app.config['UPLOAD_FOLDER'], job_id, filename)
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        file.save(file_path)
+        file_size, file_hash = save_upload_stream(file, file_path)
 
-        # Upload to S3 and create database record
-        file.seek(0)  # Reset file pointer for S3 upload
+        # Upload the saved file to S3 and create database record
         job_record, file_url, s3_success = upload_file_to_s3_and_db(
-            file, job_id, filename, platform, user_id='anonymous'
+            file_path, job_id, filename, platform, user_id='anonymous',
+            content_type=file.content_type, file_size=file_size, file_hash=file_hash
         )
 
         if s3_success:
@@ -1498,14 +1601,14 @@ def generate_docs():
                 filename = secure_filename(file.filename)
                 file_path = os.path.join(job_folder, filename)
 
-                # Save locally (for backward compatibility)
-                file.save(file_path)
+                # Save locally once, hashing while writing
+                file_size, file_hash = save_upload_stream(file, file_path)
                 logging.info(f"Job {job_id}: Saved uploaded file: {filename}")
 
-                # Upload to S3 and create database record
-                file.seek(0)  # Reset file pointer for S3 upload
+                # Upload the saved file to S3 and create database record
                 job_record, file_url, s3_success = upload_file_to_s3_and_db(
-                    file, job_id, filename, platform, user_id='anonymous'
+                    file_path, job_id, filename, platform, user_id='anonymous',
+                    content_type=file.content_type, file_size=file_size, file_hash=file_hash
                 )
 
                 if s3_success:
@@ -1620,39 +1723,50 @@ def handle_job(job_id):
     else:
         return get_job_status(job_id)
 
+def remove_job_data(job_id):
+    """
+    Delete a job from every store: database, object storage, local folders and the job list
+
+    Returns:
+        int: Bytes freed locally and in object storage
+    """
+    freed_bytes = 0
+
+    # Delete job from database if using database storage
+    if use_database:
+        try:
+            db_manager.delete_job(job_id)
+            logging.info(f"Job {job_id} deleted from database")
+        except Exception as e:
+            logging.error(f"Failed to delete job {job_id} from database: {str(e)}")
+
+    # Release stored uploads/results (deduplicated blobs are kept while other jobs use them)
+    if DATABASE_ENABLED:
+        released = integrated_manager.release_job_files(job_id)
+        freed_bytes += released.get('bytes_freed', 0)
+        integrated_manager.db.delete_job(job_id)
+        logging.info(f"Released stored files for job {job_id}: {released}")
+
+    # Delete local upload and results folders
+    for folder in (os.path.join(app.config['UPLOAD_FOLDER'], job_id), os.path.join(app.config['RESULTS_FOLDER'], job_id)):
+        if os.path.exists(folder):
+            freed_bytes += remove_path(folder)
+            logging.info(f"Deleted job folder: {folder}")
+
+    # Remove from in-memory jobs
+    if job_id in jobs:
+        del jobs[job_id]
+        save_jobs(jobs)
+
+    return freed_bytes
+
 def delete_job(job_id):
     """Delete a job and its associated files"""
     try:
         if job_id not in jobs:
             return jsonify({'error': 'Job not found'}), 404
 
-        job = jobs[job_id]
-
-        # Delete job from database if using database storage
-        if use_database:
-            try:
-                db_manager.delete_job(job_id)
-                logging.info(f"Job {job_id} deleted from database")
-            except Exception as e:
-                logging.error(f"Failed to delete job {job_id} from database: {str(e)}")
-
-        # Delete local files
-        job_folder = os.path.join(app.config['UPLOAD_FOLDER'], job_id)
-        if os.path.exists(job_folder):
-            import shutil
-            shutil.rmtree(job_folder)
-            logging.info(f"Deleted job folder: {job_folder}")
-
-        # Delete results folder if it exists
-        results_folder = os.path.join('results', job_id)
-        if os.path.exists(results_folder):
-            import shutil
-            shutil.rmtree(results_folder)
-            logging.info(f"Deleted results folder: {results_folder}")
-
-        # Remove from in-memory jobs
-        del jobs[job_id]
-        save_jobs(jobs)
+        remove_job_data(job_id)
 
         logging.info(f"Job {job_id} deleted successfully")
         return jsonify({
@@ -1664,81 +1778,212 @@ def delete_job(job_id):
         logging.error(f"Error deleting job {job_id}: {str(e)}")
         return jsonify({'error': f'Failed to delete job: {str(e)}'}), 500
 
+# Upstream generator status is fetched at most once per TTL per job, in the background
+UPSTREAM_STATUS_TTL_SECONDS = float(os.getenv('UPSTREAM_STATUS_TTL_SECONDS', '5'))
+UPSTREAM_STATUS_TIMEOUT_SECONDS = float(os.getenv('UPSTREAM_STATUS_TIMEOUT_SECONDS', '15'))
+UPSTREAM_SYNC_STATUSES = ['iflow_generation_started', 'generating_iflow', 'documentation_ready']
+# Jobs that received a signed callback recently are not polled; polling resumes as a fallback
+UPSTREAM_CALLBACK_GRACE_SECONDS = float(os.getenv('UPSTREAM_CALLBACK_GRACE_SECONDS', '120'))
+# Per worker process: with WEB_CONCURRENCY>1 each worker polls and caches on its own
+upstream_status_cache = {}  # job_id -> {'fetched_at': float, 'in_flight': bool, 'callback_at': float}
+upstream_status_lock = threading.Lock()
+
+def needs_upstream_sync(job):
+    """Check whether a job's state still depends on BoomiToIS-API"""
+    return bool(job.get('boomi_job_id')) and job.get('status') in UPSTREAM_SYNC_STATUSES
+
+def refresh_upstream_status(job_id):
+    """
+    Start a background sync of a job with BoomiToIS-API unless one is running or
+    the last one finished less than UPSTREAM_STATUS_TTL_SECONDS ago
+    """
+    job = jobs.get(job_id)
+    if not job or not needs_upstream_sync(job):
+        return
+
+    with upstream_status_lock:
+        entry = upstream_status_cache.setdefault(job_id, {'fetched_at': 0, 'in_flight': False})
+        if entry['in_flight'] or time.time() - entry['fetched_at'] < UPSTREAM_STATUS_TTL_SECONDS:
+            return
+        if time.time() - entry.get('callback_at', 0) < UPSTREAM_CALLBACK_GRACE_SECONDS:
+            return
+        entry['in_flight'] = True
+
+    thread = threading.Thread(target=sync_upstream_status, args=(job_id,))
+    thread.daemon = True
+    thread.start()
+
+def sync_upstream_status(job_id):
+    """Fetch the BoomiToIS-API job status once and merge it into the local job"""
+    try:
+        job = jobs.get(job_id)
+        if job and needs_upstream_sync(job):
+            import requests
+            boomi_api_url = os.getenv('BOOMI_API_URL', 'http://localhost:5003')
+            boomi_job_id = job['boomi_job_id']
+
+            # Check BoomiToIS-API job status
+            response = requests.get(f"{boomi_api_url}/api/jobs/{boomi_job_id}", timeout=UPSTREAM_STATUS_TIMEOUT_SECONDS)
+
+            if response.status_code == 200:
+                apply_upstream_status(job_id, response.json())
+            else:
+                logging.warning(f"BoomiToIS-API status for job {job_id} returned {response.status_code}")
+
+    except Exception as e:
+        logging.warning(f"Failed to check BoomiToIS-API status for job {job_id}: {str(e)}")
+        # Continue with existing job status if API check fails
+
+    finally:
+        with upstream_status_lock:
+            entry = upstream_status_cache.setdefault(job_id, {})
+            entry.update({'fetched_at': time.time(), 'in_flight': False})
+
+def apply_upstream_status(job_id, boomi_job):
+    """Update the Main API job from a BoomiToIS-API job payload"""
+    boomi_status = boomi_job.get('status')
+    logging.debug(f"BoomiToIS-API job {boomi_job.get('id')} status: {boomi_status}")
+
+    # Update Main API job status based on BoomiToIS-API status
+    if boomi_status == 'completed':
+        # Prepare update data
+        update_data = {
+            'status': 'completed',
+            'processing_message': 'iFlow generation completed successfully',
+            'boomi_job_data': boomi_job
+        }
+
+        # Sync deployment information from BoomiToIS-API
+        if 'deployment_status' in boomi_job:
+            update_data['deployment_status'] = boomi_job['deployment_status']
+            update_data['deployment_message'] = boomi_job.get('deployment_message', '')
+
+            if 'deployment_details' in boomi_job:
+                update_data['deployment_details'] = boomi_job['deployment_details']
+
+                # Extract key deployment info for easy access
+                deployment_details = boomi_job['deployment_details']
+                if 'iflow_name' in deployment_details:
+                    update_data['deployed_iflow_name'] = deployment_details['iflow_name']
+                if 'package_id' in deployment_details:
+                    update_data['deployed_package_id'] = deployment_details['package_id']
+
+        update_job(job_id, update_data)
+    elif boomi_status == 'failed':
+        update_job(job_id, {
+            'status': 'failed',
+            'processing_message': 'iFlow generation failed',
+            'boomi_job_data': boomi_job
+        })
+    elif boomi_status in ['processing', 'queued']:
+        message = f'iFlow generation in progress: {boomi_job.get("message", "Processing...")}'
+        if jobs.get(job_id, {}).get('processing_message') != message:
+            update_job(job_id, {
+                'status': 'generating_iflow',
+                'processing_message': message
+            })
+
 def get_job_status(job_id):
+    """Return the locally stored job; upstream state is refreshed in the background"""
     if job_id not in jobs:
         return jsonify({'error': 'Job not found'}), 404
 
-    job = jobs[job_id]
+    refresh_upstream_status(job_id)
+    return jsonify(jobs[job_id]), 200
 
-    # If job has a BoomiToIS-API job ID and is in progress, check the BoomiToIS-API status
-    if (job.get('boomi_job_id') and
-        job.get('status') in ['iflow_generation_started', 'generating_iflow', 'documentation_ready']):
+def is_job_settled(job):
+    """Check whether a job will not change any more without user action"""
+    if job.get('status') == 'failed':
+        return True
+    return job.get('status') == 'completed' and job.get('deployment_status') != 'deploying'
 
-        try:
-            import requests
-            boomi_api_url = os.getenv('BOOMI_API_URL', 'http://localhost:5003')
-            boomi_job_id = job['boomi_job_id']
+@app.route('/api/jobs/<job_id>/wait', methods=['GET'])
+def wait_for_job_status(job_id):
+    """
+    Long-poll a job until it changes
 
-            # Check BoomiToIS-API job status
-            response = requests.get(f"{boomi_api_url}/api/jobs/{boomi_job_id}", timeout=60)
+    Query parameters:
+        since: Version returned by the previous call (default 0 returns immediately)
+        timeout: Seconds to wait for a change (default 25, max 60)
+    """
+    if job_id not in jobs:
+        return jsonify({'error': 'Job not found'}), 404
 
-            if response.status_code == 200:
-                boomi_job = response.json()
-                boomi_status = boomi_job.get('status')
-
-                print(f"📦 BoomiToIS-API job {boomi_job_id} status: {boomi_status}")
-                print(f"📦 FULL BoomiToIS-API RESPONSE: {boomi_job}")
-
-                # Update Main API job status based on BoomiToIS-API status
-                if boomi_status == 'completed':
-                    # Prepare update data
-                    update_data = {
-                        'status': 'completed',
-                        'processing_message': 'iFlow generation completed successfully',
-                        'boomi_job_data': boomi_job
-                    }
-
-                    # Sync deployment information from BoomiToIS-API
-                    if 'deployment_status' in boomi_job:
-                        print(f"📦 SYNCING DEPLOYMENT STATUS: {boomi_job['deployment_status']}")
-                        update_data['deployment_status'] = boomi_job['deployment_status']
-                        update_data['deployment_message'] = boomi_job.get('deployment_message', '')
-
-                        if 'deployment_details' in boomi_job:
-                            print(f"📦 SYNCING DEPLOYMENT DETAILS: {boomi_job['deployment_details']}")
-                            update_data['deployment_details'] = boomi_job['deployment_details']
-
-                            # Extract key deployment info for easy access
-                            deployment_details = boomi_job['deployment_details']
-                            if 'iflow_name' in deployment_details:
-                                update_data['deployed_iflow_name'] = deployment_details['iflow_name']
-                                print(f"📦 DEPLOYED IFLOW NAME: {deployment_details['iflow_name']}")
-                            if 'package_id' in deployment_details:
-                                update_data['deployed_package_id'] = deployment_details['package_id']
-                    else:
-                        print(f"📦 NO DEPLOYMENT STATUS in BoomiToIS job: {list(boomi_job.keys())}")
+    since = request.args.get('since', 0, type=int)
+    timeout = min(max(request.args.get('timeout', 25, type=float), 0), 60)
 
-                    update_job(job_id, update_data)
-                    job = jobs[job_id]  # Get updated job
-                elif boomi_status == 'failed':
-                    update_job(job_id, {
-                        'status': 'failed',
-                        'processing_message': 'iFlow generation failed',
-                        'boomi_job_data': boomi_job
-                    })
-                    job = jobs[job_id]  # Get updated job
-                elif boomi_status in ['processing', 'queued']:
-                    update_job(job_id, {
-                        'status': 'generating_iflow',
-                        'processing_message': f'iFlow generation in progress: {boomi_job.get("message", "Processing...")}'
-                    })
-                    job = jobs[job_id]  # Get updated job
+    refresh_upstream_status(job_id)
+    version = wait_for_job_change(job_id, since, timeout) if since else get_job_version(job_id)
 
-        except Exception as e:
-            logging.warning(f"Failed to check BoomiToIS-API status for job {job_id}: {str(e)}")
-            # Continue with existing job status if API check fails
+    if job_id not in jobs:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify({'version': version, 'job': jobs[job_id]}), 200
+
+# An event stream holds a server thread, so it is closed after this long and the
+# client reconnects (EventSource does so on its own, after the retry delay)
+JOB_EVENT_STREAM_MAX_SECONDS = float(os.getenv('JOB_EVENT_STREAM_MAX_SECONDS', '60'))
+JOB_EVENT_STREAM_RETRY_MS = int(os.getenv('JOB_EVENT_STREAM_RETRY_MS', '1000'))
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def stream_job_events(job_id):
+    """Stream job changes as server-sent events until the job settles or JOB_EVENT_STREAM_MAX_SECONDS pass"""
+    if job_id not in jobs:
+        return jsonify({'error': 'Job not found'}), 404
+
+    def generate():
+        version = -1
+        last_payload = None
+        deadline = time.time() + JOB_EVENT_STREAM_MAX_SECONDS
+        yield f"retry: {JOB_EVENT_STREAM_RETRY_MS}\n\n"
+        while True:
+            refresh_upstream_status(job_id)
+            job = jobs.get(job_id)
+            if job is None:
+                yield "event: deleted\ndata: {}\n\n"
+                return
+
+            payload = json.dumps(job)
+            if payload != last_payload:
+                last_payload = payload
+                yield f"data: {payload}\n\n"
+            else:
+                # Heartbeat keeps proxies from closing the idle connection
+                yield ": keep-alive\n\n"
+
+            if is_job_settled(job):
+                yield "event: done\ndata: {}\n\n"
+                return
 
-    return jsonify(job), 200
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return  # The client reconnects and gets the current state first
+            version = wait_for_job_change(job_id, max(version, get_job_version(job_id)), min(15, remaining))
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def apply_deployment_status(job_id, deployment_status, deployment_message='', deployment_details=None):
+    """Record deployment information reported for a job"""
+    deployment_details = deployment_details or {}
+
+    # Update job with deployment information
+    update_data = {
+        'deployment_status': deployment_status,
+        'deployment_message': deployment_message,
+        'deployment_details': deployment_details
+    }
+
+    # Extract key deployment info for easy access
+    if 'iflow_name' in deployment_details:
+        update_data['deployed_iflow_name'] = deployment_details['iflow_name']
+    if 'package_id' in deployment_details:
+        update_data['deployed_package_id'] = deployment_details['package_id']
+
+    update_job(job_id, update_data)
+    return update_data
 
 @app.route('/api/jobs/<job_id>/update-deployment-status', methods=['POST'])
 def update_deployment_status(job_id):
@@ -1749,25 +1994,15 @@ def update_deployment_status(job_id):
     try:
         data = request.get_json()
         deployment_status = data.get('deployment_status')
-        deployment_message = data.get('deployment_message', '')
-        deployment_details = data.get('deployment_details', {})
 
         print(f"📦 UPDATING MAIN API JOB {job_id} with deployment status: {deployment_status}")
 
-        # Update job with deployment information
-        update_data = {
-            'deployment_status': deployment_status,
-            'deployment_message': deployment_message,
-            'deployment_details': deployment_details
-        }
-
-        # Extract key deployment info for easy access
-        if 'iflow_name' in deployment_details:
-            update_data['deployed_iflow_name'] = deployment_details['iflow_name']
-        if 'package_id' in deployment_details:
-            update_data['deployed_package_id'] = deployment_details['package_id']
-
-        update_job(job_id, update_data)
+        update_data = apply_deployment_status(
+            job_id,
+            deployment_status,
+            data.get('deployment_message', ''),
+            data.get('deployment_details', {})
+        )
 
         print(f"📦 MAIN API JOB {job_id} updated with deployment info: {update_data}")
 
@@ -1780,6 +2015,92 @@ def update_deployment_status(job_id):
         print(f"❌ Error updating deployment status for job {job_id}: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+# Callbacks older than this are rejected to prevent replays
+JOB_CALLBACK_MAX_AGE_SECONDS = 300
+
+def verify_callback_signature(body, timestamp, signature):
+    """
+    Verify the HMAC signature of a generator service callback
+
+    Args:
+        body (bytes): Raw request body
+        timestamp (str): Value of X-Callback-Timestamp
+        signature (str): Value of X-Callback-Signature ("sha256=<hex>")
+
+    Returns:
+        bool: True if the signature is valid and the timestamp is recent
+    """
+    secret = os.getenv('JOB_CALLBACK_SECRET')
+    if not secret or not timestamp or not signature:
+        return False
+
+    try:
+        if abs(time.time() - int(timestamp)) > JOB_CALLBACK_MAX_AGE_SECONDS:
+            return False
+    except ValueError:
+        return False
+
+    expected = hmac.new(secret.encode('utf-8'), f"{timestamp}.".encode('utf-8') + body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(f"sha256={expected}", signature)
+
+@app.route('/api/callbacks/job-events', methods=['POST'])
+def receive_job_event():
+    """
+    Receive a signed progress, completion or deployment event from BoomiToIS-API or MuleToIS-API
+
+    Request body:
+    {
+        "event": "status" | "deployment",
+        "source": "boomi" | "mule",
+        "job_id": "<generator job ID>",
+        "main_job_id": "<Main API job ID>",
+        "job": {"status": "...", "message": "...", "deployment_status": "...", ...}
+    }
+    """
+    body = request.get_data()
+    if not verify_callback_signature(body, request.headers.get('X-Callback-Timestamp'),
+                                     request.headers.get('X-Callback-Signature')):
+        return jsonify({'error': 'Invalid callback signature'}), 401
+
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return jsonify({'error': 'Invalid JSON'}), 400
+
+    job_id = payload.get('main_job_id')
+    if job_id not in jobs:
+        return jsonify({'error': 'Job not found'}), 404
+
+    source = payload.get('source')
+    source_job = dict(payload.get('job') or {})
+    source_job['id'] = payload.get('job_id')
+
+    with upstream_status_lock:
+        upstream_status_cache.setdefault(job_id, {'fetched_at': 0, 'in_flight': False})['callback_at'] = time.time()
+
+    # Remember which generator job belongs to this job
+    source_job_key = f"{source}_job_id"
+    if source in ('boomi', 'mule') and payload.get('job_id') and jobs[job_id].get(source_job_key) != payload['job_id']:
+        update_job(job_id, {source_job_key: payload['job_id']})
+
+    if payload.get('event') == 'deployment':
+        details = dict(source_job.get('deployment_details') or {})
+        details.setdefault('iflow_name', source_job.get('iflow_name'))
+        if source_job.get('runtime_status'):
+            details['runtime_status'] = source_job['runtime_status']
+        if source_job.get('runtime_error'):
+            details['runtime_error'] = source_job['runtime_error']
+        apply_deployment_status(
+            job_id,
+            source_job.get('deployment_status'),
+            source_job.get('deployment_message', ''),
+            details
+        )
+    else:
+        apply_upstream_status(job_id, source_job)
+
+    return jsonify({'status': 'accepted'}), 202
+
 @app.route('/api/jobs/<job_id>/download', methods=['GET'])
 def download_iflow(job_id):
     """Download the generated iFlow ZIP file"""
@@ -1797,42 +2118,136 @@ def download_iflow(job_id):
 
     try:
         import requests
-        from flask import send_file
-        import tempfile
-        import os
 
         boomi_api_url = os.getenv('BOOMI_API_URL', 'http://localhost:5003')
         boomi_job_id = job['boomi_job_id']
 
-        # Download from BoomiToIS-API
-        response = requests.get(f"{boomi_api_url}/api/jobs/{boomi_job_id}/download", timeout=30)
+        # Stream the ZIP from BoomiToIS-API to the client without buffering it
+        response = requests.get(f"{boomi_api_url}/api/jobs/{boomi_job_id}/download", timeout=30, stream=True)
 
-        if response.status_code == 200:
-            # Create a temporary file to store the downloaded content
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.zip')
-            temp_file.write(response.content)
-            temp_file.close()
-
-            # Get filename from BoomiToIS-API response headers or use default
-            filename = response.headers.get('Content-Disposition', 'attachment; filename="iflow.zip"')
-            if 'filename=' in filename:
-                filename = filename.split('filename=')[1].strip('"')
-            else:
-                filename = f"iflow_{job_id[:8]}.zip"
+        if response.status_code != 200:
+            response.close()
+            return jsonify({'error': f'Failed to download from BoomiToIS-API: {response.status_code}'}), 500
 
-            return send_file(
-                temp_file.name,
-                as_attachment=True,
-                download_name=filename,
-                mimetype='application/zip'
-            )
+        # Get filename from BoomiToIS-API response headers or use default
+        filename = response.headers.get('Content-Disposition', 'attachment; filename="iflow.zip"')
+        if 'filename=' in filename:
+            filename = filename.split('filename=')[1].strip('"')
         else:
-            return jsonify({'error': f'Failed to download from BoomiToIS-API: {response.status_code}'}), 500
+            filename = f"iflow_{job_id[:8]}.zip"
+
+        headers = {'Content-Disposition': f'attachment; filename="{filename}"'}
+        if response.headers.get('Content-Length'):
+            headers['Content-Length'] = response.headers['Content-Length']
+
+        def generate():
+            try:
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    if chunk:
+                        yield chunk
+            finally:
+                response.close()
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype='application/zip',
+            headers=headers
+        )
 
     except Exception as e:
         logging.error(f"Error downloading iFlow for job {job_id}: {str(e)}")
         return jsonify({'error': f'Download failed: {str(e)}'}), 500
 
+# ==========================================
+# RETENTION
+# ==========================================
+
+def env_number(name, default=None):
+    """Read an optional numeric setting; empty or unset means no limit"""
+    value = os.getenv(name)
+    return float(value) if value else default
+
+def job_timestamp(job):
+    """Seconds since the epoch of a job's last update"""
+    for field in ('last_updated', 'created', 'timestamp'):
+        if job.get(field):
+            try:
+                return datetime.fromisoformat(job[field]).timestamp()
+            except ValueError:
+                continue
+    return time.time()
+
+def list_job_entries():
+    """Yield (job_id, last update, local bytes) for the job retention policy"""
+    for job_id, job in list(jobs.items()):
+        size = 0
+        for folder in (os.path.join(app.config['UPLOAD_FOLDER'], job_id), os.path.join(app.config['RESULTS_FOLDER'], job_id)):
+            if os.path.exists(folder):
+                size += path_usage(folder)[1]
+        yield job_id, job_timestamp(job), size
+
+def is_job_active(job_id):
+    """Jobs that are still running (or unknown folders of running jobs) are never cleaned up"""
+    job = jobs.get(job_id)
+    return job is not None and not is_job_settled(job)
+
+def cleanup_stored_jobs():
+    """Apply job retention to the database and object storage"""
+    if not DATABASE_ENABLED:
+        return {'skipped': True, 'freed_bytes': 0}
+    return integrated_manager.cleanup_old_data(int(env_number('JOB_RETENTION_DAYS', 30)))
+
+def build_retention_policies():
+    """Retention policies for every artifact class the Main API produces"""
+    import tempfile
+
+    mb = 1024 * 1024
+    results_quota = env_number('RESULTS_RETENTION_MAX_MB')
+    return [
+        # Whole jobs: database, object storage, local folders and the job list
+        RetentionPolicy('jobs', list_entries=list_job_entries, remove=remove_job_data, is_protected=is_job_active,
+                        max_age_days=env_number('JOB_RETENTION_DAYS', 30), max_count=env_number('JOB_RETENTION_MAX_JOBS')),
+        RetentionPolicy('stored_jobs', run=cleanup_stored_jobs),
+        # Uploaded sources are only needed while a job is processed
+        RetentionPolicy('uploads', root=app.config['UPLOAD_FOLDER'], is_protected=is_job_active,
+                        max_age_days=env_number('UPLOAD_RETENTION_DAYS', 7)),
+        RetentionPolicy('results', root=app.config['RESULTS_FOLDER'],
+                        is_protected=lambda name: name == 'similarity_cache' or is_job_active(name),
+                        max_age_days=env_number('JOB_RETENTION_DAYS', 30),
+                        max_bytes=results_quota * mb if results_quota else None),
+        RetentionPolicy('similarity_cache', root=os.path.join(app.config['RESULTS_FOLDER'], 'similarity_cache'),
+                        max_age_days=env_number('SIMILARITY_CACHE_RETENTION_DAYS', 30), max_count=500),
+        RetentionPolicy('genai_debug', root=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'genai_debug'),
+                        max_age_days=env_number('DEBUG_RETENTION_DAYS', 7)),
+        # Extracted PDF text cached by content hash
+        RetentionPolicy('pdf_text_cache', root=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'pdf_text'),
+                        max_age_days=env_number('CACHE_RETENTION_DAYS', 30), max_count=1000),
+        # Images extracted from DOCX uploads by DocumentProcessor
+        RetentionPolicy('docx_images', root=tempfile.gettempdir(), pattern='docx_images_*',
+                        max_age_days=env_number('TEMP_RETENTION_DAYS', 1))
+    ]
+
+retention_engine = RetentionEngine(
+    build_retention_policies(),
+    interval_seconds=env_number('RETENTION_INTERVAL_SECONDS', 3600)
+)
+
+# Started per worker in after_fork (or before app.run), never at import: a
+# preloading gunicorn master would otherwise sweep with a stale copy of the jobs
+def start_retention():
+    """Start the retention sweeper; of several workers only the holder of the retention lock sweeps"""
+    if os.getenv('RETENTION_ENABLED', 'true').lower() == 'true':
+        retention_engine.start(lock_path=f"{app.config['JOBS_FILE']}.retention.lock")
+
+@app.route('/api/retention', methods=['GET', 'POST'])
+def retention():
+    """Get the last retention report (GET) or run retention now in the background (POST)"""
+    if request.method == 'POST':
+        threading.Thread(target=retention_engine.run_once, daemon=True).start()
+        return jsonify({'message': 'Retention run started', 'last_report': retention_engine.last_report}), 202
+
+    return jsonify({'last_report': retention_engine.last_report}), 200
+
 @app.route('/api/jobs', methods=['GET'])
 def list_jobs():
     # Return a list of all jobs (limited info)
@@ -1955,7 +2370,13 @@ def get_iflow_match_file(job_id, file_type):
 
 @app.route('/api/iflow-match/<job_id>/charts/<chart_name>', methods=['GET'])
 def get_iflow_match_chart(job_id, chart_name):
-    """Get a chart from the iFlow match results"""
+    """
+    Get a chart from the iFlow match results.
+
+    Charts are rendered from the job's saved chart specs the first time they are
+    requested and cached on disk. Use chart_name "specs" (or ?format=json) to get
+    the chart data for client-side rendering instead of a PNG.
+    """
     if job_id not in jobs:
         return jsonify({'error': 'Job not found'}), 404
 
@@ -1976,18 +2397,155 @@ def get_iflow_match_chart(job_id, chart_name):
     report_path = job['iflow_match_files']['report']
     report_dir = os.path.dirname(os.path.join(os.path.dirname(os.path.abspath(__file__)), report_path))
     charts_dir = os.path.join(report_dir, 'charts')
-    chart_path = os.path.join(charts_dir, chart_name)
+    chart_name = secure_filename(chart_name)
+
+    from present_findings import CHART_SPECS_FILENAME, get_or_render_chart
+
+    if chart_name == 'specs' or request.args.get('format') == 'json':
+        specs_path = os.path.join(charts_dir, CHART_SPECS_FILENAME)
+        if not os.path.exists(specs_path):
+            return jsonify({'error': 'Chart data not available'}), 404
+
+        with open(specs_path, 'r', encoding='utf-8') as f:
+            specs = json.load(f)
 
-    if not os.path.exists(chart_path):
+        if chart_name == 'specs':
+            return jsonify(specs)
+
+        spec = specs.get(os.path.splitext(chart_name)[0])
+        if not spec:
+            return jsonify({'error': f'Chart {chart_name} not found'}), 404
+        return jsonify(spec)
+
+    try:
+        chart_path = get_or_render_chart(charts_dir, chart_name)
+    except Exception as e:
+        logging.error(f"Error rendering chart {chart_name} for job {job_id}: {str(e)}")
+        return jsonify({'error': f'Failed to render chart {chart_name}'}), 500
+
+    if not chart_path:
         return jsonify({'error': f'Chart {chart_name} not found'}), 404
 
     return send_file(chart_path)
 
-# New endpoint for generating similarity report
+# Similarity reports are generated one at a time by a background worker
+similarity_report_queue = queue.Queue()
+similarity_report_worker = None
+similarity_report_worker_lock = threading.Lock()
+similarity_report_jobs = set()  # Jobs queued or processing in this process
+
+# The queue is in memory: a report left 'queued'/'processing' by a restarted
+# worker is queued again once it is older than this, or right away if it was
+# owned by this process but is no longer in its queue
+SIMILARITY_REPORT_STALE_SECONDS = float(os.getenv('SIMILARITY_REPORT_STALE_SECONDS', '1800'))
+
+def process_owner():
+    """Identity of this worker process, recorded with work it owns"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def similarity_report_in_progress(job):
+    """True if a queued or processing similarity report of the job is still owned by a live worker"""
+    if job.get('similarity_report_status') not in ['queued', 'processing']:
+        return False
+    with similarity_report_worker_lock:
+        if job['id'] in similarity_report_jobs:
+            return True
+    if job.get('similarity_report_owner') == process_owner():
+        return False
+    try:
+        started = datetime.fromisoformat(job.get('similarity_report_started_at'))
+    except (TypeError, ValueError):
+        return False
+    return (datetime.now() - started).total_seconds() < SIMILARITY_REPORT_STALE_SECONDS
+
+def ensure_similarity_report_worker():
+    """Start the similarity report worker thread if it is not running"""
+    global similarity_report_worker
+    with similarity_report_worker_lock:
+        if similarity_report_worker is None or not similarity_report_worker.is_alive():
+            similarity_report_worker = threading.Thread(target=similarity_report_worker_loop, daemon=True)
+            similarity_report_worker.start()
+
+def similarity_report_worker_loop():
+    """Process queued similarity report jobs"""
+    while True:
+        job_id, md_file_path = similarity_report_queue.get()
+        try:
+            process_similarity_report(job_id, md_file_path)
+        except Exception as e:
+            logging.error(f"Error generating similarity report for job {job_id}: {str(e)}")
+            update_job(job_id, {
+                'similarity_report_status': 'failed',
+                'similarity_report_message': f'Error generating similarity report: {str(e)}'
+            })
+        finally:
+            with similarity_report_worker_lock:
+                similarity_report_jobs.discard(job_id)
+            similarity_report_queue.task_done()
+
+def process_similarity_report(job_id, md_file_path):
+    """
+    Generate the similarity report for a job with the shared matcher service
+
+    Reports are cached by the SHA-256 of the markdown content, so regenerating
+    the report for unchanged documentation only copies the cached file.
+
+    Args:
+        job_id: Job ID to identify which documentation to process
+        md_file_path: Path to the markdown file
+    """
+    update_job(job_id, {
+        'similarity_report_status': 'processing',
+        'similarity_report_message': 'Generating SAP Integration Suite similarity report...',
+        'similarity_report_started_at': datetime.now().isoformat()
+    })
+
+    # Hash the markdown content to look up a cached report
+    content_hash = hashlib.sha256()
+    with open(md_file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            content_hash.update(chunk)
+    content_hash = content_hash.hexdigest()
+
+    cache_dir = os.path.join(app.config['RESULTS_FOLDER'], 'similarity_cache', content_hash)
+    cached_report = os.path.join(cache_dir, 'integration_match_report.html')
+
+    if os.path.exists(cached_report):
+        logging.info(f"Using cached similarity report for job {job_id} ({content_hash[:12]})")
+    else:
+        from iflow_matcher import get_matcher_service
+        result = get_matcher_service().match(md_file_path, output_dir=cache_dir)
+
+        if result["status"] != "success":
+            update_job(job_id, {
+                'similarity_report_status': 'failed',
+                'similarity_report_message': f'Failed to generate similarity report: {result["message"]}'
+            })
+            return
+
+    # Copy the report into the job's results folder
+    report_dir = os.path.join(app.config['RESULTS_FOLDER'], job_id, 'similarity_report')
+    os.makedirs(report_dir, exist_ok=True)
+    shutil.copyfile(cached_report, os.path.join(report_dir, 'iflow_similarity_report.html'))
+
+    # Update job with similarity report file path
+    job = get_job(job_id) or {}
+    relative_report_path = os.path.join('results', job_id, 'similarity_report', 'iflow_similarity_report.html')
+    update_job(job_id, {
+        'files': {
+            **job.get('files', {}),
+            'similarity_report': relative_report_path
+        },
+        'similarity_report_status': 'completed',
+        'similarity_report_message': 'Similarity report generated successfully',
+        'similarity_report_hash': content_hash
+    })
+
+# Endpoint for generating similarity report
 @app.route('/api/generate-similarity-report/<job_id>', methods=['POST'])
 def generate_similarity_report(job_id):
     """
-    Generate an SAP Integration Suite iFlow similarity report based on the already generated documentation
+    Queue generation of an SAP Integration Suite iFlow similarity report based on the already generated documentation
     """
     if job_id not in jobs:
         return jsonify({'error': 'Job not found'}), 404
@@ -2005,52 +2563,63 @@ def generate_similarity_report(job_id):
     if not os.path.exists(md_file_path):
         return jsonify({'error': 'Markdown file not found on server'}), 404
 
+    status_url = f'/api/generate-similarity-report/{job_id}'
+
     try:
-        # Path to the GetIflowEquivalent script
-        iflow_equiv_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'GetIflowEquivalent')
-
-        # Create a directory for the similarity report if it doesn't exist
-        report_dir = os.path.join(app.config['RESULTS_FOLDER'], job_id, 'similarity_report')
-        os.makedirs(report_dir, exist_ok=True)
-
-        # Output file path for the similarity report
-        report_file = os.path.join(report_dir, 'iflow_similarity_report.html')
-
-        # Call the GetIflowEquivalent functionality (implement the specific call based on the module's interface)
-        # This is a placeholder - replace with actual implementation
-        from subprocess import run, PIPE
-
-        # Run the similarity report generator script
-        result = run([
-            'python',
-            os.path.join(iflow_equiv_dir, 'generate_report.py'),
-            '--input', md_file_path,
-            '--output', report_file
-        ], stdout=PIPE, stderr=PIPE, text=True)
-
-        if result.returncode != 0:
-            logging.error(f"Error generating similarity report: {result.stderr}")
-            return jsonify({'error': f'Failed to generate similarity report: {result.stderr}'}), 500
-
-        # Update job with similarity report file path
-        relative_report_path = os.path.join('results', job_id, 'similarity_report', 'iflow_similarity_report.html')
+        # Do not queue the same job twice, unless the worker that queued it is gone
+        if similarity_report_in_progress({**job, 'id': job_id}):
+            return jsonify({
+                'status': job['similarity_report_status'],
+                'message': 'Similarity report generation already in progress',
+                'status_url': status_url
+            }), 202
+
         update_job(job_id, {
-            'files': {
-                **job['files'],
-                'similarity_report': relative_report_path
-            }
+            'similarity_report_status': 'queued',
+            'similarity_report_message': 'Similarity report generation queued',
+            'similarity_report_started_at': datetime.now().isoformat(),
+            'similarity_report_owner': process_owner()
         })
 
+        ensure_similarity_report_worker()
+        with similarity_report_worker_lock:
+            similarity_report_jobs.add(job_id)
+        similarity_report_queue.put((job_id, md_file_path))
+
         return jsonify({
-            'status': 'success',
-            'message': 'Similarity report generated successfully',
+            'status': 'queued',
+            'message': 'Similarity report generation started',
+            'status_url': status_url,
             'report_path': f'/api/docs/{job_id}/similarity_report'
-        }), 200
+        }), 202
 
     except Exception as e:
-        logging.error(f"Error generating similarity report: {str(e)}")
+        logging.error(f"Error queuing similarity report: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/generate-similarity-report/<job_id>', methods=['GET'])
+def get_similarity_report_status(job_id):
+    """Get the status of the similarity report generation"""
+    if job_id not in jobs:
+        return jsonify({'error': 'Job not found'}), 404
+
+    job = jobs[job_id]
+
+    if 'similarity_report_status' not in job:
+        return jsonify({
+            'status': 'not_started',
+            'message': 'Similarity report generation has not been started'
+        })
+
+    response = {
+        'status': job['similarity_report_status'],
+        'message': job.get('similarity_report_message', '')
+    }
+    if job['similarity_report_status'] == 'completed':
+        response['report_path'] = f'/api/docs/{job_id}/similarity_report'
+
+    return jsonify(response)
+
 @app.route('/', methods=['GET'])
 def home():
     return render_template('upload.html')
@@ -2125,13 +2694,9 @@ def process_iflow_match(job_id, markdown_file_path):
         markdown_file_path: Path to the markdown file
     """
     try:
-        # Import the local iflow_matcher module
-        try:
-            from iflow_matcher import process_markdown_for_iflow
-            print("Successfully imported process_markdown_for_iflow from local iflow_matcher module")
-        except ImportError as e:
-            print(f"Error importing from iflow_matcher: {str(e)}")
-            raise ImportError(f"Could not import process_markdown_for_iflow: {str(e)}")
+        # Use the shared, already initialized matcher service
+        from iflow_matcher import get_matcher_service
+        matcher_service = get_matcher_service()
 
         # Create output directory in the job results folder
         job_result_dir = os.path.join(app.config['RESULTS_FOLDER'], job_id)
@@ -2144,16 +2709,13 @@ def process_iflow_match(job_id, markdown_file_path):
             'iflow_match_message': 'Extracting terms from markdown and searching for matches...'
         })
 
-        # Get GitHub token from environment
-        github_token = os.environ.get("GITHUB_TOKEN")
-        if not github_token:
+        if not matcher_service.github_token:
             logging.warning("No GitHub token found in environment. SAP Integration Suite equivalent search may fail.")
 
         # Process the markdown file
-        result = process_markdown_for_iflow(
+        result = matcher_service.match(
             markdown_file_path=markdown_file_path,
-            output_dir=iflow_output_dir,
-            github_token=github_token
+            output_dir=iflow_output_dir
         )
 
         if result["status"] == "success":
@@ -2163,6 +2725,19 @@ def process_iflow_match(job_id, markdown_file_path):
                 'summary': os.path.relpath(result["files"]["summary"], os.path.dirname(os.path.abspath(__file__)))
             }
 
+            # Chart data for lazy (server or client side) rendering; the key must not
+            # start with 'chart_', which was used for pre-rendered chart files
+            chart_urls = {}
+            if result["files"].get("chart_specs"):
+                files_dict['match_chart_specs'] = os.path.relpath(result["files"]["chart_specs"], os.path.dirname(os.path.abspath(__file__)))
+
+                # Per-chart download links; each PNG is rendered on its first request
+                from present_findings import CHART_NAMES
+                chart_urls = {
+                    chart_name: f'/api/iflow-match/{job_id}/charts/{chart_name}.png'
+                    for chart_name in CHART_NAMES
+                }
+
             # Add chart files if they exist
             if "charts" in result["files"]:
                 chart_files = result["files"]["charts"]
@@ -2179,7 +2754,8 @@ def process_iflow_match(job_id, markdown_file_path):
                 'iflow_match_message': 'SAP Integration Suite equivalent search completed successfully!',
                 'iflow_match_files': files_dict,
                 'iflow_match_result': {
-                    'message': result["message"]
+                    'message': result["message"],
+                    'charts': chart_urls
                 }
             })
         else:
@@ -2196,6 +2772,61 @@ def process_iflow_match(job_id, markdown_file_path):
             'iflow_match_message': f'Error processing iFlow match: {str(e)}'
         })
 
+def verify_nltk_data():
+    timed_import('nltk_setup').verify_nltk_data()
+
+def warm_matcher_service():
+    # Before forking, only import and initialize; the catalog scan goes over the network
+    timed_import('iflow_matcher').get_matcher_service().initialize(load_catalog=STARTUP_WARMUP != 'preload')
+
+def load_matcher_catalog():
+    timed_import('iflow_matcher').get_matcher_service().initialize()
+
+def preload_templates():
+    for template_name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(template_name)
+
+WARM_UP_TASKS = (
+    [verify_nltk_data, preload_templates]
+    + DOCUMENTATION_MODULES
+    + (['enhanced_doc_generator'] if use_enhanced_generator else [])
+    + [get_document_processor, warm_matcher_service]
+)
+
+# Load the heavy modules after startup, so the first request does not pay for them.
+# 'preload' (set by gunicorn.conf.py) loads them before the workers are forked so they share the memory.
+STARTUP_WARMUP = os.getenv('STARTUP_WARMUP', 'true').lower()
+if STARTUP_WARMUP == 'preload':
+    warm_up(WARM_UP_TASKS, background=False)
+elif STARTUP_WARMUP == 'true':
+    warm_up(WARM_UP_TASKS, delay=float(os.getenv('STARTUP_WARMUP_DELAY_SECONDS', '1')))
+
+STARTUP_SECONDS = round(time.perf_counter() - STARTUP_STARTED, 3)
+print(f"API module loaded in {STARTUP_SECONDS}s")
+
+def after_fork():
+    """Give a freshly forked worker its own connections (called from gunicorn.conf.py)"""
+    reset_clients()
+    if use_database:
+        try:
+            from models import db
+            with app.app_context():
+                db.engine.dispose()
+        except Exception as e:
+            logging.warning(f"Could not reset database connections after fork: {str(e)}")
+    start_retention()
+    warm_clients()
+    if STARTUP_WARMUP == 'preload':
+        warm_up([load_matcher_catalog], name='catalog-warm-up')
+
+@app.route('/api/startup', methods=['GET'])
+def startup_info():
+    """Startup time and per-module import timings (modules loaded lazily appear once used)"""
+    return jsonify({
+        'startup_seconds': STARTUP_SECONDS,
+        'import_timings': get_import_timings()
+    })
+
 if __name__ == '__main__':
     # Set up stdout logger for better visibility
     class CustomFormatter(logging.Formatter):
@@ -2238,7 +2869,9 @@ if __name__ == '__main__':
     # Run Flask app without reloader to prevent issues with file uploads
     PORT = int(os.getenv('PORT', 5000))
     print(f"Starting Flask application on port {PORT}")
-    app.run(debug=True, host='0.0.0.0', port=PORT, use_reloader=False)
+    # Development server; production runs gunicorn with gunicorn.conf.py (see Procfile)
+    start_retention()
+    app.run(debug=os.getenv('FLASK_DEBUG', 'false').lower() == 'true', host='0.0.0.0', port=PORT, use_reloader=False)
 
 
 
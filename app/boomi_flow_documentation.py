@@ -12,6 +12,7 @@ import json
 import logging
 from typing import Dict, List, Any, Optional
 from datetime import datetime
+from boomi_process_graph import BoomiProcessGraph, graph_to_mermaid, graph_structure_markdown
 # LLM Mermaid fixer available if needed
 # from llm_mermaid_fixer import fix_documentation_with_llm
 
@@ -211,7 +212,8 @@ class BoomiFlowDocumentationGenerator:
             return None
         
         shapes = self._extract_shapes(process_elem)
-        connections = self._extract_connections(shapes)
+        graph = BoomiProcessGraph(shapes)
+        connections = graph.connections()
         
         return {
             'type': 'process',
@@ -223,7 +225,8 @@ class BoomiFlowDocumentationGenerator:
                 'process_log_on_error_only': process_elem.get('processLogOnErrorOnly'),
                 'workload': process_elem.get('workload'),
                 'shapes': shapes,
-                'connections': connections
+                'connections': connections,
+                'graph': graph.to_dict()
             },
             'integration_patterns': self._identify_integration_patterns(root)
         }
@@ -426,19 +429,7 @@ class BoomiFlowDocumentationGenerator:
     
     def _extract_connections(self, shapes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Extract connections between shapes"""
-        connections = []
-        
-        for shape in shapes:
-            for dragpoint in shape.get('dragpoints', []):
-                if dragpoint.get('to_shape'):
-                    connections.append({
-                        'from_shape': shape['name'],
-                        'to_shape': dragpoint['to_shape'],
-                        'from_position': dragpoint['position'],
-                        'connection_type': 'flow'
-                    })
-        
-        return connections
+        return BoomiProcessGraph(shapes).connections()
     
     def _identify_integration_patterns(self, root: ET.Element) -> List[str]:
         """Identify common integration patterns in the Boomi process"""
@@ -530,7 +521,17 @@ class BoomiFlowDocumentationGenerator:
                 # Process flow
                 doc_lines.append("#### Process Flow")
                 doc_lines.append("")
-                doc_lines.append(self._generate_flow_diagram(process_info['shapes'], process_info['connections']))
+                doc_lines.append(self._generate_flow_diagram(
+                    process_info['shapes'], process_info['connections'], process_info.get('graph')
+                ))
+                doc_lines.append("")
+                
+                # Structure found in the process graph (branches, joins, loops, unreachable shapes)
+                doc_lines.append("#### Process Structure")
+                doc_lines.append("")
+                doc_lines.extend(graph_structure_markdown(
+                    process_info.get('graph') or BoomiProcessGraph(process_info['shapes']).to_dict()
+                ))
                 doc_lines.append("")
         
         # Maps
@@ -582,32 +583,9 @@ class BoomiFlowDocumentationGenerator:
         
         return "\n".join(doc_lines)
     
-    def _generate_flow_diagram(self, shapes: List[Dict[str, Any]], connections: List[Dict[str, Any]]) -> str:
-        """Generate a text-based flow diagram"""
-        diagram_lines = ["```mermaid", "graph TD"]
-        
-        # Add shapes
-        for shape in shapes:
-            shape_name = shape['name']
-            shape_type = shape['type']
-            label = shape.get('user_label') or shape_name
-            
-            if shape_type == 'start':
-                diagram_lines.append(f"    {shape_name}([{label}])")
-            elif shape_type == 'stop':
-                diagram_lines.append(f"    {shape_name}([{label}])")
-            elif shape_type == 'connectoraction':
-                diagram_lines.append(f"    {shape_name}[{label}]")
-            elif shape_type == 'map':
-                diagram_lines.append(f"    {shape_name}{{Transform: {label}}}")
-            else:
-                diagram_lines.append(f"    {shape_name}[{label}]")
-        
-        # Add connections
-        for connection in connections:
-            from_shape = connection['from_shape']
-            to_shape = connection['to_shape']
-            diagram_lines.append(f"    {from_shape} --> {to_shape}")
-        
-        diagram_lines.append("```")
-        return "\n".join(diagram_lines)
+    def _generate_flow_diagram(self, shapes: List[Dict[str, Any]], connections: List[Dict[str, Any]],
+                               graph: Optional[Dict[str, Any]] = None) -> str:
+        """Generate a Mermaid flow diagram from the process graph (built from the shapes if not given)"""
+        if graph is None:
+            graph = BoomiProcessGraph(shapes).to_dict()
+        return graph_to_mermaid(graph)
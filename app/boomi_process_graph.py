@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Boomi Process Graph
+
+Builds an indexed graph of a Boomi process from its shapes and dragpoints, once
+per process: adjacency lists, reachability from the start shape, strongly
+connected components (loops), a topological order, branches and joins.
+
+The documentation, the Mermaid flow diagram and the iFlow generation request
+all read the same plain-dict summary (BoomiProcessGraph.to_dict), so none of
+them has to walk the shape list again and the LLM receives the structure
+instead of having to infer it from text.
+"""
+
+import re
+import json
+import heapq
+from collections import deque
+from typing import Dict, List, Any, Optional
+
+class BoomiProcessGraph:
+    """Indexed process graph built from the shapes returned by _extract_shapes"""
+
+    def __init__(self, shapes: List[Dict[str, Any]]):
+        self.shapes = {}
+        for shape in shapes:
+            if shape.get('name') and shape['name'] not in self.shapes:
+                self.shapes[shape['name']] = shape
+
+        self.successors = {name: [] for name in self.shapes}
+        self.predecessors = {name: [] for name in self.shapes}
+        self.edges = []
+        self.missing_targets = []
+
+        for shape in shapes:
+            source = shape.get('name')
+            if source not in self.shapes:
+                continue
+            for dragpoint in shape.get('dragpoints', []):
+                target = dragpoint.get('to_shape')
+                if not target:
+                    continue
+                edge = {
+                    'from_shape': source,
+                    'to_shape': target,
+                    'from_position': dragpoint.get('position'),
+                    'dragpoint': dragpoint.get('name'),
+                    'connection_type': 'flow'
+                }
+                self.edges.append(edge)
+                if target in self.shapes:
+                    self.successors[source].append(target)
+                    self.predecessors[target].append(source)
+                else:
+                    self.missing_targets.append({'from_shape': source, 'to_shape': target})
+
+        self.start_shapes = self._find_start_shapes()
+        self.reachable = self._reachable_from(self.start_shapes)
+        self.components = self._topological_components(self._strongly_connected_components())
+        self.order = [name for component in self.components for name in component]
+        position = {name: index for index, name in enumerate(self.order)}
+
+        # Edges that go back within a loop (target not after source in the order)
+        for edge in self.edges:
+            target = edge['to_shape']
+            edge['back_edge'] = target in position and position[target] <= position[edge['from_shape']]
+
+    def _find_start_shapes(self) -> List[str]:
+        """Start shapes, or the shapes without predecessors if the process has none"""
+        starts = [name for name, shape in self.shapes.items() if shape.get('type') == 'start']
+        if not starts:
+            starts = [name for name in self.shapes if not self.predecessors[name]]
+        return starts
+
+    def _reachable_from(self, starts: List[str]) -> set:
+        seen = set(starts)
+        queue = deque(starts)
+        while queue:
+            for target in self.successors[queue.popleft()]:
+                if target not in seen:
+                    seen.add(target)
+                    queue.append(target)
+        return seen
+
+    def _strongly_connected_components(self) -> List[List[str]]:
+        """
+        Tarjan's algorithm, iterative so deep processes do not hit the recursion limit
+
+        Returns:
+            list: Components, members in shape order
+        """
+        index = {}
+        lowlink = {}
+        on_stack = set()
+        stack = []
+        components = []
+        counter = 0
+
+        for root in self.shapes:
+            if root in index:
+                continue
+            work = [(root, iter(self.successors[root]))]
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+
+            while work:
+                node, successors = work[-1]
+                advanced = False
+                for target in successors:
+                    if target not in index:
+                        index[target] = lowlink[target] = counter
+                        counter += 1
+                        stack.append(target)
+                        on_stack.add(target)
+                        work.append((target, iter(self.successors[target])))
+                        advanced = True
+                        break
+                    if target in on_stack:
+                        lowlink[node] = min(lowlink[node], index[target])
+                if advanced:
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+
+        shape_order = {name: position for position, name in enumerate(self.shapes)}
+        return [sorted(component, key=shape_order.get) for component in components]
+
+    def _topological_components(self, components: List[List[str]]) -> List[List[str]]:
+        """
+        Order the components topologically (Kahn's algorithm on the condensed graph)
+
+        Among the components that are ready, reachable ones come first, then
+        the one whose first shape comes first in the process.
+        """
+        shape_order = {name: position for position, name in enumerate(self.shapes)}
+        component_of = {name: index for index, component in enumerate(components) for name in component}
+        successors = [set() for _ in components]
+        in_degree = [0] * len(components)
+        for source, targets in self.successors.items():
+            for target in targets:
+                a, b = component_of[source], component_of[target]
+                if a != b and b not in successors[a]:
+                    successors[a].add(b)
+                    in_degree[b] += 1
+
+        def priority(index):
+            first = components[index][0]
+            return (first not in self.reachable, shape_order[first], index)
+
+        ready = [priority(index) for index in range(len(components)) if in_degree[index] == 0]
+        heapq.heapify(ready)
+        ordered = []
+        while ready:
+            index = heapq.heappop(ready)[-1]
+            ordered.append(components[index])
+            for target in successors[index]:
+                in_degree[target] -= 1
+                if in_degree[target] == 0:
+                    heapq.heappush(ready, priority(target))
+        return ordered
+
+    def cycles(self) -> List[List[str]]:
+        """Loops: components with more than one shape, or a shape connected to itself"""
+        return [
+            component for component in self.components
+            if len(component) > 1 or component[0] in self.successors[component[0]]
+        ]
+
+    def connections(self) -> List[Dict[str, Any]]:
+        """Connections in the format of BoomiFlowDocumentationGenerator._extract_connections"""
+        return [
+            {key: edge[key] for key in ('from_shape', 'to_shape', 'from_position', 'connection_type')}
+            for edge in self.edges
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Plain summary of the graph, safe to store in processing results and to send as JSON
+
+        Returns:
+            Dict with shapes in topological order and the structural findings
+        """
+        return {
+            'shapes': [
+                {
+                    'name': name,
+                    'type': self.shapes[name].get('type'),
+                    'label': self.shapes[name].get('user_label') or name,
+                    'reachable': name in self.reachable
+                }
+                for name in self.order
+            ],
+            'edges': [
+                {'from': edge['from_shape'], 'to': edge['to_shape'], 'back_edge': edge['back_edge']}
+                for edge in self.edges if edge['to_shape'] in self.shapes
+            ],
+            'start_shapes': self.start_shapes,
+            'end_shapes': [name for name in self.order if not self.successors[name]],
+            'branches': {name: targets for name, targets in self.successors.items() if len(targets) > 1},
+            'joins': {name: sources for name, sources in self.predecessors.items() if len(sources) > 1},
+            'cycles': self.cycles(),
+            'unreachable': [name for name in self.order if name not in self.reachable],
+            'missing_targets': self.missing_targets
+        }
+
+# Mermaid node shapes per Boomi shape type
+MERMAID_SHAPES = {
+    'start': ('([', '])'),
+    'stop': ('([', '])'),
+    'map': ('{', '}'),
+    'decision': ('{', '}')
+}
+
+def _mermaid_id(name: str) -> str:
+    return re.sub(r'\W', '_', name)
+
+def _mermaid_label(shape: Dict[str, Any]) -> str:
+    label = shape['label'].replace('"', '#quot;')
+    if shape['type'] == 'map':
+        label = f"Transform: {label}"
+    return f'"{label}"'
+
+def graph_to_mermaid(graph: Dict[str, Any]) -> str:
+    """
+    Mermaid flowchart of a process graph (see BoomiProcessGraph.to_dict)
+
+    Shapes are listed in topological order. Loop-back edges are dotted and
+    shapes that cannot be reached from the start shape are highlighted.
+    """
+    lines = ["```mermaid", "graph TD"]
+    for shape in graph['shapes']:
+        opener, closer = MERMAID_SHAPES.get(shape['type'], ('[', ']'))
+        node = f"    {_mermaid_id(shape['name'])}{opener}{_mermaid_label(shape)}{closer}"
+        if not shape['reachable']:
+            node += ":::unreachable"
+        lines.append(node)
+
+    for edge in graph['edges']:
+        arrow = '-.->' if edge['back_edge'] else '-->'
+        lines.append(f"    {_mermaid_id(edge['from'])} {arrow} {_mermaid_id(edge['to'])}")
+
+    if graph['unreachable']:
+        lines.append("    classDef unreachable stroke-dasharray: 5 5,stroke:#d32f2f")
+    lines.append("```")
+    return "\n".join(lines)
+
+def graph_structure_markdown(graph: Dict[str, Any]) -> List[str]:
+    """Markdown lines describing the structure of a process graph"""
+    labels = {shape['name']: shape['label'] for shape in graph['shapes']}
+
+    def names(shape_names):
+        return ', '.join(labels.get(name, name) for name in shape_names) or 'None'
+
+    lines = [
+        f"- **Shapes:** {len(graph['shapes'])}, **Connections:** {len(graph['edges'])}",
+        f"- **Start:** {names(graph['start_shapes'])}",
+        f"- **End Points:** {names(graph['end_shapes'])}"
+    ]
+    for name, targets in graph['branches'].items():
+        lines.append(f"- **Branch:** {labels.get(name, name)} → {names(targets)}")
+    for name, sources in graph['joins'].items():
+        lines.append(f"- **Join:** {names(sources)} → {labels.get(name, name)}")
+    for cycle in graph['cycles']:
+        lines.append(f"- **Loop:** {names(cycle)}")
+    if graph['unreachable']:
+        lines.append(f"- **Unreachable From Start:** {names(graph['unreachable'])}")
+    if graph['missing_targets']:
+        missing = ', '.join(f"{edge['from_shape']} → {edge['to_shape']}" for edge in graph['missing_targets'])
+        lines.append(f"- **Connections To Missing Shapes:** {missing}")
+    return lines
+
+def process_graphs_for_llm(processing_results: Dict[str, Any]) -> Optional[str]:
+    """
+    Compact JSON of every process graph, for prompts that generate iFlows
+
+    Returns:
+        str or None: JSON keyed by process name, or None if there are no graphs
+    """
+    graphs = {}
+    for process in processing_results.get('processes', []):
+        graph = process.get('process', {}).get('graph')
+        if not graph:
+            continue
+        graphs[process['component'].get('name') or process.get('file_path')] = {
+            'shapes': {shape['name']: f"{shape['label']} ({shape['type']})" for shape in graph['shapes']},
+            'edges': [[edge['from'], edge['to']] for edge in graph['edges']],
+            'start_shapes': graph['start_shapes'],
+            'end_shapes': graph['end_shapes'],
+            'branches': graph['branches'],
+            'joins': graph['joins'],
+            'cycles': graph['cycles'],
+            'unreachable': graph['unreachable']
+        }
+    return json.dumps(graphs, separators=(',', ':')) if graphs else None
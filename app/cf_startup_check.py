@@ -1,60 +1,72 @@
 """
 Cloud Foundry startup check script.
-This script is run when the application starts in Cloud Foundry to verify that all required modules can be imported.
+This script is run when the application starts in Cloud Foundry to verify that all required modules can be found.
+Modules are located without importing them, so the check does not load NLTK or the documentation stack;
+run it as a script to also import them.
 """
 
 import os
 import sys
 import logging
+import importlib.util
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def check_imports():
-    """Check that all required modules can be imported"""
+# Modules the API needs at runtime
+REQUIRED_MODULES = [
+    'iflow_matcher',
+    'document_processor',
+    'mule_flow_documentation',
+    'boomi_flow_documentation',
+    'boomi_process_graph',
+    'md_to_html_with_mermaid',
+    'documentation_enhancer'
+]
+
+def check_imports(import_modules=False):
+    """
+    Check that all required modules can be found
+
+    Args:
+        import_modules (bool): Also import iflow_matcher to verify its dependencies (slow)
+
+    Returns:
+        bool: True if all modules were found
+    """
     logger.info("Starting import checks...")
-    
+
     # Check working directory and Python path
     logger.info(f"Current working directory: {os.getcwd()}")
-    logger.info(f"Python path: {sys.path}")
-    
-    # List files in current directory
-    try:
-        files = os.listdir(".")
-        logger.info(f"Files in current directory: {files}")
-    except Exception as e:
-        logger.error(f"Error listing files: {str(e)}")
-    
-    # Check if iflow_matcher.py exists
-    if "iflow_matcher.py" in files:
-        logger.info("iflow_matcher.py found in current directory")
-    else:
-        logger.error("iflow_matcher.py NOT found in current directory")
-    
-    # Try to import iflow_matcher
-    try:
-        logger.info("Trying to import iflow_matcher...")
-        import iflow_matcher
-        logger.info("Successfully imported iflow_matcher module")
-        logger.info(f"Module file: {iflow_matcher.__file__}")
-        
-        # Try to import process_markdown_for_iflow
+    logger.debug(f"Python path: {sys.path}")
+
+    missing = []
+    for module_name in REQUIRED_MODULES:
+        try:
+            if importlib.util.find_spec(module_name) is None:
+                missing.append(module_name)
+        except (ImportError, ValueError):
+            missing.append(module_name)
+
+    if missing:
+        logger.error(f"Modules NOT found: {', '.join(missing)}")
+        return False
+
+    if import_modules:
         try:
             logger.info("Trying to import process_markdown_for_iflow from iflow_matcher...")
             from iflow_matcher import process_markdown_for_iflow
             logger.info("Successfully imported process_markdown_for_iflow function")
-            logger.info("Import checks completed successfully!")
-            return True
         except ImportError as e:
             logger.error(f"Error importing process_markdown_for_iflow: {str(e)}")
             return False
-    except ImportError as e:
-        logger.error(f"Error importing iflow_matcher: {str(e)}")
-        return False
-    except Exception as e:
-        logger.error(f"Unexpected error during import check: {str(e)}")
-        return False
+        except Exception as e:
+            logger.error(f"Unexpected error during import check: {str(e)}")
+            return False
+
+    logger.info("Import checks completed successfully!")
+    return True
 
 if __name__ == "__main__":
-    check_imports()
+    check_imports(import_modules=True)
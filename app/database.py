@@ -172,6 +172,24 @@ class DatabaseManager:
             logging.error(f"Failed to update job {job_id}: {str(e)}")
             raise
     
+    @staticmethod
+    def update_jobs(updates_by_job):
+        """
+        Apply updates to several jobs in one transaction.
+        """
+        try:
+            jobs = Job.query.filter(Job.id.in_(list(updates_by_job))).all()
+            for job in jobs:
+                fields = dict(updates_by_job[job.id])
+                job.update_status(fields.pop('status', job.status), commit=False, **fields)
+            db.session.commit()
+            logging.debug(f"Updated {len(jobs)} job(s)")
+            return len(jobs)
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Failed to update jobs: {str(e)}")
+            raise
+    
     @staticmethod
     def get_all_jobs(limit=100, offset=0):
         """
@@ -347,17 +365,35 @@ def migrate_existing_jobs(app: Flask, jobs_file_path: str):
     if not os.path.exists(jobs_file_path):
         logging.info("No existing jobs file found, skipping migration")
         return
+
+    # Skip the migration when the file has not changed since it last succeeded
+    stat = os.stat(jobs_file_path)
+    file_stamp = f"{stat.st_size}:{stat.st_mtime_ns}"
+    marker_path = f"{jobs_file_path}.migrated"
+    try:
+        with open(marker_path, 'r') as f:
+            if f.read().strip() == file_stamp:
+                logging.info("Jobs file already migrated, skipping migration")
+                return
+    except OSError:
+        pass
     
     try:
         with app.app_context():
             with open(jobs_file_path, 'r') as f:
                 jobs_data = json.load(f)
+
+            # One query for all ids instead of one per job
+            existing_ids = set()
+            job_ids = list(jobs_data.keys())
+            for start in range(0, len(job_ids), 500):
+                rows = db.session.query(Job.id).filter(Job.id.in_(job_ids[start:start + 500])).all()
+                existing_ids.update(row[0] for row in rows)
             
             migrated_count = 0
             for job_id, job_data in jobs_data.items():
                 # Check if job already exists
-                existing_job = Job.query.get(job_id)
-                if existing_job:
+                if job_id in existing_ids:
                     continue
                 
                 # Create new job from existing data
@@ -387,6 +423,9 @@ def migrate_existing_jobs(app: Flask, jobs_file_path: str):
             
             db.session.commit()
             logging.info(f"Migrated {migrated_count} jobs from JSON file to database")
+
+        with open(marker_path, 'w') as f:
+            f.write(file_stamp)
             
     except Exception as e:
         db.session.rollback()
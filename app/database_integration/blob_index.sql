@@ -0,0 +1,141 @@
+-- Blob Index for IS-Migration Application
+-- Run this in your Supabase SQL Editor after the main schema (safe to re-run)
+--
+-- The content-addressed blob store (blob_store.py) keeps its index here, so
+-- every worker and instance sees the same blobs and job manifests. Reference
+-- counts are not stored: a blob is referenced by its blob_references rows, and
+-- it is only deleted inside the same transaction that finds it has none left.
+
+-- ==========================================
+-- TABLES
+-- ==========================================
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    size BIGINT NOT NULL,
+    storage_key TEXT NOT NULL,
+    url TEXT NOT NULL,
+    -- Found in storage by rebuild_index without known references; never deleted automatically
+    pinned BOOLEAN NOT NULL DEFAULT FALSE,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS blob_references (
+    job_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    sha256 TEXT NOT NULL REFERENCES blobs (sha256),
+    kind TEXT NOT NULL DEFAULT 'upload',
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (job_id, name)
+);
+
+CREATE INDEX IF NOT EXISTS idx_blob_references_sha256 ON blob_references (sha256);
+
+-- ==========================================
+-- FUNCTIONS
+-- ==========================================
+
+-- Record a stored blob unless another upload of the same content won; returns the stored row
+CREATE OR REPLACE FUNCTION blob_add(p_sha256 TEXT, p_size BIGINT, p_storage_key TEXT, p_url TEXT, p_pinned BOOLEAN DEFAULT FALSE)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO blobs (sha256, size, storage_key, url, pinned)
+    VALUES (p_sha256, p_size, p_storage_key, p_url, p_pinned)
+    ON CONFLICT (sha256) DO NOTHING;
+
+    RETURN (SELECT to_jsonb(b) FROM blobs b WHERE b.sha256 = p_sha256);
+END;
+$$;
+
+-- Delete the given blobs that are no longer referenced; returns them so their objects can be removed
+CREATE OR REPLACE FUNCTION blob_delete_unreferenced(p_hashes TEXT[])
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    deleted JSONB;
+BEGIN
+    -- Lock first, so references added concurrently are either seen below or fail
+    PERFORM 1 FROM blobs WHERE sha256 = ANY (p_hashes) ORDER BY sha256 FOR UPDATE;
+
+    WITH removed AS (
+        DELETE FROM blobs b
+        WHERE b.sha256 = ANY (p_hashes)
+          AND NOT b.pinned
+          AND NOT EXISTS (SELECT 1 FROM blob_references r WHERE r.sha256 = b.sha256)
+        RETURNING b.sha256, b.size, b.storage_key
+    )
+    SELECT COALESCE(jsonb_agg(to_jsonb(removed)), '[]'::jsonb) INTO deleted FROM removed;
+
+    RETURN deleted;
+END;
+$$;
+
+-- Reference a blob from a job's manifest under a file name (replacing what the name pointed to)
+CREATE OR REPLACE FUNCTION blob_add_reference(p_job_id TEXT, p_name TEXT, p_sha256 TEXT, p_kind TEXT)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    blob_url TEXT;
+    previous TEXT;
+BEGIN
+    SELECT url INTO blob_url FROM blobs WHERE sha256 = p_sha256 FOR SHARE;
+    IF NOT FOUND THEN
+        RETURN NULL;
+    END IF;
+
+    SELECT sha256 INTO previous FROM blob_references
+    WHERE job_id = p_job_id AND name = p_name
+    FOR UPDATE;
+
+    INSERT INTO blob_references (job_id, name, sha256, kind)
+    VALUES (p_job_id, p_name, p_sha256, p_kind)
+    ON CONFLICT (job_id, name) DO UPDATE
+        SET sha256 = EXCLUDED.sha256, kind = EXCLUDED.kind;
+
+    RETURN jsonb_build_object(
+        'url', blob_url,
+        'deleted', CASE
+            WHEN previous IS NOT NULL AND previous <> p_sha256 THEN blob_delete_unreferenced(ARRAY[previous])
+            ELSE '[]'::jsonb
+        END
+    );
+END;
+$$;
+
+-- Drop a job's manifest and delete the blobs no other job references
+CREATE OR REPLACE FUNCTION blob_release_job(p_job_id TEXT)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    hashes TEXT[];
+    released INT;
+BEGIN
+    WITH removed AS (
+        DELETE FROM blob_references WHERE job_id = p_job_id RETURNING sha256
+    )
+    SELECT COALESCE(array_agg(DISTINCT sha256), '{}'), COUNT(*) INTO hashes, released FROM removed;
+
+    RETURN jsonb_build_object(
+        'references_released', released,
+        'deleted', blob_delete_unreferenced(hashes)
+    );
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION blob_stats()
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT jsonb_build_object(
+        'total_files', (SELECT COUNT(*) FROM blobs),
+        'stored_bytes', (SELECT COALESCE(SUM(size), 0) FROM blobs),
+        'total_references', (SELECT COUNT(*) FROM blob_references),
+        'logical_bytes', (SELECT COALESCE(SUM(b.size), 0) FROM blob_references r JOIN blobs b ON b.sha256 = r.sha256),
+        'jobs', (SELECT COUNT(DISTINCT job_id) FROM blob_references)
+    );
+$$;
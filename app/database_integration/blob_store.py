@@ -0,0 +1,406 @@
+"""
+Content-Addressed Blob Store
+Deduplicates uploads and results on top of S3Manager
+"""
+
+import os
+import uuid
+import sqlite3
+import hashlib
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, BinaryIO, List, Tuple
+
+from .s3_manager import s3_manager, STORAGE_CHUNK_SIZE
+from .supabase_manager import supabase_manager
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BLOB_PREFIX = 'blobs/sha256'
+
+class SQLiteBlobIndex:
+    """
+    Blob index in a SQLite file, shared by the worker processes of one instance
+
+    Used with local storage, where the blobs live on the instance's disk as
+    well. Every change is one write transaction; a blob is deleted only in the
+    transaction that finds no job manifest referencing it any more.
+    """
+
+    def __init__(self, path: str, timeout: float = 30):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS blobs (sha256 TEXT PRIMARY KEY, size INTEGER NOT NULL, "
+                "storage_key TEXT NOT NULL, url TEXT NOT NULL, pinned INTEGER NOT NULL DEFAULT 0, "
+                "created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS blob_references (job_id TEXT NOT NULL, name TEXT NOT NULL, "
+                "sha256 TEXT NOT NULL, kind TEXT NOT NULL DEFAULT 'upload', PRIMARY KEY (job_id, name))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_blob_references_sha256 ON blob_references (sha256)")
+
+    def _connection(self):
+        """One connection per thread and process; connections are never inherited across fork"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _blob(row) -> Dict[str, Any]:
+        blob = dict(row)
+        blob['pinned'] = bool(blob['pinned'])
+        return blob
+
+    def _delete_unreferenced(self, conn, hashes) -> List[Dict[str, Any]]:
+        """Delete the given blobs that no manifest references; the caller holds the transaction"""
+        deleted = []
+        for sha256 in set(hashes):
+            row = conn.execute(
+                "SELECT sha256, size, storage_key FROM blobs WHERE sha256 = ? AND pinned = 0 "
+                "AND NOT EXISTS (SELECT 1 FROM blob_references WHERE sha256 = ?)",
+                (sha256, sha256)
+            ).fetchone()
+            if row:
+                conn.execute("DELETE FROM blobs WHERE sha256 = ?", (sha256,))
+                deleted.append(dict(row))
+        return deleted
+
+    def get_blob(self, sha256: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute("SELECT * FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+        return self._blob(row) if row else None
+
+    def add_blob(self, sha256: str, size: int, storage_key: str, url: str, pinned: bool = False) -> Dict[str, Any]:
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO blobs (sha256, size, storage_key, url, pinned) VALUES (?, ?, ?, ?, ?)",
+                (sha256, size, storage_key, url, int(pinned))
+            )
+            return self._blob(conn.execute("SELECT * FROM blobs WHERE sha256 = ?", (sha256,)).fetchone())
+
+    def add_reference(self, job_id: str, name: str, sha256: str, kind: str) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+        with self._transaction() as conn:
+            blob = conn.execute("SELECT url FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+            if not blob:
+                return None, []
+            previous = conn.execute(
+                "SELECT sha256 FROM blob_references WHERE job_id = ? AND name = ?", (job_id, name)
+            ).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO blob_references (job_id, name, sha256, kind) VALUES (?, ?, ?, ?)",
+                (job_id, name, sha256, kind)
+            )
+            deleted = []
+            if previous and previous['sha256'] != sha256:
+                deleted = self._delete_unreferenced(conn, [previous['sha256']])
+            return blob['url'], deleted
+
+    def get_manifest(self, job_id: str) -> Dict[str, Dict[str, Any]]:
+        rows = self._connection().execute(
+            "SELECT r.name, r.kind, b.* FROM blob_references r JOIN blobs b ON b.sha256 = r.sha256 WHERE r.job_id = ?",
+            (job_id,)
+        ).fetchall()
+        manifest = {}
+        for row in rows:
+            entry = self._blob(row)
+            manifest[entry.pop('name')] = entry
+        return manifest
+
+    def release_job(self, job_id: str) -> Tuple[int, List[Dict[str, Any]]]:
+        with self._transaction() as conn:
+            hashes = [row['sha256'] for row in conn.execute(
+                "SELECT sha256 FROM blob_references WHERE job_id = ?", (job_id,)
+            ).fetchall()]
+            conn.execute("DELETE FROM blob_references WHERE job_id = ?", (job_id,))
+            return len(hashes), self._delete_unreferenced(conn, hashes)
+
+    def stats(self) -> Dict[str, int]:
+        conn = self._connection()
+        total_files, stored_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+        total_references, logical_bytes, jobs = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(b.size), 0), COUNT(DISTINCT r.job_id) "
+            "FROM blob_references r JOIN blobs b ON b.sha256 = r.sha256"
+        ).fetchone()
+        return {
+            'total_files': total_files,
+            'stored_bytes': stored_bytes,
+            'total_references': total_references,
+            'logical_bytes': logical_bytes,
+            'jobs': jobs
+        }
+
+class SupabaseBlobIndex:
+    """
+    Blob index in the shared Supabase database (see blob_index.sql)
+
+    Used with S3 storage, so every worker and instance, including instances
+    started after a restage, sees the same blobs and manifests. Reference
+    changes run as database functions, each in one transaction.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def get_blob(self, sha256: str) -> Optional[Dict[str, Any]]:
+        result = self.client.table('blobs').select('*').eq('sha256', sha256).execute()
+        return result.data[0] if result.data else None
+
+    def add_blob(self, sha256: str, size: int, storage_key: str, url: str, pinned: bool = False) -> Dict[str, Any]:
+        return self.client.rpc('blob_add', {
+            'p_sha256': sha256,
+            'p_size': size,
+            'p_storage_key': storage_key,
+            'p_url': url,
+            'p_pinned': pinned
+        }).execute().data
+
+    def add_reference(self, job_id: str, name: str, sha256: str, kind: str) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+        result = self.client.rpc('blob_add_reference', {
+            'p_job_id': job_id,
+            'p_name': name,
+            'p_sha256': sha256,
+            'p_kind': kind
+        }).execute().data
+        if not result:
+            return None, []
+        return result['url'], result['deleted']
+
+    def get_manifest(self, job_id: str) -> Dict[str, Dict[str, Any]]:
+        references = self.client.table('blob_references').select('name, sha256, kind').eq('job_id', job_id).execute().data or []
+        if not references:
+            return {}
+        blobs = self.client.table('blobs').select('*').in_('sha256', list({r['sha256'] for r in references})).execute().data or []
+        blobs_by_hash = {blob['sha256']: blob for blob in blobs}
+        return {
+            reference['name']: {**blobs_by_hash.get(reference['sha256'], {}), 'kind': reference['kind']}
+            for reference in references
+        }
+
+    def release_job(self, job_id: str) -> Tuple[int, List[Dict[str, Any]]]:
+        result = self.client.rpc('blob_release_job', {'p_job_id': job_id}).execute().data
+        return result['references_released'], result['deleted']
+
+    def stats(self) -> Dict[str, int]:
+        return self.client.rpc('blob_stats', {}).execute().data
+
+def open_blob_index(storage):
+    """
+    Open the blob index selected by BLOB_INDEX
+
+    'auto' (default) keeps the index in Supabase when the blobs are in S3 and
+    Supabase is configured, and otherwise in a SQLite file (BLOB_INDEX_PATH,
+    default <LOCAL_STORAGE_PATH>/blob_index.sqlite3) next to the local blobs.
+    """
+    choice = os.getenv('BLOB_INDEX', 'auto').lower()
+    client = getattr(supabase_manager, 'client', None)
+
+    if choice == 'supabase' or (choice == 'auto' and storage.s3_enabled and client):
+        if not client:
+            raise RuntimeError("BLOB_INDEX=supabase requires SUPABASE_URL and SUPABASE_ANON_KEY")
+        logger.info("Using the Supabase blob index")
+        return SupabaseBlobIndex(client)
+
+    path = os.getenv(
+        'BLOB_INDEX_PATH',
+        os.path.join(os.getenv('LOCAL_STORAGE_PATH', 'storage'), 'blob_index.sqlite3')
+    )
+    if storage.s3_enabled:
+        logger.warning(f"Blobs are in S3 but the blob index is local to this instance ({path}); "
+                       "configure Supabase and run blob_index.sql to share it")
+    return SQLiteBlobIndex(path)
+
+class BlobStore:
+    """
+    Stores file contents once under their SHA-256 and tracks which jobs reference them
+
+    Each job has a manifest mapping its file names to blob hashes. A blob is
+    deleted when the last manifest entry pointing at it is released; the
+    manifests live in a shared index (see open_blob_index), so that decision
+    is taken atomically by the database and never from a per-process count.
+    Dedup checks and storage statistics never list the bucket.
+    """
+
+    def __init__(self, storage=None, index=None):
+        self.storage = storage or s3_manager
+        self.index = index or open_blob_index(self.storage)
+
+    # ==========================================
+    # BLOBS
+    # ==========================================
+
+    @staticmethod
+    def new_blob_key(sha256: str) -> str:
+        """
+        Storage key for a new upload of a blob
+
+        Each upload gets its own key, so deleting an old copy of some content
+        can never remove a copy of the same content uploaded again meanwhile.
+        """
+        return f"{BLOB_PREFIX}/{sha256[:2]}/{sha256}.{uuid.uuid4().hex[:12]}"
+
+    @staticmethod
+    def hash_from_key(key: str) -> str:
+        """SHA-256 of the blob stored under a key"""
+        return key.rsplit('/', 1)[-1].split('.', 1)[0]
+
+    @staticmethod
+    def hash_file(file_path: str) -> str:
+        """SHA-256 of a file, read in chunks"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(STORAGE_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def exists(self, sha256: str) -> bool:
+        """Check whether a blob is already stored"""
+        return self.index.get_blob(sha256) is not None
+
+    def get_blob(self, sha256: str) -> Optional[Dict[str, Any]]:
+        """Get the index entry of a blob"""
+        return self.index.get_blob(sha256)
+
+    def put_file(self, file_path: str, sha256: Optional[str] = None) -> Optional[str]:
+        """
+        Store a file on disk as a blob, uploading it only if its content is new
+        Returns the SHA-256, or None if the upload failed
+        """
+        sha256 = sha256 or self.hash_file(file_path)
+
+        if self.index.get_blob(sha256):
+            logger.info(f"Blob {sha256[:12]} already stored, skipping upload")
+            return sha256
+
+        key = self.new_blob_key(sha256)
+        url = self.storage.upload_local_file(file_path, key, {'sha256': sha256})
+        if not url:
+            return None
+
+        stored = self.index.add_blob(sha256, os.path.getsize(file_path), key, url)
+        if stored['storage_key'] != key:
+            # Another worker stored the same content first; keep its copy
+            self.storage.delete_file(key)
+
+        return sha256
+
+    def put_fileobj(self, file_obj: BinaryIO) -> Optional[str]:
+        """
+        Store a file object as a blob
+
+        The content is spooled to a temporary file while hashing, so it is read
+        once and never held in memory as a whole.
+        Returns the SHA-256, or None if the upload failed
+        """
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(prefix='blob_')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                for chunk in iter(lambda: file_obj.read(STORAGE_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    tmp.write(chunk)
+            return self.put_file(tmp_path, digest.hexdigest())
+        finally:
+            os.remove(tmp_path)
+
+    def _delete_objects(self, deleted: List[Dict[str, Any]]) -> int:
+        """Remove the storage objects of blobs the index has dropped; returns the bytes freed"""
+        for blob in deleted:
+            self.storage.delete_file(blob['storage_key'])
+        return sum(blob['size'] for blob in deleted)
+
+    # ==========================================
+    # MANIFESTS AND REFERENCES
+    # ==========================================
+
+    def add_to_manifest(self, job_id: str, name: str, sha256: str, kind: str = 'upload') -> Optional[str]:
+        """
+        Reference a stored blob from a job's manifest under a file name
+        Returns the blob URL/path
+        """
+        url, deleted = self.index.add_reference(job_id, name, sha256, kind)
+        if not url:
+            logger.error(f"Cannot reference unknown blob {sha256}")
+            return None
+
+        self._delete_objects(deleted)
+        return url
+
+    def get_manifest(self, job_id: str) -> Dict[str, Any]:
+        """Get the files of a job with their blob entries"""
+        return self.index.get_manifest(job_id)
+
+    def release_job(self, job_id: str) -> Dict[str, int]:
+        """
+        Drop a job's manifest and delete blobs no other job references
+        Returns counts of released references and deleted blobs
+        """
+        released, deleted = self.index.release_job(job_id)
+        freed = self._delete_objects(deleted)
+        return {'references_released': released, 'blobs_deleted': len(deleted), 'bytes_freed': freed}
+
+    # ==========================================
+    # STATISTICS
+    # ==========================================
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Storage statistics from the index, without listing the bucket"""
+        stats = self.index.stats()
+        stored = stats['stored_bytes']
+        logical = stats['logical_bytes']
+        return {
+            'total_files': stats['total_files'],
+            'total_references': stats['total_references'],
+            'total_size_bytes': stored,
+            'total_size_mb': round(stored / (1024 * 1024), 2),
+            'logical_size_bytes': logical,
+            'dedup_saved_mb': round(max(logical - stored, 0) / (1024 * 1024), 2),
+            'jobs': stats['jobs']
+        }
+
+    def rebuild_index(self) -> Dict[str, Any]:
+        """
+        Add blobs found in storage but missing from the index, e.g. after the index was lost
+
+        Their references are unknown, so they are added as pinned and never
+        deleted automatically. Existing entries and manifests are left alone;
+        this is the only operation that lists the blob prefix.
+        """
+        added = 0
+        for obj in self.storage.list_files(BLOB_PREFIX):
+            sha256 = self.hash_from_key(obj['key'])
+            if self.index.get_blob(sha256):
+                continue
+            self.index.add_blob(sha256, obj['size'], obj['key'], self.storage.get_object_url(obj['key']), pinned=True)
+            added += 1
+
+        logger.info(f"Blob index rebuild added {added} pinned blob(s)")
+        return self.get_stats()
+
+# Global instance
+blob_store = BlobStore()
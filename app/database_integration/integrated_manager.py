@@ -6,12 +6,13 @@ Combines Supabase database with S3 storage and vector search
 import os
 import logging
 from typing import Optional, Dict, Any, List, BinaryIO
-from datetime import datetime
+from datetime import datetime, timedelta
 import uuid
 import json
 
 from .supabase_manager import supabase_manager
 from .s3_manager import s3_manager
+from .blob_store import blob_store
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -25,6 +26,7 @@ class IntegratedManager:
     def __init__(self):
         self.db = supabase_manager
         self.storage = s3_manager
+        self.blobs = blob_store
         logger.info("Integrated manager initialized")
     
     def test_connections(self) -> Dict[str, bool]:
@@ -38,19 +40,21 @@ class IntegratedManager:
     # ENHANCED JOB MANAGEMENT
     # ==========================================
     
-    def create_job_with_file(self, job_data: Dict[str, Any], file_obj: Optional[BinaryIO] = None, filename: Optional[str] = None) -> Dict[str, Any]:
-        """Create a job and optionally upload associated file"""
+    def create_job_with_file(self, job_data: Dict[str, Any], file_obj: Optional[BinaryIO] = None, filename: Optional[str] = None, file_path: Optional[str] = None) -> Dict[str, Any]:
+        """Create a job and optionally upload associated file (from a file object or a file on disk)"""
         try:
             job_id = job_data.get('id', str(uuid.uuid4()))
             job_data['id'] = job_id
+            file_info = job_data.get('file_info') or {}
             
-            # Upload file if provided
-            if file_obj and filename:
-                file_key = f"jobs/{job_id}/uploads/{filename}"
-                file_url = self.storage.upload_file(file_obj, file_key, {
-                    'job_id': job_id,
-                    'upload_type': 'original_document'
-                })
+            # Upload file if provided (stored once per content, referenced from the job manifest)
+            if (file_obj or file_path) and filename:
+                if file_path:
+                    sha256 = self.blobs.put_file(file_path, file_info.get('sha256'))
+                else:
+                    sha256 = self.blobs.put_fileobj(file_obj)
+                
+                file_url = self.blobs.add_to_manifest(job_id, f"uploads/{filename}", sha256, 'upload') if sha256 else None
                 
                 if file_url:
                     job_data['upload_path'] = file_url
@@ -61,7 +65,7 @@ class IntegratedManager:
                         'filename': filename,
                         'document_type': 'upload',
                         'file_path': file_url,
-                        'file_size': getattr(file_obj, 'content_length', None)
+                        'file_size': self.blobs.get_blob(sha256)['size']
                     }
                     self.db.create_document(doc_data)
             
@@ -89,12 +93,8 @@ class IntegratedManager:
             if result_files:
                 result_paths = {}
                 for file_type, file_obj in result_files.items():
-                    file_key = f"jobs/{job_id}/results/{file_type}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}"
-                    file_url = self.storage.upload_file(file_obj, file_key, {
-                        'job_id': job_id,
-                        'file_type': file_type,
-                        'upload_type': 'result'
-                    })
+                    sha256 = self.blobs.put_fileobj(file_obj)
+                    file_url = self.blobs.add_to_manifest(job_id, f"results/{file_type}", sha256, 'result') if sha256 else None
                     
                     if file_url:
                         result_paths[file_type] = file_url
@@ -271,38 +271,67 @@ class IntegratedManager:
             # Get database stats
             db_stats = self.db.get_usage_stats(days)
             
-            # Get storage stats
-            storage_files = self.storage.list_files()
-            total_storage_size = sum(f.get('size', 0) for f in storage_files)
-            
-            # Combine stats
+            # Get storage stats from the blob index (no bucket listing)
             return {
                 **db_stats,
-                'storage': {
-                    'total_files': len(storage_files),
-                    'total_size_bytes': total_storage_size,
-                    'total_size_mb': round(total_storage_size / (1024 * 1024), 2)
-                }
+                'storage': self.blobs.get_stats()
             }
             
         except Exception as e:
             logger.error(f"Failed to get comprehensive stats: {str(e)}")
             return {}
     
-    def cleanup_old_data(self, days_to_keep: int = 90) -> Dict[str, int]:
-        """Clean up old data from database and storage"""
+    def release_job_files(self, job_id: str) -> Dict[str, int]:
+        """Release a job's stored files; blobs still used by other jobs are kept"""
         try:
-            # This would implement cleanup logic
-            # For now, return placeholder
-            return {
-                'jobs_deleted': 0,
-                'files_deleted': 0,
-                'storage_freed_mb': 0
-            }
+            return self.blobs.release_job(job_id)
+        except Exception as e:
+            logger.error(f"Failed to release job files: {str(e)}")
+            return {}
+    
+    def cleanup_old_data(self, days_to_keep: int = 90, statuses: Optional[List[str]] = None, page_size: int = 100) -> Dict[str, int]:
+        """
+        Delete finished jobs older than days_to_keep with their stored files
+        Jobs are processed a page at a time; a job row is only deleted after its files were released
+        """
+        statuses = statuses or ['completed', 'failed']
+        cutoff = (datetime.utcnow() - timedelta(days=days_to_keep)).isoformat()
+        jobs_deleted = 0
+        files_deleted = 0
+        freed_bytes = 0
+        
+        try:
+            # Make sure queued updates are not written after their job is gone
+            self.db.flush()
+            
+            while True:
+                expired = self.db.get_expired_jobs(cutoff, statuses, page_size)
+                if not expired:
+                    break
+                
+                deleted_in_page = 0
+                for job in expired:
+                    released = self.blobs.release_job(job['id'])
+                    if not self.db.delete_job(job['id']):
+                        continue
+                    deleted_in_page += 1
+                    files_deleted += released['blobs_deleted']
+                    freed_bytes += released['bytes_freed']
+                jobs_deleted += deleted_in_page
+                
+                # Stop on a short page, or if nothing could be deleted (the same page would come back)
+                if len(expired) < page_size or deleted_in_page == 0:
+                    break
             
         except Exception as e:
             logger.error(f"Failed to cleanup old data: {str(e)}")
-            return {}
+        
+        return {
+            'jobs_deleted': jobs_deleted,
+            'files_deleted': files_deleted,
+            'freed_bytes': freed_bytes,
+            'storage_freed_mb': round(freed_bytes / (1024 * 1024), 2)
+        }
 
 # Global instance
 integrated_manager = IntegratedManager()
@@ -10,12 +10,25 @@ import boto3
 from botocore.exceptions import ClientError, NoCredentialsError
 from datetime import datetime, timedelta
 import uuid
+import shutil
 import mimetypes
+from boto3.s3.transfer import TransferConfig
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Bytes copied per read when streaming files into storage
+STORAGE_CHUNK_SIZE = 1024 * 1024
+
+# Multipart settings: files above 8 MB are uploaded in 8 MB parts read from disk
+S3_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=4,
+    use_threads=True
+)
+
 class S3Manager:
     """
     Manages S3 file storage operations
@@ -78,6 +91,39 @@ class S3Manager:
         else:
             return self._upload_to_local(file_obj, key, metadata)
     
+    def upload_local_file(self, file_path: str, key: str, metadata: Optional[Dict[str, str]] = None) -> Optional[str]:
+        """
+        Upload a file that is already on disk without loading it into memory
+        Returns the file URL/path
+        """
+        if self.s3_enabled:
+            try:
+                content_type, _ = mimetypes.guess_type(key)
+                extra_args = {'ContentType': content_type or 'application/octet-stream'}
+                if metadata:
+                    extra_args['Metadata'] = metadata
+
+                # upload_file reads the parts straight from disk, in parallel for large files
+                self.s3_client.upload_file(file_path, self.bucket_name, key, ExtraArgs=extra_args, Config=S3_TRANSFER_CONFIG)
+
+                url = f"https://{self.bucket_name}.s3.{self.aws_region}.amazonaws.com/{key}"
+                logger.info(f"File uploaded to S3: {url}")
+                return url
+            except Exception as e:
+                logger.error(f"Failed to upload file to S3: {str(e)}")
+                return None
+        else:
+            try:
+                local_storage_path = os.getenv('LOCAL_STORAGE_PATH', 'storage')
+                target_path = os.path.join(local_storage_path, key)
+                os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                shutil.copyfile(file_path, target_path)
+                logger.info(f"File uploaded to local storage: {target_path}")
+                return target_path
+            except Exception as e:
+                logger.error(f"Failed to upload file to local storage: {str(e)}")
+                return None
+    
     def _upload_to_s3(self, file_obj: BinaryIO, key: str, metadata: Optional[Dict[str, str]] = None) -> Optional[str]:
         """Upload file to S3"""
         try:
@@ -97,8 +143,8 @@ class S3Manager:
             if metadata:
                 upload_params['Metadata'] = metadata
             
-            # Upload file
-            self.s3_client.upload_fileobj(**upload_params)
+            # Upload file (multipart for large files, streamed in chunks)
+            self.s3_client.upload_fileobj(**upload_params, Config=S3_TRANSFER_CONFIG)
             
             # Generate URL
             url = f"https://{self.bucket_name}.s3.{self.aws_region}.amazonaws.com/{key}"
@@ -120,9 +166,9 @@ class S3Manager:
             file_path = os.path.join(local_storage_path, key)
             os.makedirs(os.path.dirname(file_path), exist_ok=True)
             
-            # Write file
+            # Write file in chunks
             with open(file_path, 'wb') as f:
-                f.write(file_obj.read())
+                shutil.copyfileobj(file_obj, f, STORAGE_CHUNK_SIZE)
             
             logger.info(f"File uploaded to local storage: {file_path}")
             return file_path
@@ -209,6 +255,12 @@ class S3Manager:
             logger.error(f"Failed to generate presigned URL: {str(e)}")
             return None
     
+    def get_object_url(self, key: str) -> str:
+        """Get the URL/path a stored object is addressed by, as returned on upload"""
+        if self.s3_enabled:
+            return f"https://{self.bucket_name}.s3.{self.aws_region}.amazonaws.com/{key}"
+        return os.path.join(os.getenv('LOCAL_STORAGE_PATH', 'storage'), key)
+    
     def list_files(self, prefix: str = '') -> List[Dict[str, Any]]:
         """List files in S3 bucket or local storage"""
         if self.s3_enabled:
@@ -10,6 +10,8 @@ from datetime import datetime, timedelta
 import json
 import uuid
 
+from .write_buffer import WriteBehindBuffer
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -25,6 +27,14 @@ class SupabaseManager:
         self.service_role_key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
         self.schema_name = schema_name
 
+        # Progress updates and activity/history/metric/document inserts are written behind
+        self.writes = WriteBehindBuffer(
+            self._write_job_updates,
+            self._write_rows,
+            flush_interval=float(os.getenv('DB_FLUSH_INTERVAL_SECONDS', '1.0')),
+            name='supabase'
+        )
+
         # For testing/development, allow dummy values
         if not self.url or not self.anon_key:
             logger.warning("SUPABASE_URL and SUPABASE_ANON_KEY not set - database features disabled")
@@ -94,29 +104,73 @@ class SupabaseManager:
         """Get a job by ID"""
         try:
             result = self._get_table('jobs').select('*').eq('id', job_id).execute()
-            return result.data[0] if result.data else None
+            job = result.data[0] if result.data else None
+            if job:
+                # Include updates that are queued but not written yet
+                job.update(self.writes.pending_updates(job_id))
+            return job
         except Exception as e:
             logger.error(f"Failed to get job {job_id}: {str(e)}")
             return None
     
-    def update_job(self, job_id: str, updates: Dict[str, Any]) -> bool:
-        """Update a job record and create history entry"""
+    def update_job(self, job_id: str, updates: Dict[str, Any], wait: bool = False) -> bool:
+        """
+        Queue a job update; a history entry is written with it
+        Updates to the same job are merged until the next flush. Pass wait=True to write now.
+        """
         try:
-            # Get current job data for history
-            current_job = self.get_job(job_id)
-            if current_job:
-                # Create history entry
-                self.create_job_history(job_id, current_job, updates)
-            
-            # Update job
             updates['updated_at'] = datetime.utcnow().isoformat()
-            result = self._get_table('jobs').update(updates).eq('id', job_id).execute()
-            logger.info(f"Updated job {job_id}")
+            self.writes.update(job_id, updates)
+            if wait:
+                self.writes.flush()
             return True
         except Exception as e:
             logger.error(f"Failed to update job {job_id}: {str(e)}")
             return False
 
+    def flush(self):
+        """Write all queued updates and inserts now"""
+        self.writes.flush()
+
+    def _write_job_updates(self, updates_by_job: Dict[str, Dict[str, Any]]):
+        """Apply merged job updates: one read for history, one bulk history insert, one update per job"""
+        current = self._get_table('jobs').select('*').in_('id', list(updates_by_job)).execute()
+        current_jobs = {job['id']: job for job in (current.data or [])}
+
+        history = [
+            self._history_row(job_id, current_jobs[job_id], updates)
+            for job_id, updates in updates_by_job.items() if job_id in current_jobs
+        ]
+        if history:
+            self._write_rows('job_history', history)
+
+        for job_id, updates in updates_by_job.items():
+            self._get_table('jobs').update(updates).eq('id', job_id).execute()
+        logger.info(f"Updated {len(updates_by_job)} job(s)")
+
+    def _write_rows(self, table_name: str, rows: List[Dict[str, Any]]):
+        """Insert queued rows with one request"""
+        self._get_table(table_name).insert(rows).execute()
+
+    def get_expired_jobs(self, cutoff: str, statuses: List[str], limit: int = 100) -> List[Dict[str, Any]]:
+        """Get a page of jobs in the given statuses last updated before the cutoff (oldest first)"""
+        try:
+            result = self._get_table('jobs').select('id, status, updated_at').in_('status', statuses).lt('updated_at', cutoff).order('updated_at').limit(limit).execute()
+            return result.data or []
+        except Exception as e:
+            logger.error(f"Failed to get expired jobs: {str(e)}")
+            return []
+
+    def delete_job(self, job_id: str) -> bool:
+        """Delete a job; documents, history and feedback are removed by cascade"""
+        try:
+            self._get_table('jobs').delete().eq('id', job_id).execute()
+            logger.info(f"Deleted job {job_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to delete job {job_id}: {str(e)}")
+            return False
+
     def get_user_jobs(self, user_id: str, limit: int = 50) -> List[Dict[str, Any]]:
         """Get jobs for a specific user"""
         try:
@@ -131,7 +185,7 @@ class SupabaseManager:
     # ==========================================
     
     def create_document(self, doc_data: Dict[str, Any], embedding: Optional[List[float]] = None) -> Dict[str, Any]:
-        """Create a document record with optional vector embedding"""
+        """Queue a document record with optional vector embedding; returns the record as queued"""
         try:
             doc_data['id'] = doc_data.get('id', str(uuid.uuid4()))
             doc_data['created_at'] = datetime.utcnow().isoformat()
@@ -139,9 +193,8 @@ class SupabaseManager:
             if embedding:
                 doc_data['embedding'] = embedding
             
-            result = self._get_table('documents').insert(doc_data).execute()
-            logger.info(f"Created document {doc_data.get('filename')} in Supabase")
-            return result.data[0] if result.data else {}
+            self.writes.insert('documents', doc_data)
+            return doc_data
         except Exception as e:
             logger.error(f"Failed to create document: {str(e)}")
             raise
@@ -175,23 +228,24 @@ class SupabaseManager:
     # ==========================================
     
     def create_job_history(self, job_id: str, old_data: Dict[str, Any], new_data: Dict[str, Any]) -> bool:
-        """Create a job history entry"""
+        """Queue a job history entry"""
         try:
-            history_data = {
-                'id': str(uuid.uuid4()),
-                'job_id': job_id,
-                'old_data': old_data,
-                'new_data': new_data,
-                'changed_fields': list(new_data.keys()),
-                'created_at': datetime.utcnow().isoformat()
-            }
-            
-            result = self._get_table('job_history').insert(history_data).execute()
+            self.writes.insert('job_history', self._history_row(job_id, old_data, new_data))
             return True
         except Exception as e:
             logger.error(f"Failed to create job history: {str(e)}")
             return False
 
+    def _history_row(self, job_id: str, old_data: Dict[str, Any], new_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'id': str(uuid.uuid4()),
+            'job_id': job_id,
+            'old_data': old_data,
+            'new_data': new_data,
+            'changed_fields': list(new_data.keys()),
+            'created_at': datetime.utcnow().isoformat()
+        }
+
     def get_job_history(self, job_id: str) -> List[Dict[str, Any]]:
         """Get history for a specific job"""
         try:
@@ -202,7 +256,7 @@ class SupabaseManager:
             return []
     
     def create_user_activity(self, user_id: str, activity_type: str, activity_data: Dict[str, Any]) -> bool:
-        """Track user activity"""
+        """Track user activity (written in the next batch)"""
         try:
             activity = {
                 'id': str(uuid.uuid4()),
@@ -212,7 +266,7 @@ class SupabaseManager:
                 'created_at': datetime.utcnow().isoformat()
             }
             
-            result = self._get_table('user_activity').insert(activity).execute()
+            self.writes.insert('user_activity', activity)
             return True
         except Exception as e:
             logger.error(f"Failed to create user activity: {str(e)}")
@@ -258,19 +312,33 @@ class SupabaseManager:
     # ==========================================
     
     def record_metric(self, metric_data: Dict[str, Any]) -> bool:
-        """Record a system metric"""
+        """Record a system metric (written in the next batch)"""
         try:
             metric_data['id'] = str(uuid.uuid4())
             metric_data['recorded_at'] = datetime.utcnow().isoformat()
             
-            result = self._get_table('system_metrics').insert(metric_data).execute()
+            self.writes.insert('system_metrics', metric_data)
             return True
         except Exception as e:
             logger.error(f"Failed to record metric: {str(e)}")
             return False
 
     def get_usage_stats(self, days: int = 30) -> Dict[str, Any]:
-        """Get usage statistics for the last N days"""
+        """
+        Get usage statistics for the last N days
+        Reads the per-day rollups maintained by usage_stats.sql, so the cost does not grow with the number of jobs
+        """
+        try:
+            result = self.client.rpc('get_usage_stats', {'days': days}).execute()
+            if result.data:
+                return result.data
+        except Exception as e:
+            logger.warning(f"Usage stats rollups unavailable (run usage_stats.sql), counting rows instead: {str(e)}")
+
+        return self._count_usage_stats(days)
+
+    def _count_usage_stats(self, days: int) -> Dict[str, Any]:
+        """Count usage statistics from raw rows (fallback for databases without the rollups)"""
         try:
             cutoff_date = (datetime.utcnow() - timedelta(days=days)).isoformat()
 
@@ -0,0 +1,147 @@
+-- Usage Statistics Rollups for IS-Migration Application
+-- Run this in your Supabase SQL Editor after the main schema (safe to re-run)
+--
+-- Job and feedback counts are kept per day in small rollup tables maintained by
+-- triggers, so get_usage_stats() reads at most one row per day and status
+-- instead of every job and feedback row.
+
+-- ==========================================
+-- ROLLUP TABLES
+-- ==========================================
+CREATE TABLE IF NOT EXISTS job_stats_daily (
+    day DATE NOT NULL,
+    status TEXT NOT NULL,
+    job_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, status)
+);
+
+CREATE TABLE IF NOT EXISTS feedback_stats_daily (
+    day DATE PRIMARY KEY,
+    feedback_count BIGINT NOT NULL DEFAULT 0,
+    rating_count BIGINT NOT NULL DEFAULT 0,
+    rating_sum BIGINT NOT NULL DEFAULT 0
+);
+
+-- ==========================================
+-- TRIGGERS
+-- ==========================================
+CREATE OR REPLACE FUNCTION bump_job_stats(stat_day DATE, stat_status TEXT, delta INT)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO job_stats_daily (day, status, job_count)
+    VALUES (stat_day, COALESCE(stat_status, 'unknown'), delta)
+    ON CONFLICT (day, status) DO UPDATE
+        SET job_count = job_stats_daily.job_count + EXCLUDED.job_count;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION track_job_stats()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM bump_job_stats(OLD.created_at::date, OLD.status, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM bump_job_stats(NEW.created_at::date, NEW.status, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_job_stats ON jobs;
+CREATE TRIGGER trg_job_stats
+    AFTER INSERT OR DELETE OR UPDATE OF status ON jobs
+    FOR EACH ROW EXECUTE FUNCTION track_job_stats();
+
+CREATE OR REPLACE FUNCTION bump_feedback_stats(stat_day DATE, stat_rating INT, delta INT)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO feedback_stats_daily (day, feedback_count, rating_count, rating_sum)
+    VALUES (
+        stat_day,
+        delta,
+        CASE WHEN stat_rating IS NULL THEN 0 ELSE delta END,
+        COALESCE(stat_rating, 0) * delta
+    )
+    ON CONFLICT (day) DO UPDATE
+        SET feedback_count = feedback_stats_daily.feedback_count + EXCLUDED.feedback_count,
+            rating_count = feedback_stats_daily.rating_count + EXCLUDED.rating_count,
+            rating_sum = feedback_stats_daily.rating_sum + EXCLUDED.rating_sum;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION track_feedback_stats()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM bump_feedback_stats(OLD.created_at::date, OLD.rating, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM bump_feedback_stats(NEW.created_at::date, NEW.rating, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_feedback_stats ON user_feedback;
+CREATE TRIGGER trg_feedback_stats
+    AFTER INSERT OR DELETE OR UPDATE OF rating ON user_feedback
+    FOR EACH ROW EXECUTE FUNCTION track_feedback_stats();
+
+-- ==========================================
+-- BACKFILL (rebuilds the rollups from existing rows)
+-- ==========================================
+TRUNCATE job_stats_daily;
+INSERT INTO job_stats_daily (day, status, job_count)
+SELECT created_at::date, COALESCE(status, 'unknown'), COUNT(*)
+FROM jobs
+GROUP BY 1, 2;
+
+TRUNCATE feedback_stats_daily;
+INSERT INTO feedback_stats_daily (day, feedback_count, rating_count, rating_sum)
+SELECT created_at::date, COUNT(*), COUNT(rating), COALESCE(SUM(rating), 0)
+FROM user_feedback
+GROUP BY 1;
+
+-- ==========================================
+-- STATS FUNCTION
+-- ==========================================
+CREATE OR REPLACE FUNCTION get_usage_stats(days int DEFAULT 30)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    WITH job_totals AS (
+        SELECT status, SUM(job_count) AS job_count
+        FROM job_stats_daily
+        WHERE day >= (NOW() - INTERVAL '1 day' * days)::date
+        GROUP BY status
+        HAVING SUM(job_count) > 0
+    ),
+    feedback_totals AS (
+        SELECT
+            COALESCE(SUM(feedback_count), 0) AS feedback_count,
+            COALESCE(SUM(rating_count), 0) AS rating_count,
+            COALESCE(SUM(rating_sum), 0) AS rating_sum
+        FROM feedback_stats_daily
+        WHERE day >= (NOW() - INTERVAL '1 day' * days)::date
+    )
+    SELECT jsonb_build_object(
+        'total_jobs', COALESCE((SELECT SUM(job_count) FROM job_totals), 0),
+        'job_status_breakdown', COALESCE((SELECT jsonb_object_agg(status, job_count) FROM job_totals), '{}'::jsonb),
+        'average_rating', (SELECT CASE WHEN rating_count > 0 THEN rating_sum::float / rating_count ELSE 0 END FROM feedback_totals),
+        'total_feedback', (SELECT feedback_count FROM feedback_totals),
+        'period_days', days
+    );
+$$;
+
+GRANT SELECT ON job_stats_daily, feedback_stats_daily TO anon, authenticated;
+GRANT EXECUTE ON FUNCTION get_usage_stats(int) TO anon, authenticated;
@@ -0,0 +1,218 @@
+"""
+Write-Behind Buffer for Database Writes
+Coalesces job updates and batches inserts so callers never wait on the database
+"""
+
+import atexit
+import logging
+import threading
+from typing import Callable, Optional, Dict, Any, List, Iterable, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Flushes a single record or row may fail in a row before it is dropped
+MAX_FAILED_FLUSHES = 5
+
+class WriteBehindBuffer:
+    """
+    Buffers database writes and applies them from one background thread
+
+    Updates to the same record are merged (later values win), so a job that
+    reports a dozen progress steps between flushes costs one UPDATE. Inserts
+    are grouped per table and written as one bulk request. Writes for records
+    reaching a terminal status are flushed immediately, and everything pending
+    is flushed at interpreter exit.
+
+    When a batch fails, its records and rows are retried one by one, so one bad
+    write cannot hold back the others. Only a write that keeps failing is
+    dropped, and it is handed to on_drop first.
+    """
+
+    def __init__(self,
+                 write_updates: Callable[[Dict[str, Dict[str, Any]]], None],
+                 write_inserts: Optional[Callable[[str, List[Dict[str, Any]]], None]] = None,
+                 flush_interval: float = 1.0,
+                 max_batch: int = 200,
+                 terminal_statuses: Iterable[str] = ('completed', 'failed'),
+                 name: str = 'db',
+                 on_drop: Optional[Callable[[str, str, Dict[str, Any]], None]] = None):
+        """
+        Args:
+            write_updates: Called with {record_id: merged_fields} for each flush
+            write_inserts: Called with (table, rows) for each table with pending inserts
+            flush_interval: Seconds between background flushes
+            max_batch: Pending inserts that trigger an early flush
+            terminal_statuses: Status values that trigger an immediate flush
+            name: Name used for the flusher thread and in log messages
+            on_drop: Called with ('update', record_id, fields) or ('insert', table, row)
+                for a write dropped after MAX_FAILED_FLUSHES failures
+        """
+        self.write_updates = write_updates
+        self.write_inserts = write_inserts
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.terminal_statuses = set(terminal_statuses)
+        self.name = name
+        self.on_drop = on_drop
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._updates: Dict[str, Dict[str, Any]] = {}
+        self._inserts: Dict[str, List[Tuple[Dict[str, Any], int]]] = {}  # table -> [(row, failures)]
+        self._insert_count = 0
+        self._update_failures: Dict[str, int] = {}
+        self._thread = None
+
+        atexit.register(self.flush)
+
+    def update(self, record_id: str, fields: Dict[str, Any]):
+        """Queue an update, merging it into any pending update for the record"""
+        with self._lock:
+            self._updates.setdefault(record_id, {}).update(fields)
+        self._ensure_thread()
+        if fields.get('status') in self.terminal_statuses:
+            self._wake.set()
+
+    def insert(self, table: str, row: Dict[str, Any]):
+        """Queue a row for a bulk insert"""
+        with self._lock:
+            self._inserts.setdefault(table, []).append((row, 0))
+            self._insert_count += 1
+            full = self._insert_count >= self.max_batch
+        self._ensure_thread()
+        if full:
+            self._wake.set()
+
+    def pending_updates(self, record_id: str) -> Dict[str, Any]:
+        """Get fields queued for a record but not yet written (for read-your-writes)"""
+        with self._lock:
+            return dict(self._updates.get(record_id, {}))
+
+    def flush(self):
+        """Write everything pending now, in the calling thread"""
+        with self._flush_lock:
+            with self._lock:
+                updates, self._updates = self._updates, {}
+                inserts, self._inserts = self._inserts, {}
+                self._insert_count = 0
+
+            if not updates and not inserts:
+                return
+
+            # Inserts first: history and documents reference jobs created synchronously
+            failed_inserts = {}
+            if self.write_inserts:
+                for table, entries in inserts.items():
+                    failed = self._write_table(table, entries)
+                    if failed:
+                        failed_inserts[table] = failed
+            failed_updates = self._write_records(updates) if updates else {}
+            self._requeue(failed_updates, failed_inserts)
+
+    def _write_table(self, table: str, entries: List[Tuple[Dict[str, Any], int]]) -> List[Tuple[Dict[str, Any], int]]:
+        """
+        Insert the rows for one table, one by one if the bulk insert fails
+
+        Returns:
+            list: (row, failures) entries to retry
+        """
+        try:
+            self.write_inserts(table, [row for row, _ in entries])
+            return []
+        except Exception as e:
+            if len(entries) > 1:
+                logger.warning(f"[{self.name}] Bulk insert into {table} failed, retrying row by row: {str(e)}")
+            error = e
+
+        retry = []
+        for row, failures in entries:
+            if len(entries) > 1:
+                try:
+                    self.write_inserts(table, [row])
+                    continue
+                except Exception as e:
+                    error = e
+            failures += 1
+            if failures >= MAX_FAILED_FLUSHES:
+                self._drop('insert', table, row, failures, error)
+            else:
+                retry.append((row, failures))
+        if retry:
+            logger.warning(f"[{self.name}] {len(retry)} row(s) for {table} failed, will retry: {str(error)}")
+        return retry
+
+    def _write_records(self, updates: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Apply merged record updates, one record at a time if the batch fails
+
+        Returns:
+            dict: {record_id: fields} to retry
+        """
+        try:
+            self.write_updates(updates)
+            for record_id in updates:
+                self._update_failures.pop(record_id, None)
+            return {}
+        except Exception as e:
+            if len(updates) > 1:
+                logger.warning(f"[{self.name}] Batched update failed, retrying record by record: {str(e)}")
+            error = e
+
+        retry = {}
+        for record_id, fields in updates.items():
+            if len(updates) > 1:
+                try:
+                    self.write_updates({record_id: fields})
+                    self._update_failures.pop(record_id, None)
+                    continue
+                except Exception as e:
+                    error = e
+            failures = self._update_failures.get(record_id, 0) + 1
+            if failures >= MAX_FAILED_FLUSHES:
+                self._update_failures.pop(record_id, None)
+                self._drop('update', record_id, fields, failures, error)
+            else:
+                self._update_failures[record_id] = failures
+                retry[record_id] = fields
+        if retry:
+            logger.warning(f"[{self.name}] Update of {len(retry)} record(s) failed, will retry: {str(error)}")
+        return retry
+
+    def _drop(self, kind: str, key: str, data: Dict[str, Any], failures: int, error: Exception):
+        """Give up on one write and hand it to on_drop"""
+        logger.error(f"[{self.name}] Dropping buffered {kind} for {key} after {failures} failed flushes: {str(error)}")
+        if self.on_drop:
+            try:
+                self.on_drop(kind, key, data)
+            except Exception as e:
+                logger.error(f"[{self.name}] Fallback for dropped {kind} for {key} failed: {str(e)}")
+
+    def _requeue(self, updates: Dict[str, Dict[str, Any]], inserts: Dict[str, List[Tuple[Dict[str, Any], int]]]):
+        """Put failed writes back in front of writes queued since"""
+        with self._lock:
+            for record_id, fields in updates.items():
+                self._updates[record_id] = {**fields, **self._updates.get(record_id, {})}
+            for table, entries in inserts.items():
+                self._inserts[table] = entries + self._inserts.get(table, [])
+                self._insert_count += len(entries)
+
+    def _ensure_thread(self):
+        """Start the flusher thread once"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=f"{self.name}-write-behind", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"[{self.name}] Unexpected error in write-behind flusher: {str(e)}")
@@ -9,6 +9,253 @@ import logging
 import json
 from pathlib import Path
 import mimetypes
+import hashlib
+import struct
+import threading
+
+# utils first: with the app directory on sys.path, "app" is app.py and importing it starts the API
+try:
+    from utils.doc_chunker import split_sections, map_chunks, merge_markdown
+except ImportError:
+    # Fallback for when imported as part of the app package
+    from app.utils.doc_chunker import split_sections, map_chunks, merge_markdown
+
+# Documents longer than this are converted to markdown in chunks, in parallel
+MARKDOWN_CHUNK_CHARS = int(os.getenv('MARKDOWN_CHUNK_CHARS', '40000'))
+MARKDOWN_CONVERSION_WORKERS = int(os.getenv('MARKDOWN_CONVERSION_WORKERS', '4'))
+
+# Vision calls made in parallel for one document
+IMAGE_ANALYSIS_WORKERS = int(os.getenv('IMAGE_ANALYSIS_WORKERS', '4'))
+
+# Images smaller than this (bytes, or pixels on both sides) are treated as icons/logos and not analyzed
+MIN_IMAGE_BYTES = int(os.getenv('MIN_IMAGE_BYTES', '2048'))
+MIN_IMAGE_SIDE = int(os.getenv('MIN_IMAGE_SIDE', '64'))
+
+# Marker returned by the vision prompt for decorative images
+NON_TECHNICAL_IMAGE = "NON_TECHNICAL_IMAGE"
+
+# Formats accepted by the vision API
+VISION_MIME_TYPES = {
+    'png': 'image/png',
+    'jpg': 'image/jpeg',
+    'jpeg': 'image/jpeg',
+    'gif': 'image/gif',
+    'webp': 'image/webp'
+}
+
+def image_mime_type(name):
+    """MIME type for the vision API, or None for formats it does not accept (EMF, WMF, TIFF...)"""
+    return VISION_MIME_TYPES.get(name.rsplit('.', 1)[-1].lower())
+
+def image_dimensions(data):
+    """Read (width, height) from PNG, GIF, BMP or JPEG headers; None if unknown"""
+    try:
+        if data[:8] == b'\x89PNG\r\n\x1a\n':
+            return struct.unpack('>II', data[16:24])
+        if data[:6] in (b'GIF87a', b'GIF89a'):
+            return struct.unpack('<HH', data[6:10])
+        if data[:2] == b'BM':
+            width, height = struct.unpack('<ii', data[18:26])
+            return abs(width), abs(height)
+        if data[:2] == b'\xff\xd8':
+            i = 2
+            while i + 9 < len(data):
+                if data[i] != 0xFF:
+                    i += 1
+                    continue
+                marker = data[i + 1]
+                if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                    height, width = struct.unpack('>HH', data[i + 5:i + 9])
+                    return width, height
+                i += 2 + struct.unpack('>H', data[i + 2:i + 4])[0]
+    except struct.error:
+        pass
+    return None
+
+def is_decorative_image(data):
+    """Tiny files and small icons carry no integration detail"""
+    if len(data) < MIN_IMAGE_BYTES:
+        return True
+    size = image_dimensions(data)
+    return bool(size) and size[0] < MIN_IMAGE_SIDE and size[1] < MIN_IMAGE_SIDE
+
+def image_fingerprint(data):
+    """
+    Key identifying an image for dedup and caching: the SHA-256 of its bytes
+
+    Only byte-identical images share a key. A perceptual hash is not used:
+    distinct screenshots of text collide on it and would share a description.
+    """
+    return f"sha256:{hashlib.sha256(data).hexdigest()}"
+
+# PDFs are split into page ranges extracted by a process pool; small PDFs are read in-process
+PDF_PAGES_PER_CHUNK = int(os.getenv('PDF_PAGES_PER_CHUNK', '16'))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv('PDF_PARALLEL_MIN_PAGES', '40'))
+PDF_EXTRACT_WORKERS = int(os.getenv('PDF_EXTRACT_WORKERS', str(min(4, os.cpu_count() or 1))))
+PDF_TEXT_CACHE_DIR = os.getenv(
+    'PDF_TEXT_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'pdf_text')
+)
+
+def _file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _pdf_page_count(file_path):
+    try:
+        import pdfplumber
+        with pdfplumber.open(file_path) as pdf:
+            return len(pdf.pages)
+    except ImportError:
+        import PyPDF2
+        with open(file_path, 'rb') as f:
+            return len(PyPDF2.PdfReader(f).pages)
+
+def _extract_pdf_page_range(file_path, start, end):
+    """
+    Extract the text of pages [start, end) (runs in pool workers, so it must stay module-level)
+
+    Returns:
+        list: (page index, text) for each page
+    """
+    pages = []
+    try:
+        import pdfplumber
+        with pdfplumber.open(file_path) as pdf:
+            for index in range(start, min(end, len(pdf.pages))):
+                page = pdf.pages[index]
+                pages.append((index, page.extract_text() or ''))
+                # Drop parsed page objects so memory stays flat on long documents
+                getattr(page, 'flush_cache', lambda: None)()
+    except ImportError:
+        import PyPDF2
+        with open(file_path, 'rb') as f:
+            reader = PyPDF2.PdfReader(f)
+            for index in range(start, min(end, len(reader.pages))):
+                pages.append((index, reader.pages[index].extract_text() or ''))
+    return pages
+
+def iter_pdf_pages(file_path, workers=None, pages_per_chunk=None):
+    """
+    Yield (page index, text) for every page of a PDF in page order
+
+    Long PDFs are extracted in page ranges across a process pool; results are merged
+    in order and yielded as soon as the next range is ready, so consumers can start
+    on early pages. Text is cached by file content hash, so a re-upload of the same
+    file is read back from the cache without parsing.
+    """
+    workers = workers or PDF_EXTRACT_WORKERS
+    pages_per_chunk = pages_per_chunk or PDF_PAGES_PER_CHUNK
+
+    cache_path = os.path.join(PDF_TEXT_CACHE_DIR, f"{_file_sha256(file_path)}.jsonl")
+    if os.path.exists(cache_path):
+        logging.info(f"Using cached PDF text for {file_path}")
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                index, text = json.loads(line)
+                yield index, text
+        return
+
+    page_count = _pdf_page_count(file_path)
+    ranges = [(start, start + pages_per_chunk) for start in range(0, page_count, pages_per_chunk)]
+
+    os.makedirs(PDF_TEXT_CACHE_DIR, exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    completed = False
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as cache_file:
+            for index, text in _extract_pdf_ranges(file_path, ranges, workers, page_count):
+                cache_file.write(json.dumps([index, text]) + '\n')
+                yield index, text
+        completed = True
+    finally:
+        # Only a fully extracted document is cached
+        if completed:
+            os.replace(tmp_path, cache_path)
+        elif os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def _extract_pdf_ranges(file_path, ranges, workers, page_count):
+    """Yield pages of the given ranges in order, in-process or from a bounded process pool"""
+    if workers <= 1 or page_count < PDF_PARALLEL_MIN_PAGES:
+        for start, end in ranges:
+            yield from _extract_pdf_page_range(file_path, start, end)
+        return
+
+    import multiprocessing
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+
+    # spawn: forking a multi-threaded web server is unsafe
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        pending = deque()
+        remaining = iter(ranges)
+
+        # Keep a bounded number of ranges in flight so finished text does not pile up
+        for start, end in remaining:
+            pending.append(executor.submit(_extract_pdf_page_range, file_path, start, end))
+            if len(pending) >= workers * 2:
+                break
+
+        while pending:
+            pages = pending.popleft().result()
+            next_range = next(remaining, None)
+            if next_range:
+                pending.append(executor.submit(_extract_pdf_page_range, file_path, *next_range))
+            yield from pages
+
+class ImageDescriptionCache:
+    """Vision descriptions keyed by image fingerprint, persisted across uploads"""
+
+    def __init__(self, path, max_entries=5000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = None
+
+    def _load(self):
+        if self._entries is None:
+            self._entries = {}
+            if os.path.exists(self.path):
+                try:
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        self._entries = json.load(f)
+                except (OSError, ValueError):
+                    logging.warning(f"Could not read image description cache {self.path}, starting empty")
+        return self._entries
+
+    def get(self, key):
+        with self._lock:
+            return self._load().get(key)
+
+    def put(self, key, description):
+        with self._lock:
+            entries = self._load()
+            entries.pop(key, None)
+            entries[key] = description
+            while len(entries) > self.max_entries:
+                entries.pop(next(iter(entries)))
+
+    def save(self):
+        with self._lock:
+            if self._entries is None:
+                return
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self._entries, f)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logging.warning(f"Could not save image description cache: {str(e)}")
+
+image_description_cache = ImageDescriptionCache(os.getenv(
+    'IMAGE_DESCRIPTION_CACHE_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'image_descriptions.json')
+))
 
 class DocumentProcessor:
     """Process various document formats for iFlow generation"""
@@ -27,6 +274,7 @@ class DocumentProcessor:
         # Try to import optional dependencies
         self.has_pdf_support = self._check_pdf_support()
         self.has_docx_support = self._check_docx_support()
+        self._vision_enhancer = None
     
     def _check_pdf_support(self):
         """Check if PDF processing is available"""
@@ -183,38 +431,14 @@ class DocumentProcessor:
             }
         
         try:
-            # Try pdfplumber first (better text extraction)
-            try:
-                import pdfplumber
-                
-                text_content = []
-                with pdfplumber.open(file_path) as pdf:
-                    for page in pdf.pages:
-                        text = page.extract_text()
-                        if text:
-                            text_content.append(text)
-                
-                content = '\n\n'.join(text_content)
-                
-            except ImportError:
-                # Fallback to PyPDF2
-                import PyPDF2
-                
-                text_content = []
-                with open(file_path, 'rb') as file:
-                    pdf_reader = PyPDF2.PdfReader(file)
-                    for page in pdf_reader.pages:
-                        text = page.extract_text()
-                        if text:
-                            text_content.append(text)
-                
-                content = '\n\n'.join(text_content)
+            texts = [text for _, text in self.iter_pdf_text(file_path) if text]
+            content = '\n\n'.join(texts)
             
             return {
                 'success': True,
                 'content': content,
                 'content_type': 'pdf',
-                'page_count': len(text_content),
+                'page_count': len(texts),
                 'word_count': len(content.split()),
                 'char_count': len(content)
             }
@@ -225,6 +449,18 @@ class DocumentProcessor:
                 'error': f'Error processing PDF file: {str(e)}'
             }
     
+    def iter_pdf_text(self, file_path):
+        """
+        Stream (page index, text) pairs of a PDF in page order
+        
+        Args:
+            file_path (str): Path to the PDF
+            
+        Returns:
+            generator: Pages as they are extracted (pdfplumber first, PyPDF2 as fallback)
+        """
+        return iter_pdf_pages(file_path)
+    
     def _process_docx(self, file_path, filename):
         """Process DOCX files"""
         if not self.has_docx_support:
@@ -298,67 +534,87 @@ class DocumentProcessor:
         }
 
     def _extract_images_from_docx(self, doc, file_path, filename):
-        """Extract and analyze images from DOCX document"""
+        """
+        Extract and analyze images from DOCX document
+
+        Images are handed to the vision stage in memory. Identical images are analyzed
+        once, tiny/decorative images are skipped, descriptions are cached across
+        uploads, and the remaining vision calls run in parallel.
+        """
         images_info = {
             'count': 0,
             'analyzed_count': 0,
+            'skipped_count': 0,
+            'duplicate_count': 0,
+            'cached_count': 0,
             'descriptions': [],
             'image_files': []
         }
 
         try:
-            import os
-            import tempfile
-
             logging.info(f"Checking document relationships for images in {filename}")
 
-            # Create temp directory for extracted images
-            temp_dir = tempfile.mkdtemp(prefix=f"docx_images_{filename}_")
-            logging.info(f"Created temp directory: {temp_dir}")
-
-            # Extract images from document relationships
-            total_rels = len(doc.part.rels.values())
-            logging.info(f"Found {total_rels} document relationships to check")
-
+            images = []
             for rel in doc.part.rels.values():
-                logging.debug(f"Checking relationship: {rel.target_ref}")
                 if "image" in rel.target_ref:
                     images_info['count'] += 1
-                    logging.info(f"Found image {images_info['count']}: {rel.target_ref}")
+                    images_info['image_files'].append(rel.target_ref)
                     try:
-                        # Save image to temp file
-                        image_data = rel.target_part.blob
-                        image_ext = rel.target_ref.split('.')[-1]
-                        image_filename = f"image_{images_info['count']}.{image_ext}"
-                        image_path = os.path.join(temp_dir, image_filename)
-
-                        logging.info(f"Saving image to: {image_path} (size: {len(image_data)} bytes)")
-                        with open(image_path, 'wb') as img_file:
-                            img_file.write(image_data)
-
-                        images_info['image_files'].append(image_path)
-
-                        # Analyze image with AI (if available)
-                        logging.info(f"Starting AI analysis for image {images_info['count']}")
-                        description = self._analyze_image_with_ai(image_path, f"Image {images_info['count']} from {filename}")
-                        if description:
-                            logging.info(f"Successfully analyzed image {images_info['count']}: {len(description)} characters")
-                            images_info['descriptions'].append(f"**Image {images_info['count']}:** {description}")
-                            images_info['analyzed_count'] += 1
-                        else:
-                            logging.warning(f"Could not analyze image {images_info['count']} - adding placeholder")
-                            images_info['descriptions'].append(f"**Image {images_info['count']}:** [Image found but could not be analyzed - likely contains integration diagrams, flow charts, or technical architecture]")
-
+                        images.append((images_info['count'], rel.target_ref, rel.target_part.blob))
                     except Exception as e:
-                        logging.warning(f"Error processing image {images_info['count']}: {str(e)}")
-                        images_info['descriptions'].append(f"**Image {images_info['count']}:** [Image extraction failed - {str(e)}]")
-
-            # Clean up temp directory
-            try:
-                import shutil
-                shutil.rmtree(temp_dir)
-            except:
-                pass
+                        logging.warning(f"Error reading image {images_info['count']}: {str(e)}")
+                        images.append((images_info['count'], rel.target_ref, None))
+
+            logging.info(f"Found {len(images)} images in {filename}")
+
+            # Group images by content so each distinct image is analyzed once
+            first_by_key = {}
+            unique = []
+            plan = []
+            for number, target_ref, data in images:
+                if data is None:
+                    plan.append((number, 'failed', None))
+                    continue
+                if is_decorative_image(data):
+                    plan.append((number, 'skipped', None))
+                    continue
+
+                key = image_fingerprint(data)
+                if key in first_by_key:
+                    plan.append((number, 'duplicate', (first_by_key[key], key)))
+                    continue
+
+                first_by_key[key] = number
+                unique.append((number, key, target_ref, data))
+                plan.append((number, 'unique', key))
+
+            descriptions = self._analyze_images(unique, filename)
+
+            for number, kind, ref in plan:
+                if kind == 'failed':
+                    images_info['descriptions'].append(f"**Image {number}:** [Image extraction failed]")
+                elif kind == 'skipped':
+                    images_info['skipped_count'] += 1
+                elif kind == 'duplicate':
+                    images_info['duplicate_count'] += 1
+                    first_number, key = ref
+                    if descriptions.get(key, (None, False))[0] not in (None, NON_TECHNICAL_IMAGE):
+                        images_info['descriptions'].append(f"**Image {number}:** Same as Image {first_number}")
+                else:
+                    description, cached = descriptions.get(ref, (None, False))
+                    images_info['cached_count'] += 1 if cached else 0
+                    if description == NON_TECHNICAL_IMAGE:
+                        images_info['skipped_count'] += 1
+                    elif description:
+                        images_info['descriptions'].append(f"**Image {number}:** {description}")
+                        images_info['analyzed_count'] += 1
+                    else:
+                        images_info['descriptions'].append(f"**Image {number}:** [Image found but could not be analyzed - likely contains integration diagrams, flow charts, or technical architecture]")
+
+            logging.info(
+                f"Images in {filename}: {images_info['count']} found, {len(unique)} distinct, "
+                f"{images_info['skipped_count']} skipped, {images_info['cached_count']} from cache"
+            )
 
         except Exception as e:
             logging.error(f"Error extracting images from DOCX: {str(e)}")
@@ -366,27 +622,71 @@ class DocumentProcessor:
 
         return images_info
 
-    def _analyze_image_with_ai(self, image_path, context=""):
-        """Analyze image content using AI vision capabilities"""
+    def _analyze_images(self, unique_images, filename):
+        """
+        Describe distinct images, from the cache where possible and otherwise in parallel
+
+        Args:
+            unique_images (list): (number, key, target_ref, data) for each distinct image
+            filename (str): Document name used as context in the prompt
+
+        Returns:
+            dict: key -> (description or NON_TECHNICAL_IMAGE or None, came from cache)
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        results = {}
+        pending = []
+        for number, key, target_ref, data in unique_images:
+            cached = image_description_cache.get(key)
+            if cached is not None:
+                results[key] = (cached, True)
+            else:
+                pending.append((number, key, target_ref, data))
+
+        if not pending:
+            return results
+
+        def analyze(item):
+            number, key, target_ref, data = item
+            mime_type = image_mime_type(target_ref)
+            if not mime_type:
+                logging.info(f"Image {number} ({target_ref}) has a format the vision API does not accept")
+                return key, None
+            return key, self._analyze_image_with_ai(data, mime_type, f"Image {number} from {filename}")
+
+        workers = min(IMAGE_ANALYSIS_WORKERS, len(pending))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for key, description in executor.map(analyze, pending):
+                results[key] = (description, False)
+                if description:
+                    image_description_cache.put(key, description)
+
+        image_description_cache.save()
+        return results
+
+    def _get_vision_enhancer(self):
+        """Create the DocumentationEnhancer used for vision calls once per processor"""
+        if self._vision_enhancer is None:
+            try:
+                from documentation_enhancer import DocumentationEnhancer
+            except ImportError:
+                # Fallback for when imported as part of the app package
+                from app.documentation_enhancer import DocumentationEnhancer
+            self._vision_enhancer = DocumentationEnhancer()
+        return self._vision_enhancer
+
+    def _analyze_image_with_ai(self, image_bytes, mime_type, context=""):
+        """
+        Analyze image content using AI vision capabilities
+
+        Returns:
+            str: The description, NON_TECHNICAL_IMAGE for decorative images, or None if analysis failed
+        """
         try:
-            logging.info(f"Starting image analysis for: {image_path}")
-            # Check if we have vision capabilities available
             import base64
-            import os
-
-            # Read and encode image
-            with open(image_path, 'rb') as image_file:
-                image_data = base64.b64encode(image_file.read()).decode('utf-8')
 
-            # Get file extension for MIME type
-            file_ext = os.path.splitext(image_path)[1].lower()
-            mime_type = {
-                '.png': 'image/png',
-                '.jpg': 'image/jpeg',
-                '.jpeg': 'image/jpeg',
-                '.gif': 'image/gif',
-                '.bmp': 'image/bmp'
-            }.get(file_ext, 'image/png')
+            image_data = base64.b64encode(image_bytes).decode('utf-8')
 
             # Create vision analysis prompt
             vision_prompt = f"""Analyze this image from an integration document. {context}
@@ -403,33 +703,20 @@ Provide a concise technical description focusing on integration-relevant details
 If this appears to be a non-technical image (photos, decorative elements), respond with "NON_TECHNICAL_IMAGE".
 """
 
-            # Try to use Claude Sonnet-4 with vision capabilities
-            try:
-                logging.info("Importing DocumentationEnhancer for vision analysis")
-                try:
-                    from app.documentation_enhancer import DocumentationEnhancer
-                except ImportError:
-                    # Fallback for when running from different directory
-                    from documentation_enhancer import DocumentationEnhancer
-                enhancer = DocumentationEnhancer()
-
-                logging.info(f"Calling Anthropic vision API for {mime_type} image")
-                # Call Anthropic with vision
-                response = enhancer.analyze_image_with_anthropic(vision_prompt, image_data, mime_type)
-
-                if response and "NON_TECHNICAL_IMAGE" not in response:
-                    logging.info(f"Vision analysis successful: {len(response)} characters")
-                    return response.strip()
-                else:
-                    logging.info("Vision analysis returned non-technical image or empty response")
-                    return None
+            logging.info(f"Calling Anthropic vision API for {mime_type} image ({context})")
+            response = self._get_vision_enhancer().analyze_image_with_anthropic(vision_prompt, image_data, mime_type)
 
-            except Exception as e:
-                logging.error(f"AI vision analysis failed: {str(e)}")
+            if not response:
+                logging.info("Vision analysis returned an empty response")
                 return None
+            if NON_TECHNICAL_IMAGE in response:
+                return NON_TECHNICAL_IMAGE
+
+            logging.info(f"Vision analysis successful: {len(response)} characters")
+            return response.strip()
 
         except Exception as e:
-            logging.error(f"Error analyzing image {image_path}: {str(e)}")
+            logging.error(f"AI vision analysis failed: {str(e)}")
             return None
     
     def generate_documentation_json(self, processed_doc, job_id, llm_provider='anthropic'):
@@ -520,6 +807,9 @@ If this appears to be a non-technical image (photos, decorative elements), respo
             logging.info(f"Creating DocumentationEnhancer with LLM provider: {llm_provider}")
             enhancer = DocumentationEnhancer(selected_service=llm_provider)
 
+            if len(raw_content) > MARKDOWN_CHUNK_CHARS:
+                return self._convert_to_markdown_chunked(enhancer, raw_content, filename, content_type, llm_provider)
+
             # Prepare prompt for markdown conversion
             conversion_prompt = f"""
 You are an expert technical documentation analyst. Convert the following {content_type} document content into well-structured markdown format suitable for integration flow generation.
@@ -573,6 +863,56 @@ You are an expert technical documentation analyst. Convert the following {conten
                 processed_doc.get('content_type', 'text')
             )
 
+    def _convert_to_markdown_chunked(self, enhancer, raw_content, filename, content_type, llm_provider):
+        """
+        Convert a large document section by section and merge the results in order
+
+        Chunks are converted in parallel (MARKDOWN_CONVERSION_WORKERS at a time), so the
+        latency follows the largest chunk rather than the whole document. A chunk whose
+        conversion fails keeps its original text.
+        """
+        chunks = split_sections(raw_content, MARKDOWN_CHUNK_CHARS)
+        logging.info(f"Converting {filename} to markdown in {len(chunks)} chunks")
+
+        def convert(index, chunk):
+            prompt = f"""
+You are an expert technical documentation analyst. Convert the following excerpt of a {content_type} document into well-structured markdown format suitable for integration flow generation.
+
+**Source Document:** {filename}
+**Excerpt:** part {index + 1} of {len(chunks)}
+
+**Instructions:**
+1. Convert only this excerpt; other parts are converted separately and appended in order
+2. Keep the excerpt's own section structure, using ## and ### headers (no # title, no table of contents)
+3. Do not add overview, summary or conclusion sections that are not in the excerpt
+4. Identify and highlight key integration components, APIs, data flows, and business processes
+5. Pay special attention to any image descriptions - they often contain crucial integration diagrams, architecture flows, and technical specifications
+6. Use bullet points, numbered lists, and tables where appropriate
+7. Preserve all technical details and specifications
+8. Format code snippets, URLs, and technical terms properly
+
+**Excerpt:**
+{chunk}
+
+**Output:** Return only the converted markdown content, no additional commentary.
+"""
+            if llm_provider == 'gemma3':
+                response = self._call_gemma3_for_conversion(prompt)
+            else:
+                response = enhancer.enhance_with_anthropic(prompt)
+            return response.strip() if response and response.strip() else None
+
+        converted = map_chunks(chunks, convert, MARKDOWN_CONVERSION_WORKERS)
+        failed = sum(1 for part in converted if part is None)
+        if failed == len(chunks):
+            logging.warning(f"LLM conversion failed for all chunks of {filename}, using original content")
+            return self._fallback_markdown_conversion(raw_content, filename, content_type)
+        if failed:
+            logging.warning(f"{failed} of {len(chunks)} chunks of {filename} kept their original text")
+
+        parts = [part if part is not None else chunk for part, chunk in zip(converted, chunks)]
+        return merge_markdown(parts, title=f"Integration Documentation: {filename}")
+
     def _fallback_markdown_conversion(self, content, filename, content_type):
         """
         Fallback method to create basic markdown structure when LLM conversion fails
@@ -606,6 +946,7 @@ You are an expert technical documentation analyst. Convert the following {conten
 ---
 *Note: This document was automatically converted from {content_type} format. Please review and enhance as needed.*
 """
+        return markdown_content
 
     def _call_gemma3_for_conversion(self, prompt):
         """Call Gemma-3 API for document conversion"""
@@ -13,6 +13,13 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from mermaid_validator import validate_mermaid_in_documentation
 from llm_mermaid_fixer import fix_documentation_with_llm
 
+# utils first: with the app directory on sys.path, "app" is app.py and importing it starts the API
+try:
+    from utils.llm_clients import get_anthropic_client, get_openai_client
+except ImportError:
+    # Fallback for when imported as part of the app package
+    from app.utils.llm_clients import get_anthropic_client, get_openai_client
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -29,7 +36,6 @@ except ImportError:
 
 try:
     import anthropic
-    import httpx
 except ImportError:
     anthropic = None
     logger.warning("Anthropic package not installed. Claude-based enhancement will not be available.")
@@ -53,21 +59,15 @@ class DocumentationEnhancer:
 
         if openai and self.openai_api_key:
             try:
-                self.openai_client = openai.OpenAI(api_key=self.openai_api_key)
+                self.openai_client = get_openai_client(self.openai_api_key)
                 logger.info("OpenAI client initialized successfully.")
             except Exception as e:
                 logger.error(f"Failed to initialize OpenAI client: {str(e)}")
 
         if anthropic and self.anthropic_api_key:
             try:
-                # Create a custom HTTP client with extended timeout (600 seconds instead of 300)
-                http_client = httpx.Client(timeout=600.0)
-
-                # Initialize Anthropic client with a custom http_client to avoid proxies issue
-                self.anthropic_client = anthropic.Anthropic(
-                    api_key=self.anthropic_api_key,
-                    http_client=http_client
-                )
+                # Shared per-process client with a custom http_client (600s timeout, avoids the proxies issue)
+                self.anthropic_client = get_anthropic_client(self.anthropic_api_key, timeout=600.0)
                 logger.info("Anthropic client initialized successfully.")
             except Exception as e:
                 logger.error(f"Failed to initialize Anthropic client: {str(e)}")
@@ -1,19 +1,191 @@
 import re
+import copy
+import hashlib
+import threading
+from collections import Counter, OrderedDict
 import nltk
 from nltk.tokenize import word_tokenize, sent_tokenize
 from nltk.corpus import stopwords
-from collections import Counter
-import markdown
-from bs4 import BeautifulSoup
 import json
 
 # You may need to download NLTK resources
 # nltk.download('punkt')
 # nltk.download('stopwords')
 
+# Patterns used by the single-pass markdown scanner
+FENCE_PATTERN = re.compile(r'^\s*(```|~~~)\s*([\w+-]*)')
+HEADER_PATTERN = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+ENDPOINT_PATTERN = re.compile(r'(GET|POST|PATCH|DELETE|PUT) (/\w+(?:/{\w+})?(?:/\w+)*)')
+URL_PATTERN = re.compile(r'https?://(?:[-\w.]|(?:%[\da-fA-F]{2}))+')
+INLINE_CODE_PATTERN = re.compile(r'`([^`]+)`')
+LINK_PATTERN = re.compile(r'!?\[([^\]]*)\]\([^)]*\)')
+EMPHASIS_PATTERN = re.compile(r'(\*\*|__|\*)(?=\S)(.+?)(?<=\S)\1')
+BLOCK_MARKER_PATTERN = re.compile(r'^\s*(?:>\s*)*(?:[-*+]|\d+\.)?\s+')
+SENTENCE_FALLBACK_PATTERN = re.compile(r'(?<=[.!?])\s+')
+
+# English stopwords, loaded once on first use
+_STOP_WORDS = None
+
+def get_stop_words():
+    """Return the cached set of English stopwords"""
+    global _STOP_WORDS
+    if _STOP_WORDS is None:
+        _STOP_WORDS = set(stopwords.words('english'))
+    return _STOP_WORDS
+
+class ContentHashCache:
+    """
+    Small thread-safe LRU cache keyed by the SHA-256 of document content
+    """
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def hash_content(content):
+        """Return the SHA-256 hex digest of a string"""
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Return a copy of the cached value, or None"""
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            value = self._entries[key]
+        return copy.deepcopy(value)
+
+    def set(self, key, value):
+        """Store a copy of the value, evicting the least recently used entry"""
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+# Extracted terms memoized by markdown content hash
+_terms_cache = ContentHashCache()
+
+def _strip_inline_markdown(line):
+    """Remove inline markdown syntax, keeping the visible text"""
+    line = LINK_PATTERN.sub(r'\1', line)
+    line = INLINE_CODE_PATTERN.sub(r'\1', line)
+    line = EMPHASIS_PATTERN.sub(r'\2', line)
+    return line
+
+def scan_markdown(markdown_content):
+    """
+    Scan markdown once, collecting headers, sections, endpoints, URLs, code blocks,
+    JSON blocks, plain text and sentences without converting to HTML
+
+    Args:
+        markdown_content (str): The markdown content
+
+    Returns:
+        dict: The scanned document structure
+    """
+    headers = []
+    sections = []
+    endpoints = []
+    urls = []
+    code_blocks = []
+    json_blocks = []
+    text_lines = []
+
+    current_section = None
+    fence_marker = None
+    fence_language = ''
+    fence_lines = []
+
+    for line in markdown_content.splitlines():
+        # Endpoints and URLs are picked up everywhere, including inside code blocks
+        if 'http' in line:
+            urls.extend(URL_PATTERN.findall(line))
+        endpoints.extend(path for _, path in ENDPOINT_PATTERN.findall(line))
+
+        if fence_marker:
+            if line.strip().startswith(fence_marker):
+                block = '\n'.join(fence_lines)
+                code_blocks.append(block.strip())
+                if fence_language == 'json':
+                    json_blocks.append(block)
+                fence_marker = None
+            else:
+                fence_lines.append(line)
+                text_lines.append(line)
+                if current_section is not None:
+                    current_section['lines'].append(line)
+            continue
+
+        fence = FENCE_PATTERN.match(line)
+        if fence:
+            fence_marker = fence.group(1)
+            fence_language = fence.group(2).lower()
+            fence_lines = []
+            continue
+
+        header = HEADER_PATTERN.match(line)
+        if header:
+            title = _strip_inline_markdown(header.group(2)).strip()
+            level = len(header.group(1))
+            if level <= 3:
+                headers.append(title)
+            current_section = {'title': title, 'level': level, 'lines': []}
+            sections.append(current_section)
+            text_lines.append(title)
+            continue
+
+        if current_section is not None:
+            current_section['lines'].append(line)
+
+        code_blocks.extend(match.strip() for match in INLINE_CODE_PATTERN.findall(line))
+        text_lines.append(_strip_inline_markdown(BLOCK_MARKER_PATTERN.sub('', line, count=1)))
+
+    # Unterminated fence: keep what we have
+    if fence_marker and fence_lines:
+        block = '\n'.join(fence_lines)
+        code_blocks.append(block.strip())
+        if fence_language == 'json':
+            json_blocks.append(block)
+
+    text_content = '\n'.join(text_lines)
+
+    try:
+        sentences = sent_tokenize(text_content)
+    except LookupError:
+        # Punkt data missing: fall back to a simple punctuation split
+        sentences = [sentence for sentence in SENTENCE_FALLBACK_PATTERN.split(text_content) if sentence.strip()]
+
+    return {
+        'headers': headers,
+        'sections': [
+            {'title': section['title'], 'level': section['level'], 'content': '\n'.join(section['lines']).strip()}
+            for section in sections
+        ],
+        'endpoints': endpoints,
+        'urls': urls,
+        'code_blocks': code_blocks,
+        'json_blocks': json_blocks,
+        'text_content': text_content,
+        'sentences': sentences
+    }
+
+def find_section(scan, section_name):
+    """Return the content of the first scanned section whose title starts with section_name"""
+    for section in scan['sections']:
+        if section['title'].startswith(section_name):
+            return section['content']
+    return None
+
 def extract_terms_from_markdown(markdown_file):
     """
     Extract key terms from markdown file for search in SAP Integration Suite
+
+    Results are memoized by content hash, so re-matching the same
+    documentation does not repeat the extraction.
     
     Args:
         markdown_file (str): Path to markdown file
@@ -24,12 +196,26 @@ def extract_terms_from_markdown(markdown_file):
     # Read markdown file
     with open(markdown_file, 'r', encoding='utf-8') as f:
         markdown_content = f.read()
+
+    content_hash = ContentHashCache.hash_content(markdown_content)
+    terms = _terms_cache.get(content_hash)
+    if terms is None:
+        terms = extract_terms_from_content(markdown_content)
+        _terms_cache.set(content_hash, terms)
+
+    return terms
+
+def extract_terms_from_content(markdown_content):
+    """
+    Extract key terms from markdown content
     
-    # Convert markdown to HTML
-    html_content = markdown.markdown(markdown_content)
-    
-    # Parse HTML
-    soup = BeautifulSoup(html_content, 'html.parser')
+    Args:
+        markdown_content (str): The markdown content
+        
+    Returns:
+        dict: Dictionary with categorized search terms
+    """
+    scan = scan_markdown(markdown_content)
     
     # Initialize categories for terms
     terms = {
@@ -42,7 +228,7 @@ def extract_terms_from_markdown(markdown_file):
     }
     
     # Extract API Overview section
-    api_overview_section = extract_section_content(markdown_content, "API Overview", 1)
+    api_overview_section = find_section(scan, "API Overview")
     if api_overview_section:
         # Extract key phrases and terms from the overview section
         overview_terms = extract_key_terms_from_text(api_overview_section)
@@ -50,19 +236,10 @@ def extract_terms_from_markdown(markdown_file):
         # Add overview terms to domain terms for better matching
         terms['domain_terms'].extend(overview_terms)
     
-    # Extract headers (h1, h2, h3) for main concepts
-    headers = []
-    for h_tag in soup.find_all(['h1', 'h2', 'h3']):
-        headers.append(h_tag.text.strip())
-    
-    # Extract API endpoints
-    endpoint_patterns = re.findall(r'(GET|POST|PATCH|DELETE|PUT) (/\w+(?:/{\w+})?(?:/\w+)*)', markdown_content)
-    endpoint_paths = [path for _, path in endpoint_patterns]
-    terms['endpoint_paths'] = endpoint_paths
-    
-    # Extract JSON structures
-    json_blocks = re.findall(r'```json\n([\s\S]*?)\n```', markdown_content)
-    terms['data_structures'] = json_blocks
+    # Headers (h1, h2, h3), API endpoints and JSON structures come from the scan
+    headers = scan['headers']
+    terms['endpoint_paths'] = scan['endpoints']
+    terms['data_structures'] = scan['json_blocks']
     
     # Extract domain-specific terms
     domain_specific_keywords = [
@@ -84,21 +261,12 @@ def extract_terms_from_markdown(markdown_file):
     ]
     
     # Process text content
-    text_content = soup.get_text()
-    
-    # Tokenize and remove stopwords
-    stop_words = set(stopwords.words('english'))
-    tokens = word_tokenize(text_content.lower())
-    filtered_tokens = [word for word in tokens if word.isalnum() and word not in stop_words]
-    
-    # Count word frequency
-    word_freq = Counter(filtered_tokens)
+    text_lower = scan['text_content'].lower()
     
-    # Extract ngrams (for multi-word terms)
-    sentences = sent_tokenize(text_content)
+    # Extract ngrams (for multi-word terms), tokenizing each sentence once
     ngrams = []
     
-    for sentence in sentences:
+    for sentence in scan['sentences']:
         words = word_tokenize(sentence)
         # Create bigrams and trigrams
         for i in range(len(words) - 1):
@@ -106,31 +274,26 @@ def extract_terms_from_markdown(markdown_file):
         for i in range(len(words) - 2):
             ngrams.append(f"{words[i]} {words[i+1]} {words[i+2]}")
     
-    ngram_freq = Counter(ngrams)
+    top_ngrams = [ngram.lower() for ngram, _ in Counter(ngrams).most_common(100)]
     
     # Match domain keywords
     for keyword in domain_specific_keywords:
         keyword_lower = keyword.lower()
         # Check exact matches
-        if keyword_lower in text_content.lower():
+        if keyword_lower in text_lower:
             terms['domain_terms'].append(keyword)
         # Check partial matches in ngrams
-        else:
-            for ngram, _ in ngram_freq.most_common(100):
-                if keyword_lower in ngram.lower():
-                    terms['domain_terms'].append(keyword)
-                    break
+        elif any(keyword_lower in ngram for ngram in top_ngrams):
+            terms['domain_terms'].append(keyword)
     
     # Match technical patterns
     for pattern in technical_patterns:
-        pattern_lower = pattern.lower()
-        if pattern_lower in text_content.lower():
+        if pattern.lower() in text_lower:
             terms['technical_terms'].append(pattern)
     
     # Match operation terms
     for op in operation_terms:
-        op_lower = op.lower()
-        if op_lower in text_content.lower():
+        if op.lower() in text_lower:
             terms['operation_terms'].append(op)
     
     # Remove duplicates
@@ -150,6 +313,7 @@ def extract_terms_from_markdown(markdown_file):
     terms['header_terms'] = headers
     
     return terms
+
 def extract_section_content(markdown_content, section_name, level=2):
     """
     Extract content from a specific section in the markdown
@@ -181,10 +345,7 @@ def extract_key_terms_from_text(text):
     Returns:
         list: List of key terms
     """
-    # Tokenize and remove stopwords
-    stop_words = set(stopwords.words('english'))
-    words = word_tokenize(text.lower())
-    filtered_words = [word for word in words if word.isalnum() and word not in stop_words]
+    stop_words = get_stop_words()
     
     # Extract noun phrases and important terms
     key_terms = []
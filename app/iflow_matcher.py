@@ -5,17 +5,18 @@ appropriate SAP Integration Suite components.
 """
 
 import os
+import sys
 import json
+import time
 import logging
-import markdown
-from bs4 import BeautifulSoup
-import re
+import threading
 import requests
 from datetime import datetime
 from collections import Counter
 import nltk
 from nltk.tokenize import word_tokenize, sent_tokenize
 import random  # For generating random scores in demo mode
+from extract_terms import ContentHashCache, scan_markdown
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -67,16 +68,12 @@ SAP_COMPONENTS = [
     }
 ]
 
-# Try to download NLTK data if not already present
+# Use the bundled NLTK data; nothing is downloaded at import time
 try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    try:
-        nltk.download('punkt', quiet=True)
-        nltk.download('stopwords', quiet=True)
-        logger.info("Downloaded NLTK data")
-    except Exception as e:
-        logger.warning(f"Could not download NLTK data: {str(e)}")
+    from nltk_setup import verify_nltk_data
+    verify_nltk_data()
+except Exception as e:
+    logger.warning(f"Could not verify NLTK data: {str(e)}")
 
 # Try to get stopwords, with fallback
 try:
@@ -106,10 +103,15 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Extracted terms memoized by markdown content hash
+_extracted_terms_cache = ContentHashCache()
+
 def extract_terms_from_markdown(markdown_file_path):
     """
     Extract key terms and information from a markdown file.
 
+    Results are memoized by content hash.
+
     Args:
         markdown_file_path (str): Path to the markdown file
 
@@ -120,37 +122,31 @@ def extract_terms_from_markdown(markdown_file_path):
     with open(markdown_file_path, 'r', encoding='utf-8') as f:
         markdown_content = f.read()
 
-    # Convert markdown to HTML
-    html_content = markdown.markdown(markdown_content)
+    content_hash = ContentHashCache.hash_content(markdown_content)
+    extracted = _extracted_terms_cache.get(content_hash)
+    if extracted is None:
+        extracted = _extract_terms_from_content(markdown_content)
+        _extracted_terms_cache.set(content_hash, extracted)
 
-    # Parse HTML
-    soup = BeautifulSoup(html_content, 'html.parser')
+    return extracted
 
-    # Extract text content
-    text_content = soup.get_text()
+def _extract_terms_from_content(markdown_content):
+    """Extract key terms from markdown content in a single scan"""
+    scan = scan_markdown(markdown_content)
 
-    # Extract headers
-    headers = []
-    for h_tag in soup.find_all(['h1', 'h2', 'h3']):
-        headers.append(h_tag.text.strip())
-
-    # Extract API endpoints
-    endpoint_patterns = re.findall(r'(GET|POST|PATCH|DELETE|PUT) (/\w+(?:/{\w+})?(?:/\w+)*)', markdown_content)
-    endpoint_paths = [path for _, path in endpoint_patterns]
-
-    # Extract URLs
-    url_pattern = r'https?://(?:[-\w.]|(?:%[\da-fA-F]{2}))+'
-    urls = re.findall(url_pattern, markdown_content)
-
-    # Extract code blocks
-    code_blocks = []
-    for code_tag in soup.find_all('code'):
-        code_blocks.append(code_tag.text.strip())
+    text_content = scan['text_content']
+    text_lower = text_content.lower()
+    headers = scan['headers']
+    endpoint_paths = scan['endpoints']
+    urls = scan['urls']
+    code_blocks = scan['code_blocks']
 
     # Extract technical terms using NLP
     try:
-        # Tokenize text
-        words = word_tokenize(text_content.lower())
+        # Tokenize the sentences found by the scan
+        words = []
+        for sentence in scan['sentences']:
+            words.extend(word_tokenize(sentence.lower()))
 
         # Remove stopwords and punctuation
         words = [word for word in words if word.isalnum() and word not in STOPWORDS]
@@ -162,7 +158,7 @@ def extract_terms_from_markdown(markdown_file_path):
         common_words = word_freq.most_common(30)
 
         # Extract sentences containing technical terms
-        sentences = sent_tokenize(text_content)
+        sentences = scan['sentences']
         technical_sentences = []
 
         # Technical terms to look for
@@ -174,17 +170,14 @@ def extract_terms_from_markdown(markdown_file_path):
         ]
 
         # Find sentences containing technical terms
+        technical_terms_lower = [term.lower() for term in technical_terms]
         for sentence in sentences:
-            for term in technical_terms:
-                if term.lower() in sentence.lower():
-                    technical_sentences.append(sentence)
-                    break
+            sentence_lower = sentence.lower()
+            if any(term in sentence_lower for term in technical_terms_lower):
+                technical_sentences.append(sentence)
 
         # Find technical terms in the text
-        found_technical_terms = []
-        for term in technical_terms:
-            if term.lower() in text_content.lower():
-                found_technical_terms.append(term)
+        found_technical_terms = [term for term in technical_terms if term.lower() in text_lower]
     except Exception as e:
         logger.warning(f"Error in NLP processing: {str(e)}")
         common_words = []
@@ -205,10 +198,8 @@ def extract_terms_from_markdown(markdown_file_path):
     }
 
     for pattern, keywords in pattern_keywords.items():
-        for keyword in keywords:
-            if keyword in text_content.lower():
-                integration_patterns.append(pattern)
-                break
+        if any(keyword in text_lower for keyword in keywords):
+            integration_patterns.append(pattern)
 
     # Return extracted terms
     return {
@@ -295,6 +286,231 @@ def calculate_component_scores(extracted_terms):
 
     return scored_components
 
+class IFlowMatcherService:
+    """
+    Long-lived service that runs the iFlow matching pipeline in-process.
+
+    The pipeline modules (extract_terms, search_discovery, score_results and
+    present_findings), NLTK data and the SAP integration recipe catalog are
+    loaded once and reused by every job instead of being re-imported per match.
+    """
+
+    # Re-scan the recipe catalog after this many seconds (default: 6 hours)
+    CATALOG_TTL_SECONDS = int(os.getenv('IFLOW_CATALOG_TTL_SECONDS', 6 * 60 * 60))
+
+    def __init__(self, github_token=None):
+        """
+        Initialize the service. Heavy work is deferred to initialize().
+
+        Args:
+            github_token (str, optional): GitHub token for API access. If None, read from environment.
+        """
+        self.github_token = github_token or os.environ.get("GITHUB_TOKEN")
+        self.initialized = False
+        self.catalog_loaded_at = 0
+        self.searcher = None
+        self.preprocess_cache = {}  # Preprocessed catalog text shared by all scorers
+
+        self._init_lock = threading.Lock()
+        self._catalog_lock = threading.Lock()
+
+        self._extract_terms_from_markdown = None
+        self._generate_search_terms = None
+        self._scorer_class = None
+        self._presenter_class = None
+
+    def initialize(self, load_catalog=True):
+        """
+        Import the pipeline modules, verify NLTK data and warm the recipe catalog.
+
+        Safe to call from several threads; only the first call does the work.
+
+        Args:
+            load_catalog (bool): Also scan the recipe catalog (network access). Pass
+                False before forking workers; the catalog is then loaded per worker
+                or on the first match.
+
+        Returns:
+            bool: True if the service is ready to process jobs
+        """
+        if self.initialized:
+            return True
+
+        with self._init_lock:
+            if self.initialized:
+                return True
+
+            start_time = time.time()
+            logger.info("Initializing iFlow matcher service...")
+
+            # Make sure the pipeline modules next to this file are importable
+            module_dir = os.path.dirname(os.path.abspath(__file__))
+            if module_dir not in sys.path:
+                sys.path.append(module_dir)
+
+            from extract_terms import extract_terms_from_markdown as pipeline_extract_terms
+            from extract_terms import generate_search_terms
+            from search_discovery import SAPDiscoverySearcher
+            from score_results import ContentSimilarityScorer
+            from present_findings import ResultsPresenter
+
+            self._extract_terms_from_markdown = pipeline_extract_terms
+            self._generate_search_terms = generate_search_terms
+            self._scorer_class = ContentSimilarityScorer
+            self._presenter_class = ResultsPresenter
+
+            # Touch the NLTK resources so the first job does not pay for loading them
+            for resource in ['tokenizers/punkt', 'corpora/stopwords']:
+                try:
+                    nltk.data.find(resource)
+                except LookupError:
+                    logger.warning(f"NLTK resource not found: {resource}")
+            try:
+                word_tokenize("warm up")
+                sent_tokenize("Warm up. Done.")
+            except Exception as e:
+                logger.warning(f"Could not warm NLTK tokenizers: {str(e)}")
+
+            self.searcher = SAPDiscoverySearcher(github_token=self.github_token)
+            self.initialized = True
+
+            logger.info(f"iFlow matcher service initialized in {time.time() - start_time:.2f}s")
+
+        if not load_catalog:
+            return True
+
+        # Loading the catalog needs network access; do not fail initialization on it
+        try:
+            self._ensure_catalog()
+        except Exception as e:
+            logger.warning(f"Could not pre-load integration recipe catalog: {str(e)}")
+
+        return True
+
+    def _ensure_catalog(self):
+        """Scan the recipe catalog if it has not been loaded yet or has expired"""
+        with self._catalog_lock:
+            expired = (time.time() - self.catalog_loaded_at) > self.CATALOG_TTL_SECONDS
+            if self.searcher.integration_content and not expired:
+                return
+
+            if not self.github_token:
+                logger.warning("No GitHub token configured; scanning the recipe catalog anonymously (lower rate limit)")
+
+            logger.info("Loading SAP integration recipe catalog...")
+            self.searcher.results_cache = {}
+            self.preprocess_cache.clear()
+            self.searcher._scan_primary_directories()
+            self.catalog_loaded_at = time.time()
+
+    def refresh_catalog(self):
+        """Force a re-scan of the recipe catalog on the next match"""
+        with self._catalog_lock:
+            self.catalog_loaded_at = 0
+
+    def match(self, markdown_file_path, output_dir=None):
+        """
+        Process a markdown file to find SAP Integration Suite (iFlow) equivalents.
+
+        Args:
+            markdown_file_path (str): Path to the markdown file with MuleSoft documentation
+            output_dir (str, optional): Directory to save output files. If None, uses the markdown file's directory.
+
+        Returns:
+            dict: Dictionary with paths to generated files and other information
+        """
+        self.initialize()
+
+        if output_dir is None:
+            output_dir = os.path.dirname(os.path.abspath(markdown_file_path))
+
+        os.makedirs(output_dir, exist_ok=True)
+        charts_dir = os.path.join(output_dir, "charts")
+        os.makedirs(charts_dir, exist_ok=True)
+
+        result = {
+            "status": "failed",
+            "message": "",
+            "files": {}
+        }
+
+        # Step 1: Extract terms from markdown
+        logger.info("Step 1: Extracting terms from markdown...")
+        extracted_terms = self._extract_terms_from_markdown(markdown_file_path)
+        search_terms = self._generate_search_terms(extracted_terms)
+        logger.info(f"Primary search terms: {search_terms['primary'][:3]}...")
+
+        # Step 2: Search the (warm) SAP Integration Recipes catalog
+        logger.info("Step 2: Searching SAP Integration Recipes catalog...")
+        self._ensure_catalog()
+        search_results = self.searcher.execute_search_strategy(search_terms)
+        logger.info(f"Found {search_results.get('total_count', 0)} potential matches")
+
+        if search_results.get('total_count', 0) == 0:
+            result["message"] = "No matches found. Please check your search terms or GitHub token."
+            return result
+
+        # Step 3: Score and rank results
+        logger.info("Step 3: Scoring and ranking results...")
+        scorer = self._scorer_class(extracted_terms, preprocess_cache=self.preprocess_cache)
+        scored_results = scorer.score_and_rank_results(search_results['results'], search_results['sources'])
+
+        # Step 4: Present findings
+        logger.info("Step 4: Presenting findings...")
+        presenter = self._presenter_class(scored_results, extracted_terms, search_terms)
+        report_path = presenter.save_report(os.path.join(output_dir, "integration_match_report.html"))
+
+        # Charts are rendered lazily when first requested; only their data is saved here
+        chart_specs_path = presenter.save_chart_specs(charts_dir)
+
+        summary = {
+            "total_matches": search_results['total_count'],
+            "top_matches": [
+                {
+                    "name": item.get("Name", "Unknown"),
+                    "description": item.get("Description", ""),
+                    "score": item.get("_scores", {}).get("combined_score", 0),
+                    "url": item.get("GitHubUrl", "")
+                }
+                for item in scored_results[:5]  # Include top 5 matches
+            ],
+            "search_terms": search_terms
+        }
+
+        summary_path = os.path.join(output_dir, "iflow_match_summary.json")
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+
+        result["status"] = "success"
+        result["message"] = f"Found {search_results['total_count']} potential matches"
+        result["files"] = {
+            "report": report_path,
+            "summary": summary_path
+        }
+        if chart_specs_path:
+            result["files"]["chart_specs"] = chart_specs_path
+
+        return result
+
+
+# Process-wide matcher service, created on first use
+_matcher_service = None
+_matcher_service_lock = threading.Lock()
+
+def get_matcher_service():
+    """
+    Get the process-wide iFlow matcher service.
+
+    Returns:
+        IFlowMatcherService: The shared matcher service
+    """
+    global _matcher_service
+    if _matcher_service is None:
+        with _matcher_service_lock:
+            if _matcher_service is None:
+                _matcher_service = IFlowMatcherService()
+    return _matcher_service
+
 def process_markdown_for_iflow(markdown_file_path, output_dir=None, github_token=None):
     """
     Process a markdown file to find SAP Integration Suite (iFlow) equivalents.
@@ -310,76 +526,18 @@ def process_markdown_for_iflow(markdown_file_path, output_dir=None, github_token
     logger.info(f"Processing markdown file: {markdown_file_path}")
 
     try:
-        # Import the main processing function from the main module
-        # Use a safer import approach to avoid reloading issues
-        import sys
-        import importlib.util
-
-        # Get the path to the main.py file
-        # Try both possible locations for main.py
-        main_path_in_getiflow = os.path.join(os.path.dirname(os.path.abspath(__file__)),
-                                "GetIflowEquivalent", "main.py")
-        main_path_in_app = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
-
-        # Check which path exists
-        if os.path.exists(main_path_in_getiflow):
-            main_path = main_path_in_getiflow
-            logger.info(f"Found main.py in GetIflowEquivalent directory")
-        elif os.path.exists(main_path_in_app):
-            main_path = main_path_in_app
-            logger.info(f"Found main.py in app directory")
-        else:
-            # Default to the app directory path for error reporting
-            main_path = main_path_in_app
-
-        # Check if the file exists
-        logger.info(f"Looking for main module at: {main_path}")
-        if not os.path.exists(main_path):
-            logger.error(f"Main module not found at: {main_path}")
-
-            # List files in the directory to help diagnose the issue
-            parent_dir = os.path.dirname(main_path)
-            if os.path.exists(parent_dir):
-                logger.info(f"Contents of {parent_dir}:")
-                for file in os.listdir(parent_dir):
-                    logger.info(f"  - {file}")
-            else:
-                logger.error(f"Parent directory does not exist: {parent_dir}")
-
-            return {
-                "status": "failed",
-                "message": f"Main module not found at: {main_path}"
-            }
-
-        # Import the module using importlib
-        spec = importlib.util.spec_from_file_location("iflow_main", main_path)
-        iflow_main = importlib.util.module_from_spec(spec)
-
-        # Add the directory containing the module to sys.path temporarily
-        # This helps with relative imports within the module
-        module_dir = os.path.dirname(main_path)
-        original_sys_path = sys.path.copy()
-        if module_dir not in sys.path:
-            sys.path.insert(0, module_dir)
-
-        try:
-            # Execute the module
-            spec.loader.exec_module(iflow_main)
-
-            # Call the main processing function
-            result = iflow_main.process_markdown_for_iflow(
-                markdown_file_path=markdown_file_path,
-                output_dir=output_dir,
-                github_token=github_token
-            )
-        finally:
-            # Restore the original sys.path
-            sys.path = original_sys_path
-
+        service = get_matcher_service()
+        if github_token and github_token != service.github_token:
+            # A caller-specific token gets its own (cold) service
+            service = IFlowMatcherService(github_token=github_token)
+
+        start_time = time.time()
+        result = service.match(markdown_file_path, output_dir=output_dir)
+        logger.info(f"iFlow matching finished in {time.time() - start_time:.2f}s")
         return result
 
     except Exception as e:
-        logger.error(f"Error importing or calling main module: {str(e)}")
+        logger.error(f"Error processing markdown for iFlow match: {str(e)}")
         import traceback
         traceback.print_exc()
 
@@ -389,7 +547,6 @@ def process_markdown_for_iflow(markdown_file_path, output_dir=None, github_token
         }
 
 if __name__ == "__main__":
-    import sys
     if len(sys.argv) > 1:
         result = process_markdown_for_iflow(sys.argv[1])
         print(f"Status: {result['status']}")
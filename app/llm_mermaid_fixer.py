@@ -5,10 +5,16 @@ Uses AI to intelligently fix Mermaid syntax errors in documentation
 
 import os
 import re
+import hashlib
 import logging
-from typing import Optional, Tuple
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Tuple
 from dotenv import load_dotenv
 
+from mermaid_flowchart import is_flowchart, repair_flowchart
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -27,8 +33,29 @@ except ImportError:
     ANTHROPIC_AVAILABLE = False
     logger.warning("Anthropic package not installed. LLM Mermaid fixing will not be available.")
 
+# utils first: with the app directory on sys.path, "app" is app.py and importing it starts the API
+try:
+    from utils.llm_clients import get_anthropic_client
+except ImportError:
+    # Fallback for when imported as part of the app package
+    from app.utils.llm_clients import get_anthropic_client
+
+# Markdown fences and HTML <pre class="mermaid"> blocks; group 1 or 2 holds the diagram
+MERMAID_BLOCK_PATTERN = re.compile(r'```mermaid\n(.*?)\n```|<pre class="mermaid">\s*(.*?)\s*</pre>', re.DOTALL)
+
+# Diagrams the local fixer cannot repair are sent to the LLM this many at a time
+MERMAID_LLM_CONCURRENCY = int(os.getenv('MERMAID_LLM_CONCURRENCY', '4'))
+
+# LLM-fixed diagrams by content hash, shared by all fixers in this process
+MERMAID_LLM_CACHE_SIZE = int(os.getenv('MERMAID_LLM_CACHE_SIZE', '256'))
+_llm_fix_cache = OrderedDict()
+_llm_fix_cache_lock = threading.Lock()
+
+def _diagram_content(match):
+    return match.group(1) if match.group(1) is not None else match.group(2)
+
 class LLMMermaidFixer:
-    """Uses LLM to fix Mermaid diagram syntax errors and enhance HTML styling"""
+    """Fixes Mermaid diagram syntax errors (locally, with the LLM as fallback) and enhances HTML styling"""
 
     def __init__(self):
         self.anthropic_client = None
@@ -36,7 +63,7 @@ class LLMMermaidFixer:
 
         if ANTHROPIC_AVAILABLE and self.api_key:
             try:
-                self.anthropic_client = anthropic.Anthropic(api_key=self.api_key)
+                self.anthropic_client = get_anthropic_client(self.api_key)
                 logger.info("LLM Mermaid fixer initialized with Anthropic")
             except Exception as e:
                 logger.error(f"Failed to initialize Anthropic client: {e}")
@@ -45,7 +72,11 @@ class LLMMermaidFixer:
     
     def fix_mermaid_documentation(self, documentation_content: str) -> Tuple[str, bool]:
         """
-        Fix Mermaid diagrams in documentation using LLM
+        Fix Mermaid diagrams in documentation
+        
+        Every diagram is first validated and repaired by the local flowchart
+        parser. Only diagrams it cannot repair are sent to the LLM, concurrently
+        and cached by content hash.
         
         Args:
             documentation_content: Full documentation content with Mermaid diagrams
@@ -53,41 +84,42 @@ class LLMMermaidFixer:
         Returns:
             tuple: (fixed_content, success_flag)
         """
-        if not self.anthropic_client:
-            logger.warning("LLM Mermaid fixer not available")
-            return documentation_content, False
-        
         try:
-            # Extract Mermaid blocks
-            mermaid_blocks = self._extract_mermaid_blocks(documentation_content)
-            
-            if not mermaid_blocks:
-                logger.info("No Mermaid blocks found in documentation")
-                return documentation_content, True
-            
-            logger.info(f"Found {len(mermaid_blocks)} Mermaid blocks to fix")
-            
+            matches = list(MERMAID_BLOCK_PATTERN.finditer(documentation_content))
             fixed_content = documentation_content
             all_fixes_successful = True
-            
-            # Fix each Mermaid block
-            for i, (original_block, mermaid_content, block_format) in enumerate(mermaid_blocks):
-                logger.info(f"Fixing Mermaid block {i+1}/{len(mermaid_blocks)} (format: {block_format})")
-
-                fixed_mermaid, success = self._fix_single_mermaid_block(mermaid_content)
-
-                if success:
-                    # Replace the original block with the fixed one in the appropriate format
-                    if block_format == 'markdown':
-                        fixed_block = f"```mermaid\n{fixed_mermaid}\n```"
-                    else:  # HTML format
-                        fixed_block = f'<pre class="mermaid">\n{fixed_mermaid}\n</pre>'
-
-                    fixed_content = fixed_content.replace(original_block, fixed_block)
-                    logger.info(f"Successfully fixed Mermaid block {i+1}")
-                else:
-                    logger.warning(f"Failed to fix Mermaid block {i+1}")
-                    all_fixes_successful = False
+
+            if not matches:
+                logger.info("No Mermaid blocks found in documentation")
+            else:
+                # Identical diagrams are fixed once
+                diagrams = list(dict.fromkeys(_diagram_content(match) for match in matches))
+                results = {}
+                unresolved = []
+                for diagram in diagrams:
+                    fixed_diagram, valid = self._fix_locally(diagram)
+                    if valid:
+                        results[diagram] = fixed_diagram
+                    else:
+                        unresolved.append((diagram, fixed_diagram))
+
+                logger.info(f"Found {len(matches)} Mermaid blocks: {len(diagrams) - len(unresolved)} valid or repaired "
+                            f"locally, {len(unresolved)} need the LLM")
+
+                if unresolved:
+                    for diagram, (fixed_diagram, success) in self._fix_with_llm(unresolved).items():
+                        results[diagram] = fixed_diagram
+                        if not success:
+                            all_fixes_successful = False
+
+                # Replace every block in a single pass, keeping its format
+                def replace_block(match):
+                    fixed_diagram = results[_diagram_content(match)]
+                    if match.group(1) is not None:
+                        return f"```mermaid\n{fixed_diagram}\n```"
+                    return f'<pre class="mermaid">\n{fixed_diagram}\n</pre>'
+
+                fixed_content = MERMAID_BLOCK_PATTERN.sub(replace_block, documentation_content)
             
             # Enhance HTML styling for professional appearance
             if fixed_content.strip().startswith('<!DOCTYPE html') or fixed_content.strip().startswith('<html'):
@@ -97,31 +129,62 @@ class LLMMermaidFixer:
             return fixed_content, all_fixes_successful
 
         except Exception as e:
-            logger.error(f"Error during LLM Mermaid fixing: {e}")
+            logger.error(f"Error during Mermaid fixing: {e}")
             return documentation_content, False
     
-    def _extract_mermaid_blocks(self, content: str) -> list:
-        """Extract all Mermaid code blocks from content (both markdown and HTML format)"""
-        blocks = []
-
-        # Pattern for markdown format: ```mermaid ... ```
-        markdown_pattern = r'```mermaid\n(.*?)\n```'
-        for match in re.finditer(markdown_pattern, content, re.DOTALL):
-            full_block = match.group(0)
-            mermaid_content = match.group(1)
-            blocks.append((full_block, mermaid_content, 'markdown'))
-
-        # Pattern for HTML format: <pre class="mermaid"> ... </pre>
-        html_pattern = r'<pre class="mermaid">\s*(.*?)\s*</pre>'
-        for match in re.finditer(html_pattern, content, re.DOTALL):
-            full_block = match.group(0)
-            mermaid_content = match.group(1)
-            blocks.append((full_block, mermaid_content, 'html'))
-
-        return blocks
+    def _fix_locally(self, mermaid_content: str) -> Tuple[str, bool]:
+        """
+        Validate and repair a diagram without the LLM
+
+        Returns:
+            tuple: (possibly repaired diagram, True if it is valid now)
+        """
+        if is_flowchart(mermaid_content):
+            fixed_content, issues, errors = repair_flowchart(mermaid_content)
+            if issues:
+                logger.info(f"Repaired Mermaid flowchart locally: {issues}")
+            if errors:
+                logger.info(f"Mermaid flowchart needs the LLM: {errors}")
+            return fixed_content, not errors
+        return mermaid_content, self._validate_mermaid_syntax(mermaid_content)
+
+    def _fix_with_llm(self, unresolved: list) -> dict:
+        """
+        Fix the diagrams the local fixer could not repair, concurrently
+
+        Args:
+            unresolved: (original diagram, locally repaired diagram) pairs
+
+        Returns:
+            dict: original diagram -> (fixed diagram, success)
+        """
+        if not self.anthropic_client:
+            logger.warning(f"LLM Mermaid fixer not available, leaving {len(unresolved)} diagrams as repaired locally")
+            return {diagram: (partial, False) for diagram, partial in unresolved}
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=min(MERMAID_LLM_CONCURRENCY, len(unresolved))) as executor:
+            futures = {
+                executor.submit(self._fix_single_mermaid_block, partial): (diagram, partial)
+                for diagram, partial in unresolved
+            }
+            for future in as_completed(futures):
+                diagram, partial = futures[future]
+                try:
+                    results[diagram] = future.result()
+                except Exception as e:
+                    logger.error(f"Error fixing Mermaid with LLM: {e}")
+                    results[diagram] = (partial, False)
+        return results
     
     def _fix_single_mermaid_block(self, mermaid_content: str) -> Tuple[str, bool]:
-        """Fix a single Mermaid diagram using LLM"""
+        """Fix a single Mermaid diagram using LLM (results are cached by content)"""
+        cache_key = hashlib.sha256(mermaid_content.encode('utf-8')).hexdigest()
+        with _llm_fix_cache_lock:
+            if cache_key in _llm_fix_cache:
+                _llm_fix_cache.move_to_end(cache_key)
+                return _llm_fix_cache[cache_key], True
+
         try:
             prompt = f"""You are a Mermaid diagram syntax expert. Fix the following Mermaid diagram to ensure it renders correctly in browsers.
 
@@ -161,8 +224,13 @@ Fixed Mermaid diagram:"""
             elif fixed_content.startswith('```'):
                 fixed_content = fixed_content.replace('```\n', '').replace('\n```', '')
             
-            # Basic validation
-            if self._validate_mermaid_syntax(fixed_content):
+            # Check the answer with the same parser (it may also repair small leftovers)
+            fixed_content, valid = self._fix_locally(fixed_content)
+            if valid:
+                with _llm_fix_cache_lock:
+                    _llm_fix_cache[cache_key] = fixed_content
+                    while len(_llm_fix_cache) > MERMAID_LLM_CACHE_SIZE:
+                        _llm_fix_cache.popitem(last=False)
                 return fixed_content, True
             else:
                 logger.warning("LLM-fixed Mermaid still has syntax issues")
@@ -173,11 +241,14 @@ Fixed Mermaid diagram:"""
             return mermaid_content, False
     
     def _validate_mermaid_syntax(self, mermaid_content: str) -> bool:
-        """Basic validation of Mermaid syntax"""
+        """Validate a diagram: flowcharts with the local parser, other types by structure"""
         try:
             # Check for basic structure
             if not mermaid_content.strip():
                 return False
+
+            if is_flowchart(mermaid_content):
+                return not repair_flowchart(mermaid_content)[2]
             
             # Check for diagram type declaration
             first_line = mermaid_content.strip().split('\n')[0]
@@ -0,0 +1,164 @@
+"""
+Load Test
+Measure requests/sec and latency of the status and upload endpoints of a running service
+
+Works against the Main API, BoomiToIS-API and MuleToIS-API, e.g. to compare
+`python app.py` with the pre-fork server (`gunicorn -c gunicorn.conf.py app:app`).
+Uses only the standard library.
+
+Usage:
+    python load_test.py --url http://localhost:5000 --scenario health --concurrency 20 --duration 15
+    python load_test.py --url http://localhost:5000 --scenario status --job-id <job id>
+    python load_test.py --url http://localhost:5000 --scenario upload --file sample.md
+
+The upload scenario creates a real job per request (the Main API processes the
+document, the generator services start an iFlow generation), so run it against
+a test deployment only.
+"""
+
+import os
+import sys
+import time
+import json
+import uuid
+import argparse
+import statistics
+import threading
+import urllib.error
+import urllib.request
+from collections import Counter
+
+def encode_multipart(fields, files):
+    """
+    Build a multipart/form-data body
+
+    Args:
+        fields (dict): Form field name -> value
+        files (dict): Form field name -> (filename, bytes)
+
+    Returns:
+        tuple: (body bytes, content type)
+    """
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, content) in files.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n'.encode() + content + b'\r\n'
+        )
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+def build_request(args):
+    """
+    Request factory for the chosen scenario
+
+    Returns:
+        callable: Returns a new urllib Request per call
+    """
+    base_url = args.url.rstrip('/')
+
+    if args.scenario == 'health':
+        return lambda: urllib.request.Request(f'{base_url}/api/health')
+
+    if args.scenario == 'status':
+        # Unknown ids still exercise routing and the job store lookup (404)
+        job_id = args.job_id or 'load-test-missing-job'
+        return lambda: urllib.request.Request(f'{base_url}/api/jobs/{job_id}')
+
+    # upload
+    with open(args.file, 'rb') as f:
+        content = f.read()
+    filename = os.path.basename(args.file)
+
+    if args.service == 'main':
+        body, content_type = encode_multipart({'platform': args.platform}, {'file': (filename, content)})
+        return lambda: urllib.request.Request(
+            f'{base_url}/api/upload-documentation', data=body, headers={'Content-Type': content_type}
+        )
+
+    payload = json.dumps({'markdown': content.decode('utf-8', errors='replace')}).encode()
+    return lambda: urllib.request.Request(
+        f'{base_url}/api/generate-iflow', data=payload, headers={'Content-Type': 'application/json'}
+    )
+
+def run_load(make_request, concurrency, duration, timeout):
+    """
+    Send requests from concurrent clients for a fixed time
+
+    Returns:
+        tuple: (latencies in seconds, Counter of status codes / errors, elapsed seconds)
+    """
+    latencies = []
+    outcomes = Counter()
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(make_request(), timeout=timeout) as response:
+                    response.read()
+                    outcome = response.status
+            except urllib.error.HTTPError as e:
+                e.read()
+                outcome = e.code
+            except Exception as e:
+                outcome = type(e).__name__
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                outcomes[outcome] += 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, outcomes, time.perf_counter() - started
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the status and upload endpoints of a service')
+    parser.add_argument('--url', default='http://localhost:5000', help='Base URL of the service')
+    parser.add_argument('--service', choices=['main', 'boomi', 'mule'], default='main',
+                        help='Service behind --url (selects the upload endpoint)')
+    parser.add_argument('--scenario', choices=['health', 'status', 'upload'], default='status')
+    parser.add_argument('--job-id', help='Existing job to poll in the status scenario')
+    parser.add_argument('--file', help='Document to upload in the upload scenario')
+    parser.add_argument('--platform', default='mulesoft', help='Platform form field for Main API uploads')
+    parser.add_argument('--concurrency', type=int, default=10, help='Concurrent clients')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds to run')
+    parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds')
+    args = parser.parse_args()
+
+    if args.scenario == 'upload' and not args.file:
+        parser.error('--file is required for the upload scenario')
+
+    print(f"🚀 Load test: {args.scenario} on {args.url} ({args.concurrency} clients, {args.duration:g}s)")
+    print("-" * 60)
+
+    latencies, outcomes, elapsed = run_load(build_request(args), args.concurrency, args.duration, args.timeout)
+    if not latencies:
+        print("❌ No requests completed")
+        return 1
+
+    print(f"Requests:     {len(latencies)}")
+    print(f"Requests/sec: {len(latencies) / elapsed:.1f}")
+    print(f"Latency:      mean {statistics.mean(latencies) * 1000:.1f}ms, "
+          f"p50 {percentile(latencies, 0.50) * 1000:.1f}ms, "
+          f"p95 {percentile(latencies, 0.95) * 1000:.1f}ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.1f}ms, "
+          f"max {max(latencies) * 1000:.1f}ms")
+    print(f"Outcomes:     {', '.join(f'{key}: {count}' for key, count in outcomes.most_common())}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,16 +6,170 @@ import os
 import sys
 import argparse
 import re
+import hashlib
+import threading
+from collections import OrderedDict
 import markdown
 from pathlib import Path
 
 # Import Mermaid validator
 try:
-    from mermaid_validator import MermaidValidator
+    from mermaid_validator import get_validator
 except ImportError:
-    MermaidValidator = None
+    get_validator = None
 
-def convert_markdown_to_html(markdown_file, output_file=None):
+MARKDOWN_EXTENSIONS = [
+    'markdown.extensions.tables',
+    'markdown.extensions.fenced_code',
+    'markdown.extensions.codehilite',
+    'markdown.extensions.toc'
+]
+
+MERMAID_PATTERN = re.compile(r'```mermaid\n(.*?)\n```', re.DOTALL)
+PLACEHOLDER_PATTERN = re.compile(r'<p>MERMAID_PLACEHOLDER_(\d+)</p>')
+FENCE_PATTERN = re.compile(r'^\s*(```|~~~)')
+SECTION_HEADING_PATTERN = re.compile(r'^#{1,2}\s')
+HEADING_ID_PATTERN = re.compile(r'(<h[1-6] id=")([^"]*)(")')
+HEADING_ID_COUNT_PATTERN = re.compile(r'^(.*)_([0-9]+)$')
+
+class RenderCache:
+    """
+    Thread-safe LRU cache of rendered HTML keyed by the SHA-256 of the source text
+    """
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(text):
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def get_or_render(self, text, render):
+        """Return the cached result for text, calling render(text) on a miss"""
+        key = self.key(text)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        result = render(text)
+        with self._lock:
+            self._entries[key] = result
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+# Rendered sections and validated diagrams, shared by all conversions in this process
+section_cache = RenderCache(int(os.getenv('MARKDOWN_SECTION_CACHE_SIZE', '512')))
+mermaid_cache = RenderCache(int(os.getenv('MERMAID_CACHE_SIZE', '512')))
+
+# markdown.Markdown instances are not thread-safe, but can be reset and reused within a thread
+_converters = threading.local()
+
+def _get_converter():
+    converter = getattr(_converters, 'converter', None)
+    if converter is None:
+        converter = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+        _converters.converter = converter
+    return converter.reset()
+
+def split_sections(markdown_content):
+    """
+    Split markdown into sections at level 1 and 2 headings outside code fences
+
+    Joining the sections gives back the original text.
+    """
+    sections = []
+    current = []
+    in_fence = False
+    for line in markdown_content.splitlines(keepends=True):
+        if FENCE_PATTERN.match(line):
+            in_fence = not in_fence
+        elif not in_fence and SECTION_HEADING_PATTERN.match(line) and current:
+            sections.append(''.join(current))
+            current = []
+        current.append(line)
+    if current:
+        sections.append(''.join(current))
+    return sections
+
+def fix_mermaid_block(mermaid_content):
+    """Validate and fix one Mermaid diagram with the shared validator (results are cached)"""
+    if not get_validator:
+        return mermaid_content
+
+    def validate(content):
+        try:
+            fixed_content, issues = get_validator().validate_and_fix(content)
+            if issues:
+                print(f"Fixed Mermaid syntax issues: {issues}")
+            return fixed_content
+        except Exception as e:
+            print(f"Mermaid validation failed: {e}")
+            return content
+
+    return mermaid_cache.get_or_render(mermaid_content, validate)
+
+def render_section(section):
+    """Render one markdown section to HTML, with Mermaid blocks as <pre class="mermaid">"""
+    mermaid_blocks = []
+
+    # Replace Mermaid blocks with placeholders so markdown leaves them alone
+    def replace_mermaid(match):
+        mermaid_blocks.append(fix_mermaid_block(match.group(1)))
+        return f'MERMAID_PLACEHOLDER_{len(mermaid_blocks) - 1}'
+
+    processed_markdown = MERMAID_PATTERN.sub(replace_mermaid, section)
+    html_content = _get_converter().convert(processed_markdown)
+
+    # Put the diagrams back in a single pass
+    def restore_mermaid(match):
+        index = int(match.group(1))
+        if index >= len(mermaid_blocks):
+            return match.group(0)
+        return f'<pre class="mermaid">\n{mermaid_blocks[index]}\n</pre>'
+
+    return PLACEHOLDER_PATTERN.sub(restore_mermaid, html_content)
+
+def make_heading_ids_unique(html_content):
+    """
+    Number repeated heading ids across sections the way the toc extension
+    does within one document (overview, overview_1, ...)
+    """
+    seen = set()
+
+    def unique(match):
+        heading_id = match.group(2)
+        while heading_id in seen:
+            count = HEADING_ID_COUNT_PATTERN.match(heading_id)
+            if count:
+                heading_id = f'{count.group(1)}_{int(count.group(2)) + 1}'
+            else:
+                heading_id = f'{heading_id}_1'
+        seen.add(heading_id)
+        return f'{match.group(1)}{heading_id}{match.group(3)}'
+
+    return HEADING_ID_PATTERN.sub(unique, html_content)
+
+def render_markdown(markdown_content):
+    """
+    Render markdown with Mermaid diagrams to an HTML fragment
+
+    The document is rendered section by section and each section is cached by
+    content hash, so regenerating a document after a small edit only renders
+    the sections that changed. Reference-style link definitions therefore
+    only apply within their own section.
+    """
+    sections = split_sections(markdown_content)
+    rendered = [section_cache.get_or_render(section, render_section) for section in sections]
+    return make_heading_ids_unique('\n'.join(part for part in rendered if part))
+
+def convert_markdown_to_html(markdown_file, output_file=None, markdown_content=None):
     """
     Convert Markdown file to HTML with Mermaid support.
     
@@ -23,6 +177,8 @@ def convert_markdown_to_html(markdown_file, output_file=None):
         markdown_file: Path to the markdown file
         output_file: Optional path for the output file. If not provided, 
                     will use the same filename with .html extension.
+        markdown_content: Optional content of markdown_file, when the caller
+                    already has it in memory (the file is not read then)
     
     Returns:
         Path to the generated HTML file
@@ -32,50 +188,11 @@ def convert_markdown_to_html(markdown_file, output_file=None):
         output_file = os.path.splitext(markdown_file)[0] + '_with_mermaid.html'
     
     # Read the markdown content
-    with open(markdown_file, 'r', encoding='utf-8') as f:
-        markdown_content = f.read()
+    if markdown_content is None:
+        with open(markdown_file, 'r', encoding='utf-8') as f:
+            markdown_content = f.read()
     
-    # Find Mermaid code blocks and save them before markdown conversion
-    mermaid_blocks = []
-    mermaid_pattern = r'```mermaid\n(.*?)\n```'
-    
-    # Function to replace code blocks with placeholders
-    def replace_mermaid(match):
-        mermaid_content = match.group(1)
-
-        # Validate and fix Mermaid syntax if validator is available
-        if MermaidValidator:
-            try:
-                validator = MermaidValidator()
-                fixed_content, issues = validator.validate_and_fix(mermaid_content)
-                if issues:
-                    print(f"Fixed Mermaid syntax issues: {issues}")
-                mermaid_content = fixed_content
-            except Exception as e:
-                print(f"Mermaid validation failed: {e}")
-
-        mermaid_blocks.append(mermaid_content)
-        return f'MERMAID_PLACEHOLDER_{len(mermaid_blocks) - 1}'
-    
-    # Replace Mermaid blocks with placeholders
-    processed_markdown = re.sub(mermaid_pattern, replace_mermaid, markdown_content, flags=re.DOTALL)
-    
-    # Convert markdown to HTML
-    html_content = markdown.markdown(
-        processed_markdown,
-        extensions=[
-            'markdown.extensions.tables',
-            'markdown.extensions.fenced_code',
-            'markdown.extensions.codehilite',
-            'markdown.extensions.toc'
-        ]
-    )
-    
-    # Replace placeholders with Mermaid pre tags
-    for i, block in enumerate(mermaid_blocks):
-        placeholder = f'<p>MERMAID_PLACEHOLDER_{i}</p>'
-        mermaid_html = f'<pre class="mermaid">\n{block}\n</pre>'
-        html_content = html_content.replace(placeholder, mermaid_html)
+    html_content = render_markdown(markdown_content)
     
     # Create the HTML document with Mermaid support
     final_html = f"""<!DOCTYPE html>
@@ -168,29 +285,21 @@ def convert_markdown_to_html(markdown_file, output_file=None):
 </body>
 </html>"""
     
-    # Write the HTML file
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(final_html)
-
     # Apply enhanced LLM Mermaid fixes to ensure diagrams render correctly
     try:
         from llm_mermaid_fixer import fix_documentation_with_llm
 
-        # Read the generated HTML file
-        with open(output_file, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-
-        # Apply LLM-powered fixes and professional styling
-        fixed_content = fix_documentation_with_llm(html_content)
-
-        # Write back the enhanced content
+        # Apply LLM-powered fixes and professional styling before writing the file once
+        final_html = fix_documentation_with_llm(final_html)
         with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(fixed_content)
+            f.write(final_html)
 
         print(f"Applied enhanced LLM Mermaid fixes and professional styling to {output_file}")
 
     except ImportError as ie:
         print(f"Enhanced LLM Mermaid fixer not available ({ie}), trying minimal fixer...")
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(final_html)
         try:
             from minimal_mermaid_fixer import fix_mermaid_syntax_in_html
             fix_mermaid_syntax_in_html(output_file)
@@ -201,6 +310,8 @@ def convert_markdown_to_html(markdown_file, output_file=None):
             print(f"Warning: Could not apply minimal Mermaid fixes: {e}")
     except Exception as e:
         print(f"Warning: Could not apply enhanced Mermaid fixes: {e}")
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(final_html)
         # Fallback to minimal fixer
         try:
             from minimal_mermaid_fixer import fix_mermaid_syntax_in_html
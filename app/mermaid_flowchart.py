@@ -0,0 +1,447 @@
+"""
+Mermaid Flowchart Parser and Fixer
+Validates and repairs flowchart diagrams locally, without an LLM
+
+The tokenizer understands the flowchart syntax the documentation generators
+produce (nodes with all common shapes, edge chains with labels, '&' groups,
+':::' classes, subgraphs and styling statements). Statements that are valid
+are kept exactly as written; only statements with a repairable problem are
+rewritten:
+
+- Node IDs with hyphens (my-node becomes my_node everywhere in the diagram)
+- Node IDs that are the reserved word 'end'
+- Unquoted labels with characters Mermaid cannot parse (quoted, inner quotes escaped)
+- Unterminated labels at the end of a statement (closed)
+- Dangling edges without a source or target (the edge is dropped)
+- Unbalanced subgraph/end pairs
+- A missing flowchart declaration
+
+Anything else is reported as an error so the caller can fall back to the LLM.
+"""
+
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+FLOWCHART_HEADER_PATTERN = re.compile(r'^(flowchart|graph)\b(\s+(TB|TD|BT|RL|LR))?\s*;?\s*$')
+DIAGRAM_TYPE_PATTERN = re.compile(
+    r'^(sequenceDiagram|classDiagram|stateDiagram(-v2)?|erDiagram|journey|gantt|pie|gitGraph|mindmap|'
+    r'timeline|quadrantChart|requirementDiagram|C4\w+|zenuml|kanban|[A-Za-z]+-beta)\b'
+)
+NODE_ID_PATTERN = re.compile(r'[A-Za-z0-9_]+(?:-[A-Za-z0-9_]+)*')
+CLASS_SUFFIX_PATTERN = re.compile(r':::([A-Za-z0-9_-]+)')
+EDGE_LABEL_PATTERN = re.compile(r'\|([^|]*)\|')
+# Arrows: -->, ---, ==>, ===, -.->, -.-, ~~~, with optional < and o/x heads; longer forms allowed
+ARROW_PATTERN = re.compile(r'<?(?:-{2,}|={2,}|-\.+-|~{3,})(?:>|(?:o|x)(?![A-Za-z0-9_]))?')
+# Text on the link itself: A -- text --> B, A == text ==> B, A -. text .-> B
+TEXT_ARROW_PATTERN = re.compile(
+    r'(?P<open><?--|<?==|<?-\.)\s+(?P<text>[^|\n]*?)\s+(?P<close>-{2,}>|={2,}>|\.-+>|-{3,}|={3,}|\.-+)'
+)
+TEXT_ARROW_CLOSE = {'-': '-->', '=': '==>', '.': '-.->'}
+STATEMENT_KEYWORD_PATTERN = re.compile(r'^(classDef|class|style|linkStyle|click|direction|accTitle|accDescr)\b')
+
+# Shape openers, longest first, with their possible closers
+SHAPES = [
+    ('(((', [')))']), ('([', ['])']), ('((', ['))']), ('[[', [']]']), ('[(', [')]']), ('{{', ['}}']),
+    ('[/', ['/]', '\\]']), ('[\\', ['\\]', '/]']),
+    ('[', [']']), ('(', [')']), ('{', ['}']), ('>', [']'])
+]
+
+# Characters that break unquoted labels
+UNSAFE_LABEL_CHARS = set('()[]{}<>|"/\\;`')
+
+class FlowchartSyntaxError(Exception):
+    """A statement the local fixer cannot repair"""
+
+class Node:
+    """A node reference in a statement, with its optional shape, label and class"""
+
+    def __init__(self, node_id, opener=None, closer=None, label=None, quoted=False, css_class=None):
+        self.node_id = node_id
+        self.opener = opener
+        self.closer = closer
+        self.label = label
+        self.quoted = quoted
+        self.css_class = css_class
+
+    def render(self):
+        text = self.node_id
+        if self.opener is not None:
+            label = f'"{self.label}"' if self.quoted else self.label
+            text += f'{self.opener}{label}{self.closer}'
+        if self.css_class:
+            text += f':::{self.css_class}'
+        return text
+
+class Edge:
+    """An arrow between two node groups, with an optional label"""
+
+    def __init__(self, arrow, label=None):
+        self.arrow = arrow
+        self.label = label
+
+    def render(self):
+        return f' {self.arrow}|{self.label}| ' if self.label is not None else f' {self.arrow} '
+
+def is_flowchart(content: str) -> bool:
+    """True if the diagram is a flowchart, or has no declaration but starts with flowchart statements"""
+    first_line = _first_statement_line(content)
+    if first_line.startswith(('flowchart', 'graph')):
+        return True
+    if not first_line or DIAGRAM_TYPE_PATTERN.match(first_line):
+        return False
+    try:
+        parse_chain(split_statements(first_line)[0])
+        return True
+    except FlowchartSyntaxError:
+        return False
+
+def _first_statement_line(content):
+    for line in content.split('\n'):
+        stripped = line.strip()
+        if stripped and not stripped.startswith('%%'):
+            return stripped
+    return ''
+
+def _needs_quotes(label):
+    return any(char in UNSAFE_LABEL_CHARS for char in label)
+
+def _clean_label(label):
+    """Label text that is safe inside double quotes"""
+    return label.strip().replace('"', '#quot;')
+
+def _fix_node_id(node_id, renames):
+    if node_id in renames:
+        return renames[node_id]
+    fixed = node_id.replace('-', '_')
+    if fixed == 'end':
+        fixed = 'end_node'
+    if fixed != node_id:
+        renames[node_id] = fixed
+    return fixed
+
+def _read_label(text, pos, opener, closers):
+    """
+    Read a node label starting after its opener
+
+    Returns:
+        tuple: (label, quoted, closer, position after the closer, closed)
+    """
+    if text.startswith('"', pos):
+        end_quote = text.find('"', pos + 1)
+        for closer in closers:
+            if end_quote != -1 and text.startswith(closer, end_quote + 1):
+                return text[pos + 1:end_quote], True, closer, end_quote + 1 + len(closer), True
+
+    # Unquoted: find a closer, allowing nested pairs of the opening bracket
+    open_char = opener[0] if opener[0] in '[({' else None
+    close_char = {'[': ']', '(': ')', '{': '}'}.get(open_char)
+    depth = 0
+    i = pos
+    while i < len(text):
+        if depth == 0:
+            for closer in closers:
+                if text.startswith(closer, i):
+                    return text[pos:i], False, closer, i + len(closer), True
+        char = text[i]
+        if open_char and char == open_char:
+            depth += 1
+        elif close_char and char == close_char and depth > 0:
+            depth -= 1
+        i += 1
+    return text[pos:], False, closers[0], len(text), False
+
+def _read_node(text, pos, renames, issues):
+    """Parse a node reference at pos; returns (Node, new position)"""
+    match = NODE_ID_PATTERN.match(text, pos)
+    if not match:
+        raise FlowchartSyntaxError(f"Expected a node ID at: {text[pos:pos + 30]!r}")
+    raw_id = match.group(0)
+    node = Node(_fix_node_id(raw_id, renames))
+    if node.node_id != raw_id:
+        issues.append(f"Renamed node ID {raw_id} to {node.node_id}")
+    pos = match.end()
+
+    for opener, closers in SHAPES:
+        if text.startswith(opener, pos):
+            label, quoted, closer, end, closed = _read_label(text, pos + len(opener), opener, closers)
+            if not closed:
+                # Close the label at the end of the statement, unless it swallowed an edge
+                if ARROW_PATTERN.search(label) or TEXT_ARROW_PATTERN.search(label):
+                    raise FlowchartSyntaxError(f"Unterminated label for node {raw_id}")
+                issues.append(f"Closed unterminated label for node {raw_id}")
+                label = label.rstrip()
+            if not quoted and len(label) > 1 and label.startswith('"') and label.endswith('"'):
+                # Quoted label with quotes inside it
+                issues.append(f"Escaped quotes in label of node {node.node_id}")
+                label, quoted = _clean_label(label[1:-1]), True
+            node.opener, node.closer = opener, closer
+            if not quoted and _needs_quotes(label):
+                issues.append(f"Quoted label of node {node.node_id}: {label.strip()}")
+                label, quoted = _clean_label(label), True
+            node.label, node.quoted = label, quoted
+            pos = end
+            break
+
+    class_match = CLASS_SUFFIX_PATTERN.match(text, pos)
+    if class_match:
+        node.css_class = class_match.group(1)
+        pos = class_match.end()
+    return node, pos
+
+def _read_edge(text, pos, issues):
+    """Parse an edge at pos; returns (Edge or None, new position)"""
+    text_arrow = TEXT_ARROW_PATTERN.match(text, pos)
+    if text_arrow:
+        close = text_arrow.group('close')
+        arrow = TEXT_ARROW_CLOSE[close[0]] if close.endswith('>') else close
+        if text_arrow.group('open').startswith('<'):
+            arrow = '<' + arrow
+        label = text_arrow.group('text')
+        if _needs_quotes(label):
+            issues.append(f"Quoted edge text: {label}")
+            label = f'"{_clean_label(label)}"'
+        return Edge(arrow, label), text_arrow.end()
+
+    arrow_match = ARROW_PATTERN.match(text, pos)
+    if not arrow_match:
+        return None, pos
+    edge = Edge(arrow_match.group(0))
+    pos = arrow_match.end()
+
+    label_match = EDGE_LABEL_PATTERN.match(text, _skip_spaces(text, pos))
+    if label_match:
+        label = label_match.group(1)
+        stripped = label.strip()
+        already_quoted = len(stripped) > 1 and stripped.startswith('"') and stripped.endswith('"')
+        if not already_quoted and _needs_quotes(label):
+            issues.append(f"Quoted edge label: {stripped}")
+            label = f'"{_clean_label(label)}"'
+        edge.label = label
+        pos = label_match.end()
+    return edge, pos
+
+def _skip_spaces(text, pos):
+    while pos < len(text) and text[pos] in ' \t':
+        pos += 1
+    return pos
+
+def split_statements(line):
+    """Split a line at ';' outside quotes, labels and brackets"""
+    statements = []
+    start = 0
+    depth = 0
+    in_quotes = False
+    in_edge_label = False
+    for i, char in enumerate(line):
+        if char == '"':
+            in_quotes = not in_quotes
+        elif in_quotes:
+            continue
+        elif char == '|':
+            in_edge_label = not in_edge_label
+        elif char in '[({':
+            depth += 1
+        elif char in '])}' and depth > 0:
+            depth -= 1
+        elif char == ';' and depth == 0 and not in_edge_label:
+            statements.append(line[start:i].strip())
+            start = i + 1
+    if line[start:].strip() or not statements:
+        statements.append(line[start:].strip())
+    return statements
+
+def parse_chain(statement, renames=None):
+    """
+    Parse a node or edge chain statement (A[Label] --> B & C -->|yes| D)
+
+    Args:
+        statement (str): One statement, without indentation or ';' (see split_statements)
+        renames (dict): Node ID renames collected so far (updated)
+
+    Returns:
+        tuple: (list of alternating node groups and edges, list of repairs made)
+
+    Raises:
+        FlowchartSyntaxError: If the statement cannot be parsed or repaired
+    """
+    renames = {} if renames is None else renames
+    issues = []
+    parts = []
+    pos = _skip_spaces(statement, 0)
+    expect_node = True
+
+    while pos < len(statement):
+        if expect_node:
+            edge, _ = _read_edge(statement, pos, [])
+            if edge is not None:
+                # An edge without a source: skip it
+                if not parts:
+                    issues.append("Removed edge without a source node")
+                    _, pos = _read_edge(statement, pos, [])
+                    pos = _skip_spaces(statement, pos)
+                    continue
+                raise FlowchartSyntaxError(f"Two edges in a row at: {statement[pos:pos + 30]!r}")
+            group = []
+            while True:
+                node, pos = _read_node(statement, pos, renames, issues)
+                group.append(node)
+                pos = _skip_spaces(statement, pos)
+                if statement.startswith('&', pos):
+                    pos = _skip_spaces(statement, pos + 1)
+                    continue
+                break
+            parts.append(group)
+            expect_node = False
+        else:
+            edge, pos = _read_edge(statement, pos, issues)
+            if edge is None:
+                raise FlowchartSyntaxError(f"Expected an edge at: {statement[pos:pos + 30]!r}")
+            parts.append(edge)
+            expect_node = True
+        pos = _skip_spaces(statement, pos)
+
+    if parts and isinstance(parts[-1], Edge):
+        issues.append("Removed edge without a target node")
+        parts.pop()
+    return parts, issues
+
+def render_chain(parts):
+    text = ''
+    for part in parts:
+        if isinstance(part, Edge):
+            text += part.render()
+        else:
+            text += ' & '.join(node.render() for node in part)
+    return text
+
+def _rename_in_statement(line, renames):
+    """Apply node ID renames to class, style and click statements"""
+    keyword = line.split(None, 1)[0]
+    if keyword == 'class':
+        fields = line.split()
+        if len(fields) >= 2:
+            ids = [renames.get(node_id, node_id) for node_id in fields[1].split(',')]
+            return ' '.join([fields[0], ','.join(ids)] + fields[2:])
+    elif keyword in ('style', 'click'):
+        fields = line.split(None, 2)
+        if len(fields) >= 2 and fields[1] in renames:
+            fields[1] = renames[fields[1]]
+            return ' '.join(fields)
+    return line
+
+def repair_flowchart(content: str) -> tuple[str, list[str], list[str]]:
+    """
+    Validate a flowchart and repair the problems that can be fixed locally
+
+    Args:
+        content: Mermaid flowchart source
+
+    Returns:
+        tuple: (fixed content, repairs made, errors left). The diagram is valid
+            when the errors list is empty. Diagrams declared as another type
+            (sequenceDiagram, classDiagram...) are returned unchanged, with no
+            repairs and no errors.
+    """
+    if DIAGRAM_TYPE_PATTERN.match(_first_statement_line(content)):
+        return content, [], []
+
+    lines = content.split('\n')
+    issues = []
+    errors = []
+    renames = {}
+    output = []
+    pending_renames = []  # Indexes of styling statements to rename after all nodes are known
+    subgraph_depth = 0
+    has_header = False
+
+    for line_number, line in enumerate(lines, 1):
+        stripped = line.strip()
+        indent = line[:len(line) - len(line.lstrip())]
+
+        if not stripped or stripped.startswith('%%'):
+            output.append(line)
+            continue
+
+        if not has_header and not output_has_statement(output):
+            if FLOWCHART_HEADER_PATTERN.match(stripped):
+                has_header = True
+                output.append(line)
+                continue
+            if stripped.startswith(('flowchart', 'graph')):
+                errors.append(f"Line {line_number}: Invalid flowchart declaration: {stripped}")
+                output.append(line)
+                has_header = True
+                continue
+            issues.append("Added missing flowchart declaration")
+            output.append('flowchart TD')
+            has_header = True
+
+        if stripped.startswith('subgraph'):
+            subgraph_depth += 1
+            rest = stripped[len('subgraph'):].strip()
+            id_match = NODE_ID_PATTERN.match(rest)
+            if id_match and '-' in id_match.group(0):
+                fixed_id = _fix_node_id(id_match.group(0), renames)
+                issues.append(f"Renamed subgraph ID {id_match.group(0)} to {fixed_id}")
+                line = f"{indent}subgraph {fixed_id}{rest[id_match.end():]}"
+            output.append(line)
+            continue
+
+        if stripped.rstrip(';') == 'end':
+            if subgraph_depth == 0:
+                issues.append(f"Removed 'end' without a subgraph on line {line_number}")
+                continue
+            subgraph_depth -= 1
+            output.append(line)
+            continue
+
+        if STATEMENT_KEYWORD_PATTERN.match(stripped):
+            if stripped.startswith(('class ', 'style ', 'click ')):
+                pending_renames.append(len(output))
+            output.append(line)
+            continue
+
+        try:
+            parsed = [parse_chain(statement, renames) for statement in split_statements(stripped)]
+        except FlowchartSyntaxError as e:
+            errors.append(f"Line {line_number}: {e}")
+            output.append(line)
+            continue
+
+        line_issues = [issue for _, statement_issues in parsed for issue in statement_issues]
+        if line_issues:
+            issues.extend(f"Line {line_number}: {issue}" for issue in line_issues)
+            # Statements that were only a dangling edge are dropped
+            statements = [render_chain(parts) for parts, _ in parsed if parts]
+            if statements:
+                output.append(indent + '; '.join(statements))
+        else:
+            output.append(line)
+
+    if not has_header:
+        output.insert(0, 'flowchart TD')
+        issues.append("Added missing flowchart declaration")
+
+    for index in pending_renames:
+        line = output[index]
+        indent = line[:len(line) - len(line.lstrip())]
+        renamed = indent + _rename_in_statement(line.strip(), renames)
+        if renamed != line:
+            output[index] = renamed
+            issues.append(f"Renamed node IDs in: {line.strip()}")
+
+    if subgraph_depth > 0:
+        output.extend(['end'] * subgraph_depth)
+        issues.append(f"Closed {subgraph_depth} unterminated subgraph(s)")
+
+    return '\n'.join(output), issues, errors
+
+def output_has_statement(output):
+    return any(line.strip() and not line.strip().startswith('%%') for line in output)
+
+def validate_flowchart(content: str) -> list[str]:
+    """Errors and repairable problems in a flowchart (empty if it is valid as written)"""
+    _, issues, errors = repair_flowchart(content)
+    return errors + issues
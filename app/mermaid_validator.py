@@ -5,35 +5,49 @@ Prevents syntax errors in generated Mermaid diagrams
 
 import re
 import logging
+import threading
+
+from mermaid_flowchart import is_flowchart, repair_flowchart
 
 logger = logging.getLogger(__name__)
 
-class MermaidValidator:
-    """Validates and fixes Mermaid diagram syntax"""
-    
-    def __init__(self):
-        self.common_fixes = [
-            # Fix special characters in labels
-            (r'\|"([^"]*\{[^}]*\}[^"]*)"\|', r'|"\1"|'),  # Escape curly braces in labels
-            (r'\|"([^"]*\$[^"]*)"\|', r'|"\1"|'),         # Escape dollar signs in labels
+# Fixes applied to every diagram, compiled once for all validators
+COMMON_FIXES = [
+    (re.compile(pattern), replacement) for pattern, replacement in [
+        # Fix special characters in labels
+        (r'\|"([^"]*\{[^}]*\}[^"]*)"\|', r'|"\1"|'),  # Escape curly braces in labels
+        (r'\|"([^"]*\$[^"]*)"\|', r'|"\1"|'),         # Escape dollar signs in labels
 
-            # Fix node ID naming issues - replace hyphens with underscores
-            (r'([A-Za-z0-9_]+)-([A-Za-z0-9_-]+)', r'\1_\2'),  # Replace hyphens in node IDs
+        # Fix node ID naming issues - replace hyphens with underscores
+        (r'([A-Za-z0-9_]+)-([A-Za-z0-9_-]+)', r'\1_\2'),  # Replace hyphens in node IDs
 
-            # Fix node labels with special characters
-            (r'([A-Za-z0-9_]+)\[([^\]]*\{[^}]*\}[^\]]*)\]', r'\1["\2"]'),  # Quote labels with curly braces
-            (r'([A-Za-z0-9_]+)\[([^\]]*\$[^\]]*)\]', r'\1["\2"]'),         # Quote labels with dollar signs
-            (r'([A-Za-z0-9_]+)\[([^\]]*\/[^\]]*)\]', r'\1["\2"]'),         # Quote labels with slashes
+        # Fix node labels with special characters
+        (r'([A-Za-z0-9_]+)\[([^\]]*\{[^}]*\}[^\]]*)\]', r'\1["\2"]'),  # Quote labels with curly braces
+        (r'([A-Za-z0-9_]+)\[([^\]]*\$[^\]]*)\]', r'\1["\2"]'),         # Quote labels with dollar signs
+        (r'([A-Za-z0-9_]+)\[([^\]]*\/[^\]]*)\]', r'\1["\2"]'),         # Quote labels with slashes
 
-            # Fix arrow syntax
-            (r'-->\s*\|\s*([^|]*)\s*\|\s*', r'-->|"\1"| '),  # Ensure labels are quoted
+        # Fix arrow syntax
+        (r'-->\s*\|\s*([^|]*)\s*\|\s*', r'-->|"\1"| '),  # Ensure labels are quoted
 
-            # Fix class definitions
-            (r'classDef\s+([^\s]+)\s+([^;]*);?', r'classDef \1 \2'),  # Normalize classDef syntax
+        # Fix class definitions
+        (r'classDef\s+([^\s]+)\s+([^;]*);?', r'classDef \1 \2'),  # Normalize classDef syntax
 
-            # Fix comment syntax
-            (r'%%\s*([^\n]*)', r'%% \1'),  # Normalize comments
-        ]
+        # Fix comment syntax
+        (r'%%\s*([^\n]*)', r'%% \1'),  # Normalize comments
+    ]
+]
+
+HYPHENATED_ID_PATTERN = re.compile(r'([A-Za-z0-9_]+)-([A-Za-z0-9_-]+)')
+NODE_LABEL_PATTERN = re.compile(r'([A-Za-z0-9_]+)\[([^\]]*)\]')
+ARROW_LABEL_PATTERN = re.compile(r'-->\s*\|\s*([^|]*)\s*\|')
+CLASS_DEF_PATTERN = re.compile(r'classDef\s+\w+\s+[^;]*')
+MERMAID_BLOCK_PATTERN = re.compile(r'```mermaid\n(.*?)\n```', re.DOTALL)
+
+class MermaidValidator:
+    """Validates and fixes Mermaid diagram syntax"""
+    
+    def __init__(self):
+        self.common_fixes = COMMON_FIXES
         
         self.reserved_words = [
             'graph', 'flowchart', 'sequenceDiagram', 'classDiagram', 'stateDiagram',
@@ -52,6 +66,12 @@ class MermaidValidator:
         Returns:
             tuple: (fixed_content, list_of_issues_found)
         """
+        # Flowcharts are parsed and repaired statement by statement, leaving valid statements untouched
+        if is_flowchart(mermaid_content):
+            fixed_content, issues, errors = repair_flowchart(mermaid_content)
+            issues.extend(f"Could not repair: {error}" for error in errors)
+            return fixed_content, issues
+
         issues = []
         fixed_content = mermaid_content
         
@@ -59,9 +79,9 @@ class MermaidValidator:
             # Apply common fixes
             for pattern, replacement in self.common_fixes:
                 old_content = fixed_content
-                fixed_content = re.sub(pattern, replacement, fixed_content)
+                fixed_content = pattern.sub(replacement, fixed_content)
                 if old_content != fixed_content:
-                    issues.append(f"Applied fix: {pattern} -> {replacement}")
+                    issues.append(f"Applied fix: {pattern.pattern} -> {replacement}")
             
             # Validate diagram type
             if not self._has_valid_diagram_type(fixed_content):
@@ -107,13 +127,12 @@ class MermaidValidator:
             original_line = line
 
             # Fix node IDs with hyphens (replace with underscores)
-            line = re.sub(r'([A-Za-z0-9_]+)-([A-Za-z0-9_-]+)', r'\1_\2', line)
+            line = HYPHENATED_ID_PATTERN.sub(r'\1_\2', line)
 
             # Fix labels with special characters
             if '[' in line and ']' in line:
                 # Extract node definitions - handle both quoted and unquoted labels
-                node_pattern = r'([A-Za-z0-9_]+)\[([^\]]*)\]'
-                matches = re.findall(node_pattern, line)
+                matches = NODE_LABEL_PATTERN.findall(line)
 
                 for node_id, label in matches:
                     # Skip if already quoted
@@ -140,8 +159,6 @@ class MermaidValidator:
         issues = []
         
         # Fix arrow labels with special characters
-        arrow_pattern = r'-->\s*\|\s*([^|]*)\s*\|'
-        
         def fix_arrow_label(match):
             label = match.group(1)
             if any(char in label for char in ['{', '}', '$', '/', '#']):
@@ -149,7 +166,7 @@ class MermaidValidator:
                 return f'-->|"{label}"|'
             return match.group(0)
         
-        fixed_content = re.sub(arrow_pattern, fix_arrow_label, content)
+        fixed_content = ARROW_LABEL_PATTERN.sub(fix_arrow_label, content)
         
         return fixed_content, issues
     
@@ -161,7 +178,7 @@ class MermaidValidator:
         for line_num, line in enumerate(lines, 1):
             if line.strip().startswith('classDef'):
                 # Check for proper classDef syntax
-                if not re.match(r'classDef\s+\w+\s+[^;]*', line.strip()):
+                if not CLASS_DEF_PATTERN.match(line.strip()):
                     issues.append(f"Line {line_num}: Invalid classDef syntax: {line.strip()}")
         
         return issues
@@ -185,6 +202,19 @@ class MermaidValidator:
         
         return fixed_content, issues
 
+# The validator keeps no state between diagrams, so one instance serves every caller and thread
+_shared_validator = None
+_shared_validator_lock = threading.Lock()
+
+def get_validator() -> MermaidValidator:
+    """Return the shared MermaidValidator"""
+    global _shared_validator
+    if _shared_validator is None:
+        with _shared_validator_lock:
+            if _shared_validator is None:
+                _shared_validator = MermaidValidator()
+    return _shared_validator
+
 def validate_mermaid_in_documentation(documentation_content: str) -> str:
     """
     Validates and fixes Mermaid diagrams in documentation content
@@ -195,10 +225,7 @@ def validate_mermaid_in_documentation(documentation_content: str) -> str:
     Returns:
         Fixed documentation content
     """
-    validator = MermaidValidator()
-    
-    # Find Mermaid code blocks
-    mermaid_pattern = r'```mermaid\n(.*?)\n```'
+    validator = get_validator()
     
     def fix_mermaid_block(match):
         mermaid_content = match.group(1)
@@ -210,6 +237,6 @@ def validate_mermaid_in_documentation(documentation_content: str) -> str:
         return f"```mermaid\n{fixed_content}\n```"
     
     # Apply fixes to all Mermaid blocks
-    fixed_documentation = re.sub(mermaid_pattern, fix_mermaid_block, documentation_content, flags=re.DOTALL)
+    fixed_documentation = MERMAID_BLOCK_PATTERN.sub(fix_mermaid_block, documentation_content)
     
     return fixed_documentation
@@ -63,8 +63,8 @@ class Job(db.Model):
             'results_path': self.results_path
         }
     
-    def update_status(self, status, **kwargs):
-        """Update job status and other fields."""
+    def update_status(self, status, commit=True, **kwargs):
+        """Update job status and other fields. Pass commit=False to commit with a batch."""
         self.status = status
         self.updated_at = datetime.utcnow()
         
@@ -75,7 +75,8 @@ class Job(db.Model):
             if hasattr(self, key):
                 setattr(self, key, value)
         
-        db.session.commit()
+        if commit:
+            db.session.commit()
 
 class Document(db.Model):
     """
@@ -1,4 +1,5 @@
 import os
+import re
 import sys
 import xml.etree.ElementTree as ET
 import json
@@ -42,6 +43,23 @@ logging.basicConfig(
     ]
 )
 
+# Verbose parser logging (HTTP request and OData extraction details) is off unless MULE_PARSER_DEBUG=true
+logger = logging.getLogger('mule_flow_parser')
+if os.getenv('MULE_PARSER_DEBUG', 'false').lower() == 'true':
+    logger.setLevel(logging.DEBUG)
+
+# OData query options extracted from HTTP request query parameters, patterns tried in order
+ODATA_PATTERNS = {
+    key: [re.compile(pattern, re.DOTALL) for pattern in [
+        rf'\${key}[^:]*:[^"\']*["\'](.*?)["\'"](?:,|}})',  # Standard JSON pattern
+        rf'\${key}[^:]*:[^"\']*["\'](.*?)(?:["\'"](?:,|}})|(?:,|}})|$)',  # Alternative with possible unclosed quotes
+        rf'[\\\$]{key}["\']?\s*:\s*["\']([^"\']+)["\']',  # Original pattern
+        rf'\${key}\s*=\s*([^&]+)',  # URL parameter style
+        rf'\${key}\s*:\s*([^,}}]+)'  # Simple colon separator
+    ]]
+    for key in ('filter', 'select')
+}
+
 class MuleFlowParser:
     def __init__(self):
         self.namespaces = {
@@ -64,6 +82,18 @@ class MuleFlowParser:
             'foreach': '#795548',
             'set-variable': '#607D8B'
         }
+        self._color_cache = {}
+
+        # Component type -> content extractor (see parse_flow)
+        self.content_extractors = {
+            'request': self._extract_request,
+            'query-params': self._extract_query_params,
+            'set-payload': self._extract_set_payload,
+            'set-variable': self._extract_set_variable,
+            'logger': self._extract_logger,
+            'flow-ref': self._extract_flow_ref,
+            'when': self._extract_when
+        }
 
     def safe_parse_xml(self, file_path: str) -> Optional[ET.ElementTree]:
         """Safely parse XML file with error handling."""
@@ -147,185 +177,150 @@ class MuleFlowParser:
         }
 
     def parse_flow(self, flow_elem: ET.Element) -> Dict:
-        """Parse a single flow element with more detailed content extraction."""
+        """
+        Parse a single flow element with more detailed content extraction.
+
+        The flow is walked once, depth first and without recursion. Every
+        namespaced element becomes a component; content that lives in child
+        elements (query parameters, DataWeave scripts, choice conditions) is
+        attached to the owning component when the child is visited, so nested
+        choice/try/foreach scopes are never traversed twice.
+
+        Returns:
+            Dict with 'components' (flat list in document order, each with its
+            'depth') and 'component_tree' (nested nodes with 'type', 'name',
+            'index' into components and 'children')
+        """
         components = []
+        tree = []
+        debug = logger.isEnabledFor(logging.DEBUG)
         try:
-            for child in flow_elem.iter():
-                if '}' in child.tag:
-                    component_type = child.tag.split('}')[1]
-                    
-                    # Get only the name attribute without documentation namespace
-                    component_name = child.get('name', '')
-                    
+            # (element, parent tree node, depth, index of the enclosing transform)
+            stack = [(flow_elem, None, 0, None)]
+            while stack:
+                elem, parent, depth, transform_index = stack.pop()
+                node = parent
+
+                if isinstance(elem.tag, str) and '}' in elem.tag:
+                    component_type = elem.tag.split('}', 1)[1]
                     component = {
                         'type': component_type,
-                        'name': component_name,
-                        'config_ref': child.get('config-ref', ''),
+                        # Get only the name attribute without documentation namespace
+                        'name': elem.get('name', ''),
+                        'config_ref': elem.get('config-ref', ''),
                         'color': self.get_component_color(component_type),
-                        'attributes': self.get_component_attributes(child),
-                        'content': self.extract_component_content(child)  # Add content extraction
+                        'attributes': self.get_component_attributes(elem),
+                        'content': {},
+                        'depth': depth
                     }
                     components.append(component)
+                    node = {'type': component_type, 'name': component['name'], 'index': len(components) - 1, 'children': []}
+                    (parent['children'] if parent is not None else tree).append(node)
+
+                    extractor = self.content_extractors.get(component_type)
+                    if extractor:
+                        owner = components[parent['index']] if parent is not None else None
+                        transform = components[transform_index] if transform_index is not None else None
+                        extractor(elem, component, owner, transform, debug)
+
+                    if component_type == 'transform':
+                        transform_index = node['index']
+                    depth += 1
+
+                # Children are pushed in reverse so they are visited in document order
+                for child in reversed(list(elem)):
+                    stack.append((child, node, depth, transform_index))
         except Exception as e:
             logging.error(f"Error parsing flow components: {str(e)}")
         
         return {
             'name': flow_elem.get('name'),
-            'components': components
+            'components': components,
+            'component_tree': tree
         }
 
+    # ==========================================
+    # CONTENT EXTRACTORS
+    # Each receives (element, its component, the parent component, the
+    # enclosing transform component, debug flag) and fills in 'content'.
+    # ==========================================
+
+    def _extract_request(self, elem, component, owner, transform, debug):
+        if debug:
+            logger.debug(f"Found HTTP request component, attributes: {elem.attrib}")
+
+    def _extract_query_params(self, elem, component, owner, transform, debug):
+        """Query parameters of the HTTP request that owns this element"""
+        if owner is None or owner['type'] != 'request':
+            return
+        if not (elem.text and elem.text.strip()):
+            if debug:
+                logger.debug("Query-params element has no text content")
+            return
+
+        # normalize any "\$" → "$" so our regexes see the real OData keys
+        query_text = elem.text.strip().replace(r'\$', '$')
+        content = owner['content']
+        content['query_params'] = query_text
+        if debug:
+            logger.debug(f"Looking for OData patterns in: {query_text[:100]}...")
+
+        try:
+            for key, patterns in ODATA_PATTERNS.items():
+                if f'${key}' not in query_text:
+                    continue
+                for i, pattern in enumerate(patterns):
+                    match = pattern.search(query_text)
+                    if match:
+                        content[f'odata_{key}'] = match.group(1).strip()
+                        if debug:
+                            logger.debug(f"Extracted {key} with pattern {i+1}: {content[f'odata_{key}']}")
+                        break
+                else:
+                    if debug:
+                        logger.debug(f"Could not extract {key} with any pattern")
+
+            # Combine OData parameters if found
+            odata_params = {f'${key}': content[f'odata_{key}'] for key in ODATA_PATTERNS if f'odata_{key}' in content}
+            if odata_params:
+                content['odata_params'] = odata_params
+                if debug:
+                    logger.debug(f"Final OData params: {odata_params}")
+        except Exception as e:
+            logging.error(f"Error processing OData parameters: {e}")
+
+    def _extract_set_payload(self, elem, component, owner, transform, debug):
+        """DataWeave payload script of the enclosing transform"""
+        if transform is not None and elem.text:
+            transform['content']['set_payload'] = elem.text.strip()
+
+    def _extract_set_variable(self, elem, component, owner, transform, debug):
+        """DataWeave variable assignment of the enclosing transform"""
+        if transform is not None and 'variableName' in elem.attrib and elem.text:
+            transform['content'][f"variable_{elem.attrib['variableName']}"] = elem.text.strip()
+
+    def _extract_logger(self, elem, component, owner, transform, debug):
+        if 'message' in elem.attrib:
+            component['content']['message'] = elem.attrib['message']
+
+    def _extract_flow_ref(self, elem, component, owner, transform, debug):
+        if 'name' in elem.attrib:
+            component['content']['target_flow'] = elem.attrib['name']
+
+    def _extract_when(self, elem, component, owner, transform, debug):
+        """Condition of the choice that owns this route"""
+        if owner is not None and owner['type'] == 'choice' and 'expression' in elem.attrib:
+            owner['content'].setdefault('conditions', []).append(elem.attrib['expression'])
+
     def extract_component_content(self, component: ET.Element) -> Dict:
         """
-        Simplified component content extractor focused on reliably extracting OData expressions.
-        This avoids complex XPath and focuses on direct text extraction.
+        Content of a single component element, using the same extractors as parse_flow.
+        parse_flow does not call this; it is kept for callers that parse one element.
         """
-        content = {}
-        
         try:
-            component_tag = component.tag
-            component_type = component_tag.split('}')[1] if '}' in component_tag else component_tag
-            
-            # Verbose debug for HTTP request components
-            if component_type == 'request':
-                logging.info(f"Found HTTP request component: {component_type}")
-                logging.info(f"Component attributes: {component.attrib}")
-                
-                # Debug all child elements
-                for child in component:
-                    child_tag = child.tag.split('}')[1] if '}' in child.tag else child.tag
-                    logging.info(f"Child element: {child_tag}")
-                    
-                    # Look for query-params in any child element
-                    if 'query-params' in child.tag:
-                        logging.info(f"Found query-params element")
-                        if child.text:
-                            logging.info(f"Query params text: {child.text[:100]}...")
-                            if child.text.strip():
-                                query_text = child.text.strip()
-                                # normalize any "\$" → "$" so our regexes see the real OData keys
-                                query_text = query_text.replace(r'\$', '$')
-                                content['query_params'] = query_text
-
-                                
-                                # Log the content for debugging
-                                logging.info(f"Looking for OData patterns in: {query_text[:100]}...")
-                                
-                                # Extract OData parameters using regex
-                                try:
-                                    import re
-                                    
-                                    # Log dollar sign presence
-                                    if '$' in query_text or '\\$' in query_text:
-                                        logging.info(f"Found $ symbol in query text, checking for OData params")
-                                    else:
-                                        logging.info("No $ symbol found in query text, OData parameters unlikely")
-                                    
-                                    # Try multiple patterns for $filter
-                                    if '\\$filter' in query_text or '$filter' in query_text:
-                                        logging.info(f"Found filter keyword in query text")
-                                        
-                                        # Try these patterns in sequence
-                                        filter_patterns = [
-                                            r'\$filter[^:]*:[^"\']*["\'](.*?)["\'"](?:,|})',  # Standard JSON pattern
-                                            r'\$filter[^:]*:[^"\']*["\'](.*?)(?:["\'"](?:,|})|(?:,|})|$)', # Alternative with possible unclosed quotes
-                                            r'[\\\$]filter["\']?\s*:\s*["\']([^"\']+)["\']', # Original pattern
-                                            r'\$filter\s*=\s*([^&]+)',  # URL parameter style
-                                            r'\$filter\s*:\s*([^,}]+)'  # Simple colon separator
-                                        ]
-                                        
-                                        filter_found = False
-                                        for i, pattern in enumerate(filter_patterns):
-                                            try:
-                                                filter_match = re.search(pattern, query_text, re.DOTALL)
-                                                if filter_match:
-                                                    filter_found = True
-                                                    content['odata_filter'] = filter_match.group(1).strip()
-                                                    logging.info(f"Extracted filter with pattern {i+1}: {content['odata_filter']}")
-                                                    break
-                                            except Exception as e:
-                                                logging.error(f"Error with filter pattern {i+1}: {e}")
-                                        
-                                        if not filter_found:
-                                            logging.info("Could not extract filter with any pattern")
-                                    
-                                    # Try multiple patterns for $select
-                                    if '\\$select' in query_text or '$select' in query_text:
-                                        logging.info(f"Found select keyword in query text")
-                                        
-                                        # Try these patterns in sequence
-                                        select_patterns = [
-                                            r'\$select[^:]*:[^"\']*["\'](.*?)["\'"](?:,|})',  # Standard JSON pattern
-                                            r'\$select[^:]*:[^"\']*["\'](.*?)(?:["\'"](?:,|})|(?:,|})|$)', # Alternative with possible unclosed quotes
-                                            r'[\\\$]select["\']?\s*:\s*["\']([^"\']+)["\']', # Original pattern
-                                            r'\$select\s*=\s*([^&]+)',  # URL parameter style
-                                            r'\$select\s*:\s*([^,}]+)'  # Simple colon separator
-                                        ]
-                                        
-                                        select_found = False
-                                        for i, pattern in enumerate(select_patterns):
-                                            try:
-                                                select_match = re.search(pattern, query_text, re.DOTALL)
-                                                if select_match:
-                                                    select_found = True
-                                                    content['odata_select'] = select_match.group(1).strip()
-                                                    logging.info(f"Extracted select with pattern {i+1}: {content['odata_select']}")
-                                                    break
-                                            except Exception as e:
-                                                logging.error(f"Error with select pattern {i+1}: {e}")
-                                        
-                                        if not select_found:
-                                            logging.info("Could not extract select with any pattern")
-                                    
-                                    # Combine OData parameters if found
-                                    odata_params = {}
-                                    if 'odata_filter' in content:
-                                        odata_params['$filter'] = content['odata_filter']
-                                    if 'odata_select' in content:
-                                        odata_params['$select'] = content['odata_select']
-                                    
-                                    if odata_params:
-                                        content['odata_params'] = odata_params
-                                        logging.info(f"Final OData params: {odata_params}")
-                                
-                                except Exception as e:
-                                    logging.error(f"Error processing OData parameters: {e}")
-                        else:
-                            logging.info("Query-params element has no text content")
-            
-            # Handle DataWeave transformations
-            if component_type == 'transform':
-                # Extract set-payload content
-                for elem in component.iter():
-                    if elem.tag.endswith('set-payload') and elem.text:
-                        content['set_payload'] = elem.text.strip()
-                    
-                    # Extract variable assignments
-                    if elem.tag.endswith('set-variable') and 'variableName' in elem.attrib and elem.text:
-                        var_name = elem.attrib['variableName']
-                        content[f'variable_{var_name}'] = elem.text.strip()
-            
-            # Handle logger messages
-            if component_type == 'logger' and 'message' in component.attrib:
-                content['message'] = component.attrib['message']
-            
-            # Handle flow references
-            if component_type == 'flow-ref' and 'name' in component.attrib:
-                content['target_flow'] = component.attrib['name']
-            
-            # Handle choice conditions
-            if component_type == 'choice':
-                conditions = []
-                for elem in component.iter():
-                    if elem.tag.endswith('when') and 'expression' in elem.attrib:
-                        conditions.append(elem.attrib['expression'])
-                
-                if conditions:
-                    content['conditions'] = conditions
-        
-        except Exception as e:
-            logging.error(f"Error extracting component content: {e}")
-        
-        return content
+            return self.parse_flow(component)['components'][0]['content']
+        except IndexError:
+            return {}
 
     def parse_config(self, config_elem: ET.Element) -> Dict:
         """Parse a configuration element."""
@@ -367,10 +362,15 @@ class MuleFlowParser:
 
     def get_component_color(self, component_type: str) -> str:
         """Get the color for a component type."""
-        for key, color in self.component_colors.items():
-            if key in component_type.lower():
-                return color
-        return '#9E9E9E'  # Default color
+        color = self._color_cache.get(component_type)
+        if color is None:
+            color = '#9E9E9E'  # Default color
+            for key, key_color in self.component_colors.items():
+                if key in component_type.lower():
+                    color = key_color
+                    break
+            self._color_cache[component_type] = color
+        return color
 
 class HTMLGenerator:
     def __init__(self):
@@ -0,0 +1,88 @@
+"""
+Mule Parser Benchmark
+Measure MuleFlowParser.parse_flow on deeply nested synthetic flows
+
+Each level nests a choice, try and foreach scope with a logger, an HTTP request
+with OData query parameters and a DataWeave transform, so the work per
+component should stay flat as the depth grows.
+Usage: python mule_parser_benchmark.py [--depths 10 50 200 800] [--width 2] [--runs 3]
+"""
+
+import sys
+import time
+import argparse
+import statistics
+import xml.etree.ElementTree as ET
+
+MULE = 'http://www.mulesoft.org/schema/mule/core'
+HTTP = 'http://www.mulesoft.org/schema/mule/http'
+EE = 'http://www.mulesoft.org/schema/mule/ee/core'
+
+def add_level_components(parent, level):
+    """A logger, an HTTP request and a transform, like a typical flow step"""
+    ET.SubElement(parent, f'{{{MULE}}}logger', message=f'level {level}', level='INFO')
+    request = ET.SubElement(parent, f'{{{HTTP}}}request', method='GET', path=f'/odata/Entity{level}')
+    params = ET.SubElement(request, f'{{{HTTP}}}query-params')
+    params.text = f'#[{{ "$filter": "Level eq {level}", "$select": "Id,Name" }}]'
+    transform = ET.SubElement(parent, f'{{{EE}}}transform')
+    message = ET.SubElement(transform, f'{{{EE}}}message')
+    payload = ET.SubElement(message, f'{{{EE}}}set-payload')
+    payload.text = '%dw 2.0\noutput application/json\n---\npayload'
+
+def build_flow(depth, width):
+    """
+    Synthetic flow nested depth levels deep; every level has width branches of
+    which the first one continues the nesting
+
+    Returns:
+        ET.Element: The flow element
+    """
+    flow = ET.Element(f'{{{MULE}}}flow', name=f'deep_flow_{depth}')
+    ET.SubElement(flow, f'{{{HTTP}}}listener', path='/deep')
+    current = flow
+    for level in range(depth):
+        add_level_components(current, level)
+        scope = ('choice', 'try', 'foreach')[level % 3]
+        scope_elem = ET.SubElement(current, f'{{{MULE}}}{scope}')
+        if scope == 'choice':
+            branches = [ET.SubElement(scope_elem, f'{{{MULE}}}when', expression=f'#[vars.level == {level}]')
+                        for _ in range(width)]
+            ET.SubElement(scope_elem, f'{{{MULE}}}otherwise')
+        else:
+            branches = [scope_elem] + [ET.SubElement(current, f'{{{MULE}}}{scope}') for _ in range(width - 1)]
+        for branch in branches[1:]:
+            add_level_components(branch, level)
+        current = branches[0]
+    return flow
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark MuleFlowParser.parse_flow on deep flows')
+    parser.add_argument('--depths', type=int, nargs='+', default=[10, 50, 200, 800], help='Nesting depths to test')
+    parser.add_argument('--width', type=int, default=2, help='Branches per nesting level')
+    parser.add_argument('--runs', type=int, default=3, help='Runs per depth (median is reported)')
+    args = parser.parse_args()
+
+    from mule_flow_documentation import MuleFlowParser
+    flow_parser = MuleFlowParser()
+
+    print("🚀 MuleFlowParser.parse_flow benchmark")
+    print("-" * 60)
+    print(f"{'depth':>6} {'elements':>9} {'components':>11} {'median':>10} {'per component':>14}")
+
+    for depth in args.depths:
+        flow = build_flow(depth, args.width)
+        elements = sum(1 for _ in flow.iter())
+        durations = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            result = flow_parser.parse_flow(flow)
+            durations.append(time.perf_counter() - start)
+        seconds = statistics.median(durations)
+        components = len(result['components'])
+        print(f"{depth:>6} {elements:>9} {components:>11} {seconds * 1000:>8.1f}ms "
+              f"{seconds / components * 1e6:>11.1f}µs")
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
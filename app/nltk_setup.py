@@ -1,15 +1,67 @@
-import nltk
+"""
+NLTK data setup.
+
+verify_nltk_data() registers the bundled nltk_data directory and checks that the
+required resources are present without network access. Missing resources are
+only downloaded when NLTK_DOWNLOAD_MISSING=true or when this file is run as a
+script (setup_nltk.bat).
+"""
+
 import os
+import logging
+
+logger = logging.getLogger(__name__)
 
-# Create a directory for NLTK data
+# Directory for NLTK data shipped with the app
 nltk_data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nltk_data')
-os.makedirs(nltk_data_dir, exist_ok=True)
 
-# Set NLTK data path
-nltk.data.path.append(nltk_data_dir)
+# Package name -> resource path checked with nltk.data.find
+REQUIRED_RESOURCES = {
+    'punkt': 'tokenizers/punkt',
+    'stopwords': 'corpora/stopwords'
+}
+
+def verify_nltk_data(download=None):
+    """
+    Check that the required NLTK resources can be loaded locally
+
+    Args:
+        download (bool): Download missing resources. Defaults to the
+            NLTK_DOWNLOAD_MISSING environment variable (off).
+
+    Returns:
+        list: Names of resources that are still missing
+    """
+    import nltk
+
+    if nltk_data_dir not in nltk.data.path:
+        nltk.data.path.append(nltk_data_dir)
+
+    if download is None:
+        download = os.getenv('NLTK_DOWNLOAD_MISSING', 'false').lower() == 'true'
+
+    missing = []
+    for package, resource in REQUIRED_RESOURCES.items():
+        try:
+            nltk.data.find(resource)
+            continue
+        except LookupError:
+            pass
+
+        if download:
+            logger.info(f"Downloading NLTK resource {package} to {nltk_data_dir}")
+            os.makedirs(nltk_data_dir, exist_ok=True)
+            if nltk.download(package, download_dir=nltk_data_dir, quiet=True):
+                continue
+        missing.append(package)
+
+    if missing:
+        logger.warning(f"NLTK resources not available offline: {', '.join(missing)}. "
+                       f"Run nltk_setup.py or set NLTK_DOWNLOAD_MISSING=true.")
+    return missing
 
-# Download required NLTK data
-print("Downloading NLTK data...")
-nltk.download('punkt', download_dir=nltk_data_dir)
-nltk.download('stopwords', download_dir=nltk_data_dir)
-print("NLTK data download complete.")
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    print("Setting up NLTK data...")
+    missing = verify_nltk_data(download=True)
+    print("NLTK data setup complete." if not missing else f"Could not download: {', '.join(missing)}")
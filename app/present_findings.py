@@ -1,14 +1,18 @@
 import json
 import os
 import datetime
+import threading
 from tabulate import tabulate
-# Set matplotlib backend to Agg (non-interactive) to avoid Tkinter issues
-import matplotlib
-matplotlib.use('Agg')  # This must be done before importing pyplot
-import matplotlib.pyplot as plt
-import numpy as np
 from termcolor import colored
 
+# Charts rendered for every iFlow match job, in display order
+CHART_NAMES = ['top_matches', 'score_breakdown', 'quality_distribution']
+CHART_SPECS_FILENAME = 'chart_specs.json'
+
+# One lock per chart file so concurrent requests render it only once
+_render_locks = {}
+_render_locks_guard = threading.Lock()
+
 class ResultsPresenter:
     """
     Present the search results and recommendations in a useful format
@@ -517,101 +521,67 @@ class ResultsPresenter:
 
         return output_path
 
-    def create_charts(self, output_dir="charts"):
+    def build_chart_specs(self):
         """
-        Create visualization charts for the results
+        Build renderer-independent chart specifications for the results
 
-        Args:
-            output_dir (str): Directory to save the charts
+        The specs are plain JSON data, so they can be rendered lazily on the
+        server with render_chart() or handed to a client-side chart library.
 
         Returns:
-            list: List of paths to generated chart files
+            dict: Chart specifications keyed by chart name
         """
         if not self.scored_results:
-            return []
-
-        # Create output directory if it doesn't exist
-        os.makedirs(output_dir, exist_ok=True)
+            return {}
 
-        chart_files = []
+        def quality_color(score):
+            if score >= self.high_quality_threshold:
+                return 'green'
+            elif score >= self.medium_quality_threshold:
+                return 'orange'
+            return 'red'
 
         # 1. Top matches bar chart
-        plt.figure(figsize=(12, 6))
-
-        # Get top 10 results
         top_results = self.scored_results[:10]
         names = [result.get('Name', '')[:20] + '...' if len(result.get('Name', '')) > 20 else result.get('Name', '') for result in top_results]
         scores = [result.get('_scores', {}).get('combined_score', 0) for result in top_results]
 
-        # Create bars
-        bars = plt.bar(names, scores, color='skyblue')
-
-        # Color bars based on score
-        for i, bar in enumerate(bars):
-            if scores[i] >= self.high_quality_threshold:
-                bar.set_color('green')
-            elif scores[i] >= self.medium_quality_threshold:
-                bar.set_color('orange')
-            else:
-                bar.set_color('red')
-
-        plt.xlabel('Integration Content')
-        plt.ylabel('Match Score')
-        plt.title('Top 10 Integration Matches')
-        plt.xticks(rotation=45, ha='right')
-        plt.tight_layout()
-
-        # Save chart
-        chart_path = os.path.join(output_dir, 'top_matches.png')
-        plt.savefig(chart_path)
-        plt.close()
-        chart_files.append(chart_path)
+        top_matches = {
+            "type": "bar",
+            "title": "Top 10 Integration Matches",
+            "xlabel": "Integration Content",
+            "ylabel": "Match Score",
+            "figsize": [12, 6],
+            "labels": names,
+            "series": [
+                {"label": "Match Score", "values": scores, "colors": [quality_color(score) for score in scores]}
+            ]
+        }
 
         # 2. Score breakdown for top 5 matches
-        plt.figure(figsize=(12, 8))
-
-        # Get top 5 results
         top_5_results = self.scored_results[:5]
         names = [result.get('Name', '')[:15] + '...' if len(result.get('Name', '')) > 15 else result.get('Name', '') for result in top_5_results]
 
-        # Get score components
-        term_match_scores = [result.get('_scores', {}).get('term_match', 0) for result in top_5_results]
-        endpoint_match_scores = [result.get('_scores', {}).get('endpoint_match', 0) for result in top_5_results]
-        content_similarity_scores = [result.get('_scores', {}).get('content_similarity', 0) * 20 for result in top_5_results]  # Scale for visibility
-        search_priority_scores = [result.get('_scores', {}).get('search_priority', 0) for result in top_5_results]
-
-        # Set bar width
-        bar_width = 0.2
-
-        # Set positions
-        r1 = np.arange(len(names))
-        r2 = [x + bar_width for x in r1]
-        r3 = [x + bar_width for x in r2]
-        r4 = [x + bar_width for x in r3]
-
-        # Create grouped bars
-        plt.bar(r1, term_match_scores, width=bar_width, label='Term Match', color='royalblue')
-        plt.bar(r2, endpoint_match_scores, width=bar_width, label='Endpoint Match', color='seagreen')
-        plt.bar(r3, content_similarity_scores, width=bar_width, label='Content Similarity (x20)', color='gold')
-        plt.bar(r4, search_priority_scores, width=bar_width, label='Search Priority', color='gray')
-
-        plt.xlabel('Integration Content')
-        plt.ylabel('Score Component Value')
-        plt.title('Score Breakdown for Top 5')
-        plt.xticks([r + bar_width * 1.5 for r in range(len(names))], names, rotation=45, ha='right')
-        plt.legend()
-        plt.tight_layout()
-
-        # Save chart
-        chart_path = os.path.join(output_dir, 'score_breakdown.png')
-        plt.savefig(chart_path)
-        plt.close()
-        chart_files.append(chart_path)
+        score_breakdown = {
+            "type": "grouped_bar",
+            "title": "Score Breakdown for Top 5",
+            "xlabel": "Integration Content",
+            "ylabel": "Score Component Value",
+            "figsize": [12, 8],
+            "labels": names,
+            "series": [
+                {"label": "Term Match", "color": "royalblue",
+                 "values": [result.get('_scores', {}).get('term_match', 0) for result in top_5_results]},
+                {"label": "Endpoint Match", "color": "seagreen",
+                 "values": [result.get('_scores', {}).get('endpoint_match', 0) for result in top_5_results]},
+                {"label": "Content Similarity (x20)", "color": "gold",  # Scale for visibility
+                 "values": [result.get('_scores', {}).get('content_similarity', 0) * 20 for result in top_5_results]},
+                {"label": "Search Priority", "color": "gray",
+                 "values": [result.get('_scores', {}).get('search_priority', 0) for result in top_5_results]}
+            ]
+        }
 
         # 3. Quality distribution pie chart
-        plt.figure(figsize=(8, 8))
-
-        # Count results by quality
         high_quality = 0
         medium_quality = 0
         low_quality = 0
@@ -625,20 +595,176 @@ class ResultsPresenter:
             else:
                 low_quality += 1
 
-        # Create pie chart
-        labels = ['High Quality', 'Medium Quality', 'Low Quality']
-        sizes = [high_quality, medium_quality, low_quality]
-        colors = ['green', 'orange', 'red']
-        explode = (0.1, 0, 0)  # Explode high quality slice
+        quality_distribution = {
+            "type": "pie",
+            "title": "Quality Distribution of Matches",
+            "figsize": [8, 8],
+            "labels": ['High Quality', 'Medium Quality', 'Low Quality'],
+            "series": [
+                {"label": "Matches", "values": [high_quality, medium_quality, low_quality],
+                 "colors": ['green', 'orange', 'red'], "explode": [0.1, 0, 0]}
+            ]
+        }
+
+        return {
+            "top_matches": top_matches,
+            "score_breakdown": score_breakdown,
+            "quality_distribution": quality_distribution
+        }
+
+    def save_chart_specs(self, output_dir="charts"):
+        """
+        Save chart specifications as JSON for lazy rendering
+
+        Args:
+            output_dir (str): Directory to save the chart specifications
+
+        Returns:
+            str: Path to the chart specifications file, or None if there are no results
+        """
+        specs = self.build_chart_specs()
+        if not specs:
+            return None
+
+        os.makedirs(output_dir, exist_ok=True)
+        specs_path = os.path.join(output_dir, CHART_SPECS_FILENAME)
+        with open(specs_path, 'w', encoding='utf-8') as f:
+            json.dump(specs, f, indent=2)
+
+        return specs_path
+
+    def create_charts(self, output_dir="charts"):
+        """
+        Create visualization charts for the results
+
+        Args:
+            output_dir (str): Directory to save the charts
 
-        plt.pie(sizes, explode=explode, labels=labels, colors=colors, autopct='%1.1f%%', shadow=True, startangle=140)
-        plt.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle
-        plt.title('Quality Distribution of Matches')
+        Returns:
+            list: List of paths to generated chart files
+        """
+        specs = self.build_chart_specs()
+        if not specs:
+            return []
+
+        # Create output directory if it doesn't exist
+        os.makedirs(output_dir, exist_ok=True)
 
-        # Save chart
-        chart_path = os.path.join(output_dir, 'quality_distribution.png')
-        plt.savefig(chart_path)
-        plt.close()
-        chart_files.append(chart_path)
+        chart_files = []
+        for chart_name in CHART_NAMES:
+            chart_path = os.path.join(output_dir, f'{chart_name}.png')
+            render_chart(specs[chart_name], chart_path)
+            chart_files.append(chart_path)
 
         return chart_files
+
+
+def render_chart(spec, output_path):
+    """
+    Render a chart specification to a PNG file
+
+    Uses the object-oriented Figure API with an Agg canvas instead of the
+    global pyplot state machine, so it is safe to call from request threads.
+
+    Args:
+        spec (dict): Chart specification from ResultsPresenter.build_chart_specs()
+        output_path (str): Path to save the PNG file
+
+    Returns:
+        str: Path to the rendered chart
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=tuple(spec.get("figsize", [12, 6])))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+
+    labels = spec.get("labels", [])
+    series = spec.get("series", [])
+
+    if spec["type"] == "bar":
+        data = series[0]
+        ax.bar(labels, data["values"], color=data.get("colors", 'skyblue'))
+        ax.tick_params(axis='x', labelrotation=45)
+        for label in ax.get_xticklabels():
+            label.set_horizontalalignment('right')
+
+    elif spec["type"] == "grouped_bar":
+        bar_width = 0.2
+        positions = list(range(len(labels)))
+        for index, data in enumerate(series):
+            ax.bar([x + bar_width * index for x in positions], data["values"],
+                   width=bar_width, label=data["label"], color=data.get("color"))
+        ax.set_xticks([x + bar_width * (len(series) - 1) / 2 for x in positions])
+        ax.set_xticklabels(labels, rotation=45, ha='right')
+        ax.legend()
+
+    elif spec["type"] == "pie":
+        data = series[0]
+        ax.pie(data["values"], explode=data.get("explode"), labels=labels, colors=data.get("colors"),
+               autopct='%1.1f%%', shadow=True, startangle=140)
+        ax.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle
+
+    else:
+        raise ValueError(f"Unsupported chart type: {spec['type']}")
+
+    if spec.get("xlabel"):
+        ax.set_xlabel(spec["xlabel"])
+    if spec.get("ylabel"):
+        ax.set_ylabel(spec["ylabel"])
+    ax.set_title(spec.get("title", ""))
+
+    fig.tight_layout()
+    fig.savefig(output_path)
+
+    return output_path
+
+
+def get_or_render_chart(charts_dir, chart_name):
+    """
+    Return the path to a rendered chart, rendering it from the saved specs on first request
+
+    Args:
+        charts_dir (str): Directory containing chart_specs.json for the job
+        chart_name (str): Chart file name, e.g. "top_matches.png"
+
+    Returns:
+        str: Path to the PNG file, or None if the chart is unknown
+    """
+    chart_path = os.path.join(charts_dir, chart_name)
+    if os.path.exists(chart_path):
+        return chart_path
+
+    base_name, extension = os.path.splitext(chart_name)
+    if extension.lower() != '.png' or base_name not in CHART_NAMES:
+        return None
+
+    specs_path = os.path.join(charts_dir, CHART_SPECS_FILENAME)
+    if not os.path.exists(specs_path):
+        return None
+
+    with _render_locks_guard:
+        lock = _render_locks.setdefault(chart_path, threading.Lock())
+
+    with lock:
+        # Another request may have rendered it while we waited
+        if os.path.exists(chart_path):
+            return chart_path
+
+        with open(specs_path, 'r', encoding='utf-8') as f:
+            specs = json.load(f)
+
+        spec = specs.get(base_name)
+        if not spec:
+            return None
+
+        # Render to a temporary file so readers never see a partial PNG
+        temp_path = chart_path + '.tmp.png'
+        render_chart(spec, temp_path)
+        os.replace(temp_path, chart_path)
+
+    with _render_locks_guard:
+        _render_locks.pop(chart_path, None)
+
+    return chart_path
@@ -6,19 +6,31 @@ from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
 
+# English stopwords, loaded once on first use
+_STOP_WORDS = None
+
+def get_stop_words():
+    """Return the cached set of English stopwords"""
+    global _STOP_WORDS
+    if _STOP_WORDS is None:
+        _STOP_WORDS = set(stopwords.words('english'))
+    return _STOP_WORDS
+
 class ContentSimilarityScorer:
     """
     Score and rank integration content based on similarity to Mulesoft implementation
     """
     
-    def __init__(self, extracted_terms):
+    def __init__(self, extracted_terms, preprocess_cache=None):
         """
         Initialize with extracted terms from Mulesoft documentation
         
         Args:
             extracted_terms (dict): Dictionary with categorized terms from Mulesoft documentation
+            preprocess_cache (dict, optional): Shared cache of preprocessed catalog text keyed by item ID
         """
         self.extracted_terms = extracted_terms
+        self.preprocess_cache = preprocess_cache if preprocess_cache is not None else {}
         
         # Combine all relevant terms for matching
         self.all_terms = []
@@ -52,7 +64,7 @@ class ContentSimilarityScorer:
         tokens = word_tokenize(text)
         
         # Remove stopwords
-        stop_words = set(stopwords.words('english'))
+        stop_words = get_stop_words()
         filtered_tokens = [word for word in tokens if word.isalnum() and word not in stop_words]
         
         return ' '.join(filtered_tokens)
@@ -149,10 +161,14 @@ class ContentSimilarityScorer:
         
         # Add content items to corpus
         for item in items:
-            name = item.get('Name', '')
-            description = item.get('Description', '')
-            text = f"{name} {description}"
-            preprocessed = self.preprocess_text(text)
+            item_id = item.get('Id')
+            preprocessed = self.preprocess_cache.get(item_id) if item_id else None
+            if preprocessed is None:
+                name = item.get('Name', '')
+                description = item.get('Description', '')
+                preprocessed = self.preprocess_text(f"{name} {description}")
+                if item_id:
+                    self.preprocess_cache[item_id] = preprocessed
             corpus.append(preprocessed)
         
         # Create and fit TF-IDF vectorizer
@@ -1,3 +1,4 @@
+import os
 import requests
 import json
 import time
@@ -5,6 +6,9 @@ import re
 import base64
 from collections import defaultdict
 
+# Seconds to wait for a GitHub API response, so a slow or blocked GitHub cannot hang a catalog scan
+GITHUB_REQUEST_TIMEOUT = float(os.getenv('GITHUB_REQUEST_TIMEOUT_SECONDS', '15'))
+
 class SAPDiscoverySearcher:
     """
     Class to search for SAP integration content using GitHub API
@@ -43,7 +47,7 @@ class SAPDiscoverySearcher:
             list: Directory contents
         """
         url = f"https://api.github.com/repos/{self.repo_owner}/{self.repo_name}/contents/{path}"
-        response = requests.get(url, headers=self.headers)
+        response = requests.get(url, headers=self.headers, timeout=GITHUB_REQUEST_TIMEOUT)
         
         if response.status_code == 200:
             return response.json()
@@ -62,7 +66,7 @@ class SAPDiscoverySearcher:
             str: File content
         """
         url = f"https://api.github.com/repos/{self.repo_owner}/{self.repo_name}/contents/{path}"
-        response = requests.get(url, headers=self.headers)
+        response = requests.get(url, headers=self.headers, timeout=GITHUB_REQUEST_TIMEOUT)
         
         if response.status_code == 200:
             content_data = response.json()
@@ -0,0 +1,116 @@
+"""
+Startup Benchmark
+Measure how long the Main API takes to import, and which modules cost the most
+
+Each measurement runs in a fresh interpreter so nothing is cached between runs.
+Usage: python startup_benchmark.py [--runs 3] [--top 15]
+"""
+
+import os
+import re
+import sys
+import argparse
+import statistics
+import subprocess
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Heavy dependencies that should no longer be imported at startup
+HEAVY_MODULES = [
+    'nltk', 'sklearn', 'matplotlib', 'anthropic', 'openai', 'pdfplumber', 'docx',
+    'markdown', 'bs4', 'iflow_matcher', 'document_processor', 'mule_flow_documentation',
+    'boomi_flow_documentation', 'md_to_html_with_mermaid', 'documentation_enhancer'
+]
+
+def run_python(code, env_overrides=None, extra_args=None):
+    """Run code in a fresh interpreter in the app directory"""
+    env = dict(os.environ, STARTUP_WARMUP='false', RETENTION_ENABLED='false', **(env_overrides or {}))
+    return subprocess.run(
+        [sys.executable] + (extra_args or []) + ['-c', code],
+        cwd=APP_DIR, env=env, capture_output=True, text=True
+    )
+
+def measure_app_import():
+    """
+    Import the app once
+
+    Returns:
+        tuple: (seconds, heavy modules loaded at import) or (None, error output)
+    """
+    code = (
+        "import time, sys\n"
+        "start = time.perf_counter()\n"
+        "import app\n"
+        "print('SECONDS', time.perf_counter() - start)\n"
+        f"print('LOADED', ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    result = run_python(code)
+    seconds = re.search(r'^SECONDS (\S+)$', result.stdout, re.MULTILINE)
+    if result.returncode != 0 or not seconds:
+        return None, result.stderr.strip().splitlines()[-1:] or ['import failed']
+    loaded = re.search(r'^LOADED (.*)$', result.stdout, re.MULTILINE).group(1)
+    return float(seconds.group(1)), [name for name in loaded.split(',') if name]
+
+def import_time_breakdown(top):
+    """
+    Per-module import cost of the app, from python -X importtime
+
+    Returns:
+        list: (cumulative seconds, module) for the slowest top-level imports
+    """
+    result = run_python('import app', extra_args=['-X', 'importtime'])
+    timings = []
+    for line in result.stderr.splitlines():
+        match = re.match(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)', line)
+        # The app and the modules it imports directly (first two nesting levels)
+        if match and len(match.group(3)) <= 3:
+            timings.append((int(match.group(2)) / 1e6, match.group(4)))
+    return sorted(timings, reverse=True)[:top]
+
+def measure_module(module_name):
+    """Import time of one module on its own, or None if it cannot be imported"""
+    code = f"import time\nstart = time.perf_counter()\nimport {module_name}\nprint(time.perf_counter() - start)"
+    result = run_python(code)
+    if result.returncode != 0:
+        return None
+    return float(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Main API startup time')
+    parser.add_argument('--runs', type=int, default=3, help='Fresh-interpreter imports of the app to average')
+    parser.add_argument('--top', type=int, default=15, help='Slowest imports to list')
+    args = parser.parse_args()
+
+    print("🚀 Main API startup benchmark")
+    print("-" * 60)
+
+    durations = []
+    loaded = []
+    for run in range(args.runs):
+        seconds, loaded = measure_app_import()
+        if seconds is None:
+            print(f"❌ Importing app failed: {' '.join(loaded)}")
+            return 1
+        durations.append(seconds)
+        print(f"Run {run + 1}: {seconds:.3f}s")
+
+    print(f"\nImport app: median {statistics.median(durations):.3f}s, "
+          f"min {min(durations):.3f}s, max {max(durations):.3f}s")
+    if loaded:
+        print(f"⚠️ Heavy modules loaded at startup: {', '.join(loaded)}")
+    else:
+        print("✅ No heavy modules loaded at startup")
+
+    print(f"\nSlowest imports at startup (python -X importtime, top {args.top}):")
+    for seconds, module_name in import_time_breakdown(args.top):
+        print(f"  {seconds:8.3f}s  {module_name}")
+
+    print("\nDeferred modules (loaded on first use or by the warm-up thread):")
+    for module_name in HEAVY_MODULES:
+        seconds = measure_module(module_name)
+        print(f"  {module_name:28s} {'not installed' if seconds is None else f'{seconds:.3f}s'}")
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
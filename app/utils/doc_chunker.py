@@ -0,0 +1,204 @@
+# doc_chunker.py - Section-aware splitting and ordered map/merge for large documents
+
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Markdown headings, and numbered headings such as "2.1 Error Handling" in extracted Word/PDF text
+HEADING_PATTERN = re.compile(r'^(#{1,6}\s+\S|\d+(\.\d+)*\.?\s+[A-Z]\S*)')
+TABLE_LINE_PATTERN = re.compile(r'^\s*\|| \| ')
+
+def _split_blocks(text):
+    """
+    Split text into blocks at blank lines, keeping code fences and tables whole
+
+    Returns:
+        list: (block text, starts with a heading)
+    """
+    blocks = []
+    current = []
+    in_fence = False
+    in_table = False
+
+    def close():
+        if current:
+            block = '\n'.join(current)
+            blocks.append((block, bool(HEADING_PATTERN.match(current[0])) and len(current[0]) < 120))
+            current.clear()
+
+    for line in text.split('\n'):
+        if line.strip().startswith('```'):
+            if not in_fence:
+                close()
+            in_fence = not in_fence
+            current.append(line)
+            if not in_fence:
+                close()
+            continue
+        if in_fence:
+            current.append(line)
+            continue
+
+        is_table = bool(TABLE_LINE_PATTERN.search(line))
+        if in_table and not is_table:
+            close()
+        in_table = is_table
+
+        if not line.strip():
+            if not in_table:
+                close()
+            continue
+        if HEADING_PATTERN.match(line) and current and not in_table:
+            close()
+        current.append(line)
+
+    close()
+    return blocks
+
+def _split_long_line(line, max_chars):
+    """Cut a line longer than max_chars at the last space that leaves a piece at least half full, else hard"""
+    pieces = []
+    while len(line) > max_chars:
+        cut = line.rfind(' ', max_chars // 2, max_chars)
+        cut = cut + 1 if cut > 0 else max_chars
+        pieces.append(line[:cut])
+        line = line[cut:]
+    pieces.append(line)
+    return pieces
+
+def split_sections(text, max_chars):
+    """
+    Split a document into chunks of at most max_chars, preferring section boundaries
+
+    Chunks end before a heading once they are at least half full. Tables and code
+    fences are never split; a single block larger than max_chars is cut at line
+    boundaries, and lines longer than max_chars (e.g. in extracted PDF text) are
+    cut at word boundaries.
+
+    Args:
+        text (str): Document text (markdown or text extracted from Word/PDF)
+        max_chars (int): Target maximum chunk size
+
+    Returns:
+        list: Chunks in document order
+    """
+    if len(text) <= max_chars:
+        return [text]
+
+    chunks = []
+    current = []
+    size = 0
+
+    def flush():
+        nonlocal size
+        if current:
+            chunks.append('\n\n'.join(current))
+            current.clear()
+            size = 0
+
+    for block, is_heading in _split_blocks(text):
+        if is_heading and size >= max_chars // 2:
+            flush()
+        if size and size + len(block) + 2 > max_chars:
+            flush()
+
+        if len(block) > max_chars:
+            # Oversized block: cut at line boundaries
+            piece = []
+            piece_size = 0
+            lines = (part for line in block.split('\n') for part in _split_long_line(line, max_chars - 1))
+            for line in lines:
+                if piece and piece_size + len(line) + 1 > max_chars:
+                    chunks.append('\n'.join(piece))
+                    piece, piece_size = [], 0
+                piece.append(line)
+                piece_size += len(line) + 1
+            if piece:
+                current.append('\n'.join(piece))
+                size = piece_size
+            continue
+
+        current.append(block)
+        size += len(block) + 2
+
+    flush()
+    return chunks
+
+def map_chunks(chunks, convert, max_workers=4):
+    """
+    Convert chunks in parallel and return the results in chunk order
+
+    Args:
+        chunks (list): Chunk texts
+        convert (callable): convert(index, chunk) -> converted text or None
+        max_workers (int): Maximum concurrent conversions
+
+    Returns:
+        list: Converted text per chunk (None where the conversion failed)
+    """
+    def run(item):
+        index, chunk = item
+        try:
+            return convert(index, chunk)
+        except Exception as e:
+            logger.warning(f"Conversion of chunk {index + 1}/{len(chunks)} failed: {str(e)}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as executor:
+        return list(executor.map(run, enumerate(chunks)))
+
+def _strip_markdown_fence(text):
+    text = text.strip()
+    match = re.match(r'^```(?:markdown|md)?\s*\n(.*)\n```$', text, re.DOTALL)
+    return match.group(1).strip() if match else text
+
+def merge_markdown(parts, title=None):
+    """
+    Deterministically merge converted chunks into one markdown document
+
+    Wrapping ```markdown fences are removed, only the first level-1 heading is kept
+    (later ones become level 2), and a heading repeated at the start of the next
+    part (a section continued across a chunk boundary) is dropped.
+
+    Args:
+        parts (list): Converted markdown per chunk, in order
+        title (str): Optional document title emitted as the level-1 heading
+
+    Returns:
+        str: Merged markdown
+    """
+    output = []
+    seen_title = False
+    if title:
+        output.append(f"# {title}")
+        seen_title = True
+
+    last_heading = None
+    for part in parts:
+        if not part:
+            continue
+        lines = _strip_markdown_fence(part).split('\n')
+
+        # Skip a heading that repeats the last one (section continued across the boundary)
+        first = next((i for i, line in enumerate(lines) if line.strip()), None)
+        if first is not None and lines[first].strip() == last_heading:
+            lines = lines[first + 1:]
+
+        in_fence = False
+        for i, line in enumerate(lines):
+            if line.strip().startswith('```'):
+                in_fence = not in_fence
+            if in_fence:
+                continue
+            if line.startswith('# '):
+                if seen_title:
+                    lines[i] = '#' + line
+                seen_title = True
+            if line.startswith('#'):
+                last_heading = lines[i].strip()
+
+        output.append('\n'.join(lines).strip())
+
+    return '\n\n'.join(block for block in output if block) + '\n'
@@ -0,0 +1,237 @@
+# job_store.py - Job state shared by all worker processes of a service
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from collections.abc import MutableMapping
+
+logger = logging.getLogger(__name__)
+
+class JobRecord(dict):
+    """
+    A job returned by SharedJobStore
+
+    Setting or removing a top-level field writes it through to the store, so
+    existing code such as jobs[job_id].update({...}) or
+    jobs[job_id]['status'] = 'completed' keeps working across processes.
+    Changes inside nested values must be re-assigned to be stored.
+    """
+
+    def __init__(self, store, job_id, data):
+        super().__init__(data)
+        self._store = store
+        self._job_id = job_id
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._store.update_fields(self._job_id, {key: value})
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._store.remove_fields(self._job_id, [key])
+
+    def update(self, *args, **kwargs):
+        fields = dict(*args, **kwargs)
+        super().update(fields)
+        self._store.update_fields(self._job_id, fields)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return super().__getitem__(key)
+
+    def pop(self, key, *default):
+        present = key in self
+        value = super().pop(key, *default)
+        if present:
+            self._store.remove_fields(self._job_id, [key])
+        return value
+
+class SharedJobStore(MutableMapping):
+    """
+    Dict-like job storage in SQLite, shared by the worker processes of one instance
+
+    Each field update is a short read-merge-write transaction, so workers
+    updating different fields of the same job do not overwrite each other.
+    Every change also bumps a per-job version that long-poll readers in any
+    worker can wait on.
+    """
+
+    def __init__(self, path, timeout=30):
+        """
+        Args:
+            path (str): SQLite database file
+            timeout (float): Seconds to wait for a lock held by another process
+        """
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connection()
+        conn.execute("CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, data TEXT NOT NULL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS job_versions (id TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+
+    def _connection(self):
+        """One connection per thread and process; connections are never inherited across fork"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _modify(self, job_id, change):
+        """Apply change(data) to a stored job inside a write transaction"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is not None:
+                data = json.loads(row[0])
+                change(data)
+                conn.execute("UPDATE jobs SET data = ? WHERE id = ?", (json.dumps(data), job_id))
+            self._bump(conn, job_id)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _bump(self, conn, job_id):
+        conn.execute(
+            "INSERT INTO job_versions (id, version) VALUES (?, 1) "
+            "ON CONFLICT(id) DO UPDATE SET version = version + 1",
+            (job_id,)
+        )
+
+    # ==========================================
+    # MAPPING INTERFACE
+    # ==========================================
+
+    def __getitem__(self, job_id):
+        row = self._connection().execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            raise KeyError(job_id)
+        return JobRecord(self, job_id, json.loads(row[0]))
+
+    def __setitem__(self, job_id, data):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("INSERT OR REPLACE INTO jobs (id, data) VALUES (?, ?)", (job_id, json.dumps(dict(data))))
+            self._bump(conn, job_id)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def __delitem__(self, job_id):
+        cursor = self._connection().execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        if cursor.rowcount == 0:
+            raise KeyError(job_id)
+
+    def __contains__(self, job_id):
+        return self._connection().execute("SELECT 1 FROM jobs WHERE id = ?", (job_id,)).fetchone() is not None
+
+    def __iter__(self):
+        rows = self._connection().execute("SELECT id FROM jobs").fetchall()
+        return iter([row[0] for row in rows])
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def items(self):
+        """All jobs in one query"""
+        rows = self._connection().execute("SELECT id, data FROM jobs").fetchall()
+        return [(job_id, JobRecord(self, job_id, json.loads(data))) for job_id, data in rows]
+
+    def values(self):
+        return [job for _, job in self.items()]
+
+    # ==========================================
+    # FIELD UPDATES AND VERSIONS
+    # ==========================================
+
+    def update_fields(self, job_id, fields):
+        """Merge fields into a stored job"""
+        self._modify(job_id, lambda data: data.update(fields))
+
+    def remove_fields(self, job_id, keys):
+        """Remove fields from a stored job"""
+        def remove(data):
+            for key in keys:
+                data.pop(key, None)
+        self._modify(job_id, remove)
+
+    def bump_version(self, job_id):
+        """Mark a job as changed; returns its new version"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._bump(conn, job_id)
+            version = conn.execute("SELECT version FROM job_versions WHERE id = ?", (job_id,)).fetchone()[0]
+            conn.execute("COMMIT")
+            return version
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def version(self, job_id):
+        """Current version of a job (0 if it never changed)"""
+        row = self._connection().execute("SELECT version FROM job_versions WHERE id = ?", (job_id,)).fetchone()
+        return row[0] if row else 0
+
+    def import_jobs(self, jobs_dict):
+        """Add jobs that are not stored yet (e.g. from jobs.json); returns how many were added"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO jobs (id, data) VALUES (?, ?)",
+                [(job_id, json.dumps(data)) for job_id, data in jobs_dict.items()]
+            )
+            added = conn.total_changes - before
+            conn.execute("COMMIT")
+            return added
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+def shared_store_enabled():
+    """True when JOB_STORE selects the shared SQLite store"""
+    return os.getenv('JOB_STORE', 'memory').lower() == 'sqlite'
+
+def job_store_path(jobs_file):
+    """SQLite file for a JSON state file: same name, in JOB_STORE_DIR or next to it"""
+    name = os.path.splitext(os.path.basename(jobs_file))[0] + '.sqlite3'
+    return os.path.join(os.getenv('JOB_STORE_DIR', os.path.dirname(os.path.abspath(jobs_file))), name)
+
+def open_job_store(jobs_file, load_jobs):
+    """
+    Open the job storage selected by JOB_STORE
+
+    'memory' (default) returns the plain dict from load_jobs(), persisted to
+    jobs.json by the service. 'sqlite' returns a SharedJobStore (see
+    job_store_path), seeded from jobs.json, for running several worker
+    processes.
+
+    Args:
+        jobs_file (str): Path of the service's JSON state file (e.g. jobs.json)
+        load_jobs (callable): Loads the JSON state file into a dict
+
+    Returns:
+        dict or SharedJobStore: Job storage
+    """
+    if not shared_store_enabled():
+        return load_jobs()
+
+    path = job_store_path(jobs_file)
+    store = SharedJobStore(path)
+    added = store.import_jobs(load_jobs())
+    logger.info(f"Using shared job store {path} ({len(store)} jobs, {added} imported from {os.path.basename(jobs_file)})")
+    return store
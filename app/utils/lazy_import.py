@@ -0,0 +1,107 @@
+# lazy_import.py - Deferred imports, background warm-up and per-import startup timings
+
+import importlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Seconds spent importing each module, in import order
+import_timings = {}
+_timings_lock = threading.Lock()
+_import_lock = threading.RLock()
+
+def timed_import(module_name):
+    """
+    Import a module and record how long the first import took
+
+    Returns:
+        module: The imported module
+    """
+    start = time.perf_counter()
+    with _import_lock:
+        module = importlib.import_module(module_name)
+    elapsed = time.perf_counter() - start
+
+    with _timings_lock:
+        # Later imports of a loaded module are free; keep the cost of the first one
+        if module_name not in import_timings:
+            import_timings[module_name] = round(elapsed, 4)
+            if elapsed > 0.5:
+                logger.info(f"Imported {module_name} in {elapsed:.2f}s")
+    return module
+
+def get_import_timings():
+    """Recorded import timings, slowest first"""
+    with _timings_lock:
+        return dict(sorted(import_timings.items(), key=lambda item: item[1], reverse=True))
+
+class LazyAttribute:
+    """
+    Stand-in for a class or function of a module that is imported on first use
+
+    Calling the stand-in (or reading an attribute from it) imports the module,
+    so module-level names such as LLMDocumentationEnhancer or
+    convert_markdown_to_html keep working at their call sites without paying
+    for the import at startup.
+    """
+
+    def __init__(self, module_name, attribute):
+        self._module_name = module_name
+        self._attribute = attribute
+        self._target = None
+
+    def resolve(self):
+        """Import the module (once) and return the real object"""
+        if self._target is None:
+            self._target = getattr(timed_import(self._module_name), self._attribute)
+        return self._target
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __getattr__(self, name):
+        # Not initialized yet (e.g. while copying): avoid recursing into resolve()
+        if name in ('_module_name', '_attribute', '_target'):
+            raise AttributeError(name)
+        return getattr(self.resolve(), name)
+
+    def __repr__(self):
+        state = 'loaded' if self._target is not None else 'not loaded'
+        return f"<LazyAttribute {self._module_name}.{self._attribute} ({state})>"
+
+def warm_up(tasks, delay=0.0, name='warm-up', background=True):
+    """
+    Run warm-up tasks in a daemon thread so the first request does not pay for them
+
+    Args:
+        tasks (list): Module names to import, or callables to run, in order
+        delay (float): Seconds to wait first, so the server starts accepting requests
+        name (str): Thread name
+        background (bool): Run in the calling thread instead, e.g. before forking workers
+
+    Returns:
+        threading.Thread: The started thread, or None when run in the calling thread
+    """
+    def run():
+        if delay:
+            time.sleep(delay)
+        start = time.perf_counter()
+        for task in tasks:
+            try:
+                if callable(task):
+                    task()
+                else:
+                    timed_import(task)
+            except Exception as e:
+                logger.warning(f"Warm-up of {getattr(task, '__name__', task)} failed: {str(e)}")
+        logger.info(f"Warm-up finished in {time.perf_counter() - start:.2f}s")
+
+    if not background:
+        run()
+        return None
+
+    thread = threading.Thread(target=run, name=name, daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,75 @@
+# llm_clients.py - Pooled LLM API clients, one set per worker process
+
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# (provider, api key, timeout) -> client
+_clients = {}
+_clients_lock = threading.Lock()
+_clients_pid = os.getpid()
+
+def _get_client(key, create):
+    global _clients_pid
+    with _clients_lock:
+        # Clients created before a fork share sockets with the parent: start over
+        if _clients_pid != os.getpid():
+            _clients.clear()
+            _clients_pid = os.getpid()
+        client = _clients.get(key)
+        if client is None:
+            client = create()
+            _clients[key] = client
+        return client
+
+def get_anthropic_client(api_key=None, timeout=600.0):
+    """
+    Get the shared Anthropic client for an API key
+
+    The client keeps its HTTP connections open, so jobs in the same process
+    reuse them instead of opening a new TLS connection per generator.
+    """
+    api_key = api_key or os.getenv('ANTHROPIC_API_KEY')
+
+    def create():
+        import anthropic
+        import httpx
+        return anthropic.Anthropic(api_key=api_key, http_client=httpx.Client(timeout=timeout))
+
+    return _get_client(('anthropic', api_key, timeout), create)
+
+def get_openai_client(api_key=None):
+    """Get the shared OpenAI client for an API key"""
+    api_key = api_key or os.getenv('OPENAI_API_KEY')
+
+    def create():
+        import openai
+        return openai.OpenAI(api_key=api_key)
+
+    return _get_client(('openai', api_key, None), create)
+
+def reset_clients():
+    """Forget all clients (e.g. in a freshly forked worker)"""
+    global _clients_pid
+    with _clients_lock:
+        _clients.clear()
+        _clients_pid = os.getpid()
+
+def warm_clients():
+    """Create clients for the configured API keys so the first job does not pay for it"""
+    warmed = []
+    if os.getenv('ANTHROPIC_API_KEY'):
+        try:
+            get_anthropic_client()
+            warmed.append('anthropic')
+        except Exception as e:
+            logger.warning(f"Could not create Anthropic client: {str(e)}")
+    if os.getenv('OPENAI_API_KEY'):
+        try:
+            get_openai_client()
+            warmed.append('openai')
+        except Exception as e:
+            logger.warning(f"Could not create OpenAI client: {str(e)}")
+    return warmed
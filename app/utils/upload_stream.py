@@ -0,0 +1,41 @@
+# upload_stream.py - Helpers for writing uploads to disk once, in bounded chunks
+
+import hashlib
+import os
+
+# Bytes read from the upload stream per write
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+def save_upload_stream(file_storage, file_path, chunk_size=UPLOAD_CHUNK_SIZE):
+    """
+    Write an uploaded file to disk in chunks while hashing it
+
+    Only one chunk is held in memory at a time, so a 100 MB upload costs a few MB
+    instead of several full in-memory copies.
+
+    Args:
+        file_storage: werkzeug FileStorage (or any object with a readable .stream or .read)
+        file_path (str): Destination path
+        chunk_size (int): Bytes per read
+
+    Returns:
+        tuple: (size in bytes, hex SHA-256 of the content)
+    """
+    stream = getattr(file_storage, 'stream', file_storage)
+    digest = hashlib.sha256()
+    size = 0
+
+    os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+    tmp_path = f"{file_path}.part"
+
+    with open(tmp_path, 'wb') as f:
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            f.write(chunk)
+            size += len(chunk)
+
+    os.replace(tmp_path, file_path)
+    return size, digest.hexdigest()
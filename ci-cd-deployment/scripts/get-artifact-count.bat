@@ -5,6 +5,9 @@ echo ========================================
 
 cd /d "%~dp0..\.."
 
+rem get_artifact_count.py shares the token cache of the BoomiToIS-API clients
+set "PYTHONPATH=%CD%\BoomiToIS-API;%PYTHONPATH%"
+
 if "%1"=="" (
     echo Usage: get-artifact-count.bat [options]
     echo.
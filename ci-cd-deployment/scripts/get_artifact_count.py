@@ -2,16 +2,24 @@
 """
 SAP BTP CPI Artifact Count Script
 Gets artifact count from SAP Integration Suite using OAuth authentication
+
+Uses the OAuth token cache and pooled sessions of the BoomiToIS-API deployment
+clients, so BoomiToIS-API must be on PYTHONPATH (get-artifact-count.bat sets it):
+    PYTHONPATH=BoomiToIS-API python ci-cd-deployment/scripts/get_artifact_count.py
 """
 
-import requests
-import base64
 import json
 import sys
-import os
+import logging
 from datetime import datetime
 import argparse
 
+from sap_token_cache import token_cache, authorized_request
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
 class SAPCPIArtifactCounter:
     """
     SAP CPI Artifact Counter using OAuth authentication
@@ -28,66 +36,36 @@ class SAPCPIArtifactCounter:
         self.access_token = None
         
     def get_access_token(self):
-        """Get OAuth access token"""
-        print("🔑 Getting OAuth access token...")
-        
-        # Create Basic Auth header
-        credentials = f"{self.client_id}:{self.client_secret}"
-        encoded_credentials = base64.b64encode(credentials.encode()).decode()
-        
-        headers = {
-            'Authorization': f'Basic {encoded_credentials}',
-            'Content-Type': 'application/x-www-form-urlencoded',
-            'Accept': 'application/json'
-        }
-        
-        data = {
-            'grant_type': 'client_credentials'
-        }
-        
+        """Get OAuth access token (reused from the token cache while still valid)"""
         try:
-            response = requests.post(self.oauth_url, headers=headers, data=data, timeout=30)
-            
-            if response.status_code == 200:
-                token_data = response.json()
-                self.access_token = token_data['access_token']
-                print(f"✅ OAuth token acquired successfully")
-                return self.access_token
-            else:
-                print(f"❌ OAuth token request failed: {response.status_code}")
-                print(f"Response: {response.text}")
-                return None
+            self.access_token = token_cache.get_token(self.oauth_url, self.client_id, self.client_secret)
+            logger.debug("OAuth access token ready")
+            return self.access_token
                 
-        except requests.exceptions.RequestException as e:
-            print(f"❌ OAuth request failed: {str(e)}")
+        except Exception as e:
+            logger.error(f"OAuth request failed: {str(e)}")
             return None
     
     def make_authenticated_request(self, url, method='GET'):
-        """Make authenticated request to SAP CPI"""
-        if not self.access_token:
-            if not self.get_access_token():
-                return None
-        
+        """Make authenticated request to SAP CPI, refreshing the token once on 401"""
         headers = {
-            'Authorization': f'Bearer {self.access_token}',
             'Accept': 'application/json',
             'Content-Type': 'application/json'
         }
         
         try:
-            response = requests.request(method, url, headers=headers, timeout=30)
-            
-            # If 401, try refreshing token once
-            if response.status_code == 401:
-                print("🔄 Token expired, refreshing...")
-                if self.get_access_token():
-                    headers['Authorization'] = f'Bearer {self.access_token}'
-                    response = requests.request(method, url, headers=headers, timeout=30)
-            
-            return response
+            return authorized_request(
+                method,
+                url,
+                self.oauth_url,
+                self.client_id,
+                self.client_secret,
+                headers=headers,
+                timeout=30
+            )
             
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Request failed: {str(e)}")
+        except Exception as e:
+            logger.error(f"Request failed: {str(e)}")
             return None
     
     def get_artifact_count(self, artifact_id, version='1.0.1'):